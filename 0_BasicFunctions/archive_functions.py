@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für das Ergebnisarchiv: Die Zeitreihen einer SWMM-Ergebnisdatei (.out) werden einmal in
+# ein spaltenorientiertes Archiv (Ordner) umgewandelt. Die Zeitschritte werden in Blöcke aufgeteilt,
+# pro Block wird eine komprimierte NPZ-Datei mit einem Array pro Objekttyp und Variable gespeichert
+# (Form: Zeitschritte x Objekte). Der Index ("index.json") enthält die Namen der Objekte, die
+# Variablen und die Zeitspanne der Blöcke, die Zeitachse wird in "times.npy" gespeichert. Beim Lesen
+# werden nur die Blöcke im gewünschten Zeitfenster und nur die gewünschte Variable geladen.
+#
+# Zusätzlich werden die Simulationen (Szenarien) in einem Register (JSON-Datei) mit den Pfaden zu den
+# SWMM-Dateien und zum Archiv erfasst, damit die Skripte in 5_RESULT die Szenarien nicht fest codieren.
+# -----------------------------------------------------------------------------
+"""archive_functions"""
+import os, json, datetime
+import numpy as np
+import out_functions as of
+
+_index_name = "index.json"
+_times_name = "times.npy"
+_archive_format = 1
+
+
+def _to_datetime64(days):
+    """Hilfsfunktion: SWMM-Datum (Tage seit 30.12.1899) in numpy datetime64 (Sekunden) umwandeln"""
+    seconds = np.round(np.asarray(days, dtype = float) * 86400).astype("int64")
+    return np.datetime64("1899-12-30T00:00:00", "s") + seconds.astype("timedelta64[s]")
+
+
+def _key(object_type, variable):
+    """Hilfsfunktion: Bezeichnung eines Arrays in der NPZ-Datei"""
+    return object_type + "__" + variable
+
+
+def archive_is_current(out_file, archive_dir):
+    """Prüfen ob das Archiv vorhanden ist und der .out-Datei entspricht (Grösse und Änderungszeit)"""
+    index_file = os.path.join(archive_dir, _index_name)
+    if not os.path.isfile(index_file):
+        return False
+    try:
+        with open(index_file, encoding = "utf-8") as f:
+            index = json.load(f)
+    except ValueError:
+        return False
+    stat = os.stat(out_file)
+    return (index.get("format") == _archive_format and index.get("source_size") == stat.st_size
+            and index.get("source_mtime") == stat.st_mtime_ns)
+
+
+def out_to_archive(out_file, archive_dir, block_periods = 1000, compress = True, overwrite = False):
+    """SWMM-Ergebnisdatei (.out) in ein Archiv umwandeln. Die .out-Datei wird dabei blockweise gelesen.
+
+    Required:
+        out_file -- Pfad zur .out-Datei
+        archive_dir -- Pfad zum Ordner des Archivs (wird erstellt)
+    Optional:
+        block_periods -- Anzahl Zeitschritte pro Block (NPZ-Datei)
+        compress -- Falls True werden die NPZ-Dateien komprimiert
+        overwrite -- Falls True wird ein aktuelles Archiv trotzdem neu erstellt
+
+    Return:
+        index -- Index des Archivs (siehe open_archive)
+    """
+    if not overwrite and archive_is_current(out_file, archive_dir):
+        return open_archive(archive_dir)
+    if not os.path.isdir(archive_dir):
+        os.makedirs(archive_dir)
+
+    header = of.read_out_header(out_file)
+    save = np.savez_compressed if compress else np.savez
+    chunks = []
+    times = []
+    start = 0
+    for nr, block in enumerate(of.iter_out_blocks(out_file, header, block_periods)):
+        arrays = {}
+        for object_type in of.OBJECT_TYPES + ["system"]:
+            values = block[object_type]
+            for ii, variable in enumerate(header["variables"][object_type]):
+                arrays[_key(object_type, variable)] = np.ascontiguousarray(values[..., ii])
+        file_name = f'chunk_{nr:05d}.npz'
+        save(os.path.join(archive_dir, file_name), **arrays)
+        block_times = _to_datetime64(block["date"])
+        times.append(block_times)
+        chunks.append({"file": file_name, "start": start, "n": len(block),
+                       "t0": str(block_times[0]), "t1": str(block_times[-1])})
+        start += len(block)
+    np.save(os.path.join(archive_dir, _times_name), np.concatenate(times) if times else np.array([], "datetime64[s]"))
+
+    stat = os.stat(out_file)
+    index = {"format": _archive_format, "source": os.path.abspath(out_file), "source_size": stat.st_size,
+             "source_mtime": stat.st_mtime_ns, "created": datetime.datetime.now().isoformat(timespec = "seconds"),
+             "flow_unit": header["flow_unit"], "start_date": header["start_date"].isoformat(),
+             "report_step": header["report_step"], "n_periods": start, "block_periods": block_periods,
+             "names": {object_type: header["names"][object_type] for object_type in of.OBJECT_TYPES},
+             "variables": header["variables"],
+             "properties": {object_type: {name: values.tolist() for name, values in properties.items()}
+                            for object_type, properties in header["properties"].items()},
+             "chunks": chunks}
+    with open(os.path.join(archive_dir, _index_name), "w", encoding = "utf-8") as f:
+        json.dump(index, f, ensure_ascii = False)
+    return index
+
+
+def open_archive(archive_dir):
+    """Index eines Archivs lesen
+
+    Return:
+        index -- Dictionary mit "names" {Objekttyp: Liste}, "variables" {Objekttyp: Liste}, "properties",
+                 "flow_unit", "start_date", "report_step", "n_periods" und "chunks" (Liste mit "file", "start",
+                 "n", "t0", "t1" pro Block)
+    """
+    with open(os.path.join(archive_dir, _index_name), encoding = "utf-8") as f:
+        return json.load(f)
+
+
+def read_archive(archive_dir, object_type, variable, names = None, start = None, end = None, index = None):
+    """Zeitreihen einer Variable aus dem Archiv lesen. Es werden nur die Blöcke im Zeitfenster gelesen.
+
+    Required:
+        archive_dir -- Pfad zum Ordner des Archivs
+        object_type -- "subcatchment", "node", "link" oder "system"
+        variable -- Bezeichnung der Variable (siehe out_functions.VARIABLES, z. B. "total_inflow")
+    Optional:
+        names -- Liste mit den Namen der Objekte (Default: alle Objekte, bei "system" nicht verwendet)
+        start -- Beginn vom Zeitfenster (datetime oder numpy datetime64)
+        end -- Ende vom Zeitfenster (datetime oder numpy datetime64)
+        index -- Index des Archivs (siehe open_archive), wird bei Bedarf gelesen
+
+    Return:
+        times -- numpy-Array (datetime64) mit den Zeitschritten
+        values -- numpy-Array (float32) der Form (Zeitschritte, Objekte) bzw. (Zeitschritte,) bei "system"
+    """
+    if index is None:
+        index = open_archive(archive_dir)
+    if variable not in index["variables"][object_type]:
+        raise ValueError(f'Variable "{variable}" ist für "{object_type}" im Archiv nicht vorhanden')
+    positions = None
+    if object_type != "system" and names is not None:
+        lookup = {name: ii for ii, name in enumerate(index["names"][object_type])}
+        missing = [name for name in names if name not in lookup]
+        if missing:
+            raise ValueError(f'Objekt "{missing[0]}" ist im Archiv nicht vorhanden')
+        positions = np.array([lookup[name] for name in names], dtype = int)
+    start = np.datetime64(start, "s") if start is not None else None
+    end = np.datetime64(end, "s") if end is not None else None
+
+    all_times = np.load(os.path.join(archive_dir, _times_name), mmap_mode = "r")
+    key = _key(object_type, variable)
+    times = []
+    values = []
+    for chunk in index["chunks"]:
+        if (start is not None and np.datetime64(chunk["t1"]) < start) or \
+           (end is not None and np.datetime64(chunk["t0"]) > end):
+            continue
+        chunk_times = np.asarray(all_times[chunk["start"]:chunk["start"] + chunk["n"]])
+        with np.load(os.path.join(archive_dir, chunk["file"])) as npz:
+            chunk_values = npz[key]
+        if positions is not None:
+            chunk_values = chunk_values[:, positions]
+        mask = np.ones(len(chunk_times), dtype = bool)
+        if start is not None:
+            mask &= chunk_times >= start
+        if end is not None:
+            mask &= chunk_times <= end
+        times.append(chunk_times[mask])
+        values.append(chunk_values[mask])
+    if not times:
+        n_objects = len(positions) if positions is not None else len(index["names"].get(object_type, []))
+        shape = (0,) if object_type == "system" else (0, n_objects)
+        return np.array([], dtype = "datetime64[s]"), np.zeros(shape, dtype = np.float32)
+    return np.concatenate(times), np.concatenate(values)
+
+
+def load_registry(registry_file):
+    """Register der Simulationen (Szenarien) lesen
+
+    Return:
+        registry -- Dictionary {Szenario: {"out_file", "rpt_file", "inp_file", "archive", ...}}
+                    (leer falls die Datei nicht vorhanden ist)
+    """
+    if not os.path.isfile(registry_file):
+        return {}
+    with open(registry_file, encoding = "utf-8") as f:
+        return json.load(f)
+
+
+def register_scenario(registry_file, scenario, **entries):
+    """Simulation (Szenario) im Register erfassen bzw. aktualisieren
+
+    Required:
+        registry_file -- Pfad zur JSON-Datei mit dem Register
+        scenario -- Bezeichnung der Simulation (z. B. "v1")
+    Optional:
+        entries -- Angaben zur Simulation, z. B. out_file, rpt_file, inp_file, archive, description
+    """
+    registry = load_registry(registry_file)
+    registry.setdefault(scenario, {}).update(entries)
+    registry[scenario]["updated"] = datetime.datetime.now().isoformat(timespec = "seconds")
+    with open(registry_file, "w", encoding = "utf-8") as f:
+        json.dump(registry, f, ensure_ascii = False, indent = 1)
+    return registry
+
+
+def get_scenarios(registry_file, scenarios = None, required = None):
+    """Simulationen (Szenarien) aus dem Register auswählen
+
+    Optional:
+        scenarios -- Liste mit Bezeichnungen (Default: alle Szenarien im Register)
+        required -- Angabe, die vorhanden sein muss (z. B. "archive"); andere Szenarien werden übersprungen
+
+    Return:
+        Dictionary {Szenario: Angaben}
+    """
+    registry = load_registry(registry_file)
+    if scenarios is None:
+        scenarios = list(registry)
+    selected = {}
+    for scenario in scenarios:
+        entry = registry.get(scenario)
+        if entry is None:
+            raise ValueError(f'Szenario "{scenario}" ist im Register "{registry_file}" nicht vorhanden')
+        if required and not entry.get(required):
+            continue
+        selected[scenario] = entry
+    return selected
+
+
+def scenario_file(registry_file, scenario, key, default = None):
+    """Pfad einer Datei (z. B. "rpt_file", "archive") eines Szenarios aus dem Register. Falls das Register oder
+    die Angabe nicht vorhanden ist, wird default zurückgegeben."""
+    entry = load_registry(registry_file).get(scenario, {})
+    return entry.get(key) or default
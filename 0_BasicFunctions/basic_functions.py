@@ -8,31 +8,75 @@
 # -----------------------------------------------------------------------------
 """basic_functions"""
 import sys
-import arcpy
+try:
+    import arcpy
+except ImportError:
+    # Ohne ArcGIS sind nur die Funktionen über storage_functions verfügbar (GeoPackage)
+    arcpy = None
 import logging_functions as lf
+import storage_functions as sf
 
 
-def append_text(in_fc, in_field, text, separator = ";"):
-    """ Text einem bestehenden Feld einer Feature-Klasse hinzufügen
+## Tags (Kennzeichnung von berechneten Werten im tag-Feld)
+def merge_tags(old, tags, separator = ";"):
+    """Tags dem Wert eines tag-Feldes hinzufügen. Bereits vorhandene Tags werden nicht wiederholt.
 
     Required:
-        in_fc -- Input Feature-Klasse oder Layer
-        in_field -- Input tag-Feld
-        text -- Text
+        old -- Bisheriger Wert des tag-Feldes (oder None)
+        tags -- Tag (Text) oder Liste mit Tags
     Optional:
-        separator -- Seperator mit welchem der neue Text hinzugefügt wird
+        separator -- Seperator mit welchem die Tags getrennt werden
+
+    Return:
+        Neuer Wert des tag-Feldes (unverändert, falls keine neuen Tags)
+    """
+    if not tags:
+        return old
+    if isinstance(tags, str):
+        tags = [tags]
+    parts = old.split(separator) if old else []
+    new_parts = [tag for tag in dict.fromkeys(tags) if tag and tag not in parts]
+    if not new_parts:
+        return old
+    return separator.join(parts + new_parts)
+
+
+def new_tag_buffer():
+    """Leeren Tag-Puffer erstellen. Der Puffer sammelt während eines Arbeitsschrittes die Tags pro Objekt
+    (z. B. OBJECTID oder Schacht-ID), damit diese zusammen mit den übrigen Attributen in einem einzigen
+    UpdateCursor-Durchgang geschrieben werden können (siehe apply_tags).
+    """
+    return {}
+
+
+def add_tag(buffer, key, tag):
+    """Tag für ein Objekt im Tag-Puffer vormerken (doppelte Tags werden ignoriert)
+
+    Required:
+        buffer -- Tag-Puffer (siehe new_tag_buffer)
+        key -- Schlüssel des Objekts (z. B. OBJECTID oder Schacht-ID)
+        tag -- Text für das tag-Feld
+    """
+    if not tag:
+        return
+    tags = buffer.setdefault(key, [])
+    if tag not in tags:
+        tags.append(tag)
+
+
+def apply_tags(buffer, key, old, separator = ";"):
+    """Vorgemerkte Tags eines Objekts mit dem bisherigen Wert des tag-Feldes zusammenführen. Für die
+    Verwendung innerhalb eines bestehenden UpdateCursors.
+
+    Return:
+        Neuer Wert des tag-Feldes
     """
-    expression_tag = "addTag(" + "!"+in_field+"!," + '"'+text+'"'+ ")"
-    codeblock = """def addTag(old, new):
-        if old:
-            return old + separator + new
-        else:
-            return new"""
-    arcpy.management.CalculateField(in_fc, in_field, expression_tag, "PYTHON3", codeblock)
+    return merge_tags(old, buffer.get(key, []), separator)
 
 
-def add_field(in_table, field_name, field_type, **kwargs):
-    """Feld zu einer Tabelle oder Feature-Klasse hinzufügen
+def add_field(in_table, field_name, field_type, field_length = None, field_alias = None):
+    """Feld zu einer Tabelle oder Feature-Klasse hinzufügen (falls noch nicht vorhanden). Mehrere Felder
+    sollten als Schema mit storage_functions.add_fields in einem Schritt hinzugefügt werden.
 
     Required:
         in_table -- Name der Tabelle oder Feature-Klasse
@@ -40,17 +84,55 @@ def add_field(in_table, field_name, field_type, **kwargs):
         field_type -- Feldtyp
 
     Optional:
-        **kwargs -- Zusätzliche Parameter für arcpy.management.AddField (siehe Dokumentation Esri)
+        field_length -- Feldlänge (Textfelder)
+        field_alias -- Alias des Feldes
     """
 
     # Feld hinzufügen
     try:
-        arcpy.management.AddField(in_table = in_table, field_name = field_name,
-                                field_type = field_type, **kwargs)
+        sf.add_fields(in_table, [[field_name, field_type, field_length, field_alias]])
     except Exception:
         e = sys.exc_info()[1]
         print(f'Fehler beim erstellen des Feldes "{field_name}": {e.args[0]}')
 
 
+def oid_where_clauses(oids, oid_field = "OBJECTID", batch_size = 1000):
+    """Where-Clauses für eine Liste von ObjectIDs in Batches erstellen, damit die SQL-Statements 
+    auch bei sehr vielen Objekten kurz bleiben.
 
+    Required:
+        oids -- Liste mit ObjectIDs
+    Optional:
+        oid_field -- Bezeichnung vom ObjectID-Feld (GeoPackage: "fid")
+        batch_size -- Maximale Anzahl ObjectIDs pro Where-Clause
+
+    Return:
+        Generator mit Where-Clauses ('"OBJECTID" IN (1,2,...)')
+    """
+    oids = sorted(set(oids))
+    for ii in range(0, len(oids), batch_size):
+        batch = oids[ii:ii + batch_size]
+        yield '"' + oid_field + '"' + " IN (" + ",".join(str(int(oid)) for oid in batch) + ")"
+
+
+def delete_rows(in_table, oids, oid_field = "OBJECTID", batch_size = 1000):
+    """Zeilen einer Tabelle oder Feature-Klasse anhand der ObjectIDs in Batches löschen.
+
+    Required:
+        in_table -- Name der Tabelle oder Feature-Klasse
+        oids -- Liste mit ObjectIDs der zu löschenden Zeilen
+    Optional:
+        oid_field -- Bezeichnung vom ObjectID-Feld (GeoPackage: "fid")
+        batch_size -- Maximale Anzahl ObjectIDs pro Where-Clause
+
+    Return:
+        cnt -- Anzahl gelöschte Zeilen
+    """
+    cnt = 0
+    for where in oid_where_clauses(oids, oid_field, batch_size):
+        with sf.update_cursor(in_table, ["OID@"], where) as dcursor:
+            for drow in dcursor:
+                dcursor.deleteRow()
+                cnt += 1
+    return cnt
 
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für Änderungssätze (change sets): Änderungen an Feature-Klassen werden zunächst
+# im Speicher gesammelt (Feldänderungen pro Objekt, hinzugefügte und gelöschte Objekte) statt
+# direkt in die Geodatabase geschrieben. Ein Änderungssatz kann als JSON-Datei gespeichert,
+# zwischen zwei Parametersätzen verglichen und anschliessend in einer einzigen Edit-Session
+# (Transaktion) angewendet werden. Das Anwenden erfolgt über storage_functions (arcpy-Workspace oder
+# GeoPackage).
+# -----------------------------------------------------------------------------
+"""changeset_functions"""
+import json, datetime
+
+
+def new_change_set(settings = None):
+    """Leeren Änderungssatz erstellen
+
+    Optional:
+        settings -- Dictionary mit den verwendeten Parametern (wird im Änderungssatz gespeichert)
+
+    Return:
+        change_set -- Dictionary {"created": Zeitpunkt, "settings": Parameter, "tables": {}}
+    """
+    return {"created": datetime.datetime.now().isoformat(timespec = "seconds"),
+            "settings": settings or {}, "tables": {}}
+
+
+def _table(change_set, table, id_field):
+    """Hilfsfunktion: Eintrag einer Tabelle im Änderungssatz zurückgeben (wird bei Bedarf erstellt)"""
+    return change_set["tables"].setdefault(table, {"id_field": id_field, "new_fields": [], "updates": {},
+                                                   "added": [], "removed": []})
+
+
+def add_field(change_set, table, id_field, field_name, field_type, field_length = None):
+    """Neues Feld im Änderungssatz vormerken (wird beim Anwenden erstellt, falls nicht vorhanden)"""
+    new_fields = _table(change_set, table, id_field)["new_fields"]
+    if field_name not in [field[0] for field in new_fields]:
+        new_fields.append([field_name, field_type, field_length])
+
+
+def set_value(change_set, table, id_field, oid, object_id, field_name, old_value, new_value):
+    """Feldänderung eines bestehenden Objektes im Änderungssatz speichern. Unveränderte Werte werden nicht
+    gespeichert.
+
+    Required:
+        change_set -- Änderungssatz (siehe new_change_set)
+        table -- Name der Feature-Klasse
+        id_field -- Bezeichnung vom ID-Feld
+        oid -- ObjectID des Objektes
+        object_id -- ID des Objektes (Wert von id_field)
+        field_name -- Bezeichnung vom Feld
+        old_value -- Ursprünglicher Wert
+        new_value -- Neuer Wert
+    """
+    if old_value == new_value:
+        return
+    updates = _table(change_set, table, id_field)["updates"]
+    updates.setdefault(str(oid), {"id": object_id, "fields": {}})["fields"][field_name] = [old_value, new_value]
+
+
+def add_row(change_set, table, id_field, object_id, fields, shape = None):
+    """Neues Objekt im Änderungssatz speichern
+
+    Required:
+        object_id -- ID des Objektes (Wert von id_field)
+        fields -- Dictionary mit den Feldwerten
+    Optional:
+        shape -- Geometrie als Esri-JSON (arcpy Geometry.JSON)
+    """
+    _table(change_set, table, id_field)["added"].append({"id": object_id, "fields": fields, "shape": shape})
+
+
+def remove_row(change_set, table, id_field, oid, object_id):
+    """Löschen eines bestehenden Objektes im Änderungssatz speichern. Allfällige Feldänderungen des
+    Objektes werden verworfen."""
+    entry = _table(change_set, table, id_field)
+    entry["updates"].pop(str(oid), None)
+    entry["removed"].append({"oid": oid, "id": object_id})
+
+
+def summarize(change_set):
+    """Anzahl Änderungen pro Tabelle zusammenfassen
+
+    Return:
+        Dictionary {Tabelle: {"updated": Anzahl Objekte, "values": Anzahl Feldwerte, "added": Anzahl, "removed": Anzahl}}
+    """
+    summary = {}
+    for table, entry in change_set["tables"].items():
+        summary[table] = {"updated": len(entry["updates"]),
+                          "values": sum(len(update["fields"]) for update in entry["updates"].values()),
+                          "added": len(entry["added"]), "removed": len(entry["removed"])}
+    return summary
+
+
+def _final_values(entry):
+    """Hilfsfunktion: Neue Werte pro Objekt-ID (bestehende und hinzugefügte Objekte)"""
+    values = {}
+    for update in entry["updates"].values():
+        values.setdefault(update["id"], {}).update({field: pair[1] for field, pair in update["fields"].items()})
+    for row in entry["added"]:
+        values.setdefault(row["id"], {}).update(row["fields"])
+    for row in entry["removed"]:
+        values[row["id"]] = None
+    return values
+
+
+def diff_change_sets(change_set_a, change_set_b, tolerance = 0.0):
+    """Zwei Änderungssätze (z. B. mit unterschiedlichen Parametern berechnet) vergleichen. Die Objekte
+    werden über die ID (id_field) zugeordnet.
+
+    Optional:
+        tolerance -- Zahlenwerte mit einer kleineren Differenz werden als gleich betrachtet
+
+    Return:
+        differences -- Liste mit Tupeln (Tabelle, Objekt-ID, Feld, Wert A, Wert B). Bei Objekten, die nur in
+                       einem Änderungssatz gelöscht werden, wird als Feld "<removed>" angegeben.
+    """
+    differences = []
+    tables = list(change_set_a["tables"]) + [t for t in change_set_b["tables"] if t not in change_set_a["tables"]]
+    for table in tables:
+        values_a = _final_values(change_set_a["tables"].get(table, {"updates": {}, "added": [], "removed": []}))
+        values_b = _final_values(change_set_b["tables"].get(table, {"updates": {}, "added": [], "removed": []}))
+        for object_id in list(values_a) + [oid for oid in values_b if oid not in values_a]:
+            fields_a = values_a.get(object_id, {})
+            fields_b = values_b.get(object_id, {})
+            if fields_a is None or fields_b is None:
+                if fields_a is not fields_b:
+                    differences.append((table, object_id, "<removed>", fields_a is None, fields_b is None))
+                continue
+            for field in list(fields_a) + [f for f in fields_b if f not in fields_a]:
+                value_a = fields_a.get(field)
+                value_b = fields_b.get(field)
+                if isinstance(value_a, (int, float)) and isinstance(value_b, (int, float)):
+                    if abs(value_a - value_b) <= tolerance:
+                        continue
+                elif value_a == value_b:
+                    continue
+                differences.append((table, object_id, field, value_a, value_b))
+    return differences
+
+
+def _encode(obj):
+    """Hilfsfunktion: Datumswerte für JSON kodieren"""
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return {"__datetime__": obj.isoformat()}
+    raise TypeError(f'Objekt vom Typ {type(obj).__name__} kann nicht gespeichert werden')
+
+
+def _decode(obj):
+    """Hilfsfunktion: Datumswerte aus JSON dekodieren"""
+    if "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def save_change_set(change_set, out_file):
+    """Änderungssatz als JSON-Datei speichern"""
+    with open(out_file, "w", encoding = "utf-8") as f:
+        json.dump(change_set, f, ensure_ascii = False, indent = 1, default = _encode)
+
+
+def load_change_set(in_file):
+    """Änderungssatz aus einer JSON-Datei lesen"""
+    with open(in_file, encoding = "utf-8") as f:
+        return json.load(f, object_hook = _decode)
+
+
+def _check_value(table, oid, field, expected, value):
+    """Hilfsfunktion: Wert eines Objektes mit dem Wert im Änderungssatz vergleichen (ValueError bei Abweichung)"""
+    if value != expected:
+        raise ValueError(f'Änderungssatz passt nicht zu "{table}": ObjectID {oid}, Feld "{field}" ist {value!r} '
+                         f'statt {expected!r}')
+
+
+def apply_change_set(change_set, workspace, logger = None):
+    """Änderungssatz in einer einzigen Edit-Session (Transaktion) auf die Feature-Klassen anwenden.
+    Neue Felder werden vorgängig erstellt. Pro Feature-Klasse werden alle Änderungen und Löschungen mit
+    einem UpdateCursor und alle neuen Objekte mit einem InsertCursor geschrieben. Pro betroffenem Objekt wird
+    geprüft, ob die ID und die ursprünglichen Werte noch mit dem Änderungssatz übereinstimmen (z. B. nicht nach
+    einem erneuten Import mit neuen ObjectIDs angewendet wird). Tritt ein Fehler oder eine Abweichung auf,
+    werden alle Änderungen verworfen (ValueError).
+
+    Required:
+        change_set -- Änderungssatz (siehe new_change_set)
+        workspace -- Pfad zum Workspace (.gdb oder .gpkg) mit den Feature-Klassen
+
+    Optional:
+        logger -- Logger für die Ausgabe von Meldungen
+
+    Return:
+        summary -- Anzahl angewendete Änderungen (siehe summarize)
+    """
+    import storage_functions as sf
+
+    # Neue Felder erstellen (Schemaänderungen sind innerhalb einer Edit-Session nicht möglich)
+    for table, entry in change_set["tables"].items():
+        added = sf.add_fields(table, entry["new_fields"])
+        if logger:
+            for field_name in added:
+                logger.info(f'Feld "{field_name}" in "{table}" erstellen')
+
+    with sf.transaction(workspace):
+        for table, entry in change_set["tables"].items():
+            id_field = entry["id_field"]
+            updates = entry["updates"]
+            removed = {str(row["oid"]): row["id"] for row in entry["removed"]}
+            fields = [id_field]
+            for update in updates.values():
+                for field in update["fields"]:
+                    if field not in fields:
+                        fields.append(field)
+            if updates or removed:
+                if logger:
+                    logger.info(f'{len(updates)} Objekte in "{table}" aktualisieren und {len(removed)} löschen')
+                found = set()
+                with sf.update_cursor(table, ["OID@"] + fields) as ucursor:
+                    for urow in ucursor:
+                        key = str(urow[0])
+                        if key in removed:
+                            _check_value(table, key, id_field, removed[key], urow[1])
+                            found.add(key)
+                            ucursor.deleteRow()
+                        elif key in updates:
+                            _check_value(table, key, id_field, updates[key]["id"], urow[1])
+                            for field, pair in updates[key]["fields"].items():
+                                _check_value(table, key, field, pair[0], urow[fields.index(field) + 1])
+                                urow[fields.index(field) + 1] = pair[1]
+                            found.add(key)
+                            ucursor.updateRow(urow)
+                missing = sorted((set(updates) | set(removed)) - found, key = int)
+                if missing:
+                    raise ValueError(f'Änderungssatz passt nicht zu "{table}": ObjectIDs {", ".join(missing[:10])} '
+                                     f'nicht gefunden')
+
+            if entry["added"]:
+                if logger:
+                    logger.info(f'{len(entry["added"])} Objekte in "{table}" hinzufügen')
+                add_fields = []
+                for row in entry["added"]:
+                    for field in row["fields"]:
+                        if field not in add_fields:
+                            add_fields.append(field)
+                with sf.insert_cursor(table, add_fields + ["SHAPE@"]) as icursor:
+                    for row in entry["added"]:
+                        shape = sf.as_shape(row["shape"], table) if row["shape"] else None
+                        icursor.insertRow([row["fields"].get(field) for field in add_fields] + [shape])
+
+    return summarize(change_set)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Checkpoints für lange laufende Skripte: Jeder abgeschlossene Arbeitsschritt (z. B. ein Raster oder das
+# Ergebnis einer Verschneidung) wird mit einem Fingerabdruck seiner Eingaben in einer JSON-Datei im
+# Logfolder vermerkt. Bei Schleifen über viele Objekte (Teileinzugsgebiete, Einlaufschächte) werden die
+# erledigten Objekte in Batches vermerkt. Der Fingerabdruck eines Arbeitsschrittes enthält den Fingerabdruck
+# des vorherigen Schrittes, ein Checkpoint ist deshalb nur gültig, solange alle vorgelagerten Schritte mit
+# denselben Eingaben berechnet wurden. Wird ein Skript mit "--resume" erneut gestartet, werden die gültigen
+# Arbeitsschritte übersprungen und die Schleifen beim letzten vermerkten Batch fortgesetzt. Wird das Skript von
+# run_pipeline gestartet, ist der Fingerabdruck der vorgelagerten Stufen ("--upstream") Teil des Fingerabdrucks:
+# Wurde eine vorgelagerte Stufe (z. B. sia2gisswmm) seither erneut ausgeführt, wird neu begonnen.
+# Die Datei wird jeweils vollständig in eine temporäre Datei geschrieben und anschliessend ersetzt, damit
+# bei einem Abbruch keine halb geschriebene Checkpoint-Datei zurückbleibt.
+# -----------------------------------------------------------------------------
+"""checkpoint_functions"""
+import os, sys, json, hashlib, datetime
+import pipeline_functions as pf
+import storage_functions as sf
+
+# Anzahl Objekte (z. B. Teileinzugsgebiete oder Einlaufschächte), nach denen ein Checkpoint gespeichert wird
+DEFAULT_BATCH_SIZE = 200
+
+
+def resume_requested(argv = None):
+    """Prüfen ob das Skript mit dem Parameter "--resume" gestartet wurde"""
+    return "--resume" in (argv if argv is not None else sys.argv)[1:]
+
+
+def upstream_requested(argv = None):
+    """Fingerabdruck der vorgelagerten Stufen (Parameter "--upstream <Fingerabdruck>", siehe
+    pipeline_functions.run_pipeline), None falls nicht angegeben"""
+    argv = list(argv if argv is not None else sys.argv)[1:]
+    if "--upstream" in argv:
+        index = argv.index("--upstream")
+        if index + 1 < len(argv):
+            return argv[index + 1]
+    return None
+
+
+def checkpoint_file(log_folder, script, sim_nr):
+    """Pfad zur Checkpoint-Datei eines Skripts ("checkpoint_<Skript>_<sim_nr>.json" im Logfolder)"""
+    return os.path.join(log_folder, 'checkpoint_' + script + '_' + sim_nr + '.json')
+
+
+def fingerprint_rows(dataset, field_names):
+    """Fingerabdruck (SHA-256) der Zeilen einer Tabelle oder Feature-Klasse, z. B. der Schächte
+
+    Required:
+        dataset -- Tabelle oder Feature-Klasse
+        field_names -- Liste mit den Feldern (erstes Feld für die Sortierung, z. B. "OID@")
+    """
+    digest = hashlib.sha256()
+    with sf.search_cursor(dataset, field_names) as cursor:
+        rows = sorted((tuple(row) for row in cursor), key = lambda row: str(row[0]))
+    for row in rows:
+        digest.update((repr(row) + "\n").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _save(checkpoint):
+    """Hilfsfunktion: Checkpoint-Datei über eine temporäre Datei ersetzen"""
+    temp_file = checkpoint["file"] + ".tmp"
+    with open(temp_file, "w", encoding = "utf-8") as f:
+        json.dump({"fingerprint": checkpoint["fingerprint"], "upstream_stages": checkpoint["upstream_stages"],
+                   "steps": checkpoint["steps"]}, f, ensure_ascii = False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, checkpoint["file"])
+
+
+def open_checkpoint(file, inputs = None, paths = None, resume = False, upstream = None):
+    """Checkpoint-Datei öffnen. Ohne "resume" oder bei veränderten Eingaben des Skripts wird neu begonnen.
+
+    Required:
+        file -- Pfad zur Checkpoint-Datei (siehe checkpoint_file)
+    Optional:
+        inputs -- Eingaben des Skripts (JSON-Wert, z. B. Parameter der JSON-Datei)
+        paths -- Liste mit Pfaden zu externen Dateien oder Workspaces (siehe pipeline_functions.fingerprint_path)
+        resume -- Falls True werden die gültigen Checkpoints eines vorherigen Laufs übernommen
+        upstream -- Fingerabdruck der vorgelagerten Stufen (siehe upstream_requested)
+
+    Return:
+        checkpoint -- Dictionary mit "file", "fingerprint", "steps", "resumed" (True, falls Checkpoints
+                      eines vorherigen Laufs übernommen wurden) und "discarded" (True, falls ein vorhandener
+                      Checkpoint wegen veränderter Eingaben oder vorgelagerter Stufen verworfen wurde)
+    """
+    fingerprint = pf.fingerprint_value({"inputs": inputs, "upstream_stages": upstream,
+                                        "paths": {path: pf.fingerprint_path(path) for path in paths or [] if path}})
+    steps = {}
+    discarded = False
+    if resume and os.path.isfile(file):
+        try:
+            with open(file, encoding = "utf-8") as f:
+                data = json.load(f)
+        except ValueError:
+            data = {}
+        if data.get("fingerprint") == fingerprint:
+            steps = data.get("steps", {})
+        else:
+            discarded = True
+    checkpoint = {"file": file, "fingerprint": fingerprint, "upstream_stages": upstream, "steps": steps,
+                  "resumed": bool(steps), "discarded": discarded, "upstream": fingerprint, "pending": {}}
+    _save(checkpoint)
+    return checkpoint
+
+
+def _step_fingerprint(checkpoint, name, inputs):
+    """Hilfsfunktion: Fingerabdruck eines Arbeitsschrittes (Name, Eingaben und vorheriger Schritt)"""
+    return pf.fingerprint_value({"name": name, "inputs": inputs, "upstream": checkpoint["upstream"]})
+
+
+def step_done(checkpoint, name, outputs = None, inputs = None):
+    """Prüfen ob ein Arbeitsschritt bereits mit denselben Eingaben abgeschlossen wurde und die Ausgaben noch
+    vorhanden sind. Ist dies nicht der Fall, muss der Schritt ausgeführt und mit mark_done vermerkt werden.
+
+    Required:
+        checkpoint -- Checkpoint (siehe open_checkpoint), bei None wird immer False zurückgegeben
+        name -- Bezeichnung des Arbeitsschrittes
+    Optional:
+        outputs -- Liste mit den Ausgaben des Schrittes (Datensätze, die vorhanden sein müssen)
+        inputs -- Zusätzliche Eingaben des Schrittes (JSON-Wert)
+    """
+    if checkpoint is None:
+        return False
+    fingerprint = _step_fingerprint(checkpoint, name, inputs)
+    checkpoint["pending"][name] = (fingerprint, list(outputs or []))
+    step = checkpoint["steps"].get(name)
+    if step and step["fingerprint"] == fingerprint and step.get("complete") and \
+       all(sf.exists(output) for output in step.get("outputs", [])):
+        checkpoint["upstream"] = fingerprint
+        return True
+    return False
+
+
+def mark_done(checkpoint, name):
+    """Arbeitsschritt als abgeschlossen vermerken (nach step_done bzw. batch_keys)"""
+    if checkpoint is None:
+        return
+    fingerprint, outputs = checkpoint["pending"].pop(name)
+    step = checkpoint["steps"].get(name, {})
+    keys = step.get("keys", []) + step.get("buffer", []) if step.get("fingerprint") == fingerprint else []
+    checkpoint["steps"][name] = {"fingerprint": fingerprint, "complete": True, "outputs": outputs, "keys": keys,
+                                 "finished": datetime.datetime.now().isoformat(timespec = "seconds")}
+    checkpoint["upstream"] = fingerprint
+    _save(checkpoint)
+
+
+def batch_keys(checkpoint, name, inputs = None):
+    """Bereits erledigte Objekte eines Arbeitsschrittes, der in Batches vermerkt wird
+
+    Required:
+        checkpoint -- Checkpoint (siehe open_checkpoint), bei None wird eine leere Menge zurückgegeben
+        name -- Bezeichnung des Arbeitsschrittes
+    Optional:
+        inputs -- Zusätzliche Eingaben des Schrittes (JSON-Wert)
+
+    Return:
+        Menge mit den Schlüsseln der erledigten Objekte (leer, falls kein gültiger Checkpoint vorhanden ist)
+    """
+    if checkpoint is None:
+        return set()
+    fingerprint = _step_fingerprint(checkpoint, name, inputs)
+    checkpoint["pending"][name] = (fingerprint, [])
+    step = checkpoint["steps"].get(name)
+    if step and step["fingerprint"] == fingerprint:
+        return set(step.get("keys", []))
+    checkpoint["steps"][name] = {"fingerprint": fingerprint, "complete": False, "keys": []}
+    return set()
+
+
+def add_batch(checkpoint, name, keys):
+    """Objekte als erledigt vermerken und Checkpoint sofort speichern (z. B. nachdem ein Batch mit einem
+    Insert-Cursor geschrieben wurde)"""
+    if checkpoint is None:
+        return
+    step = checkpoint["steps"][name]
+    step["keys"] = step["keys"] + step.pop("buffer", []) + list(keys)
+    _save(checkpoint)
+
+
+def add_key(checkpoint, name, key, batch_size = DEFAULT_BATCH_SIZE):
+    """Objekt als erledigt vormerken. Der Checkpoint wird jeweils nach "batch_size" Objekten gespeichert."""
+    if checkpoint is None:
+        return
+    buffer = checkpoint["steps"][name].setdefault("buffer", [])
+    buffer.append(key)
+    if len(buffer) >= batch_size:
+        add_batch(checkpoint, name, [])
+
+
+def close_checkpoint(checkpoint):
+    """Checkpoint-Datei nach einem erfolgreichen Lauf löschen"""
+    if checkpoint is not None and os.path.isfile(checkpoint["file"]):
+        os.remove(checkpoint["file"])
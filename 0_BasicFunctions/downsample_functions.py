@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für das Ausdünnen (Downsampling) von Zeitreihen vor dem Plotten. Lange Zeitreihen
+# (z. B. Berichtsintervall 1 Minute über mehrere Tage) werden auf etwa so viele Punkte reduziert,
+# wie die Abbildung Pixel breit ist. Die Spitzen (Maximum und Minimum) und deren Zeitpunkt bleiben
+# dabei erhalten.
+#  - "minmax": Pro Intervall (Pixel) werden der kleinste und der grösste Wert behalten (vektorisiert).
+#  - "lttb": Largest-Triangle-Three-Buckets (Steinarsson, 2013), behält die visuell wichtigsten Punkte.
+# -----------------------------------------------------------------------------
+"""downsample_functions"""
+import numpy as np
+
+
+def _as_float(x):
+    """Hilfsfunktion: x-Werte (auch datetime64) in Gleitkommazahlen umwandeln"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[s]").astype("int64").astype(float)
+    return x.astype(float)
+
+
+def minmax_indices(y, n_buckets):
+    """Indizes der Punkte mit dem kleinsten und grössten Wert pro Intervall
+
+    Required:
+        y -- numpy-Array mit den Werten
+        n_buckets -- Anzahl Intervalle (z. B. Breite der Abbildung in Pixel)
+
+    Return:
+        indices -- sortiertes numpy-Array mit den Indizes (erster und letzter Punkt sind immer enthalten)
+    """
+    y = np.asarray(y, dtype = float)
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = int(np.ceil(n / n_buckets))
+    n_buckets = int(np.ceil(n / size))
+    # Auf ganze Intervalle auffüllen (NaN wird bei min/max ignoriert)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(padded).all(axis = 1)
+    offsets = np.arange(n_buckets) * size
+    filled_min = np.where(np.isnan(padded), np.inf, padded)
+    filled_max = np.where(np.isnan(padded), -np.inf, padded)
+    i_min = filled_min.argmin(axis = 1) + offsets
+    i_max = filled_max.argmax(axis = 1) + offsets
+    indices = np.concatenate([i_min[valid], i_max[valid], [0, n - 1]])
+    return np.unique(indices)
+
+
+def lttb_indices(x, y, n_out):
+    """Indizes der Punkte gemäss Largest-Triangle-Three-Buckets
+
+    Required:
+        x -- numpy-Array mit den x-Werten (Zahlen oder datetime64)
+        y -- numpy-Array mit den Werten
+        n_out -- Anzahl Punkte nach dem Ausdünnen
+
+    Return:
+        indices -- sortiertes numpy-Array mit den Indizes
+    """
+    x = _as_float(x)
+    y = np.nan_to_num(np.asarray(y, dtype = float))
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # Grenzen der Intervalle (ohne ersten und letzten Punkt)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype = int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for ii in range(n_out - 2):
+        start, end = edges[ii], edges[ii + 1]
+        # Mittelwert des nächsten Intervalls (beim letzten Intervall der letzte Punkt)
+        if ii + 2 < len(edges):
+            next_x = x[end:edges[ii + 2]].mean()
+            next_y = y[end:edges[ii + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        # Fläche der Dreiecke (vorheriger Punkt, Kandidat, Mittelwert nächstes Intervall) vektorisiert
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        indices[ii + 1] = previous
+    return indices
+
+
+def downsample(x, y, max_points, method = "minmax"):
+    """Zeitreihe ausdünnen. Das globale Maximum und Minimum bleiben immer erhalten.
+
+    Required:
+        x -- numpy-Array mit den x-Werten (Zahlen oder datetime64)
+        y -- numpy-Array mit den Werten
+        max_points -- Anzahl Punkte nach dem Ausdünnen (bei "minmax" zwei Punkte pro Intervall, zusätzlich
+                      können der erste und letzte Punkt sowie Maximum und Minimum hinzukommen)
+    Optional:
+        method -- "minmax" oder "lttb"
+
+    Return:
+        x_out -- ausgedünnte x-Werte
+        y_out -- ausgedünnte Werte
+        info -- Dictionary {"n_in": Anzahl Punkte vorher, "n_out": Anzahl Punkte nachher}
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(y)
+    if max_points is None or n <= max_points:
+        return x, y, {"n_in": n, "n_out": n}
+    if method == "minmax":
+        indices = minmax_indices(y, max(1, max_points // 2))
+    elif method == "lttb":
+        indices = lttb_indices(x, y, max_points)
+    else:
+        raise ValueError(f'Unbekannte Methode "{method}" (erlaubt: "minmax" oder "lttb")')
+    finite = np.isfinite(y.astype(float))
+    if finite.any():
+        extremes = np.flatnonzero(finite)[[y[finite].argmax(), y[finite].argmin()]]
+        indices = np.union1d(indices, extremes)
+    return x[indices], y[indices], {"n_in": n, "n_out": len(indices)}
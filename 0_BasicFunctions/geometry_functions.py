@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Geometrien ohne arcpy für den GeoPackage/SQLite-Speicher (siehe storage_functions.py): Punkte, Linien
+# und Polygone (2D) mit den Eigenschaften und Methoden der arcpy-Geometrien, die in den Skripten verwendet
+# werden (type, length, area, firstPoint, lastPoint, centroid, extent, JSON, distanceTo,
+# queryPointAndDistance, segmentAlongLine). Dadurch laufen z. B. die Topologie und der Änderungssatz in
+# gisswmm_upd.py unverändert mit beiden Speichern. Zusätzlich werden Geometrien als WKB, WKT und
+# GeoPackage-Binary (GPB) gelesen und geschrieben.
+# -----------------------------------------------------------------------------
+"""geometry_functions"""
+import math, json, struct
+from collections import namedtuple
+
+# Punkt bzw. Ausdehnung mit den Attributnamen von arcpy.Point und arcpy.Extent
+Point = namedtuple("Point", ["X", "Y"])
+Extent = namedtuple("Extent", ["XMin", "YMin", "XMax", "YMax"])
+
+# WKB-Geometrietypen
+_wkb_types = {1: "point", 2: "polyline", 3: "polygon", 4: "multipoint", 5: "polyline", 6: "polygon"}
+# Grösse der Ausdehnung im GPB-Header (Indikator -> Anzahl Bytes)
+_envelope_sizes = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+
+class Geometry:
+    """Geometrie (Punkt, Multipunkt, Linie oder Polygon) mit den wichtigsten Eigenschaften von arcpy.Geometry
+
+    Required:
+        geometry_type -- "point", "multipoint", "polyline" oder "polygon"
+        parts -- Liste mit Teilen, ein Teil ist eine Liste mit Koordinaten (x, y). Bei Polygonen sind die Teile
+                 die Ringe (geschlossen, erster Punkt = letzter Punkt).
+    Optional:
+        srs_id -- ID des Koordinatensystems (z. B. 2056)
+    """
+
+    def __init__(self, geometry_type, parts, srs_id = None):
+        self.type = geometry_type
+        self.parts = [[(float(x), float(y)) for x, y in part] for part in parts]
+        self.srs_id = srs_id
+
+    def __repr__(self):
+        return f'Geometry({self.type!r}, {self.pointCount} Punkte)'
+
+    def __eq__(self, other):
+        return isinstance(other, Geometry) and self.type == other.type and self.parts == other.parts
+
+    def __iter__(self):
+        """Teile als Listen mit Punkten (wie die Iteration über arcpy.Geometry)"""
+        return iter([[Point(*point) for point in part] for part in self.parts])
+
+    @property
+    def partCount(self):
+        return len(self.parts)
+
+    @property
+    def pointCount(self):
+        return sum(len(part) for part in self.parts)
+
+    @property
+    def firstPoint(self):
+        return Point(*self.parts[0][0]) if self.parts and self.parts[0] else None
+
+    @property
+    def lastPoint(self):
+        return Point(*self.parts[-1][-1]) if self.parts and self.parts[-1] else None
+
+    @property
+    def length(self):
+        """Länge der Linie bzw. Umfang des Polygons"""
+        if self.type not in ("polyline", "polygon"):
+            return 0.0
+        return sum(math.hypot(x2 - x1, y2 - y1) for part in self.parts for (x1, y1), (x2, y2) in zip(part, part[1:]))
+
+    @property
+    def area(self):
+        """Fläche des Polygons (Löcher mit umgekehrter Orientierung werden abgezogen)"""
+        if self.type != "polygon":
+            return 0.0
+        return abs(sum(_signed_area(ring) for ring in self.parts))
+
+    @property
+    def extent(self):
+        points = [point for part in self.parts for point in part]
+        if not points:
+            return None
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        return Extent(min(xs), min(ys), max(xs), max(ys))
+
+    @property
+    def centroid(self):
+        """Schwerpunkt (Punkte: Mittelwert, Linien: Mittelpunkte der Segmente gewichtet mit der Länge,
+        Polygone: Flächenschwerpunkt)"""
+        if not self.parts:
+            return None
+        if self.type == "polygon":
+            area = cx = cy = 0.0
+            for ring in self.parts:
+                for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+                    cross = x1 * y2 - x2 * y1
+                    area += cross
+                    cx += (x1 + x2) * cross
+                    cy += (y1 + y2) * cross
+            if area:
+                return Point(cx / (3 * area), cy / (3 * area))
+        if self.type == "polyline" and self.length > 0:
+            cx = cy = 0.0
+            for part in self.parts:
+                for (x1, y1), (x2, y2) in zip(part, part[1:]):
+                    weight = math.hypot(x2 - x1, y2 - y1)
+                    cx += (x1 + x2) / 2 * weight
+                    cy += (y1 + y2) / 2 * weight
+            return Point(cx / self.length, cy / self.length)
+        points = [point for part in self.parts for point in part]
+        return Point(sum(point[0] for point in points) / len(points), sum(point[1] for point in points) / len(points))
+
+    @property
+    def JSON(self):
+        """Geometrie als Esri-JSON (wie arcpy.Geometry.JSON)"""
+        spatial_reference = {"spatialReference": {"wkid": self.srs_id}} if self.srs_id else {}
+        if self.type == "point":
+            x, y = self.parts[0][0] if self.parts else (None, None)
+            return json.dumps({"x": x, "y": y, **spatial_reference})
+        if self.type == "multipoint":
+            return json.dumps({"points": [list(point) for part in self.parts for point in part], **spatial_reference})
+        key = "paths" if self.type == "polyline" else "rings"
+        return json.dumps({key: [[list(point) for point in part] for part in self.parts], **spatial_reference})
+
+    @property
+    def WKT(self):
+        return to_wkt(self)
+
+    @property
+    def WKB(self):
+        return to_wkb(self)
+
+    def _segments(self):
+        """Hilfsmethode: Alle Segmente ((x1, y1), (x2, y2)) der Geometrie"""
+        if self.type in ("point", "multipoint"):
+            return [(point, point) for part in self.parts for point in part]
+        return [(p1, p2) for part in self.parts for p1, p2 in zip(part, part[1:])]
+
+    def _contains_point(self, point):
+        """Hilfsmethode: True falls der Punkt innerhalb des Polygons liegt (Ray Casting, Löcher berücksichtigt)"""
+        if self.type != "polygon":
+            return False
+        x, y = point
+        inside = False
+        for ring in self.parts:
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+                if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                    inside = not inside
+        return inside
+
+    def within(self, other, tolerance = 1e-6):
+        """True falls die Geometrie innerhalb des Polygons "other" liegt (alle Stützpunkte innerhalb oder auf dem
+        Rand, bei Polygonen zusätzlich der Schwerpunkt; wie SelectLayerByLocation "WITHIN" für Teilflächen)"""
+        if other.type != "polygon" or not self.parts:
+            return False
+        boundary = other._segments()
+
+        def inside(point):
+            if other._contains_point(point):
+                return True
+            return any(_point_segment(point, p1, p2)[0] <= tolerance for p1, p2 in boundary)
+        points = [point for part in self.parts for point in part]
+        if self.type == "polygon":
+            points.append(tuple(self.centroid))
+        return all(inside(point) for point in points)
+
+    def distanceTo(self, other):
+        """Kleinste Distanz zu einer anderen Geometrie (0 falls sich die Geometrien schneiden)"""
+        if isinstance(other, Point):
+            other = Geometry("point", [[other]])
+        segments_a = self._segments()
+        segments_b = other._segments()
+        if not segments_a or not segments_b:
+            return None
+        if any(other._contains_point(p1) for p1, _ in segments_a) or any(self._contains_point(p1) for p1, _ in segments_b):
+            return 0.0
+        best = math.inf
+        for a1, a2 in segments_a:
+            for b1, b2 in segments_b:
+                if _segments_intersect(a1, a2, b1, b2):
+                    return 0.0
+                best = min(best, _point_segment(a1, b1, b2)[0], _point_segment(a2, b1, b2)[0],
+                           _point_segment(b1, a1, a2)[0], _point_segment(b2, a1, a2)[0])
+        return best
+
+    def queryPointAndDistance(self, in_point, use_percentage = False):
+        """Nächster Punkt auf der Linie (wie arcpy.Polyline.queryPointAndDistance)
+
+        Return:
+            (Punkt-Geometrie, Distanz entlang der Linie, Distanz zur Linie, True falls der Punkt rechts liegt)
+        """
+        if isinstance(in_point, Geometry):
+            in_point = in_point.parts[0][0]
+        best = None
+        along = 0.0
+        for part in self.parts:
+            for p1, p2 in zip(part, part[1:]):
+                distance, t, nearest = _point_segment(in_point, p1, p2)
+                segment_length = math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+                if best is None or distance < best[2]:
+                    cross = (p2[0] - p1[0]) * (in_point[1] - p1[1]) - (p2[1] - p1[1]) * (in_point[0] - p1[0])
+                    best = (nearest, along + t * segment_length, distance, cross < 0)
+                along += segment_length
+        if best is None:
+            return None
+        measure = best[1] / along if use_percentage and along else best[1]
+        return Geometry("point", [[best[0]]], self.srs_id), measure, best[2], best[3]
+
+    def segmentAlongLine(self, start_measure, end_measure, use_percentage = False):
+        """Teil der Linie zwischen zwei Distanzen entlang der Linie (wie arcpy.Polyline.segmentAlongLine)"""
+        if use_percentage:
+            start_measure, end_measure = start_measure * self.length, end_measure * self.length
+        start_measure, end_measure = min(start_measure, end_measure), max(start_measure, end_measure)
+        points = []
+        along = 0.0
+        for part in self.parts:
+            for p1, p2 in zip(part, part[1:]):
+                segment_length = math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+                seg_start, seg_end = along, along + segment_length
+                if seg_end >= start_measure and seg_start <= end_measure and segment_length > 0:
+                    t1 = max(0.0, (start_measure - seg_start) / segment_length)
+                    t2 = min(1.0, (end_measure - seg_start) / segment_length)
+                    for t in (t1, t2):
+                        point = (p1[0] + t * (p2[0] - p1[0]), p1[1] + t * (p2[1] - p1[1]))
+                        if not points or points[-1] != point:
+                            points.append(point)
+                along = seg_end
+        return Geometry("polyline", [points], self.srs_id)
+
+
+def _signed_area(ring):
+    """Hilfsfunktion: Fläche eines Ringes mit Vorzeichen (Gauss'sche Trapezformel)"""
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(ring, ring[1:])) / 2
+
+
+def _point_segment(point, p1, p2):
+    """Hilfsfunktion: Distanz, Position (0..1) und nächster Punkt eines Punktes zu einem Segment"""
+    dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((point[0] - p1[0]) * dx + (point[1] - p1[1]) * dy) / length2))
+    nearest = (p1[0] + t * dx, p1[1] + t * dy)
+    return math.hypot(point[0] - nearest[0], point[1] - nearest[1]), t, nearest
+
+
+def _segments_intersect(a1, a2, b1, b2):
+    """Hilfsfunktion: True falls sich zwei Segmente schneiden (ohne Berührung in kollinearen Fällen)"""
+    def orientation(p, q, r):
+        value = (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+        return (value > 0) - (value < 0)
+    o1, o2 = orientation(a1, a2, b1), orientation(a1, a2, b2)
+    o3, o4 = orientation(b1, b2, a1), orientation(b1, b2, a2)
+    return o1 * o2 < 0 and o3 * o4 < 0
+
+
+def as_shape(geojson, srs_id = None):
+    """Geometrie aus Esri-JSON (String oder Dictionary, wie arcpy.AsShape(..., True)) erstellen"""
+    if isinstance(geojson, str):
+        geojson = json.loads(geojson)
+    srs_id = srs_id or (geojson.get("spatialReference") or {}).get("wkid")
+    if "x" in geojson:
+        if geojson["x"] is None:
+            return Geometry("point", [], srs_id)
+        return Geometry("point", [[(geojson["x"], geojson["y"])]], srs_id)
+    if "points" in geojson:
+        return Geometry("multipoint", [[point[:2] for point in geojson["points"]]], srs_id)
+    if "paths" in geojson:
+        return Geometry("polyline", [[point[:2] for point in path] for path in geojson["paths"]], srs_id)
+    if "rings" in geojson:
+        return Geometry("polygon", [[point[:2] for point in ring] for ring in geojson["rings"]], srs_id)
+    raise ValueError(f'Unbekannte Geometrie: {str(geojson)[:80]}')
+
+
+def to_wkt(geometry):
+    """Geometrie als WKT (Linien und Polygone als MULTILINESTRING bzw. MULTIPOLYGON)"""
+    def coords(points):
+        return "(" + ", ".join(f'{x!r} {y!r}' for x, y in points) + ")"
+    if not geometry.parts:
+        return {"point": "POINT", "multipoint": "MULTIPOINT", "polyline": "MULTILINESTRING"}.get(geometry.type, "MULTIPOLYGON") + " EMPTY"
+    if geometry.type == "point":
+        return "POINT " + coords(geometry.parts[0])
+    if geometry.type == "multipoint":
+        return "MULTIPOINT (" + ", ".join(coords([point]) for point in geometry.parts[0]) + ")"
+    if geometry.type == "polyline":
+        return "MULTILINESTRING (" + ", ".join(coords(part) for part in geometry.parts) + ")"
+    return "MULTIPOLYGON (" + ", ".join("(" + coords(polygon[0]) + "".join(", " + coords(ring) for ring in polygon[1:]) + ")"
+                                        for polygon in _polygons(geometry.parts)) + ")"
+
+
+def _polygons(rings):
+    """Hilfsfunktion: Ringe (Esri) in Polygone aufteilen (äussere Ringe im Uhrzeigersinn, Löcher im Gegenuhrzeigersinn)"""
+    polygons = []
+    for ring in rings:
+        if not polygons or _signed_area(ring) < 0:
+            polygons.append([ring])
+        else:
+            polygons[-1].append(ring)
+    return polygons
+
+
+def to_wkb(geometry):
+    """Geometrie als WKB (little endian, 2D, Linien und Polygone als MultiLineString bzw. MultiPolygon)"""
+    def points(part):
+        return struct.pack("<I", len(part)) + b"".join(struct.pack("<2d", x, y) for x, y in part)
+    if geometry.type == "point":
+        x, y = geometry.parts[0][0] if geometry.parts else (math.nan, math.nan)
+        return struct.pack("<BI2d", 1, 1, x, y)
+    if geometry.type == "multipoint":
+        members = [point for part in geometry.parts for point in part]
+        return struct.pack("<BII", 1, 4, len(members)) + b"".join(struct.pack("<BI2d", 1, 1, x, y) for x, y in members)
+    if geometry.type == "polyline":
+        return struct.pack("<BII", 1, 5, len(geometry.parts)) + b"".join(struct.pack("<BI", 1, 2) + points(part)
+                                                                       for part in geometry.parts)
+    polygons = _polygons(geometry.parts)
+    return struct.pack("<BII", 1, 6, len(polygons)) + b"".join(
+        struct.pack("<BII", 1, 3, len(polygon)) + b"".join(points(ring) for ring in polygon) for polygon in polygons)
+
+
+def from_wkb(data, srs_id = None):
+    """Geometrie aus WKB lesen (2D, Z- und M-Werte werden ignoriert)"""
+    parts, geometry_type, _ = _read_wkb(memoryview(data), 0)
+    if geometry_type == "point" and parts and any(math.isnan(value) for value in parts[0][0]):
+        parts = []
+    return Geometry(geometry_type, parts, srs_id)
+
+
+def _read_wkb(data, offset):
+    """Hilfsfunktion: Eine WKB-Geometrie ab offset lesen
+
+    Return:
+        parts, Geometrietyp, neuer offset
+    """
+    order = "<" if data[offset] == 1 else ">"
+    code = struct.unpack_from(order + "I", data, offset + 1)[0]
+    offset += 5
+    # Z- und M-Werte (ISO 1000/2000/3000 bzw. EWKB-Flags)
+    dims = 2 + (1 if code & 0x80000000 or (code % 10000) // 1000 in (1, 3) else 0) + \
+        (1 if code & 0x40000000 or (code % 10000) // 1000 in (2, 3) else 0)
+    base = (code & 0x0FFFFFFF) % 1000
+    size = 8 * dims
+
+    def read_points(offset):
+        count = struct.unpack_from(order + "I", data, offset)[0]
+        offset += 4
+        part = [struct.unpack_from(order + "2d", data, offset + ii * size) for ii in range(count)]
+        return part, offset + count * size
+
+    if base == 1:
+        return [[struct.unpack_from(order + "2d", data, offset)]], "point", offset + size
+    if base == 2:
+        part, offset = read_points(offset)
+        return [part], "polyline", offset
+    if base == 3:
+        n_rings = struct.unpack_from(order + "I", data, offset)[0]
+        offset += 4
+        rings = []
+        for _ in range(n_rings):
+            ring, offset = read_points(offset)
+            rings.append(ring)
+        return rings, "polygon", offset
+    if base in (4, 5, 6):
+        n_members = struct.unpack_from(order + "I", data, offset)[0]
+        offset += 4
+        parts = []
+        for _ in range(n_members):
+            member, _, offset = _read_wkb(data, offset)
+            parts.extend(member if base != 4 else [member[0]])
+        if base == 4:
+            parts = [[part[0] for part in parts]]
+        return parts, _wkb_types[base], offset
+    raise ValueError(f'WKB-Geometrietyp {code} wird nicht unterstützt')
+
+
+def to_gpb(geometry, srs_id = None):
+    """Geometrie als GeoPackage-Binary (Header mit Ausdehnung und WKB) für die Spalte "geom" """
+    if geometry is None:
+        return None
+    srs_id = srs_id if srs_id is not None else (geometry.srs_id or 0)
+    extent = geometry.extent
+    if extent is None:
+        # Leere Geometrie: Flag "empty", keine Ausdehnung
+        return b"GP" + struct.pack("<BBi", 0, 0b00010001, srs_id) + to_wkb(geometry)
+    return b"GP" + struct.pack("<BBi4d", 0, 0b00000011, srs_id, extent.XMin, extent.XMax, extent.YMin, extent.YMax) + \
+        to_wkb(geometry)
+
+
+def from_gpb(data):
+    """Geometrie aus einem GeoPackage-Binary lesen (None falls kein Wert vorhanden ist)"""
+    if data is None:
+        return None
+    data = memoryview(data)
+    if bytes(data[:2]) != b"GP":
+        raise ValueError('Kein GeoPackage-Binary (Kennung "GP" fehlt)')
+    flags = data[3]
+    order = "<" if flags & 1 else ">"
+    srs_id = struct.unpack_from(order + "i", data, 4)[0]
+    offset = 8 + _envelope_sizes[(flags >> 1) & 0b111]
+    return from_wkb(data[offset:], srs_id or None)
+
+
+def envelope(geometry):
+    """Ausdehnung (xmin, xmax, ymin, ymax) für den R-Tree-Index (None bei leeren Geometrien)"""
+    extent = geometry.extent if geometry is not None else None
+    return None if extent is None else (extent.XMin, extent.XMax, extent.YMin, extent.YMax)
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für das Lesen von SWMM-Eingabedateien (.inp). Beim ersten Zugriff wird die Datei
+# einmal durchsucht und ein Index mit den Byte-Positionen der Abschnitte ("[SECTION]") erstellt.
+# Der Index wird neben der .inp-Datei gespeichert ("<Datei>.inp.idx.json") und wiederverwendet, solange
+# sich die Datei nicht ändert. Anschliessend werden nur die benötigten Abschnitte gelesen und in
+# Spalten (numpy-Arrays) umgewandelt, sodass der Aufwand nur von der Grösse dieser Abschnitte abhängt.
+#
+# Beim Schreiben werden nur die angegebenen Abschnitte neu formatiert, alle anderen Abschnitte werden
+# unverändert (byteweise) aus der Vorlage kopiert.
+# -----------------------------------------------------------------------------
+"""inp_functions"""
+import os, re, json, mmap, shlex
+import numpy as np
+
+# Spaltenbezeichnungen der wichtigsten Abschnitte (SWMM 5.1). Bei fehlenden Abschnitten werden die Spalten
+# mit "col_1", "col_2", ... bezeichnet. Die Werte werden den Spalten in der Reihenfolge zugeordnet.
+SECTION_COLUMNS = {
+    "SUBCATCHMENTS": ["Name", "Raingage", "Outlet", "Area", "PercImperv", "Width", "PercSlope", "CurbLength", "SnowPack"],
+    "SUBAREAS": ["Subcatchment", "N-Imperv", "N-Perv", "S-Imperv", "S-Perv", "PctZero", "RouteTo", "PctRouted"],
+    "INFILTRATION": ["Subcatchment", "MaxRate", "MinRate", "Decay", "DryTime", "MaxInfil"],
+    "JUNCTIONS": ["Name", "InvertElev", "MaxDepth", "InitDepth", "SurchargeDepth", "PondedArea"],
+    "OUTFALLS": ["Name", "InvertElev", "OutfallType", "StageOrTimeseries", "TideGate"],
+    "CONDUITS": ["Name", "InletNode", "OutletNode", "Length", "Roughness", "InOffset", "OutOffset", "InitFlow", "MaxFlow"],
+    "PUMPS": ["Name", "InletNode", "OutletNode", "PumpCurve", "Status", "Startup", "Shutoff"],
+    "XSECTIONS": ["Link", "Shape", "Geom1", "Geom2", "Geom3", "Geom4", "Barrels", "Culvert"],
+    "COORDINATES": ["Node", "X", "Y"],
+    "VERTICES": ["Link", "X", "Y"],
+    "POLYGONS": ["Subcatchment", "X", "Y"],
+    "RAINGAGES": ["Name", "Format", "Interval", "SCF", "Source", "SourceName"],
+    "TIMESERIES": ["Name", "Date", "Time", "Value"],
+}
+
+# Spalten mit Text (z. B. IDs), die nicht in Zahlen umgewandelt werden. Die erste Spalte (ID) ist immer Text.
+TEXT_COLUMNS = ["Raingage", "Outlet", "InletNode", "OutletNode", "RouteTo", "OutfallType", "StageOrTimeseries", 
+                "TideGate", "PumpCurve", "Status", "Shape", "Culvert", "SnowPack", "Format", "Source", "SourceName",
+                "Date", "Time"]
+
+# Abschnitte mit Schlüssel-Wert-Paaren
+KEY_VALUE_SECTIONS = ["OPTIONS", "REPORT", "EVAPORATION", "MAP"]
+
+_section_pattern = re.compile(rb'^[ \t]*\[([^\]\r\n]+)\]', re.MULTILINE)
+
+
+def build_inp_index(inp_file, use_mmap = True):
+    """Index mit den Byte-Positionen aller Abschnitte einer .inp-Datei erstellen (ein Durchlauf).
+
+    Required:
+        inp_file -- Pfad zur .inp-Datei
+    Optional:
+        use_mmap -- Falls True wird die Datei mit mmap durchsucht, ansonsten vollständig eingelesen
+
+    Return:
+        index -- Dictionary {"size": Dateigrösse, "mtime": Änderungszeit, "sections": {Abschnitt: [Start, Ende]}}.
+                 Start ist die Position nach der Zeile mit dem Abschnittsnamen, Ende die Position des nächsten Abschnitts.
+    """
+    stat = os.stat(inp_file)
+    sections = {}
+    with open(inp_file, "rb") as f:
+        if stat.st_size == 0:
+            data = b""
+        elif use_mmap:
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        else:
+            data = f.read()
+        try:
+            previous = None
+            for match in _section_pattern.finditer(data):
+                name = match.group(1).decode("ascii", "replace").strip().upper()
+                start = data.find(b"\n", match.end())
+                start = stat.st_size if start < 0 else start + 1
+                # Ende des vorherigen Abschnitts
+                if previous:
+                    sections[previous][1] = match.start()
+                    previous = None
+                # Bei doppelten Abschnitten wird nur der erste indexiert
+                if name not in sections:
+                    sections[name] = [start, stat.st_size]
+                    previous = name
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sections": sections}
+
+
+def get_inp_index(inp_file, cache = True, use_mmap = True):
+    """Index einer .inp-Datei zurückgeben. Ein gespeicherter Index ("<Datei>.idx.json") wird verwendet, falls
+    Grösse und Änderungszeit der Datei übereinstimmen, ansonsten wird der Index neu erstellt und gespeichert.
+
+    Required:
+        inp_file -- Pfad zur .inp-Datei
+    Optional:
+        cache -- Falls True wird der Index neben der Datei gespeichert bzw. von dort gelesen
+        use_mmap -- siehe build_inp_index
+
+    Return:
+        index -- siehe build_inp_index
+    """
+    index_file = inp_file + ".idx.json"
+    if cache and os.path.isfile(index_file):
+        stat = os.stat(inp_file)
+        try:
+            with open(index_file, encoding = "utf-8") as f:
+                index = json.load(f)
+            if index["size"] == stat.st_size and index["mtime"] == stat.st_mtime_ns:
+                return index
+        except (ValueError, KeyError):
+            pass
+    index = build_inp_index(inp_file, use_mmap)
+    if cache:
+        try:
+            with open(index_file, "w", encoding = "utf-8") as f:
+                json.dump(index, f)
+        except OSError:
+            # Index kann nicht gespeichert werden (z. B. fehlende Schreibrechte)
+            pass
+    return index
+
+
+def read_inp_lines(inp_file, section, index = None, encoding = "utf-8"):
+    """Datenzeilen eines Abschnitts lesen (ohne Kommentare und Leerzeilen).
+
+    Required:
+        inp_file -- Pfad zur .inp-Datei
+        section -- Name des Abschnitts (z. B. "SUBCATCHMENTS")
+    Optional:
+        index -- Index der Datei (siehe get_inp_index), wird bei Bedarf erstellt
+        encoding -- Zeichenkodierung der Datei
+
+    Return:
+        Liste mit den Datenzeilen oder None falls der Abschnitt nicht vorhanden ist
+    """
+    if index is None:
+        index = get_inp_index(inp_file)
+    position = index["sections"].get(section.upper())
+    if position is None:
+        return None
+    with open(inp_file, "rb") as f:
+        f.seek(position[0])
+        text = f.read(position[1] - position[0]).decode(encoding, "replace")
+    lines = []
+    for line in text.splitlines():
+        # Kommentare entfernen
+        line = line.split(";", 1)[0].strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _to_array(values):
+    """Hilfsfunktion: Spalte als numpy-Array (float falls alle Werte Zahlen sind, ansonsten object)"""
+    try:
+        return np.array([np.nan if value is None else float(value) for value in values], dtype = float)
+    except ValueError:
+        return np.array(values, dtype = object)
+
+
+def read_inp_section(inp_file, section, index = None, columns = None, encoding = "utf-8"):
+    """Einen Abschnitt einer .inp-Datei in Spalten lesen.
+
+    Required:
+        inp_file -- Pfad zur .inp-Datei
+        section -- Name des Abschnitts (z. B. "SUBCATCHMENTS")
+    Optional:
+        index -- Index der Datei (siehe get_inp_index), wird bei Bedarf erstellt
+        columns -- Liste mit Spaltenbezeichnungen (Default siehe SECTION_COLUMNS)
+        encoding -- Zeichenkodierung der Datei
+
+    Return:
+        Bei Abschnitten mit Schlüssel-Wert-Paaren (z. B. OPTIONS) ein Dictionary {Schlüssel: Wert}, ansonsten
+        ein Dictionary {Spalte: numpy-Array}. Fehlende Werte werden mit NaN bzw. None angegeben.
+        None falls der Abschnitt nicht vorhanden ist.
+    """
+    lines = read_inp_lines(inp_file, section, index, encoding)
+    if lines is None:
+        return None
+    section = section.upper()
+
+    if section in KEY_VALUE_SECTIONS and columns is None:
+        values = {}
+        for line in lines:
+            parts = line.split(None, 1)
+            values[parts[0]] = parts[1].strip() if len(parts) > 1 else None
+        return values
+
+    rows = [shlex.split(line) if '"' in line else line.split() for line in lines]
+    n_cols = max([len(row) for row in rows], default = 0)
+    if columns is None:
+        columns = list(SECTION_COLUMNS.get(section, []))
+    columns = list(columns) + ["col_" + str(ii + 1) for ii in range(len(columns), n_cols)]
+    table = {}
+    for ii, column in enumerate(columns):
+        values = [row[ii] if ii < len(row) else None for row in rows]
+        if ii == 0 or column in TEXT_COLUMNS:
+            table[column] = np.array(values, dtype = object)
+        else:
+            table[column] = _to_array(values)
+    return table
+
+
+def read_inp_sections(inp_file, sections, cache = True, encoding = "utf-8"):
+    """Mehrere Abschnitte einer .inp-Datei lesen (siehe read_inp_section).
+
+    Required:
+        inp_file -- Pfad zur .inp-Datei
+        sections -- Liste mit den Namen der Abschnitte
+    Optional:
+        cache -- siehe get_inp_index
+        encoding -- Zeichenkodierung der Datei
+
+    Return:
+        Dictionary {Abschnitt: Ergebnis von read_inp_section}
+    """
+    index = get_inp_index(inp_file, cache)
+    return {section: read_inp_section(inp_file, section, index, encoding = encoding) for section in sections}
+
+
+def count_inp_rows(inp_file, sections, cache = True):
+    """Anzahl Datenzeilen pro Abschnitt zählen (z. B. Anzahl Knoten, Haltungen, Teileinzugsgebiete)
+
+    Return:
+        Dictionary {Abschnitt: Anzahl Zeilen} (0 falls der Abschnitt nicht vorhanden ist)
+    """
+    index = get_inp_index(inp_file, cache)
+    counts = {}
+    for section in sections:
+        lines = read_inp_lines(inp_file, section, index)
+        counts[section] = len(lines) if lines else 0
+    return counts
+
+
+def _format_value(value):
+    """Hilfsfunktion: Wert für die .inp-Datei formatieren (Zahlen mit voller Genauigkeit, fehlende Werte = None)"""
+    if value is None:
+        return None
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return None
+        return repr(float(value))
+    value = str(value)
+    return '"' + value + '"' if " " in value else value
+
+
+def format_inp_section(table, columns = None):
+    """Tabelle (Dictionary {Spalte: Array}, siehe read_inp_section) in Zeilen einer .inp-Datei umwandeln.
+
+    Required:
+        table -- Dictionary {Spalte: Array} oder Dictionary {Schlüssel: Wert} bei Abschnitten mit Schlüssel-Wert-Paaren
+    Optional:
+        columns -- Liste mit den Spalten in der Reihenfolge der Datei (Default: Reihenfolge der Tabelle)
+
+    Return:
+        Liste mit den Zeilen (ohne Zeilenumbruch). Die Spalten werden linksbündig ausgerichtet, fehlende Werte
+        am Zeilenende werden weggelassen, fehlende Werte dazwischen mit "*" angegeben.
+    """
+    if table and not isinstance(next(iter(table.values())), np.ndarray):
+        width = max(len(key) for key in table) + 1
+        return [key.ljust(width) + (str(value) if value is not None else "") for key, value in table.items()]
+    columns = list(columns or table)
+    if not columns:
+        return []
+    rows = []
+    for values in zip(*[table[column] for column in columns]):
+        row = [_format_value(value) for value in values]
+        while row and row[-1] is None:
+            row.pop()
+        rows.append(["*" if value is None else value for value in row])
+    widths = [0] * len(columns)
+    for row in rows:
+        for ii, value in enumerate(row):
+            widths[ii] = max(widths[ii], len(value))
+    return [" ".join(value.ljust(widths[ii]) for ii, value in enumerate(row)).rstrip() for row in rows]
+
+
+def write_inp(inp_file, out_file, sections = None, index = None, encoding = "utf-8", newline = "\r\n"):
+    """.inp-Datei mit ersetzten Abschnitten schreiben. Alle anderen Abschnitte werden unverändert kopiert,
+    ohne Ersatz ist die neue Datei byteweise identisch mit der Vorlage.
+
+    Required:
+        inp_file -- Pfad zur Vorlage (.inp-Datei)
+        out_file -- Pfad zur neuen .inp-Datei (darf nicht der Vorlage entsprechen)
+    Optional:
+        sections -- Dictionary {Abschnitt: Tabelle (siehe read_inp_section) oder Liste mit Zeilen}. Die Kommentarzeilen
+                    am Anfang des Abschnitts (";;") werden beibehalten. Abschnitte, die in der Vorlage fehlen,
+                    werden am Ende angehängt.
+        index -- Index der Vorlage (siehe get_inp_index), wird bei Bedarf erstellt
+        encoding -- Zeichenkodierung der Datei
+        newline -- Zeilenumbruch der neuen Zeilen
+
+    Return:
+        out_file -- Pfad zur neuen .inp-Datei
+    """
+    if os.path.abspath(inp_file) == os.path.abspath(out_file):
+        raise ValueError(f'Die Vorlage "{inp_file}" kann nicht überschrieben werden')
+    if index is None:
+        index = get_inp_index(inp_file)
+    replace = {}
+    for section, content in (sections or {}).items():
+        lines = format_inp_section(content) if isinstance(content, dict) else list(content)
+        replace[section.upper()] = lines
+    positions = sorted((position[0], position[1], name) for name, position in index["sections"].items()
+                       if name in replace)
+    with open(inp_file, "rb") as src, open(out_file, "wb") as dst:
+        position = 0
+        for start, end, name in positions:
+            dst.write(src.read(start - position))
+            text = src.read(end - start).decode(encoding, "replace")
+            header = []
+            for line in text.splitlines():
+                if not line.startswith(";;"):
+                    break
+                header.append(line)
+            dst.write(newline.join(header + replace.pop(name) + ["", ""]).encode(encoding))
+            position = end
+        dst.write(src.read())
+        for name, lines in replace.items():
+            dst.write(newline.join(["", "[" + name + "]"] + lines + [""]).encode(encoding))
+    return out_file
@@ -5,35 +5,211 @@
 # date: 29.10.2021
 #
 # Funktionen für das Logging
+#
+# Profil: Mit init_logging wird zusätzlich ein Laufzeitprofil gestartet. Abschnitte (Spans) werden mit
+# "with span(...)", dem Dekorator "@profiled()" oder mit "step(...)" (aufeinanderfolgende Schritte einer
+# Funktion) markiert und verschachtelt erfasst: Laufzeit, CPU-Zeit, maximaler Arbeitsspeicher (Peak RSS)
+# und optional die Speicherallokationen (tracemalloc, Umgebungsvariable PYGISSWMM_TRACEMALLOC=1). Zähler
+# (count) werden pro Abschnitt summiert, die Aufrufe der arcpy Geoverarbeitungswerkzeuge und die gelesenen
+# bzw. geschriebenen Zeilen der arcpy.da-Cursors werden automatisch gezählt (instrument_arcpy). Das Profil
+# wird am Ende als JSON-Datei neben der Log-Datei gespeichert ("<Log-Datei>_profile.json").
+#
+# Meldungen: Die Meldungen werden über eine Warteschlange (QueueHandler/QueueListener) in einem eigenen
+# Thread in die Log-Datei und auf die Konsole geschrieben. Gleichartige Meldungen (gleiche Vorlage, z. B.
+# "Beim Schacht mit der ID # wurde die Mindesttiefe # unterschritten") werden im Speicher gezählt und pro
+# Vorlage nur bis zu einer maximalen Anzahl ausgegeben (Fehler werden immer ausgegeben). Am Ende wird eine
+# Zusammenfassung geschrieben, die Anzahl Fehler liefert error_count().
+#
+# Fortschritt: Lange Schleifen (z. B. über die Teileinzugsgebiete oder Einlaufschächte) melden mit progress(...)
+# in einem festen Intervall die Anzahl bearbeiteter Objekte, den Durchsatz und die geschätzte Restdauer. Die
+# Meldungen werden nicht zusammengefasst, der Verlauf wird im Profil beim aktuellen Abschnitt gespeichert.
 # -----------------------------------------------------------------------------
 """logging_functions"""
-import logging
+import os, re, sys, json, time, queue, atexit, logging, datetime, functools, contextlib, inspect, threading, tracemalloc
+import logging.handlers
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Aktuelles Profil (None falls kein Profil aktiv ist)
+_profile = None
+# Module von arcpy, deren Werkzeuge gezählt werden
+ARCPY_TOOLBOXES = ["management", "analysis", "conversion", "cartography", "sa", "edit"]
+# Maximale Anzahl ausgegebener Meldungen pro Vorlage (None = unbegrenzt)
+MAX_PER_TEMPLATE = 20
+# Maximale Anzahl Vorlagen in der Zusammenfassung
+MAX_SUMMARY_LINES = 50
+# Intervall (Sekunden) der Fortschrittsmeldungen (Umgebungsvariable PYGISSWMM_PROGRESS_INTERVAL, 0 = keine Meldungen)
+PROGRESS_INTERVAL = float(os.environ.get("PYGISSWMM_PROGRESS_INTERVAL", "30"))
+# Aktuelle Zählung der Meldungen und Thread für das Schreiben (siehe init_logging)
+_aggregator = None
+_listener = None
+
+# Variable Teile einer Meldung: GUIDs, Texte in Anführungszeichen, Wörter mit Ziffern (IDs, Zahlen)
+_template_patterns = [(re.compile(r'\{[0-9A-Fa-f-]{8,}\}'), '{…}'), (re.compile(r'"[^"]*"'), '"…"'),
+                      (re.compile(r"'[^']*'"), "'…'"), (re.compile(r'[\w.\-]*\d[\w.\-]*'), '#')]
+
+
+def message_template(record):
+    """Vorlage einer Meldung bestimmen (variable Teile wie IDs und Zahlen werden ersetzt)"""
+    if record.args:
+        return str(record.msg)
+    template = str(record.msg)
+    for pattern, replacement in _template_patterns:
+        template = pattern.sub(replacement, template)
+    return template
+
+
+class AggregatingFilter(logging.Filter):
+    """Zählt die Meldungen pro Stufe und Vorlage im Speicher und lässt pro Vorlage nur die ersten
+    "max_per_template" Meldungen durch. Meldungen ab der Stufe "always_level" und Meldungen mit
+    extra = {"aggregate": False} (z. B. Fortschritt) werden immer durchgelassen."""
+
+    def __init__(self, max_per_template = MAX_PER_TEMPLATE, always_level = logging.ERROR):
+        super().__init__()
+        self.max_per_template = max_per_template
+        self.always_level = always_level
+        self.templates = {}
+        self.levels = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, "aggregate", True):
+            return True
+        template = message_template(record)
+        key = (record.levelname, template)
+        with self.lock:
+            n = self.templates.get(key, 0) + 1
+            self.templates[key] = n
+            self.levels[record.levelname] = self.levels.get(record.levelname, 0) + 1
+        if record.levelno >= self.always_level or self.max_per_template is None or n < self.max_per_template:
+            return True
+        if n == self.max_per_template:
+            record.msg = record.getMessage() + ' (weitere Meldungen dieser Art werden nur gezählt)'
+            record.args = None
+            return True
+        return False
+
+    def count(self, min_level = logging.ERROR):
+        """Anzahl Meldungen ab der angegebenen Stufe"""
+        return sum(n for level, n in self.levels.items() if logging.getLevelName(level) >= min_level)
 
-def init_logging(file):
+    def summary(self, min_level = logging.WARNING):
+        """Liste mit (Stufe, Vorlage, Anzahl, Anzahl unterdrückt) ab der angegebenen Stufe, sortiert nach Anzahl"""
+        rows = []
+        for (level, template), n in self.templates.items():
+            if logging.getLevelName(level) < min_level:
+                continue
+            suppressed = 0
+            if self.max_per_template is not None and logging.getLevelName(level) < self.always_level:
+                suppressed = max(0, n - self.max_per_template)
+            rows.append((level, template, n, suppressed))
+        rows.sort(key = lambda row: -row[2])
+        return rows
+
+
+def init_logging(file, profile = True, trace_memory = None, max_per_template = MAX_PER_TEMPLATE):
     """Initialisiert das Logging
 
     Required:
         file -- Pfad zur Logdatei
+    Optional:
+        profile -- Falls True wird ein Laufzeitprofil erstellt (siehe init_profile)
+        trace_memory -- Speicherallokationen mit tracemalloc erfassen (verlangsamt die Ausführung, Default:
+                        Umgebungsvariable PYGISSWMM_TRACEMALLOC=1)
+        max_per_template -- Maximale Anzahl ausgegebener Meldungen pro Vorlage (None = unbegrenzt)
     """
+    global _aggregator, _listener
     logger = logging.getLogger('myapp')
+    # Handler einer vorherigen Initialisierung entfernen (mehrere Skripte im gleichen Prozess, siehe
+    # worker_functions), sonst wird jede Meldung mehrfach bzw. in die alte Log-Datei geschrieben
+    close_logging()
     # Logging  für Log-Datei initialisieren
     hdlr = logging.FileHandler(file, mode='w')
     formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
     hdlr.setFormatter(formatter)
-    logger.addHandler(hdlr)
     # Logging für Konsole initialisieren
     consoleHandler = logging.StreamHandler()
     consoleHandler.setFormatter(formatter)
-    logger.addHandler(consoleHandler)
+    # Meldungen zählen und über eine Warteschlange in einem eigenen Thread schreiben
+    _aggregator = AggregatingFilter(max_per_template)
+    queueHandler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queueHandler.addFilter(_aggregator)
+    queueHandler.set_name('init_logging')
+    logger.addHandler(queueHandler)
+    _listener = logging.handlers.QueueListener(queueHandler.queue, hdlr, consoleHandler)
+    _listener.start()
+    if not getattr(init_logging, "_atexit", False):
+        atexit.register(close_logging)
+        init_logging._atexit = True
 
     logger.setLevel(logging.INFO)
 
+    if profile:
+        if trace_memory is None:
+            trace_memory = os.environ.get("PYGISSWMM_TRACEMALLOC") == "1"
+        init_profile(os.path.splitext(file)[0] + "_profile.json", os.path.basename(os.path.splitext(file)[0]), trace_memory)
+        if "arcpy" in sys.modules:
+            instrument_arcpy(sys.modules["arcpy"])
+
     return logger
 
 
+def close_logging():
+    """Das Profil speichern, die Zusammenfassung der Meldungen schreiben und die mit init_logging erstellten
+    Handler schliessen und entfernen (Log-Datei wird freigegeben)"""
+    global _aggregator, _listener
+    logger = logging.getLogger('myapp')
+    if _profile is not None:
+        profile_file = write_profile()
+        logger.info(f'Profil gespeichert: {profile_file}')
+    if _aggregator is not None:
+        log_summary(logger)
+    for hdlr in list(logger.handlers):
+        if hdlr.get_name() == 'init_logging':
+            logger.removeHandler(hdlr)
+            hdlr.close()
+    if _listener is not None:
+        # Warteschlange abarbeiten und Log-Datei schliessen
+        _listener.stop()
+        for hdlr in _listener.handlers:
+            hdlr.close()
+    _aggregator = None
+    _listener = None
+
+
+def error_count(min_level = logging.ERROR) -> int:
+    """Anzahl der seit init_logging gemeldeten Fehler (ersetzt search_in_file(log, "error"))"""
+    if _aggregator is None:
+        return 0
+    return _aggregator.count(min_level)
+
+
+def log_summary(logger, min_level = logging.WARNING):
+    """Zusammenfassung der Warnungen und Fehler pro Vorlage schreiben (nur Vorlagen, die mehrfach vorkommen oder
+    unterdrückt wurden)"""
+    rows = [row for row in _aggregator.summary(min_level) if row[2] > 1 or row[3] > 0]
+    if not rows:
+        return
+    # Ab hier nicht mehr begrenzen, damit die Zusammenfassung vollständig ist
+    max_per_template, _aggregator.max_per_template = _aggregator.max_per_template, None
+    logger.info('Zusammenfassung der Meldungen: ' + ", ".join(f'{level}: {n}' for level, n in sorted(_aggregator.levels.items())))
+    logger.info(f'{"Anzahl":>8} {"davon nicht ausgegeben":>22}  Stufe    Meldung')
+    for level, template, n, suppressed in rows[:MAX_SUMMARY_LINES]:
+        logger.info(f'{n:>8} {suppressed:>22}  {level:<8} {template}')
+    if len(rows) > MAX_SUMMARY_LINES:
+        logger.info(f'... {len(rows) - MAX_SUMMARY_LINES} weitere Vorlagen')
+    _aggregator.max_per_template = max_per_template
+
+
 def search_in_file(file, text) -> int:
     """In einer Datei nach einem bestimmten String suchen und ermitteln wie oft
-    der Text in der Datei vorkommt
+    der Text in der Datei vorkommt (für die Anzahl Fehler siehe error_count)
 
     Required:
         file -- Pfad zur Logdatei
@@ -48,4 +224,427 @@ def search_in_file(file, text) -> int:
             if text in line.lower():
                 #logger.info(line)
                 cnt=cnt+1
-        return cnt
\ No newline at end of file
+        return cnt
+
+
+
+def _peak_rss():
+    """Hilfsfunktion: Maximaler Arbeitsspeicher des Prozesses in MB (None falls nicht bestimmbar)"""
+    if resource is not None:
+        # POSIX: Maximum seit Prozessstart (Linux: Kilobyte, macOS: Byte)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(maxrss / 1024**2 if sys.platform == "darwin" else maxrss / 1024, 1)
+    if psutil is not None:
+        # Windows: Maximum des Working Sets (psutil liefert sonst nur den aktuellen Wert)
+        peak_wset = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        if peak_wset is not None:
+            return round(peak_wset / 1024**2, 1)
+    return None
+
+
+def _new_span(name, is_step = False):
+    """Hilfsfunktion: Abschnitt beginnen und auf den Stapel legen"""
+    record = {"name": name, "calls": 1, "wall": 0.0, "cpu": 0.0, "counters": {}, "children": [],
+              "_start": (time.perf_counter(), time.process_time(), _peak_rss()), "_step": is_step}
+    if _profile["trace_memory"]:
+        current, peak = tracemalloc.get_traced_memory()
+        parent = _profile["stack"][-1] if _profile["stack"] else None
+        if parent is not None:
+            parent["_mem_peak"] = max(parent["_mem_peak"], peak)
+        tracemalloc.reset_peak()
+        record["_mem_start"] = current
+        record["_mem_peak"] = current
+    _profile["stack"].append(record)
+    return record
+
+
+def _merge(target, source):
+    """Hilfsfunktion: Werte eines abgeschlossenen Abschnitts zu einem gleichnamigen Abschnitt addieren"""
+    target["calls"] += source["calls"]
+    for key in ("wall", "cpu", "rss_peak_delta_mb", "mem_delta_mb"):
+        if key in source:
+            target[key] = round(target.get(key, 0.0) + source[key], 3)
+    for key in ("rss_peak_mb", "mem_peak_mb"):
+        if key in source:
+            target[key] = max(target.get(key, 0.0), source[key])
+    for key, value in source["counters"].items():
+        target["counters"][key] = round(target["counters"].get(key, 0) + value, 3)
+    for key, value in source.get("progress", {}).items():
+        _add_progress(target, key, value)
+    for child in source["children"]:
+        _add_child(target, child)
+
+
+def _add_child(parent, child):
+    """Hilfsfunktion: Abschnitt dem übergeordneten Abschnitt hinzufügen (gleichnamige Abschnitte werden
+    zusammengefasst, z. B. eine Funktion mit @profiled in einer Schleife)"""
+    for other in parent["children"]:
+        if other["name"] == child["name"]:
+            _merge(other, child)
+            return
+    parent["children"].append(child)
+
+
+def _end_span(record):
+    """Hilfsfunktion: Abschnitt (und allenfalls noch offene Schritte darüber) beenden"""
+    stack = _profile["stack"]
+    while stack and stack[-1] is not record:
+        _end_span(stack[-1])
+    stack.pop()
+    wall_start, cpu_start, rss_start = record.pop("_start")
+    record["wall"] = round(time.perf_counter() - wall_start, 3)
+    record["cpu"] = round(time.process_time() - cpu_start, 3)
+    rss = _peak_rss()
+    if rss is not None:
+        record["rss_peak_mb"] = rss
+        record["rss_peak_delta_mb"] = round(rss - rss_start, 1)
+    record.pop("_step")
+    if "_mem_start" in record:
+        current, peak = tracemalloc.get_traced_memory()
+        mem_peak = max(record.pop("_mem_peak"), peak)
+        mem_start = record.pop("_mem_start")
+        record["mem_delta_mb"] = round((current - mem_start) / 1024**2, 3)
+        record["mem_peak_mb"] = round((mem_peak - mem_start) / 1024**2, 3)
+        tracemalloc.reset_peak()
+        if stack:
+            stack[-1]["_mem_peak"] = max(stack[-1]["_mem_peak"], mem_peak)
+    if stack:
+        parent = stack[-1]
+        for key, value in record["counters"].items():
+            parent["counters"][key] = round(parent["counters"].get(key, 0) + value, 3)
+        _add_child(parent, record)
+
+
+def init_profile(profile_file, name, trace_memory = False):
+    """Laufzeitprofil starten (wird von init_logging aufgerufen). Ein noch offenes Profil wird zuerst gespeichert.
+
+    Required:
+        profile_file -- Pfad zur JSON-Datei des Profils
+        name -- Name des obersten Abschnitts (z. B. Skript und sim_nr)
+    Optional:
+        trace_memory -- Falls True werden die Speicherallokationen mit tracemalloc erfasst
+    """
+    global _profile
+    if _profile is not None:
+        write_profile()
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _profile = {"file": profile_file, "started": datetime.datetime.now().isoformat(timespec = "seconds"),
+                "trace_memory": bool(trace_memory), "stack": [], "gp_tools": {}}
+    _profile["root"] = _new_span(name)
+
+
+def write_profile():
+    """Alle offenen Abschnitte beenden und das Profil als JSON-Datei speichern
+
+    Return:
+        Pfad zur JSON-Datei (None falls kein Profil aktiv ist)
+    """
+    global _profile
+    if _profile is None:
+        return None
+    profile = _profile
+    _end_span(profile["root"])
+    _profile = None
+    if profile["trace_memory"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    result = {"started": profile["started"], "finished": datetime.datetime.now().isoformat(timespec = "seconds"),
+              "python": sys.version.split()[0], "trace_memory": profile["trace_memory"],
+              "gp_tools": {tool: {"calls": calls, "seconds": round(seconds, 3)}
+                           for tool, (calls, seconds) in sorted(profile["gp_tools"].items(), key = lambda item: -item[1][1])},
+              "spans": profile["root"]}
+    with open(profile["file"], "w", encoding = "utf-8") as f:
+        json.dump(result, f, ensure_ascii = False, indent = 1)
+    return profile["file"]
+
+
+@contextlib.contextmanager
+def span(name):
+    """Abschnitt als Context-Manager erfassen (ohne aktives Profil wirkungslos)
+
+    Beispiel:
+        with lf.span("Teileinzugsgebiete parametrisieren"):
+            ...
+    """
+    if _profile is None:
+        yield None
+        return
+    record = _new_span(name)
+    try:
+        yield record
+    finally:
+        if _profile is not None and any(other is record for other in _profile["stack"]):
+            _end_span(record)
+
+
+def profiled(name = None):
+    """Dekorator: Jeder Aufruf der Funktion wird als Abschnitt erfasst (Default-Name: Name der Funktion)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def step(name):
+    """Neuen Schritt beginnen: Ein noch offener Schritt auf der gleichen Ebene wird beendet. Der letzte
+    Schritt wird mit dem übergeordneten Abschnitt (z. B. Funktion mit @profiled) beendet. Damit können die
+    Schritte einer langen Funktion ohne Einrücken markiert werden."""
+    if _profile is None:
+        return
+    stack = _profile["stack"]
+    if len(stack) > 1 and stack[-1]["_step"]:
+        _end_span(stack[-1])
+    _new_span(name, is_step = True)
+
+
+def count(counter, n = 1):
+    """Zähler des aktuellen Abschnitts erhöhen (wird beim Beenden zum übergeordneten Abschnitt addiert)"""
+    if _profile is None or not _profile["stack"]:
+        return
+    counters = _profile["stack"][-1]["counters"]
+    counters[counter] = round(counters.get(counter, 0) + n, 3)
+
+
+def _format_duration(seconds):
+    """Hilfsfunktion: Dauer in Sekunden als Text (sec., min oder h)"""
+    if seconds < 60:
+        return f'{seconds:.0f} sec.'
+    if seconds < 3600:
+        return f'{seconds / 60:.1f} min'
+    return f'{seconds / 3600:.1f} h'
+
+
+def _add_progress(record, name, progress):
+    """Hilfsfunktion: Fortschritt einer Schleife im Abschnitt des Profils speichern (gleichnamige Schleifen, z. B.
+    beim zweiten Durchgang, werden addiert)"""
+    entries = record.setdefault("progress", {})
+    if name not in entries:
+        entries[name] = progress
+        return
+    entry = entries[name]
+    for key in ("done", "seconds"):
+        entry[key] = round(entry[key] + progress[key], 3)
+    if entry.get("total") is not None and progress.get("total") is not None:
+        entry["total"] += progress["total"]
+    else:
+        entry["total"] = None
+    entry["rate"] = round(entry["done"] / entry["seconds"], 3) if entry["seconds"] > 0 else None
+    entry["samples"] = entry["samples"] + progress["samples"]
+
+
+class Progress:
+    """Fortschritt einer langen Schleife: Ein eigener Thread meldet im Intervall "interval" (Sekunden) die Anzahl
+    bearbeiteter Objekte, den Durchsatz (Objekte pro Sekunde) und die geschätzte Restdauer. Da die Meldungen nicht
+    von der Schleife abhängen, ist auch ein Stillstand erkennbar ("kein Fortschritt seit ..."). Beim Beenden wird
+    der Fortschritt mit den Zwischenständen im aktuellen Abschnitt des Profils gespeichert.
+
+    Beispiel (siehe auch progress):
+        reporter = lf.Progress("Einlaufschächte", total = len(nodes)).start()
+        for node in nodes:
+            ...
+            reporter.update()
+        reporter.close()
+    """
+
+    def __init__(self, name, total = None, interval = None, logger = None):
+        self.name = name
+        self.total = total
+        self.interval = PROGRESS_INTERVAL if interval is None else interval
+        self.logger = logger or logging.getLogger('myapp')
+        self.done = 0
+        self.samples = []
+        self.start_time = None
+        self._record = None
+        self._last_done = 0
+        self._last_change = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Zeitmessung und Thread für die Meldungen starten"""
+        self.start_time = self._last_change = time.perf_counter()
+        if _profile is not None and _profile["stack"]:
+            self._record = _profile["stack"][-1]
+        if self.interval and self.interval > 0:
+            self._thread = threading.Thread(target = self._run, name = "progress", daemon = True)
+            self._thread.start()
+        return self
+
+    def update(self, n = 1):
+        """Anzahl bearbeiteter Objekte erhöhen"""
+        self.done += n
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def status(self):
+        """Aktueller Stand: Dictionary mit "done", "total", "seconds", "rate" (pro Sekunde) und "eta" (Sekunden)"""
+        seconds = time.perf_counter() - self.start_time
+        rate = self.done / seconds if seconds > 0 else 0.0
+        eta = None
+        if self.total is not None and rate > 0:
+            eta = max(self.total - self.done, 0) / rate
+        return {"done": self.done, "total": self.total, "seconds": round(seconds, 3), "rate": round(rate, 3),
+                "eta": round(eta, 1) if eta is not None else None}
+
+    def report(self):
+        """Fortschritt melden und als Zwischenstand speichern"""
+        status = self.status()
+        now = time.perf_counter()
+        if status["done"] != self._last_done:
+            self._last_done = status["done"]
+            self._last_change = now
+        message = f'{self.name}: {status["done"]}'
+        if self.total:
+            message += f'/{self.total} ({100 * status["done"] / self.total:.0f}%)'
+        message += f', {status["rate"]:.1f} pro sec.'
+        if status["eta"] is not None:
+            message += f', Restdauer ca. {_format_duration(status["eta"])}'
+        if now - self._last_change >= self.interval:
+            message += f', kein Fortschritt seit {_format_duration(now - self._last_change)}'
+        self.logger.info(message, extra = {"aggregate": False})
+        self.samples.append([round(status["seconds"], 1), status["done"]])
+
+    def close(self):
+        """Thread beenden, Abschluss melden und Fortschritt im Profil speichern"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        status = self.status()
+        if self.interval and self.interval > 0:
+            self.logger.info(f'{self.name}: {status["done"]} Objekte in {_format_duration(status["seconds"])} bearbeitet '
+                             f'({status["rate"]:.1f} pro sec.)', extra = {"aggregate": False})
+        if self._record is not None and _profile is not None:
+            _add_progress(self._record, self.name, {"done": status["done"], "total": self.total,
+                                                    "seconds": status["seconds"], "rate": status["rate"],
+                                                    "samples": self.samples})
+
+
+def progress(iterable, name, total = None, interval = None, logger = None):
+    """Generator: Objekte durchlaufen und den Fortschritt melden (siehe Progress). Ein Objekt gilt als bearbeitet,
+    sobald das nächste Objekt angefordert wird (auch bei "continue").
+
+    Required:
+        iterable -- Objekte (z. B. Liste oder Cursor)
+        name -- Bezeichnung der Schleife in den Meldungen und im Profil
+    Optional:
+        total -- Anzahl Objekte (Default: len(iterable), falls vorhanden)
+        interval -- Intervall der Meldungen in Sekunden (Default: PROGRESS_INTERVAL)
+        logger -- Logger für die Meldungen (Default: Logger von init_logging)
+
+    Beispiel:
+        for row in lf.progress(cursor, "Teileinzugsgebiete parametrisieren", total = n):
+            ...
+    """
+    if total is None and hasattr(iterable, "__len__"):
+        total = len(iterable)
+    reporter = Progress(name, total, interval, logger).start()
+    try:
+        for item in iterable:
+            yield item
+            reporter.update()
+    finally:
+        reporter.close()
+
+
+class _CountingCursor:
+    """Hilfsklasse: arcpy.da-Cursor, der die gelesenen und geschriebenen Zeilen zählt"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        return self._cursor.__exit__(*args)
+
+    def __iter__(self):
+        n = 0
+        try:
+            for row in self._cursor:
+                n += 1
+                yield row
+        finally:
+            count("rows_read", n)
+
+    def __next__(self):
+        row = next(self._cursor)
+        count("rows_read")
+        return row
+
+    def next(self):
+        return self.__next__()
+
+    def updateRow(self, row):
+        count("rows_written")
+        return self._cursor.updateRow(row)
+
+    def insertRow(self, row):
+        count("rows_written")
+        return self._cursor.insertRow(row)
+
+    def deleteRow(self, *args):
+        count("rows_deleted")
+        return self._cursor.deleteRow(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def _counting_tool(func, tool):
+    """Hilfsfunktion: Geoverarbeitungswerkzeug, dessen Aufrufe und Laufzeit gezählt werden"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            count("gp_calls")
+            count("gp_seconds", round(seconds, 3))
+            if _profile is not None:
+                calls, total = _profile["gp_tools"].get(tool, (0, 0.0))
+                _profile["gp_tools"][tool] = (calls + 1, total + seconds)
+    wrapper._lf_counting = True
+    return wrapper
+
+
+def _counting_cursor_class(cursor_class):
+    """Hilfsfunktion: Konstruktor für gezählte arcpy.da-Cursors"""
+    @functools.wraps(cursor_class)
+    def factory(*args, **kwargs):
+        return _CountingCursor(cursor_class(*args, **kwargs))
+    factory._lf_counting = True
+    return factory
+
+
+def instrument_arcpy(arcpy):
+    """Die Werkzeuge der Toolboxen (ARCPY_TOOLBOXES, inkl. Aliase wie "AddField_management") und die
+    arcpy.da-Cursors so ersetzen, dass Aufrufe und Zeilen im aktuellen Abschnitt gezählt werden
+    ("gp_calls", "gp_seconds", "rows_read", "rows_written", "rows_deleted"). Wird nur einmal ausgeführt."""
+    if getattr(arcpy, "_lf_instrumented", False):
+        return
+    for toolbox in ARCPY_TOOLBOXES:
+        module = getattr(arcpy, toolbox, None)
+        if module is None:
+            continue
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if not name.startswith("_") and not getattr(func, "_lf_counting", False):
+                setattr(module, name, _counting_tool(func, toolbox + "." + name))
+    suffixes = tuple("_" + toolbox for toolbox in ARCPY_TOOLBOXES)
+    for name, func in inspect.getmembers(arcpy, inspect.isfunction):
+        if name.endswith(suffixes) and not getattr(func, "_lf_counting", False):
+            tool, _, toolbox = name.rpartition("_")
+            setattr(arcpy, name, _counting_tool(func, toolbox + "." + tool))
+    for name in ("SearchCursor", "UpdateCursor", "InsertCursor"):
+        cursor_class = getattr(arcpy.da, name, None)
+        if cursor_class is not None and not getattr(cursor_class, "_lf_counting", False):
+            setattr(arcpy.da, name, _counting_cursor_class(cursor_class))
+    arcpy._lf_instrumented = True
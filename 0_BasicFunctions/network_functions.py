@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für die Analyse des Kanalnetzes (Graph aus Knoten und Haltungen).
+# Die Funktionen sind unabhängig von arcpy und arbeiten mit Listen und Dictionaries,
+# damit sie in allen pygisswmm-Skripts verwendet werden können.
+# -----------------------------------------------------------------------------
+"""network_functions"""
+
+
+def _find(parent, x):
+    """Hilfsfunktion Union-Find: Wurzel eines Elementes suchen (mit Pfadhalbierung)"""
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def _union(parent, size, a, b):
+    """Hilfsfunktion Union-Find: Mengen von zwei Elementen vereinigen (nach Grösse)"""
+    root_a = _find(parent, a)
+    root_b = _find(parent, b)
+    if root_a == root_b:
+        return
+    if size[root_a] < size[root_b]:
+        root_a, root_b = root_b, root_a
+    parent[root_b] = root_a
+    size[root_a] += size[root_b]
+
+
+def connected_components(node_ids, links):
+    """Zusammenhängende Teilnetze (ohne Berücksichtigung der Fliessrichtung) mit Union-Find bestimmen.
+
+    Required:
+        node_ids -- Liste mit den IDs der Knoten
+        links -- Liste mit Haltungen als Tupel (link_id, link_from, link_to)
+
+    Return:
+        components -- Dictionary {node_id: Nummer des Teilnetzes}. Die Teilnetze sind nach Grösse
+                      absteigend nummeriert (1 = grösstes Teilnetz).
+    """
+    parent = {}
+    size = {}
+    for nid in node_ids:
+        if nid not in parent:
+            parent[nid] = nid
+            size[nid] = 1
+    for link in links:
+        if link[1] in parent and link[2] in parent:
+            _union(parent, size, link[1], link[2])
+
+    # Teilnetze nach Grösse nummerieren
+    roots = {}
+    for nid in parent:
+        root = _find(parent, nid)
+        roots[root] = size[root]
+    root_nr = {root: nr for nr, root in enumerate(sorted(roots, key=lambda r: -roots[r]), start=1)}
+    return {nid: root_nr[_find(parent, nid)] for nid in parent}
+
+
+def strongly_connected_components(adjacency):
+    """Stark zusammenhängende Komponenten eines gerichteten Graphen bestimmen (Tarjan, iterative Tiefensuche).
+
+    Required:
+        adjacency -- Dictionary {node_id: [node_id unterhalb, ...]}
+
+    Return:
+        Liste mit Listen von Knoten-IDs pro Komponente
+    """
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    for root in adjacency:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adjacency.get(root, ())))]
+        while work:
+            v, neighbours = work[-1]
+            advanced = False
+            for w in neighbours:
+                if w not in index:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(adjacency.get(w, ()))))
+                    advanced = True
+                    break
+                elif w in on_stack:
+                    low[v] = min(low[v], index[w])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                low[u] = min(low[u], low[v])
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack.discard(w)
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(component)
+    return components
+
+
+def diagnose_network(node_ids, links):
+    """Das Kanalnetz auf Datenprobleme prüfen (Laufzeit linear zur Anzahl Knoten und Haltungen).
+
+    Geprüft werden zusammenhängende Teilnetze, gerichtete Zyklen, Haltungen mit fehlendem Von- oder
+    Bis-Schacht, Knoten ohne Haltungen sowie doppelte IDs.
+
+    Required:
+        node_ids -- Liste mit den IDs der Knoten
+        links -- Liste mit Haltungen als Tupel (link_id, link_from, link_to)
+
+    Return:
+        Dictionary mit folgenden Einträgen:
+            "components" -- {node_id: Nummer des Teilnetzes}
+            "n_components" -- Anzahl Teilnetze
+            "cycles" -- Liste mit den Knoten-IDs pro gerichtetem Zyklus
+            "cycle_links" -- Liste mit den IDs der Haltungen, die Teil eines Zyklus sind
+            "dangling_links" -- Liste mit Tupeln (link_id, Problem) für Haltungen mit fehlendem Knoten
+            "orphan_nodes" -- Liste mit den IDs der Knoten ohne Haltungen
+            "duplicate_nodes" -- Liste mit doppelten Knoten-IDs
+            "duplicate_links" -- Liste mit doppelten Haltungs-IDs
+    """
+    # Doppelte IDs (Reihenfolge der Knoten beibehalten)
+    node_set = {}
+    duplicate_nodes = set()
+    for nid in node_ids:
+        if nid in node_set:
+            duplicate_nodes.add(nid)
+        node_set[nid] = None
+    link_set = set()
+    duplicate_links = set()
+    for link in links:
+        if link[0] in link_set:
+            duplicate_links.add(link[0])
+        link_set.add(link[0])
+
+    # Haltungen mit fehlendem Von- oder Bis-Schacht und gerichteter Graph
+    dangling_links = []
+    connected = set()
+    adjacency = {}
+    for link_id, link_from, link_to in links:
+        problems = []
+        for ref, label in ((link_from, "von"), (link_to, "bis")):
+            if ref is None:
+                problems.append(f'{label}_null')
+            elif ref not in node_set:
+                problems.append(f'{label}_fehlt')
+            else:
+                connected.add(ref)
+        if problems:
+            dangling_links.append((link_id, ";".join(problems)))
+        else:
+            adjacency.setdefault(link_from, []).append(link_to)
+
+    # Knoten ohne Haltungen
+    orphan_nodes = [nid for nid in node_set if nid not in connected]
+
+    # Gerichtete Zyklen (stark zusammenhängende Komponenten mit mehr als einem Knoten oder Schleifen)
+    cycles = []
+    cycle_nodes = {}
+    for component in strongly_connected_components(adjacency):
+        if len(component) > 1 or component[0] in adjacency.get(component[0], ()):
+            cycles.append(component)
+            for nid in component:
+                cycle_nodes[nid] = len(cycles)
+    cycle_links = [link_id for link_id, link_from, link_to in links
+                   if link_from in cycle_nodes and cycle_nodes.get(link_from) == cycle_nodes.get(link_to)]
+
+    components = connected_components(node_set, links)
+
+    return {"components": components,
+            "n_components": len(set(components.values())),
+            "cycles": cycles,
+            "cycle_links": cycle_links,
+            "dangling_links": dangling_links,
+            "orphan_nodes": orphan_nodes,
+            "duplicate_nodes": sorted(duplicate_nodes, key=str),
+            "duplicate_links": sorted(duplicate_links, key=str)}
+
+
+def new_trace_cache():
+    """Leeren Cache für die Funktion trace_known_values erstellen. Der Cache kann für alle Knoten
+    eines Durchgangs verwendet werden.
+
+    Return:
+        Dictionary mit den zwischengespeicherten Ergebnissen pro Richtung ("results"), den Abhängigkeiten
+        zwischen den Knoten ("parents") und einer Statistik ("stats")
+    """
+    return {"results": {}, "parents": {}, "stats": {"hits": 0, "traces": 0, "truncated": 0}}
+
+
+def invalidate_trace_cache(cache, node_id):
+    """Zwischengespeicherte Ergebnisse verwerfen, die vom Wert eines Knotens abhängen. Muss aufgerufen werden,
+    sobald ein Knoten einen neuen Wert erhält (z. B. interpolierte Sohlenkote).
+
+    Required:
+        cache -- Cache (siehe new_trace_cache)
+        node_id -- ID des Knotens, dessen Wert geändert wurde
+    """
+    for direction, parents in cache["parents"].items():
+        results = cache["results"].get(direction, {})
+        stack = [node_id]
+        seen = set()
+        while stack:
+            nid = stack.pop()
+            for parent in parents.pop(nid, ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    results.pop(parent, None)
+                    stack.append(parent)
+
+
+def trace_known_values(node_dict, start, link_ref, link_node, cache = None, max_depth = None, max_branches = None,
+                       value_key = "node_sk"):
+    """Alle Stränge ausgehend von einem Knoten in eine Richtung verfolgen, bis jeweils ein Knoten mit bekanntem
+    Wert (z. B. Sohlenkote) erreicht wird. Die Verfolgung erfolgt iterativ mit einer Liste der Knoten auf dem
+    aktuellen Pfad, damit gerichtete Zyklen erkannt werden, und ist durch eine maximale Tiefe und eine maximale
+    Anzahl Stränge begrenzt. Die Ergebnisse pro Knoten werden im Cache gespeichert und für alle weiteren Knoten
+    wiederverwendet.
+
+    Required:
+        node_dict -- Dictionary mit den Knoten (Schema siehe gisswmm_upd.get_interpolated_sk)
+        start -- ID des Knotens, bei welchem die Verfolgung beginnt
+        link_ref -- 'links_up' (oberhalb) oder 'links_down' (unterhalb)
+        link_node -- 'link_from' (oberhalb) oder 'link_to' (unterhalb)
+
+    Optional:
+        cache -- Cache (siehe new_trace_cache). Ohne Cache werden keine Ergebnisse wiederverwendet.
+        max_depth -- Maximale Anzahl Haltungen pro Strang
+        max_branches -- Maximale Anzahl Stränge
+        value_key -- Schlüssel des gesuchten Wertes im node_dict
+
+    Return:
+        branchs -- Liste mit Tupeln (Wert, Länge bis zum Knoten, ID des Knotens) pro Strang
+        info -- Dictionary mit "cycle" (Zyklus erkannt), "depth_limit" (maximale Tiefe erreicht),
+                "branch_limit" (maximale Anzahl Stränge erreicht) und "missing" (Liste mit nicht vorhandenen Knoten)
+    """
+    direction = (link_ref, link_node)
+    if cache is None:
+        cache = new_trace_cache()
+    results = cache["results"].setdefault(direction, {})
+    parents = cache["parents"].setdefault(direction, {})
+    cache["stats"]["traces"] += 1
+    info = {"cycle": False, "depth_limit": False, "branch_limit": False, "missing": []}
+
+    if start in results:
+        cache["stats"]["hits"] += 1
+        return results[start], info
+
+    # Ein Eintrag pro Knoten auf dem aktuellen Pfad: [ID, Haltungen, Index nächste Haltung, Ergebnis, unvollständig]
+    path = [[start, node_dict[start][link_ref], 0, [], False]]
+    on_path = {start}
+    while path:
+        frame = path[-1]
+        nid, links, ii, result, truncated = frame
+        descended = False
+        while ii < len(links):
+            link = links[ii]
+            ii += 1
+            child = link[link_node]
+            if child is None or child not in node_dict:
+                info["missing"].append(child)
+                continue
+            if node_dict[child][value_key]:
+                result.append((node_dict[child][value_key], link['link_length'], child))
+            elif child in on_path:
+                # Gerichteter Zyklus: Strang wird nicht weiterverfolgt
+                info["cycle"] = True
+                truncated = True
+            elif child in results:
+                cache["stats"]["hits"] += 1
+                parents.setdefault(child, set()).add(nid)
+                result.extend((val, length + link['link_length'], end) for val, length, end in results[child])
+            elif max_depth is not None and len(path) >= max_depth:
+                info["depth_limit"] = True
+                truncated = True
+            else:
+                # Knoten oberhalb bzw. unterhalb zuerst verfolgen
+                frame[2] = ii
+                frame[4] = truncated
+                path.append([child, node_dict[child][link_ref], 0, [], False])
+                on_path.add(child)
+                descended = True
+                break
+            if max_branches is not None and len(result) > max_branches:
+                info["branch_limit"] = True
+                truncated = True
+                del result[max_branches:]
+                ii = len(links)
+        if descended:
+            continue
+
+        # Alle Haltungen des Knotens verfolgt -> Ergebnis an übergeordneten Knoten übergeben
+        path.pop()
+        on_path.discard(nid)
+        if not truncated:
+            results[nid] = result
+        if path:
+            parent = path[-1]
+            child_length = parent[1][parent[2] - 1]['link_length']
+            parents.setdefault(nid, set()).add(parent[0])
+            parent[3].extend((val, length + child_length, end) for val, length, end in result)
+            parent[4] = parent[4] or truncated
+            if max_branches is not None and len(parent[3]) > max_branches:
+                info["branch_limit"] = True
+                parent[4] = True
+                del parent[3][max_branches:]
+                parent[2] = len(parent[1])
+        else:
+            if truncated:
+                cache["stats"]["truncated"] += 1
+            return result, info
+
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für das Lesen von SWMM-Ergebnisdateien (.out, Binärformat SWMM 5.1). Die Ergebnisse
+# werden blockweise (jeweils einige Zeitschritte) gelesen, sodass nie die gesamte Zeitreihe im
+# Speicher gehalten wird. Pro Teileinzugsgebiet, Knoten und Haltung werden in einem Durchlauf
+# Kennwerte berechnet (Maximum, Zeitpunkt vom Maximum, Volumen, Dauer über einem Schwellenwert).
+# -----------------------------------------------------------------------------
+"""out_functions"""
+import os, struct, datetime
+import numpy as np
+import inp_functions as inpf
+
+_magic_number = 516114522
+_record_size = 4
+
+# Objekttypen in der Reihenfolge der .out-Datei
+OBJECT_TYPES = ["subcatchment", "node", "link"]
+
+# Bezeichnung der Ergebnisvariablen (Reihenfolge gemäss .out-Datei, danach folgen die Schadstoffe)
+VARIABLES = {
+    "subcatchment": ["rainfall", "snow_depth", "evaporation", "infiltration", "runoff", "groundwater_flow",
+                     "groundwater_elevation", "soil_moisture"],
+    "node": ["depth", "head", "volume", "lateral_inflow", "total_inflow", "flooding"],
+    "link": ["flow", "depth", "velocity", "volume", "capacity"],
+    "system": ["air_temperature", "rainfall", "snow_depth", "infiltration", "runoff", "dry_weather_inflow",
+               "groundwater_inflow", "rdii_inflow", "external_inflow", "total_lateral_inflow", "flooding",
+               "outflow", "storage", "evaporation", "potential_evaporation"],
+}
+
+# Bezeichnung der Objekteigenschaften (Reihenfolge gemäss .out-Datei)
+PROPERTIES = {
+    "subcatchment": ["area"],
+    "node": ["type", "invert", "max_depth"],
+    "link": ["type", "offset_1", "offset_2", "max_depth", "length"],
+}
+
+# Abflusseinheiten und Umrechnungsfaktor für das Volumen (Abfluss * Sekunden -> m3 bzw. ft3)
+FLOW_UNITS = ["CFS", "GPM", "MGD", "CMS", "LPS", "MLD"]
+_volume_factor = {"CFS": 1.0, "GPM": 0.133681 / 60, "MGD": 1e6 * 0.133681 / 86400,
+                  "CMS": 1.0, "LPS": 0.001, "MLD": 1000 / 86400}
+
+# Variablen, für die das Maximum und der Zeitpunkt vom Maximum berechnet werden
+MAX_VARIABLES = {
+    "subcatchment": ["rainfall", "runoff"],
+    "node": ["depth", "head", "total_inflow", "flooding"],
+    "link": ["flow", "depth", "velocity", "capacity"],
+}
+# Variablen, bei denen der Betrag verwendet wird (Fliessrichtung)
+ABS_VARIABLES = {"link": ["flow", "velocity"]}
+# Abfluss-Variablen, für die das Volumen berechnet wird
+VOLUME_VARIABLES = {
+    "subcatchment": ["runoff"],
+    "node": ["lateral_inflow", "total_inflow", "flooding"],
+    "link": ["flow"],
+}
+# Schwellenwerte für die Dauer: {Name: (Variable, Vergleich, Schwellenwert, Eigenschaft)}. Ist eine Eigenschaft
+# angegeben, wird der Schwellenwert mit der Eigenschaft multipliziert. Neben den Eigenschaften der .out-Datei
+# (z. B. "max_depth" = Schachttiefe) ist "crown_depth" möglich: Einstau über dem höchsten Scheitel der
+# angeschlossenen Haltungen (aus der .inp-Datei, siehe crown_depths).
+THRESHOLDS = {
+    "subcatchment": {"runoff": ("runoff", ">", 0.0, None)},
+    "node": {"surcharge": ("depth", ">", 1.0, "crown_depth"), "flooding": ("flooding", ">", 0.0, None)},
+    "link": {"capacity": ("capacity", ">=", 1.0, None)},
+}
+
+
+def _to_datetime(days):
+    """Hilfsfunktion: SWMM-Datum (Tage seit 30.12.1899) in datetime umwandeln"""
+    # Auf Sekunden runden (Datum wird als Gleitkommazahl gespeichert)
+    return datetime.datetime(1899, 12, 30) + datetime.timedelta(seconds = round(float(days) * 86400))
+
+
+def _read_ints(f, count):
+    """Hilfsfunktion: Ganzzahlen (4 Byte) lesen"""
+    return list(struct.unpack(f'<{count}i', f.read(_record_size * count)))
+
+
+def read_out_header(out_file):
+    """Aufbau einer .out-Datei lesen (Anzahl Objekte, Namen, Eigenschaften, Variablen, Zeitschritte)
+
+    Required:
+        out_file -- Pfad zur .out-Datei
+
+    Return:
+        header -- Dictionary mit "flow_unit", "counts" {Objekttyp: Anzahl}, "names" {Objekttyp: Liste},
+                  "properties" {Objekttyp: {Eigenschaft: Array}}, "variables" {Objekttyp: Liste},
+                  "start_date", "report_step" (Sekunden), "n_periods", "results_start" und "dtype"
+                  (numpy-Datentyp eines Zeitschrittes)
+    """
+    with open(out_file, "rb") as f:
+        magic, version, flow_unit, n_sub, n_node, n_link, n_poll = _read_ints(f, 7)
+        if magic != _magic_number:
+            raise ValueError(f'Die Datei "{out_file}" ist keine SWMM-Ergebnisdatei')
+        f.seek(-6 * _record_size, 2)
+        names_start, props_start, results_start, n_periods, error_code, magic = _read_ints(f, 6)
+        if magic != _magic_number or n_periods == 0:
+            raise ValueError(f'Die Datei "{out_file}" ist unvollständig (Simulation abgebrochen?)')
+        if error_code != 0:
+            raise ValueError(f'Die Simulation wurde mit dem Fehlercode {error_code} beendet')
+
+        counts = {"subcatchment": n_sub, "node": n_node, "link": n_link}
+        # Namen der Objekte
+        f.seek(names_start)
+        names = {}
+        for object_type in OBJECT_TYPES + ["pollutant"]:
+            n_objects = counts.get(object_type, n_poll)
+            names[object_type] = []
+            for ii in range(n_objects):
+                length = _read_ints(f, 1)[0]
+                names[object_type].append(f.read(length).decode("utf-8", "replace"))
+
+        # Eigenschaften der Objekte
+        f.seek(props_start)
+        properties = {}
+        for object_type in OBJECT_TYPES:
+            n_props = _read_ints(f, 1)[0]
+            _read_ints(f, n_props)
+            values = np.frombuffer(f.read(_record_size * n_props * counts[object_type]), dtype = "<f4")
+            values = values.reshape(counts[object_type], n_props)
+            properties[object_type] = {name: values[:, ii].astype(float) for ii, name in
+                                       enumerate(PROPERTIES[object_type][:n_props])}
+
+        # Ergebnisvariablen
+        variables = {}
+        for object_type in OBJECT_TYPES + ["system"]:
+            n_vars = _read_ints(f, 1)[0]
+            codes = _read_ints(f, n_vars)
+            base = VARIABLES[object_type]
+            variables[object_type] = [base[code] if code < len(base) else names["pollutant"][code - len(base)]
+                                      for code in codes]
+        start_date = struct.unpack("<d", f.read(8))[0]
+        report_step = _read_ints(f, 1)[0]
+
+    dtype = np.dtype([("date", "<f8")] +
+                     [(object_type, "<f4", (counts[object_type], len(variables[object_type])))
+                      for object_type in OBJECT_TYPES] +
+                     [("system", "<f4", (len(variables["system"]),))])
+    return {"version": version, "flow_unit": FLOW_UNITS[flow_unit], "counts": counts, "names": names,
+            "properties": properties, "variables": variables, "start_date": _to_datetime(start_date),
+            "report_step": report_step, "n_periods": n_periods, "results_start": results_start, "dtype": dtype}
+
+
+def iter_out_blocks(out_file, header = None, block_periods = 500):
+    """Ergebnisse einer .out-Datei blockweise lesen
+
+    Required:
+        out_file -- Pfad zur .out-Datei
+    Optional:
+        header -- Aufbau der Datei (siehe read_out_header), wird bei Bedarf gelesen
+        block_periods -- Anzahl Zeitschritte pro Block
+
+    Return:
+        Generator mit numpy-Arrays (Datentyp header["dtype"]) mit jeweils höchstens block_periods Zeitschritten.
+        Die Ergebnisse eines Objekttyps haben die Form (Zeitschritte, Objekte, Variablen).
+    """
+    if header is None:
+        header = read_out_header(out_file)
+    dtype = header["dtype"]
+    with open(out_file, "rb") as f:
+        f.seek(header["results_start"])
+        remaining = header["n_periods"]
+        while remaining > 0:
+            n_read = min(block_periods, remaining)
+            block = np.frombuffer(f.read(dtype.itemsize * n_read), dtype = dtype)
+            if len(block) == 0:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def crown_depths(inp_file, node_names, node_inverts = None):
+    """Scheiteltiefe pro Knoten: Höhe des höchsten Scheitels der angeschlossenen Haltungen über der Sohle des
+    Knotens (Offset + Geom1 aus den Abschnitten CONDUITS und XSECTIONS). Eine Wassertiefe darüber entspricht
+    dem Einstau in SWMM. Bei "LINK_OFFSETS ELEVATION" werden die Offsets als Koten interpretiert.
+
+    Required:
+        inp_file -- Pfad zur .inp-Datei
+        node_names -- Liste mit den Namen der Knoten (Reihenfolge der .out-Datei)
+    Optional:
+        node_inverts -- Sohlenkoten der Knoten (nur bei "LINK_OFFSETS ELEVATION" erforderlich)
+
+    Return:
+        numpy-Array mit der Scheiteltiefe pro Knoten (np.inf bei Knoten ohne Haltung, d. h. kein Einstau)
+    """
+    sections = inpf.read_inp_sections(inp_file, ["CONDUITS", "XSECTIONS", "OPTIONS"])
+    conduits = sections["CONDUITS"]
+    xsections = sections["XSECTIONS"]
+    options = sections["OPTIONS"] or {}
+    crowns = np.full(len(node_names), -np.inf)
+    if conduits is not None and xsections is not None:
+        elevation = str(options.get("LINK_OFFSETS", "DEPTH")).upper() == "ELEVATION"
+        if elevation and node_inverts is None:
+            raise ValueError('Bei "LINK_OFFSETS ELEVATION" sind die Sohlenkoten der Knoten erforderlich')
+        position = {name: ii for ii, name in enumerate(node_names)}
+        geom1 = dict(zip(xsections["Link"], xsections["Geom1"]))
+        for node_column, offset_column in [("InletNode", "InOffset"), ("OutletNode", "OutOffset")]:
+            for link, node, offset in zip(conduits["Name"], conduits[node_column], conduits[offset_column]):
+                ii = position.get(node)
+                if ii is None or link not in geom1:
+                    continue
+                # Fehlender Offset ("*" bei Koten): Haltung liegt auf der Sohle des Knotens
+                offset = 0.0 if np.isnan(offset) else float(offset)
+                if elevation and offset != 0.0:
+                    offset = max(offset - float(node_inverts[ii]), 0.0)
+                crowns[ii] = max(crowns[ii], offset + float(geom1[link]))
+    crowns[np.isneginf(crowns)] = np.inf
+    return crowns
+
+
+def _reference_values(header, object_type, reference, inp_file):
+    """Hilfsfunktion: Werte einer Eigenschaft pro Objekt für die Schwellenwerte (siehe THRESHOLDS)"""
+    if reference == "crown_depth":
+        if not inp_file or not os.path.isfile(inp_file):
+            raise ValueError(f'Für den Einstau über dem Scheitel ist die .inp-Datei erforderlich ("{inp_file}" nicht vorhanden)')
+        return crown_depths(inp_file, header["names"][object_type], header["properties"][object_type]["invert"])
+    return header["properties"][object_type][reference]
+
+
+def _compare(values, operator, threshold):
+    """Hilfsfunktion: Werte mit einem Schwellenwert vergleichen"""
+    if operator == ">":
+        return values > threshold
+    if operator == ">=":
+        return values >= threshold
+    if operator == "<":
+        return values < threshold
+    if operator == "<=":
+        return values <= threshold
+    raise ValueError(f'Unbekannter Vergleich "{operator}"')
+
+
+def out_statistics(out_file, max_variables = None, volume_variables = None, thresholds = None, block_periods = 500,
+                   inp_file = None):
+    """Kennwerte pro Teileinzugsgebiet, Knoten und Haltung in einem Durchlauf durch die .out-Datei berechnen.
+    Pro Block werden die Kennwerte aller Objekte gleichzeitig (vektorisiert) nachgeführt.
+
+    Required:
+        out_file -- Pfad zur .out-Datei
+    Optional:
+        max_variables -- Dictionary {Objekttyp: [Variable]} für Maximum und Zeitpunkt (Default: MAX_VARIABLES)
+        volume_variables -- Dictionary {Objekttyp: [Variable]} für das Volumen (Default: VOLUME_VARIABLES)
+        thresholds -- Dictionary {Objekttyp: {Name: (Variable, Vergleich, Schwellenwert, Eigenschaft)}}
+                      für die Dauer über dem Schwellenwert (Default: THRESHOLDS)
+        block_periods -- Anzahl Zeitschritte, die gleichzeitig gelesen werden
+        inp_file -- Pfad zur .inp-Datei für "crown_depth" (Default: .inp-Datei mit dem Namen der .out-Datei)
+
+    Return:
+        tables -- Dictionary {Objekttyp: {Spalte: numpy-Array}} mit den Spalten "Name", "<Variable>_max",
+                  "<Variable>_tmax" (Zeitpunkt), "<Variable>_vol" (m3 bzw. ft3) und "<Name>_dur" (Stunden)
+    """
+    max_variables = MAX_VARIABLES if max_variables is None else max_variables
+    volume_variables = VOLUME_VARIABLES if volume_variables is None else volume_variables
+    thresholds = THRESHOLDS if thresholds is None else thresholds
+    inp_file = inp_file or os.path.splitext(out_file)[0] + ".inp"
+    header = read_out_header(out_file)
+    step = header["report_step"]
+    factor = _volume_factor[header["flow_unit"]]
+
+    # Akkumulatoren pro Objekttyp initialisieren
+    acc = {}
+    for object_type in OBJECT_TYPES:
+        n_objects = header["counts"][object_type]
+        variables = header["variables"][object_type]
+        limits = {}
+        for name, (variable, operator, threshold, reference) in thresholds.get(object_type, {}).items():
+            if reference:
+                threshold = threshold * _reference_values(header, object_type, reference, inp_file)
+            limits[name] = (variables.index(variable), operator, threshold)
+        acc[object_type] = {
+            "max": {var: (variables.index(var), np.full(n_objects, -np.inf), np.zeros(n_objects))
+                    for var in max_variables.get(object_type, []) if var in variables},
+            "vol": {var: (variables.index(var), np.zeros(n_objects))
+                    for var in volume_variables.get(object_type, []) if var in variables},
+            "dur": {name: (index, operator, threshold, np.zeros(n_objects, dtype = np.int64))
+                    for name, (index, operator, threshold) in limits.items()},
+        }
+
+    for block in iter_out_blocks(out_file, header, block_periods):
+        dates = block["date"]
+        for object_type in OBJECT_TYPES:
+            if header["counts"][object_type] == 0:
+                continue
+            values = block[object_type]
+            for var, (index, maximum, tmax) in acc[object_type]["max"].items():
+                column = values[:, :, index]
+                if var in ABS_VARIABLES.get(object_type, []):
+                    column = np.abs(column)
+                arg = column.argmax(axis = 0)
+                block_max = column[arg, np.arange(column.shape[1])]
+                better = block_max > maximum
+                maximum[better] = block_max[better]
+                tmax[better] = dates[arg[better]]
+            for var, (index, volume) in acc[object_type]["vol"].items():
+                volume += values[:, :, index].sum(axis = 0, dtype = float)
+            for name, (index, operator, threshold, count) in acc[object_type]["dur"].items():
+                count += _compare(values[:, :, index], operator, threshold).sum(axis = 0)
+
+    # Tabellen zusammenstellen
+    tables = {}
+    for object_type in OBJECT_TYPES:
+        table = {"Name": np.array(header["names"][object_type], dtype = object)}
+        for var, (index, maximum, tmax) in acc[object_type]["max"].items():
+            table[var + "_max"] = maximum
+            table[var + "_tmax"] = np.array([_to_datetime(t) if t else None for t in tmax], dtype = object)
+        for var, (index, volume) in acc[object_type]["vol"].items():
+            table[var + "_vol"] = volume * step * factor
+        for name, (index, operator, threshold, count) in acc[object_type]["dur"].items():
+            table[name + "_dur"] = count * step / 3600
+        tables[object_type] = table
+    return tables
+
+
+def _block_events(values, mask, dates, carry):
+    """Hilfsfunktion: Ereignisse (zusammenhängende Zeitschritte über dem Schwellenwert) eines Blocks für alle
+    Objekte gleichzeitig bestimmen (Lauflängenkodierung). Ereignisse, die am Ende des Blocks noch andauern,
+    werden in carry übernommen.
+
+    Required:
+        values -- Werte des Blocks (Zeitschritte, Objekte)
+        mask -- Werte über dem Schwellenwert (Zeitschritte, Objekte)
+        dates -- SWMM-Datum der Zeitschritte
+        carry -- Dictionary mit den offenen Ereignissen pro Objekt ("open", "start", "count", "peak", "tpeak") und
+                 dem Datum des letzten Zeitschrittes vom vorherigen Block ("last")
+
+    Return:
+        Liste mit abgeschlossenen Ereignissen (Objekt, Beginn, Ende, Anzahl Zeitschritte, Maximum, Zeitpunkt Maximum)
+    """
+    n_periods, n_objects = mask.shape
+    width = n_periods + 2
+    # Pro Objekt eine Zeile: [offenes Ereignis aus vorherigem Block, Zeitschritte des Blocks, False]
+    flags = np.zeros((n_objects, width), dtype = np.int8)
+    flags[:, 0] = carry["open"]
+    flags[:, 1:-1] = mask.T
+    padded = np.full((n_objects, width), -np.inf)
+    padded[:, 0] = np.where(carry["open"], carry["peak"], -np.inf)
+    padded[:, 1:-1] = values.T
+    flags = flags.ravel()
+    padded = padded.ravel()
+    # Werte ausserhalb der Ereignisse nicht berücksichtigen (das letzte Segment von reduceat reicht bis zum Ende
+    # des Arrays und würde sonst die Werte der folgenden Objekte enthalten)
+    padded[flags == 0] = -np.inf
+    change = np.diff(np.concatenate([[0], flags]))
+    starts = np.flatnonzero(change == 1)
+    ends = np.flatnonzero(change == -1)
+    time_pad = np.concatenate([[carry["last"]], dates, [np.nan]])
+    carry["last"] = dates[-1]
+    if len(starts) == 0:
+        carry["open"][:] = False
+        return []
+    lengths = ends - starts
+    rows = starts // width
+    cols = starts % width
+    end_cols = ends % width
+
+    # Maximum und Zeitpunkt vom Maximum pro Ereignis
+    peaks = np.maximum.reduceat(padded, np.column_stack([starts, ends]).ravel()[:-1])[::2]
+    segment = np.repeat(np.arange(len(starts)), lengths)
+    positions = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+    is_peak = padded[positions] == peaks[segment]
+    first_peak = np.full(len(starts), -1)
+    peak_positions = positions[is_peak][::-1]
+    first_peak[segment[is_peak][::-1]] = peak_positions
+    peak_cols = first_peak % width
+    tpeaks = np.where(peak_cols == 0, carry["tpeak"][rows], time_pad[peak_cols])
+
+    # Ereignisse aus dem vorherigen Block fortsetzen
+    carried = cols == 0
+    begin = np.where(carried, carry["start"][rows], time_pad[np.maximum(cols, 1)])
+    counts = lengths - carried + np.where(carried, carry["count"][rows], 0)
+
+    # Ereignisse, die bis zum Ende des Blocks andauern, bleiben offen
+    still_open = end_cols == width - 1
+    carry["open"][:] = False
+    carry["open"][rows[still_open]] = True
+    carry["start"][rows[still_open]] = begin[still_open]
+    carry["count"][rows[still_open]] = counts[still_open]
+    carry["peak"][rows[still_open]] = peaks[still_open]
+    carry["tpeak"][rows[still_open]] = tpeaks[still_open]
+
+    closed = ~still_open
+    last = time_pad[end_cols[closed] - 1]
+    return list(zip(rows[closed], begin[closed], last, counts[closed], peaks[closed], tpeaks[closed]))
+
+
+def out_events(out_file, thresholds = None, block_periods = 500, min_periods = 1, inp_file = None):
+    """Ereignisse über einem Schwellenwert (z. B. Einstau, Überflutung, Vollfüllung) für alle Objekte in einem
+    Durchlauf durch die .out-Datei bestimmen. Pro Block werden die Zeitschritte über dem Schwellenwert
+    vektorisiert verglichen und lauflängenkodiert.
+
+    Required:
+        out_file -- Pfad zur .out-Datei
+    Optional:
+        thresholds -- Dictionary {Objekttyp: {Name: (Variable, Vergleich, Schwellenwert, Eigenschaft)}}
+                      (Default: THRESHOLDS, siehe out_statistics)
+        block_periods -- Anzahl Zeitschritte, die gleichzeitig gelesen werden
+        min_periods -- Minimale Anzahl Zeitschritte eines Ereignisses
+        inp_file -- Pfad zur .inp-Datei für "crown_depth" (Default: .inp-Datei mit dem Namen der .out-Datei)
+
+    Return:
+        tables -- Dictionary {Objekttyp: {Spalte: numpy-Array}} mit einer Zeile pro Ereignis und den Spalten
+                  "Name", "event" (Name des Schwellenwerts), "start", "end" (letzter Zeitschritt über dem
+                  Schwellenwert), "duration" (Stunden), "peak" und "peak_time"
+    """
+    thresholds = THRESHOLDS if thresholds is None else thresholds
+    inp_file = inp_file or os.path.splitext(out_file)[0] + ".inp"
+    header = read_out_header(out_file)
+    step = header["report_step"]
+
+    # Schwellenwerte und offene Ereignisse pro Objekttyp und Schwellenwert
+    limits = []
+    for object_type in OBJECT_TYPES:
+        n_objects = header["counts"][object_type]
+        if n_objects == 0:
+            continue
+        variables = header["variables"][object_type]
+        for name, (variable, operator, threshold, reference) in thresholds.get(object_type, {}).items():
+            if reference:
+                threshold = threshold * _reference_values(header, object_type, reference, inp_file)
+            carry = {"open": np.zeros(n_objects, dtype = bool), "start": np.zeros(n_objects),
+                     "count": np.zeros(n_objects, dtype = np.int64), "peak": np.zeros(n_objects),
+                     "tpeak": np.zeros(n_objects), "last": np.nan}
+            limits.append((object_type, name, variables.index(variable), operator, threshold, carry))
+
+    events = {object_type: [] for object_type in OBJECT_TYPES}
+    last_date = None
+    for block in iter_out_blocks(out_file, header, block_periods):
+        last_date = block["date"][-1]
+        for object_type, name, index, operator, threshold, carry in limits:
+            values = block[object_type][:, :, index].astype(float)
+            mask = _compare(values, operator, threshold)
+            events[object_type].extend([(name,) + event for event in _block_events(values, mask, block["date"], carry)])
+
+    # Ereignisse, die bis zum Ende der Simulation andauern
+    for object_type, name, index, operator, threshold, carry in limits:
+        for row in np.flatnonzero(carry["open"]):
+            events[object_type].append((name, row, carry["start"][row], last_date, carry["count"][row],
+                                        carry["peak"][row], carry["tpeak"][row]))
+
+    tables = {}
+    for object_type in OBJECT_TYPES:
+        rows = [event for event in events[object_type] if event[4] >= min_periods]
+        rows.sort(key = lambda event: (event[1], event[0], event[2]))
+        names = header["names"][object_type]
+        tables[object_type] = {
+            "Name": np.array([names[event[1]] for event in rows], dtype = object),
+            "event": np.array([event[0] for event in rows], dtype = object),
+            "start": np.array([_to_datetime(event[2]) for event in rows], dtype = object),
+            "end": np.array([_to_datetime(event[3]) for event in rows], dtype = object),
+            "duration": np.array([event[4] * step / 3600 for event in rows], dtype = float),
+            "peak": np.array([event[5] for event in rows], dtype = float),
+            "peak_time": np.array([_to_datetime(event[6]) for event in rows], dtype = object),
+        }
+    return tables
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für die Ausführung der Skripte als Pipeline: Die Skripte (Stufen) werden als gerichteter
+# azyklischer Graph mit Abhängigkeiten und deklarierten Eingaben (Parameter der JSON-Datei, externe
+# Datensätze, Vorlagen) beschrieben. Pro Stufe wird ein Fingerabdruck (SHA-256) der Eingaben und der
+# Fingerabdrücke der vorgelagerten Stufen berechnet. Stufen, deren Fingerabdruck seit der letzten
+# erfolgreichen Ausführung unverändert ist, werden übersprungen. Stufen ohne gegenseitige Abhängigkeit
+# werden parallel (in separaten Prozessen) ausgeführt. Optional werden die Stufen an einen langlebigen
+# Worker-Prozess übergeben (siehe worker_functions), der arcpy nur einmal lädt.
+# -----------------------------------------------------------------------------
+"""pipeline_functions"""
+import os, sys, json, time, hashlib, subprocess, datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import worker_functions as wf
+
+_block_size = 1024 * 1024
+
+
+def fingerprint_value(value):
+    """Fingerabdruck eines JSON-Wertes (unabhängig von der Reihenfolge der Schlüssel)"""
+    text = json.dumps(value, sort_keys = True, ensure_ascii = False, default = str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def fingerprint_path(path):
+    """Fingerabdruck einer Datei (Inhalt) oder eines Ordners, z. B. File-Geodatabase (Name, Grösse und
+    Änderungszeit aller Dateien, der Inhalt wird bei Ordnern aus Zeitgründen nicht gelesen)
+
+    Return:
+        Fingerabdruck als Hex-String ("missing" falls der Pfad nicht vorhanden ist)
+    """
+    if os.path.isfile(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(_block_size), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                # Sperrdateien einer File-Geodatabase ignorieren
+                if name.endswith(".lock"):
+                    continue
+                file_path = os.path.join(root, name)
+                stat = os.stat(file_path)
+                digest.update(f'{os.path.relpath(file_path, path)}|{stat.st_size}|{stat.st_mtime_ns}\n'.encode("utf-8"))
+        return digest.hexdigest()
+    return "missing"
+
+
+def stage_inputs(stage, settings):
+    """Eingaben einer Stufe aus der JSON-Datei zusammenstellen
+
+    Required:
+        stage -- Dictionary mit "settings" (Parameter), "paths" (Parameter mit Pfaden zu externen Dateien oder
+                 Workspaces) und optional "files" (Funktion settings -> Liste mit zusätzlichen Pfaden)
+        settings -- Parameter der JSON-Datei
+
+    Return:
+        inputs -- Dictionary {"settings": {Parameter: Wert}, "paths": {Pfad: Fingerabdruck}}
+    """
+    values = {key: settings.get(key) for key in stage.get("settings", [])}
+    paths = [settings[key] for key in stage.get("paths", []) if settings.get(key)]
+    if "files" in stage:
+        paths += list(stage["files"](settings))
+    return {"settings": values, "paths": {path: fingerprint_path(path) for path in paths}}
+
+
+def topological_order(stages):
+    """Stufen nach den Abhängigkeiten sortieren (Kahn)
+
+    Required:
+        stages -- Liste mit Dictionaries ("name", "depends")
+
+    Return:
+        Liste mit den Namen der Stufen
+    """
+    names = [stage["name"] for stage in stages]
+    depends = {stage["name"]: list(stage.get("depends", [])) for stage in stages}
+    for name, deps in depends.items():
+        for dep in deps:
+            if dep not in depends:
+                raise ValueError(f'Stufe "{name}" hängt von der unbekannten Stufe "{dep}" ab')
+    order = []
+    remaining = {name: len(deps) for name, deps in depends.items()}
+    ready = [name for name in names if remaining[name] == 0]
+    while ready:
+        name = ready.pop(0)
+        order.append(name)
+        for other in names:
+            if name in depends[other]:
+                remaining[other] -= 1
+                if remaining[other] == 0:
+                    ready.append(other)
+    if len(order) != len(names):
+        raise ValueError('Die Abhängigkeiten der Stufen enthalten einen Zyklus')
+    return order
+
+
+def compute_fingerprints(stages, settings):
+    """Fingerabdruck pro Stufe berechnen (Eingaben und Fingerabdrücke der vorgelagerten Stufen)
+
+    Return:
+        fingerprints -- Dictionary {Stufe: Fingerabdruck}
+        inputs -- Dictionary {Stufe: Eingaben (siehe stage_inputs)}
+    """
+    by_name = {stage["name"]: stage for stage in stages}
+    fingerprints = {}
+    inputs = {}
+    for name in topological_order(stages):
+        stage = by_name[name]
+        inputs[name] = stage_inputs(stage, settings)
+        upstream = {dep: fingerprints[dep] for dep in stage.get("depends", [])}
+        fingerprints[name] = fingerprint_value({"script": stage["script"], "inputs": inputs[name], "upstream": upstream})
+    return fingerprints, inputs
+
+
+def load_state(state_file):
+    """Zustand der letzten Ausführung lesen ({Stufe: {"fingerprint", "status", "finished", "duration"}})"""
+    if not os.path.isfile(state_file):
+        return {}
+    try:
+        with open(state_file, encoding = "utf-8") as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def save_state(state_file, state):
+    """Zustand der Ausführung speichern"""
+    with open(state_file, "w", encoding = "utf-8") as f:
+        json.dump(state, f, ensure_ascii = False, indent = 1)
+
+
+def run_script(script, settings_file, cwd, output_file = None, args = None):
+    """Skript in einem eigenen Prozess mit der JSON-Datei als Parameter ausführen (optional mit weiteren
+    Parametern "args", z. B. ["--resume"])
+
+    Return:
+        returncode -- Rückgabewert des Prozesses (0 = erfolgreich)
+    """
+    command = [sys.executable, script, settings_file] + list(args or [])
+    if output_file:
+        with open(output_file, "w", encoding = "utf-8") as f:
+            process = subprocess.run(command, cwd = cwd, stdout = f, stderr = subprocess.STDOUT)
+    else:
+        process = subprocess.run(command, cwd = cwd)
+    return process.returncode
+
+
+def run_worker_job(stage, settings_file, worker, output_file = None, args = None):
+    """Stufe im Worker-Prozess ausführen (siehe worker_functions.serve)
+
+    Return:
+        returncode -- Rückgabewert des Skripts (0 = erfolgreich)
+    """
+    if output_file:
+        with open(output_file, "w", encoding = "utf-8") as f:
+            return wf.submit_job(stage, settings_file, address = worker, output = f.write, args = args)
+    return wf.submit_job(stage, settings_file, address = worker, args = args)
+
+
+def upstream_fingerprint(stage, state):
+    """Fingerabdruck der vorgelagerten Stufen (Fingerabdruck und Zeitpunkt der letzten Ausführung), wird den
+    Skripten mit "--upstream" übergeben und im Checkpoint gespeichert (siehe checkpoint_functions)"""
+    return fingerprint_value({dep: [state.get(dep, {}).get("fingerprint"), state.get(dep, {}).get("finished")]
+                              for dep in stage.get("depends", [])})
+
+
+def run_pipeline(stages, settings_file, state_file, root, selected = None, force = False, jobs = 2,
+                 dry_run = False, output_folder = None, logger = None, worker = None, resume = False):
+    """Stufen gemäss Abhängigkeiten ausführen. Unveränderte Stufen werden übersprungen, bereite Stufen ohne
+    gegenseitige Abhängigkeit parallel ausgeführt. Schlägt eine Stufe fehl, werden die nachgelagerten Stufen
+    nicht ausgeführt.
+
+    Required:
+        stages -- Liste mit den Stufen (Dictionaries mit "name", "script", "depends", "settings", "paths")
+        settings_file -- Pfad zur JSON-Datei mit den Parametern
+        state_file -- Pfad zur JSON-Datei mit dem Zustand der letzten Ausführung
+        root -- Ordner, in dem die Skripte ausgeführt werden (relative Pfade der JSON-Datei)
+    Optional:
+        selected -- Liste mit den auszuführenden Stufen (Default: alle Stufen ohne "optional")
+        force -- Falls True werden alle ausgewählten Stufen ausgeführt
+        jobs -- Maximale Anzahl parallel ausgeführter Stufen
+        dry_run -- Falls True wird nur ausgegeben, welche Stufen ausgeführt würden
+        output_folder -- Ordner für die Konsolenausgabe der Stufen ("pipeline_<Stufe>.txt")
+        logger -- Logger für die Ausgabe von Meldungen
+        worker -- Adresse eines Worker-Prozesses ("host:port"), der die Stufen ausführt (Default: None = ein
+                  neuer Prozess pro Stufe). Der Worker führt die Stufen nacheinander aus.
+        resume -- Falls True werden fehlgeschlagene Stufen mit "--resume" gestartet und setzen den abgebrochenen
+                  Lauf beim letzten Checkpoint fort (siehe checkpoint_functions). Wurde eine vorgelagerte Stufe in
+                  diesem Lauf ausgeführt, wird die Stufe neu begonnen.
+
+    Return:
+        results -- Dictionary {Stufe: "ok", "skipped", "failed", "blocked", "dry_run" (Probelauf der Stufe, siehe
+                   "dry_run" der Stufe) oder "pending" (dry_run bzw. nach einem Probelauf einer vorgelagerten Stufe)}
+    """
+    log = logger.info if logger else print
+    with open(settings_file, encoding = "utf-8") as f:
+        settings = json.load(f)
+    by_name = {stage["name"]: stage for stage in stages}
+    order = topological_order(stages)
+    if selected is None:
+        selected = [name for name in order if not by_name[name].get("optional")]
+    unknown = [name for name in selected if name not in by_name]
+    if unknown:
+        raise ValueError(f'Unbekannte Stufe "{unknown[0]}" (vorhanden: {", ".join(order)})')
+    fingerprints, inputs = compute_fingerprints(stages, settings)
+    state = load_state(state_file)
+
+    # Zu erledigende Stufen bestimmen
+    results = {}
+    todo = []
+    for name in order:
+        if name not in selected:
+            continue
+        last = state.get(name, {})
+        missing = [path for path, fp in inputs[name]["paths"].items() if fp == "missing"]
+        if not force and last.get("status") == "ok" and last.get("fingerprint") == fingerprints[name]:
+            results[name] = "skipped"
+            log(f'Stufe "{name}" unverändert, wird übersprungen')
+        elif missing:
+            results[name] = "blocked"
+            log(f'Stufe "{name}" wird nicht ausgeführt, Eingabe "{missing[0]}" ist nicht vorhanden')
+        else:
+            todo.append(name)
+    if dry_run:
+        for name in todo:
+            results[name] = "pending"
+            log(f'Stufe "{name}" würde ausgeführt ({by_name[name]["script"]})')
+        return results
+
+    running = {}
+    with ThreadPoolExecutor(max_workers = max(1, jobs)) as executor:
+        while todo or running:
+            # Bereite Stufen starten (vorgelagerte Stufen erledigt oder nicht ausgewählt)
+            for name in list(todo):
+                deps = [dep for dep in by_name[name].get("depends", []) if dep in selected]
+                if any(results.get(dep) in ("failed", "blocked") for dep in deps):
+                    todo.remove(name)
+                    results[name] = "blocked"
+                    log(f'Stufe "{name}" wird nicht ausgeführt, eine vorgelagerte Stufe ist fehlgeschlagen')
+                elif any(results.get(dep) in ("dry_run", "pending") for dep in deps):
+                    todo.remove(name)
+                    results[name] = "pending"
+                    log(f'Stufe "{name}" wird nicht ausgeführt, eine vorgelagerte Stufe war ein Probelauf')
+                elif all(results.get(dep) in ("ok", "skipped") for dep in deps):
+                    todo.remove(name)
+                    output_file = os.path.join(output_folder, f'pipeline_{name}.txt') if output_folder else None
+                    log(f'Stufe "{name}" starten ({by_name[name]["script"]})')
+                    args = ["--upstream", upstream_fingerprint(by_name[name], state)]
+                    if resume:
+                        upstream_run = [dep for dep in by_name[name].get("depends", []) if results.get(dep) in ("ok", "dry_run")]
+                        if state.get(name, {}).get("status") == "failed":
+                            if upstream_run:
+                                log(f'Stufe "{name}" wird neu begonnen, die vorgelagerte Stufe "{upstream_run[0]}" wurde ausgeführt')
+                            else:
+                                args.append("--resume")
+                    if worker:
+                        future = executor.submit(run_worker_job, name, settings_file, worker, output_file, args)
+                    else:
+                        future = executor.submit(run_script, by_name[name]["script"], settings_file, root, output_file, args)
+                    running[future] = (name, time.time())
+            if not running:
+                continue
+            done, pending = wait(list(running), return_when = FIRST_COMPLETED)
+            for future in done:
+                name, start_time = running.pop(future)
+                try:
+                    returncode = future.result()
+                except Exception as e:
+                    returncode = -1
+                    log(f'Stufe "{name}" konnte nicht gestartet werden: {e}')
+                duration = round(time.time() - start_time, 1)
+                if returncode == 0 and str(settings.get(by_name[name].get("dry_run"), "False")) == "True":
+                    # Probelauf: nichts geschrieben, die Stufe wird beim nächsten Lauf wieder ausgeführt
+                    results[name] = "dry_run"
+                    log(f'Probelauf der Stufe "{name}" in {duration} sec. abgeschlossen')
+                elif returncode == 0:
+                    results[name] = "ok"
+                    log(f'Stufe "{name}" in {duration} sec. abgeschlossen')
+                else:
+                    results[name] = "failed"
+                    if logger:
+                        logger.error(f'Stufe "{name}" mit Rückgabewert {returncode} fehlgeschlagen')
+                    else:
+                        print(f'Stufe "{name}" mit Rückgabewert {returncode} fehlgeschlagen')
+                state[name] = {"fingerprint": fingerprints[name], "status": results[name], "duration": duration,
+                               "finished": datetime.datetime.now().isoformat(timespec = "seconds")}
+                save_state(state_file, state)
+    return results
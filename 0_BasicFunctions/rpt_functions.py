@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für das Lesen von SWMM-Berichtsdateien (.rpt). Die Datei wird zeilenweise in einem
+# einzigen Durchlauf gelesen und nur die gewünschten Tabellen (z. B. "Link Flow Summary") werden in
+# Spalten (numpy-Arrays) umgewandelt. Sobald alle gewünschten Tabellen gefunden wurden, wird das
+# Lesen abgebrochen. Die Spaltenbezeichnungen werden aus den Kopfzeilen der Tabellen zusammengesetzt
+# (z. B. "Maximum_|Flow|_CMS"), Zeitangaben "days hr:min" werden in Tage umgerechnet.
+# Die Tabellen können als CSV, Parquet (benötigt pyarrow) oder Excel (langsam) gespeichert werden.
+# -----------------------------------------------------------------------------
+"""rpt_functions"""
+import re, csv
+import numpy as np
+
+# Bezeichnung der Tabellen (Titel im Bericht in Kleinbuchstaben mit "_")
+SUMMARY_TABLES = ["subcatchment_runoff_summary", "node_depth_summary", "node_inflow_summary", "node_surcharge_summary",
+                  "node_flooding_summary", "outfall_loading_summary", "link_flow_summary", "flow_classification_summary",
+                  "conduit_surcharge_summary"]
+
+# Spalten mit Zeitangaben ("days hr:min" -> zwei Werte pro Zeile)
+_time_unit = "days hr:min"
+_group_pattern = re.compile(r'\S+(?: \S+)*')
+
+
+def table_key(title):
+    """Titel einer Tabelle im Bericht in die Bezeichnung der Tabelle umwandeln ("Link Flow Summary" -> "link_flow_summary")"""
+    return "_".join(title.strip().lower().split())
+
+
+def _groups(line):
+    """Hilfsfunktion: Wörter einer Kopfzeile, die durch höchstens ein Leerzeichen getrennt sind, mit Position"""
+    return [(match.start(), match.end(), match.group()) for match in _group_pattern.finditer(line)]
+
+
+def _column_names(header_lines):
+    """Hilfsfunktion: Spaltenbezeichnungen aus den Kopfzeilen einer Tabelle zusammensetzen. Die Kopfzeilen
+    werden von unten nach oben verarbeitet: Die Wörter werden der Spalte mit der grössten Überlappung
+    zugeordnet (Überschriften mit "---" allen überlappenden Spalten). Wörter ohne Überlappung (z. B. Spalten
+    ohne Einheit) ergeben eine neue Spalte."""
+    # Spalten als Liste [Start, Ende, [Wörter von unten nach oben]]
+    columns = [[start, end, [text]] for start, end, text in _groups(header_lines[-1])]
+    for line in reversed(header_lines[:-1]):
+        for start, end, text in _groups(line):
+            overlaps = [min(end, column[1]) - max(start, column[0]) for column in columns]
+            if text.startswith("-"):
+                text = text.strip("- ")
+                for ii, overlap in enumerate(overlaps):
+                    if overlap > 0 and text:
+                        columns[ii][2].append(text)
+            elif max(overlaps) > 0:
+                columns[overlaps.index(max(overlaps))][2].append(text)
+            else:
+                columns.append([start, end, [text]])
+                columns.sort(key = lambda column: column[0])
+    return ["_".join(reversed(column[2])) for column in columns]
+
+
+def _to_days(days, hr_min):
+    """Hilfsfunktion: Zeitangabe "days hr:min" in Tage umrechnen"""
+    hours, minutes = hr_min.split(":")
+    return int(days) + int(hours)/24 + int(minutes)/1440
+
+
+def _to_array(values):
+    """Hilfsfunktion: Spalte als numpy-Array (float falls alle Werte Zahlen sind, ansonsten object)"""
+    try:
+        return np.array([np.nan if value is None else float(value) for value in values], dtype = float)
+    except ValueError:
+        return np.array(values, dtype = object)
+
+
+def _parse_table(lines, columns):
+    """Hilfsfunktion: Datenzeilen einer Tabelle in Spalten umwandeln"""
+    time_cols = {ii for ii, column in enumerate(columns) if column.endswith(_time_unit)}
+    values = [[] for column in columns]
+    for line in lines:
+        tokens = line.split()
+        row = []
+        pos = 0
+        for ii in range(len(columns)):
+            if ii in time_cols and pos + 1 < len(tokens) and ":" in tokens[pos + 1]:
+                row.append(_to_days(tokens[pos], tokens[pos + 1]))
+                pos += 2
+            elif pos < len(tokens):
+                row.append(tokens[pos])
+                pos += 1
+            else:
+                row.append(None)
+        for ii, value in enumerate(row):
+            values[ii].append(value)
+    table = {}
+    for ii, column in enumerate(columns):
+        table[column] = np.array(values[ii], dtype = object) if ii == 0 else _to_array(values[ii])
+    return table
+
+
+def read_rpt_tables(rpt_file, tables = None, encoding = "utf-8"):
+    """Tabellen aus einer SWMM-Berichtsdatei (.rpt) in einem Durchlauf lesen.
+
+    Required:
+        rpt_file -- Pfad zur .rpt-Datei
+    Optional:
+        tables -- Liste mit den Bezeichnungen der Tabellen (siehe SUMMARY_TABLES). Default: alle Tabellen
+        encoding -- Zeichenkodierung der Datei
+
+    Return:
+        Dictionary {Tabelle: {Spalte: numpy-Array}}. Nicht vorhandene Tabellen (z. B. "node_flooding_summary"
+        falls kein Knoten überflutet wird) sind nicht enthalten.
+    """
+    wanted = set(tables) if tables else None
+    result = {}
+    # Zustand: "search" (Titel suchen), "header" (Kopfzeilen), "data" (Datenzeilen)
+    state = "search"
+    previous = ""
+    key = None
+    header_lines = []
+    data_lines = []
+    with open(rpt_file, encoding = encoding, errors = "replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            stripped = line.strip()
+            if state == "search":
+                # Titel steht zwischen zwei Zeilen mit "*"
+                if previous.startswith("***") and stripped and not stripped.startswith("*"):
+                    candidate = table_key(stripped)
+                    if candidate in SUMMARY_TABLES and (wanted is None or candidate in wanted):
+                        key = candidate
+                        star_lines = 0
+                        state = "title"
+                previous = stripped
+            elif state == "title":
+                # Bis zur ersten Linie "---" (Beginn der Kopfzeilen) überspringen
+                if stripped.startswith("---"):
+                    header_lines = []
+                    state = "header"
+                elif stripped.startswith("***"):
+                    star_lines += 1
+                    if star_lines > 1:
+                        # Nächster Abschnitt beginnt ohne Tabelle
+                        state = "search"
+                        previous = stripped
+            elif state == "header":
+                if stripped.startswith("---") and not _groups(line)[1:]:
+                    data_lines = []
+                    state = "data"
+                else:
+                    header_lines.append(line)
+            elif state == "data":
+                if not stripped or stripped.startswith("---"):
+                    result[key] = _parse_table(data_lines, _column_names(header_lines))
+                    state = "search"
+                    previous = stripped
+                    if wanted is not None and wanted.issubset(result):
+                        # Alle gewünschten Tabellen gefunden
+                        break
+                else:
+                    data_lines.append(line)
+    if state == "data":
+        result[key] = _parse_table(data_lines, _column_names(header_lines))
+    return result
+
+
+def write_table_csv(table, out_file, delimiter = ";"):
+    """Tabelle (Dictionary {Spalte: Array}) als CSV-Datei speichern"""
+    columns = list(table)
+    with open(out_file, "w", newline = "", encoding = "utf-8") as f:
+        writer = csv.writer(f, delimiter = delimiter)
+        writer.writerow(columns)
+        writer.writerows(zip(*[table[column].tolist() for column in columns]))
+
+
+def write_table_parquet(table, out_file):
+    """Tabelle (Dictionary {Spalte: Array}) als Parquet-Datei speichern (benötigt pandas und pyarrow)"""
+    import pandas as pd
+    pd.DataFrame(table).to_parquet(out_file, index = False)
+
+
+def write_table_xlsx(table, out_file, sheet_name):
+    """Tabelle (Dictionary {Spalte: Array}) als Excel-Datei speichern (benötigt pandas und openpyxl, langsam)"""
+    import pandas as pd
+    pd.DataFrame(table).to_excel(out_file, sheet_name = sheet_name, index = False)
+
+
+def write_table(table, out_base, table_name, out_format):
+    """Tabelle im angegebenen Format ("csv", "parquet" oder "xlsx") speichern
+
+    Required:
+        table -- Dictionary {Spalte: Array}
+        out_base -- Pfad der Ausgabedatei ohne Dateiendung
+        table_name -- Bezeichnung der Tabelle (Name des Tabellenblattes bei Excel)
+        out_format -- Ausgabeformat
+
+    Return:
+        out_file -- Pfad der Ausgabedatei
+    """
+    out_file = out_base + "." + out_format
+    if out_format == "csv":
+        write_table_csv(table, out_file)
+    elif out_format == "parquet":
+        write_table_parquet(table, out_file)
+    elif out_format == "xlsx":
+        write_table_xlsx(table, out_file, table_name[:31])
+    else:
+        raise ValueError(f'Unbekanntes Ausgabeformat "{out_format}"')
+    return out_file
@@ -0,0 +1,826 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Speicher-Schicht für die Skripte: Lesen, Aktualisieren und Einfügen von Zeilen (Feldlisten, Where-Clauses,
+# Geometrie mit "SHAPE@"), Schema (Felder auflisten, hinzufügen, löschen) und Transaktionen mit zwei
+# Backends:
+# - "arcpy": File-Geodatabase bzw. alle Workspaces von arcpy (die Cursors sind die arcpy.da-Cursors)
+# - "sqlite": GeoPackage (.gpkg) bzw. SQLite-Datei (.sqlite) mit dem Modul sqlite3 der Standardbibliothek.
+#   Die Geometrie wird als GeoPackage-Binary gespeichert, pro Feature-Klasse wird ein R-Tree-Index
+#   ("rtree_<Tabelle>_geom") nachgeführt. Die Geometrien entsprechen geometry_functions.Geometry.
+# Das Backend wird anhand der Dateiendung des Workspaces gewählt. Auf Rechnern ohne ArcGIS (z. B. Linux)
+# kann damit mit einem GeoPackage gearbeitet werden, ohne die Skripte anzupassen.
+#
+# Feldnamen mit "@": "OID@", "SHAPE@" (Geometrie), "SHAPE@XY" (Schwerpunkt bzw. Punkt), "SHAPE@JSON",
+# "SHAPE@WKT", "SHAPE@WKB", "SHAPE@LENGTH" und "SHAPE@AREA". "Shape_Length" und "Shape_Area" werden bei
+# GeoPackages aus der Geometrie berechnet.
+# -----------------------------------------------------------------------------
+"""storage_functions"""
+import os, sys, sqlite3, contextlib
+from collections import namedtuple
+import geometry_functions as gf
+import logging_functions as lf
+
+# Dateiendungen, für die das Backend "sqlite" verwendet wird
+SQLITE_EXTENSIONS = (".gpkg", ".sqlite", ".db")
+# Feld mit der ObjectID bzw. Geometrie in GeoPackages
+OID_FIELD = "fid"
+GEOMETRY_FIELD = "geom"
+# Feldtypen (arcpy.management.AddField) -> Datentyp im GeoPackage
+SQLITE_TYPES = {"TEXT": "TEXT", "FLOAT": "FLOAT", "DOUBLE": "DOUBLE", "SHORT": "SMALLINT", "LONG": "INTEGER",
+                "BIGINTEGER": "INTEGER", "DATE": "DATETIME", "BLOB": "BLOB"}
+# Datentyp im GeoPackage -> Feldtyp (wie arcpy.Field.type)
+FIELD_TYPES = {"TEXT": "String", "FLOAT": "Single", "REAL": "Double", "DOUBLE": "Double", "SMALLINT": "SmallInteger",
+               "MEDIUMINT": "Integer", "INTEGER": "Integer", "INT": "Integer", "DATETIME": "Date", "DATE": "Date",
+               "BLOB": "Blob"}
+# Feldtypen (arcpy.management.AddField) -> Feldtyp (wie arcpy.Field.type), für den Vergleich mit vorhandenen Feldern
+ARCPY_FIELD_TYPES = {"TEXT": "String", "FLOAT": "Single", "DOUBLE": "Double", "SHORT": "SmallInteger", "LONG": "Integer",
+                     "BIGINTEGER": "BigInteger", "DATE": "Date", "BLOB": "Blob", "GUID": "Guid", "RASTER": "Raster"}
+# Geometrietypen (arcpy) -> GeoPackage
+GEOMETRY_TYPES = {"POINT": "POINT", "MULTIPOINT": "MULTIPOINT", "POLYLINE": "MULTILINESTRING", "POLYGON": "MULTIPOLYGON"}
+
+# Feld einer Tabelle (gleiche Attribute wie arcpy.Field)
+Field = namedtuple("Field", ["name", "type", "length", "editable"])
+
+# Aktueller Workspace (siehe set_workspace) und offene Verbindungen {Pfad: sqlite3.Connection}
+_workspace = None
+_connections = {}
+# Workspaces mit laufender Transaktion (siehe transaction)
+_transactions = set()
+
+
+def _arcpy():
+    """Hilfsfunktion: arcpy importieren (erst bei Bedarf, damit das Modul auch ohne ArcGIS geladen werden kann)"""
+    import arcpy
+    return arcpy
+
+
+def is_sqlite(path):
+    """True falls der Pfad (Workspace oder Datensatz) in einem GeoPackage bzw. einer SQLite-Datei liegt"""
+    if path is None:
+        return False
+    path = str(path).lower()
+    return any(path.endswith(ext) or (ext + os.sep) in path or (ext + "/") in path for ext in SQLITE_EXTENSIONS)
+
+
+def set_workspace(workspace):
+    """Aktuellen Workspace festlegen (wie arcpy.env.workspace, wird beim Backend "arcpy" auch dort gesetzt)"""
+    global _workspace
+    _workspace = workspace
+    if not is_sqlite(workspace):
+        _arcpy().env.workspace = workspace
+
+
+def get_workspace():
+    """Aktueller Workspace (siehe set_workspace)"""
+    if _workspace is None and "arcpy" in sys.modules:
+        return sys.modules["arcpy"].env.workspace
+    return _workspace
+
+
+def backend(dataset = None):
+    """Backend ("arcpy" oder "sqlite") für einen Datensatz bzw. den aktuellen Workspace"""
+    if dataset is not None and is_sqlite(dataset):
+        return "sqlite"
+    if dataset is not None and (os.path.isabs(str(dataset)) or str(dataset).startswith("memory")):
+        return "arcpy"
+    return "sqlite" if is_sqlite(get_workspace()) else "arcpy"
+
+
+def _split(dataset):
+    """Hilfsfunktion: Datensatz im GeoPackage in (Pfad zur Datei, Tabellenname) aufteilen"""
+    dataset = str(dataset)
+    lower = dataset.lower()
+    for ext in SQLITE_EXTENSIONS:
+        position = lower.find(ext + os.sep)
+        if position < 0:
+            position = lower.find(ext + "/")
+        if position >= 0:
+            return dataset[:position + len(ext)], dataset[position + len(ext) + 1:]
+    return get_workspace(), dataset
+
+
+def dataset_workspace(dataset):
+    """Workspace eines Datensatzes (GeoPackage bzw. übergeordneter Ordner eines Pfades, sonst aktueller Workspace)"""
+    if is_sqlite(dataset):
+        return _split(dataset)[0]
+    if os.path.isabs(str(dataset)):
+        return os.path.dirname(str(dataset))
+    return get_workspace()
+
+
+def parameter_as_text(index):
+    """Parameter des Skripts (wie arcpy.GetParameterAsText, ohne arcpy aus sys.argv)"""
+    try:
+        return _arcpy().GetParameterAsText(index)
+    except ImportError:
+        return sys.argv[index + 1] if len(sys.argv) > index + 1 else ""
+
+
+## GeoPackage
+def _quote(name):
+    """Hilfsfunktion: Bezeichner für SQL in Anführungszeichen"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def connect(path):
+    """Verbindung zu einem GeoPackage öffnen (wird wiederverwendet, bis close_workspace aufgerufen wird)"""
+    path = os.path.abspath(path)
+    if path not in _connections:
+        if not os.path.isfile(path):
+            raise ValueError(f'GeoPackage "{path}" ist nicht vorhanden (create_workspace)')
+        conn = sqlite3.connect(path, isolation_level = None)
+        conn.execute("PRAGMA foreign_keys = ON")
+        _connections[path] = conn
+    return _connections[path]
+
+
+def close_workspace(path = None):
+    """Verbindung zu einem bzw. allen GeoPackages schliessen"""
+    paths = [os.path.abspath(path)] if path else list(_connections)
+    for key in paths:
+        conn = _connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+        _transactions.discard(key)
+
+
+def reset():
+    """Alle Verbindungen schliessen und Workspace zurücksetzen (z. B. nach einem Auftrag im Worker-Prozess)"""
+    global _workspace
+    close_workspace()
+    _workspace = None
+
+
+def create_workspace(path, srs_id = None, srs_definition = None):
+    """Leeres GeoPackage mit den Systemtabellen bzw. leere File-Geodatabase (arcpy) erstellen (ersetzt einen
+    vorhandenen Workspace nicht)
+
+    Required:
+        path -- Pfad zur .gpkg-Datei bzw. .gdb
+    Optional:
+        srs_id -- ID des Koordinatensystems (z. B. 2056), wird in gpkg_spatial_ref_sys eingetragen
+        srs_definition -- WKT des Koordinatensystems (Default: "undefined")
+
+    Return:
+        path -- Pfad zur .gpkg-Datei
+    """
+    if not is_sqlite(path):
+        if not os.path.isdir(path):
+            folder, name = os.path.split(os.path.abspath(path))
+            _arcpy().management.CreateFileGDB(folder, name)
+        return path
+    if os.path.isfile(path):
+        return path
+    conn = sqlite3.connect(path, isolation_level = None)
+    try:
+        conn.executescript("""
+            PRAGMA application_id = 1196444487;
+            PRAGMA user_version = 10300;
+            CREATE TABLE gpkg_spatial_ref_sys (srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY,
+                organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL,
+                description TEXT);
+            CREATE TABLE gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL,
+                identifier TEXT UNIQUE, description TEXT DEFAULT '',
+                last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+                min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER,
+                CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id));
+            CREATE TABLE gpkg_geometry_columns (table_name TEXT NOT NULL, column_name TEXT NOT NULL,
+                geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL,
+                CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name),
+                CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+                CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys (srs_id));
+            CREATE TABLE gpkg_extensions (table_name TEXT, column_name TEXT, extension_name TEXT NOT NULL,
+                definition TEXT NOT NULL, scope TEXT NOT NULL,
+                CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name));
+            INSERT INTO gpkg_spatial_ref_sys VALUES ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', NULL);
+            INSERT INTO gpkg_spatial_ref_sys VALUES ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', NULL);
+            INSERT INTO gpkg_spatial_ref_sys VALUES ('WGS 84 geodetic', 4326, 'EPSG', 4326, 'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433]]', NULL);
+        """)
+        if srs_id and srs_id not in (-1, 0, 4326):
+            conn.execute("INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, 'EPSG', ?, ?, NULL)",
+                         ("EPSG:" + str(srs_id), srs_id, srs_id, srs_definition or "undefined"))
+    finally:
+        conn.close()
+    return path
+
+
+def _geometry_column(conn, table):
+    """Hilfsfunktion: Geometriespalte und Koordinatensystem einer Tabelle (None falls Tabelle ohne Geometrie)"""
+    row = conn.execute("SELECT column_name, srs_id FROM gpkg_geometry_columns WHERE table_name = ?", (table,)).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def _rtree(conn, table, column):
+    """Hilfsfunktion: Name des R-Tree-Index der Tabelle (None falls nicht vorhanden)"""
+    if column is None:
+        return None
+    name = "rtree_" + table + "_" + column
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return name if exists else None
+
+
+## Schema
+def exists(dataset):
+    """True falls der Datensatz vorhanden ist (wie arcpy.Exists)"""
+    if backend(dataset) == "arcpy":
+        return _arcpy().Exists(dataset)
+    path, table = _split(dataset)
+    if not path or not os.path.isfile(path):
+        return False
+    return connect(path).execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                 (table,)).fetchone() is not None
+
+
+def list_fields(dataset):
+    """Felder eines Datensatzes (Liste mit Field wie arcpy.ListFields)"""
+    if backend(dataset) == "arcpy":
+        return [Field(field.name, field.type, field.length, field.editable) for field in _arcpy().ListFields(dataset)]
+    path, table = _split(dataset)
+    conn = connect(path)
+    geometry_column = _geometry_column(conn, table)[0]
+    fields = []
+    for _, name, declared, _, _, primary_key in conn.execute(f'PRAGMA table_info({_quote(table)})'):
+        declared = (declared or "").upper()
+        base = declared.split("(")[0].strip()
+        length = int(declared.split("(")[1].rstrip(")")) if "(" in declared else None
+        if primary_key:
+            fields.append(Field(name, "OID", None, False))
+        elif name == geometry_column:
+            fields.append(Field(name, "Geometry", None, True))
+        else:
+            fields.append(Field(name, FIELD_TYPES.get(base, "String"), length, True))
+    return fields
+
+
+def oid_field_name(dataset):
+    """Bezeichnung vom ObjectID-Feld eines Datensatzes (wie arcpy.Describe(...).OIDFieldName, GeoPackage: "fid")"""
+    return next((field.name for field in list_fields(dataset) if field.type == "OID"), "OBJECTID")
+
+
+def _column_definition(field_name, field_type, field_length = None):
+    """Hilfsfunktion: Spaltendefinition für CREATE TABLE bzw. ALTER TABLE"""
+    sql_type = SQLITE_TYPES.get(str(field_type).upper(), "TEXT")
+    if sql_type == "TEXT" and field_length:
+        sql_type += f'({int(field_length)})'
+    return _quote(field_name) + " " + sql_type
+
+
+def create_feature_class(dataset, geometry_type = None, fields = None, srs_id = None):
+    """Feature-Klasse (bzw. Tabelle ohne Geometrie) mit den Feldern erstellen
+
+    Required:
+        dataset -- Name (im aktuellen Workspace) bzw. Pfad der Feature-Klasse
+    Optional:
+        geometry_type -- "POINT", "MULTIPOINT", "POLYLINE" oder "POLYGON" (None = Tabelle ohne Geometrie)
+        fields -- Liste mit Feldern [Name, Typ, Länge] (Typ wie bei arcpy.management.AddField)
+        srs_id -- ID des Koordinatensystems (z. B. 2056)
+    """
+    fields = fields or []
+    if backend(dataset) == "arcpy":
+        arcpy = _arcpy()
+        workspace, name = os.path.split(dataset) if os.path.isabs(str(dataset)) else (get_workspace(), dataset)
+        spatial_reference = arcpy.SpatialReference(srs_id) if srs_id else None
+        if geometry_type:
+            arcpy.management.CreateFeatureclass(workspace, name, geometry_type, spatial_reference = spatial_reference)
+        else:
+            arcpy.management.CreateTable(workspace, name)
+        add_fields(dataset, fields)
+        return
+    path, table = _split(dataset)
+    conn = connect(path)
+    columns = [_quote(OID_FIELD) + " INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL"]
+    if geometry_type:
+        columns.append(_quote(GEOMETRY_FIELD) + " " + GEOMETRY_TYPES[geometry_type.upper()])
+    columns += [_column_definition(*field) for field in fields]
+    with transaction(path):
+        conn.execute(f'CREATE TABLE {_quote(table)} ({", ".join(columns)})')
+        srs = srs_id if srs_id is not None else -1
+        if srs not in (-1, 0, 4326) and not conn.execute("SELECT 1 FROM gpkg_spatial_ref_sys WHERE srs_id = ?",
+                                                         (srs,)).fetchone():
+            conn.execute("INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, 'EPSG', ?, 'undefined', NULL)",
+                         ("EPSG:" + str(srs), srs, srs))
+        conn.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, ?, ?, ?)",
+                     (table, "features" if geometry_type else "attributes", table, srs if geometry_type else None))
+        if geometry_type:
+            conn.execute("INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, ?, 0, 0)",
+                         (table, GEOMETRY_FIELD, GEOMETRY_TYPES[geometry_type.upper()], srs))
+            rtree = "rtree_" + table + "_" + GEOMETRY_FIELD
+            conn.execute(f'CREATE VIRTUAL TABLE {_quote(rtree)} USING rtree(id, minx, maxx, miny, maxy)')
+            conn.execute("INSERT INTO gpkg_extensions VALUES (?, ?, 'gpkg_rtree_index', "
+                         "'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')", (table, GEOMETRY_FIELD))
+
+
+def _field_type(dataset, field_type):
+    """Hilfsfunktion: Feldtyp (wie arcpy.Field.type), den ein mit add_fields erstelltes Feld im Datensatz hat"""
+    field_type = str(field_type).upper()
+    if backend(dataset) == "arcpy":
+        return ARCPY_FIELD_TYPES.get(field_type, field_type)
+    return FIELD_TYPES.get(SQLITE_TYPES.get(field_type, "TEXT"), "String")
+
+
+def add_fields(dataset, fields):
+    """Schema eines Datensatzes ergänzen: Alle fehlenden Felder werden in einem Schritt hinzugefügt
+    (arcpy.management.AddFields bzw. eine Transaktion im GeoPackage). Bereits vorhandene Felder (Vergleich
+    ohne Gross-/Kleinschreibung) und doppelte Einträge werden übersprungen. Entspricht das Schema bereits
+    der Angabe, wird der Datensatz nicht verändert. Weicht der Typ (bzw. bei Textfeldern die angegebene
+    Länge) eines vorhandenen Feldes von der Angabe ab, wird ein ValueError ausgelöst.
+
+    Required:
+        dataset -- Name bzw. Pfad des Datensatzes
+        fields -- Liste mit Feldern [Name, Typ, Länge, Alias] (Länge und Alias optional, z. B. ["coords", "TEXT", 128])
+
+    Return:
+        Liste mit den Namen der hinzugefügten Felder
+    """
+    existing = {field.name.lower(): field for field in list_fields(dataset)}
+    new_fields = []
+    added = set()
+    for field in fields:
+        if field[0].lower() in added:
+            continue
+        present = existing.get(field[0].lower())
+        if present is not None:
+            if present.type != _field_type(dataset, field[1]) or (
+                    present.type == "String" and len(field) > 2 and field[2] and present.length != field[2]):
+                raise ValueError(f'Feld "{present.name}" ist in "{dataset}" bereits als {present.type} (Länge '
+                                 f'{present.length}) vorhanden, angegeben ist {field[1]} (Länge '
+                                 f'{field[2] if len(field) > 2 else None})')
+            continue
+        added.add(field[0].lower())
+        new_fields.append((field[0], field[1], field[2] if len(field) > 2 else None, field[3] if len(field) > 3 else None))
+    if not new_fields:
+        return []
+    if backend(dataset) == "arcpy":
+        # Feldbeschreibung von AddFields: [Name, Typ, Alias, Länge] (Alias und Länge nur falls angegeben)
+        descriptions = [[name, field_type, alias or "", length] if length else [name, field_type, alias] if alias
+                        else [name, field_type] for name, field_type, length, alias in new_fields]
+        _arcpy().management.AddFields(dataset, descriptions)
+    else:
+        path, table = _split(dataset)
+        conn = connect(path)
+        with transaction(path):
+            for name, field_type, length, _ in new_fields:
+                conn.execute(f'ALTER TABLE {_quote(table)} ADD COLUMN {_column_definition(name, field_type, length)}')
+    return [field[0] for field in new_fields]
+
+
+def delete_fields(dataset, field_names):
+    """Felder löschen (nicht vorhandene Felder werden übersprungen)"""
+    existing = {field.name.lower() for field in list_fields(dataset)}
+    field_names = [name for name in field_names if name.lower() in existing]
+    if not field_names:
+        return
+    if backend(dataset) == "arcpy":
+        _arcpy().management.DeleteField(dataset, field_names)
+        return
+    path, table = _split(dataset)
+    conn = connect(path)
+    for name in field_names:
+        conn.execute(f'ALTER TABLE {_quote(table)} DROP COLUMN {_quote(name)}')
+
+
+def delete_dataset(dataset):
+    """Datensatz löschen, falls vorhanden (arcpy.management.Delete bzw. Tabelle mit R-Tree und Einträgen in den
+    Systemtabellen des GeoPackages)"""
+    if not exists(dataset):
+        return
+    if backend(dataset) == "arcpy":
+        _arcpy().management.Delete(dataset)
+        return
+    path, table = _split(dataset)
+    conn = connect(path)
+    rtree = _rtree(conn, table, _geometry_column(conn, table)[0])
+    with transaction(path):
+        if rtree:
+            conn.execute(f'DROP TABLE {_quote(rtree)}')
+        conn.execute(f'DROP TABLE {_quote(table)}')
+        for system_table in ("gpkg_extensions", "gpkg_geometry_columns", "gpkg_contents"):
+            conn.execute(f'DELETE FROM {system_table} WHERE table_name = ?', (table,))
+
+
+def copy_dataset(source, target):
+    """Datensatz kopieren, ein vorhandenes Ziel wird ersetzt (arcpy.management.Copy bzw. Tabelle mit Geometrie,
+    R-Tree und Koordinatensystem innerhalb eines GeoPackages oder in ein anderes GeoPackage kopieren). Beim Backend
+    "arcpy" wird ein fehlendes Feature-Dataset des Ziels mit dem Koordinatensystem der Quelle erstellt.
+
+    Required:
+        source -- Pfad des Datensatzes
+        target -- Pfad der Kopie (gleiches Backend wie "source")
+    """
+    if backend(source) != backend(target):
+        raise ValueError(f'"{source}" und "{target}" verwenden nicht dasselbe Backend')
+    delete_dataset(target)
+    if backend(source) == "arcpy":
+        arcpy = _arcpy()
+        parent = os.path.dirname(str(target))
+        if parent and not parent.lower().endswith(".gdb") and not arcpy.Exists(parent):
+            workspace, name = os.path.split(parent)
+            arcpy.management.CreateFeatureDataset(workspace, name, arcpy.Describe(source).spatialReference)
+        arcpy.management.Copy(source, target)
+        return
+    source_path, source_table = _split(source)
+    path, table = _split(target)
+    source_conn = connect(source_path)
+    conn = connect(path)
+    columns = list(source_conn.execute(f'PRAGMA table_info({_quote(source_table)})'))
+    definitions = [_quote(name) + " " + (declared or "") + (" PRIMARY KEY AUTOINCREMENT NOT NULL" if primary_key else "")
+                   for _, name, declared, _, _, primary_key in columns]
+    names = ", ".join(_quote(column[1]) for column in columns)
+    geometry_column, srs_id = _geometry_column(source_conn, source_table)
+    source_rtree = _rtree(source_conn, source_table, geometry_column)
+    with transaction(path):
+        if srs_id is not None and not conn.execute("SELECT 1 FROM gpkg_spatial_ref_sys WHERE srs_id = ?",
+                                                   (srs_id,)).fetchone():
+            conn.execute("INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", source_conn.execute(
+                "SELECT * FROM gpkg_spatial_ref_sys WHERE srs_id = ?", (srs_id,)).fetchone())
+        conn.execute(f'CREATE TABLE {_quote(table)} ({", ".join(definitions)})')
+        contents = source_conn.execute("SELECT data_type, description, min_x, min_y, max_x, max_y, srs_id FROM gpkg_contents "
+                                       "WHERE table_name = ?", (source_table,)).fetchone()
+        if contents:
+            conn.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, description, min_x, min_y, max_x, "
+                         "max_y, srs_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (table, contents[0], table) + tuple(contents[1:]))
+        conn.executemany(f'INSERT INTO {_quote(table)} ({names}) VALUES ({", ".join("?" * len(columns))})',
+                         source_conn.execute(f'SELECT {names} FROM {_quote(source_table)}').fetchall())
+        if geometry_column:
+            geometry = source_conn.execute("SELECT column_name, geometry_type_name, srs_id, z, m FROM gpkg_geometry_columns "
+                                           "WHERE table_name = ?", (source_table,)).fetchone()
+            conn.execute("INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, ?, ?, ?)", (table,) + tuple(geometry))
+        if source_rtree:
+            rtree = "rtree_" + table + "_" + geometry_column
+            conn.execute(f'CREATE VIRTUAL TABLE {_quote(rtree)} USING rtree(id, minx, maxx, miny, maxy)')
+            conn.executemany(f'INSERT INTO {_quote(rtree)} VALUES (?, ?, ?, ?, ?)',
+                             source_conn.execute(f'SELECT id, minx, maxx, miny, maxy FROM {_quote(source_rtree)}').fetchall())
+            conn.execute("INSERT INTO gpkg_extensions VALUES (?, ?, 'gpkg_rtree_index', "
+                         "'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')", (table, geometry_column))
+
+
+def count_rows(dataset, where_clause = None):
+    """Anzahl Zeilen eines Datensatzes (optional mit Where-Clause)"""
+    if backend(dataset) == "arcpy" and not where_clause:
+        return int(_arcpy().management.GetCount(dataset)[0])
+    with search_cursor(dataset, ["OID@"], where_clause) as cursor:
+        return sum(1 for _ in cursor)
+
+
+## Cursors
+def _read_value(token, blob, srs_id):
+    """Hilfsfunktion: Wert eines Geometrie-Feldes ("SHAPE@...") aus dem GeoPackage-Binary"""
+    geometry = gf.from_gpb(blob)
+    if geometry is None:
+        return None
+    if token == "SHAPE@":
+        return geometry
+    if token == "SHAPE@XY":
+        return tuple(geometry.centroid) if geometry.parts else None
+    if token == "SHAPE@JSON":
+        return geometry.JSON
+    if token == "SHAPE@WKT":
+        return geometry.WKT
+    if token == "SHAPE@WKB":
+        return geometry.WKB
+    if token in ("SHAPE@LENGTH", "SHAPE_LENGTH"):
+        return geometry.length
+    if token in ("SHAPE@AREA", "SHAPE_AREA"):
+        return geometry.area
+    raise ValueError(f'Feld "{token}" wird nicht unterstützt')
+
+
+def _write_value(token, value, srs_id):
+    """Hilfsfunktion: Wert eines Geometrie-Feldes ("SHAPE@...") in eine Geometry umwandeln"""
+    if value is None:
+        return None
+    if token == "SHAPE@":
+        if isinstance(value, gf.Geometry):
+            return value
+        # arcpy-Geometrie oder andere Objekte mit Esri-JSON
+        return gf.as_shape(value.JSON, srs_id)
+    if token == "SHAPE@XY":
+        return gf.Geometry("point", [[tuple(value)]], srs_id)
+    if token == "SHAPE@JSON":
+        return gf.as_shape(value, srs_id)
+    if token == "SHAPE@WKB":
+        return gf.from_wkb(bytes(value), srs_id)
+    raise ValueError(f'Feld "{token}" kann nicht geschrieben werden')
+
+
+class _SqliteCursor:
+    """Hilfsklasse: Search-, Update- und InsertCursor für GeoPackages mit den Methoden der arcpy.da-Cursors.
+    Alle Änderungen eines Cursors werden in einer Transaktion geschrieben (ausser innerhalb von transaction)."""
+
+    def __init__(self, dataset, field_names, where_clause = None, kind = "search", extent = None):
+        self.path, self.table = _split(dataset)
+        self.conn = connect(self.path)
+        self.kind = kind
+        if isinstance(field_names, str):
+            field_names = [field_names] if field_names != "*" else \
+                [field.name for field in list_fields(dataset) if field.type not in ("OID", "Geometry")]
+        self.fields = tuple(field_names)
+        self.geometry_column, self.srs_id = _geometry_column(self.conn, self.table)
+        self.rtree = _rtree(self.conn, self.table, self.geometry_column)
+        # Spalten für die Abfrage: OID, danach pro Feld eine Spalte
+        columns = [_quote(OID_FIELD)]
+        self._tokens = []
+        self._geometry_index = None
+        for field in self.fields:
+            token = str(field).upper()
+            if token == "OID@":
+                self._tokens.append("OID@")
+                continue
+            if token.startswith("SHAPE@") or token in ("SHAPE_LENGTH", "SHAPE_AREA"):
+                if self.geometry_column is None:
+                    raise ValueError(f'"{self.table}" hat keine Geometrie (Feld "{field}")')
+                self._tokens.append(token)
+                if self._geometry_index is None:
+                    self._geometry_index = len(columns)
+                columns.append(_quote(self.geometry_column))
+                continue
+            self._tokens.append(None)
+            columns.append(_quote(field))
+        self._columns = columns
+        self._where = where_clause
+        self._extent = extent
+        self._row_oid = None
+        self._own_transaction = False
+        self._counts = {"rows_read": 0, "rows_written": 0, "rows_deleted": 0}
+        if kind != "search" and os.path.abspath(self.path) not in _transactions:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._own_transaction = True
+
+    def _select(self):
+        """Hilfsmethode: SQL-Abfrage mit Where-Clause und Ausdehnung (R-Tree)"""
+        sql = f'SELECT {", ".join(self._columns)} FROM {_quote(self.table)}'
+        conditions = []
+        parameters = []
+        if self._where:
+            conditions.append("(" + self._where + ")")
+        if self._extent is not None:
+            xmin, ymin, xmax, ymax = self._extent
+            if self.rtree:
+                conditions.append(f'{_quote(OID_FIELD)} IN (SELECT id FROM {_quote(self.rtree)} '
+                                  'WHERE maxx >= ? AND minx <= ? AND maxy >= ? AND miny <= ?)')
+                parameters += [xmin, xmax, ymin, ymax]
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, parameters
+
+    def __iter__(self):
+        if self.kind == "insert":
+            raise TypeError("InsertCursor kann nicht iteriert werden")
+        sql, parameters = self._select()
+        # Update: Zeilen zuerst lesen, damit Änderungen die laufende Abfrage nicht beeinflussen
+        rows = self.conn.execute(sql, parameters)
+        if self.kind == "update":
+            rows = rows.fetchall()
+        extent = self._extent if self._extent is not None and not self.rtree else None
+        for db_row in rows:
+            values = []
+            position = 1
+            for token in self._tokens:
+                if token == "OID@":
+                    values.append(db_row[0])
+                    continue
+                value = db_row[position]
+                position += 1
+                values.append(_read_value(token, value, self.srs_id) if token else value)
+            if extent is not None and not self._in_extent(db_row, extent):
+                continue
+            self._row_oid = db_row[0]
+            self._counts["rows_read"] += 1
+            yield tuple(values) if self.kind == "search" else list(values)
+        self._row_oid = None
+
+    def _in_extent(self, db_row, extent):
+        """Hilfsmethode: Ausdehnung prüfen, falls kein R-Tree vorhanden ist (nur mit Geometrie-Feld)"""
+        if self._geometry_index is None:
+            return True
+        box = gf.envelope(gf.from_gpb(db_row[self._geometry_index]))
+        return box is not None and box[1] >= extent[0] and box[0] <= extent[2] and box[3] >= extent[1] and box[2] <= extent[3]
+
+    def _values(self, values):
+        """Hilfsmethode: Spalten und Werte für INSERT bzw. UPDATE (Geometrie als GeoPackage-Binary)"""
+        columns = []
+        params = []
+        geometry = None
+        for field, token, value in zip(self.fields, self._tokens, values):
+            if token == "OID@" or token in ("SHAPE@LENGTH", "SHAPE@AREA", "SHAPE_LENGTH", "SHAPE_AREA"):
+                continue
+            if token:
+                geometry = _write_value(token, value, self.srs_id)
+                columns.append(_quote(self.geometry_column))
+                params.append(gf.to_gpb(geometry, self.srs_id) if geometry is not None else None)
+            else:
+                columns.append(_quote(field))
+                params.append(value)
+        has_geometry = any(self._tokens)
+        return columns, params, geometry, has_geometry
+
+    def _update_rtree(self, oid, geometry):
+        """Hilfsmethode: Eintrag im R-Tree-Index nachführen"""
+        if not self.rtree:
+            return
+        box = gf.envelope(geometry)
+        if box is None:
+            self.conn.execute(f'DELETE FROM {_quote(self.rtree)} WHERE id = ?', (oid,))
+        else:
+            self.conn.execute(f'INSERT OR REPLACE INTO {_quote(self.rtree)} VALUES (?, ?, ?, ?, ?)', (oid,) + box)
+
+    def updateRow(self, values):
+        if self._row_oid is None:
+            raise RuntimeError("updateRow ist nur während der Iteration möglich")
+        columns, params, geometry, has_geometry = self._values(values)
+        if columns:
+            self.conn.execute(f'UPDATE {_quote(self.table)} SET {", ".join(c + " = ?" for c in columns)} '
+                              f'WHERE {_quote(OID_FIELD)} = ?', params + [self._row_oid])
+        if has_geometry:
+            self._update_rtree(self._row_oid, geometry)
+        self._counts["rows_written"] += 1
+
+    def deleteRow(self):
+        if self._row_oid is None:
+            raise RuntimeError("deleteRow ist nur während der Iteration möglich")
+        self.conn.execute(f'DELETE FROM {_quote(self.table)} WHERE {_quote(OID_FIELD)} = ?', (self._row_oid,))
+        if self.rtree:
+            self.conn.execute(f'DELETE FROM {_quote(self.rtree)} WHERE id = ?', (self._row_oid,))
+        self._counts["rows_deleted"] += 1
+
+    def insertRow(self, values):
+        columns, params, geometry, has_geometry = self._values(values)
+        if columns:
+            sql = f'INSERT INTO {_quote(self.table)} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+        else:
+            sql = f'INSERT INTO {_quote(self.table)} DEFAULT VALUES'
+        oid = self.conn.execute(sql, params).lastrowid
+        if has_geometry:
+            self._update_rtree(oid, geometry)
+        self._counts["rows_written"] += 1
+        return oid
+
+    def reset(self):
+        self._row_oid = None
+
+    def close(self, commit = True):
+        if self._own_transaction:
+            self.conn.execute("COMMIT" if commit else "ROLLBACK")
+            self._own_transaction = False
+        for counter, n in self._counts.items():
+            if n:
+                lf.count(counter, n)
+        self._counts = {key: 0 for key in self._counts}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close(commit = exc_type is None)
+        return False
+
+    def __del__(self):
+        try:
+            self.close(commit = True)
+        except Exception:
+            pass
+
+
+def _arcpy_extent_filter(cursor, field_names, extent):
+    """Hilfsfunktion: Zeilen eines arcpy-Cursors nach Ausdehnung filtern (Geometrie wird zusätzlich gelesen)"""
+    xmin, ymin, xmax, ymax = extent
+    with cursor:
+        for row in cursor:
+            box = row[-1].extent if row[-1] is not None else None
+            if box is not None and box.XMax >= xmin and box.XMin <= xmax and box.YMax >= ymin and box.YMin <= ymax:
+                yield row[:-1]
+
+
+def search_cursor(dataset, field_names, where_clause = None, extent = None):
+    """Zeilen lesen (wie arcpy.da.SearchCursor)
+
+    Required:
+        dataset -- Name bzw. Pfad des Datensatzes (beim Backend "arcpy" auch Layer)
+        field_names -- Liste mit Feldern (inkl. "OID@", "SHAPE@", ...)
+    Optional:
+        where_clause -- SQL Where-Clause (z. B. '"node_sk" IS NULL')
+        extent -- Ausdehnung (xmin, ymin, xmax, ymax): nur Objekte, deren Ausdehnung diese schneidet (R-Tree)
+    """
+    if backend(dataset) == "arcpy":
+        arcpy = _arcpy()
+        if extent is None:
+            return arcpy.da.SearchCursor(dataset, field_names, where_clause)
+        cursor = arcpy.da.SearchCursor(dataset, list(field_names) + ["SHAPE@"], where_clause)
+        return contextlib.closing(_arcpy_extent_filter(cursor, field_names, extent))
+    return _SqliteCursor(dataset, field_names, where_clause, "search", extent)
+
+
+def search_within(dataset, field_names, geometry, where_clause = None):
+    """Zeilen der Objekte lesen, die innerhalb der Geometrie (Polygon) liegen (wie SelectLayerByLocation "WITHIN"
+    mit anschliessendem SearchCursor). Beim Backend "sqlite" werden die Objekte über den R-Tree vorselektiert.
+
+    Required:
+        dataset -- Name bzw. Pfad des Datensatzes
+        field_names -- Liste mit Feldern
+        geometry -- Polygon (arcpy-Geometrie bzw. geometry_functions.Geometry)
+    Optional:
+        where_clause -- SQL Where-Clause
+
+    Return:
+        rows -- Liste mit den Zeilen (Tupel)
+    """
+    if backend(dataset) == "arcpy":
+        arcpy = _arcpy()
+        layer = arcpy.management.SelectLayerByLocation(dataset, "WITHIN", geometry, "", "NEW_SELECTION")
+        with arcpy.da.SearchCursor(layer, field_names, where_clause) as cursor:
+            return [tuple(row) for row in cursor]
+    if not isinstance(geometry, gf.Geometry):
+        geometry = gf.as_shape(geometry.JSON)
+    box = geometry.extent
+    rows = []
+    with search_cursor(dataset, list(field_names) + ["SHAPE@"], where_clause,
+                       (box.XMin, box.YMin, box.XMax, box.YMax)) as cursor:
+        for row in cursor:
+            if row[-1] is not None and row[-1].within(geometry):
+                rows.append(row[:-1])
+    return rows
+
+
+def update_cursor(dataset, field_names, where_clause = None):
+    """Zeilen aktualisieren bzw. löschen (wie arcpy.da.UpdateCursor, mit updateRow und deleteRow)"""
+    if backend(dataset) == "arcpy":
+        return _arcpy().da.UpdateCursor(dataset, field_names, where_clause)
+    return _SqliteCursor(dataset, field_names, where_clause, "update")
+
+
+def insert_cursor(dataset, field_names):
+    """Zeilen einfügen (wie arcpy.da.InsertCursor, insertRow gibt die ObjectID zurück)"""
+    if backend(dataset) == "arcpy":
+        return _arcpy().da.InsertCursor(dataset, field_names)
+    return _SqliteCursor(dataset, field_names, kind = "insert")
+
+
+def as_shape(geojson, dataset = None):
+    """Geometrie aus Esri-JSON für den Datensatz erstellen (arcpy.AsShape bzw. geometry_functions.as_shape)"""
+    if backend(dataset) == "arcpy":
+        return _arcpy().AsShape(geojson, True)
+    return gf.as_shape(geojson)
+
+
+@contextlib.contextmanager
+def transaction(workspace = None):
+    """Alle Änderungen innerhalb des Blocks in einer Transaktion schreiben. Tritt ein Fehler auf, werden alle
+    Änderungen verworfen (Backend "arcpy": Edit-Session mit arcpy.da.Editor).
+
+    Optional:
+        workspace -- Pfad zum Workspace (Default: aktueller Workspace)
+    """
+    workspace = workspace or get_workspace()
+    if not is_sqlite(workspace):
+        arcpy = _arcpy()
+        editor = arcpy.da.Editor(workspace)
+        editor.startEditing(False, False)
+        editor.startOperation()
+        try:
+            yield
+        except Exception:
+            editor.abortOperation()
+            editor.stopEditing(False)
+            raise
+        editor.stopOperation()
+        editor.stopEditing(True)
+        return
+    path = os.path.abspath(_split(workspace)[0] if not workspace.lower().endswith(SQLITE_EXTENSIONS) else workspace)
+    if path in _transactions:
+        # Verschachtelte Transaktion: Teil der äusseren Transaktion
+        yield
+        return
+    conn = connect(path)
+    conn.execute("BEGIN IMMEDIATE")
+    _transactions.add(path)
+    try:
+        yield
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+    finally:
+        _transactions.discard(path)
+
+
+@contextlib.contextmanager
+def environment(**settings):
+    """Umgebungseinstellungen von arcpy im Block setzen (wie arcpy.EnvManager). Beim Backend "sqlite"
+    wird nur der Workspace gesetzt, die übrigen Einstellungen werden ignoriert."""
+    workspace = settings.get("workspace")
+    if is_sqlite(workspace if workspace is not None else get_workspace()):
+        previous = get_workspace()
+        if workspace is not None:
+            set_workspace(workspace)
+        try:
+            yield
+        finally:
+            if workspace is not None:
+                set_workspace(previous)
+        return
+    with _arcpy().EnvManager(**settings):
+        yield
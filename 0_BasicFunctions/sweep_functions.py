@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Parameterstudien (Sweeps): Aus einer JSON-Datei mit den Parametern und einem Raster von Parameterwerten
+# (z. B. {"mean_slope": ["0.03", "0.05"], "subcatchment_method": ["3", "4"]}) werden Szenarien mit der
+# sim_nr "<sim_nr>_s01", "<sim_nr>_s02", ... erstellt. Jedes Szenario erhält einen eigenen Ordner mit der
+# JSON-Datei, den Log-Dateien und eigenen Workspaces (GISSWMM und Raster), damit sich parallel laufende
+# Szenarien nicht gegenseitig die File-Geodatabases sperren.
+# Stufen der Pipeline, die keinen Parameter des Rasters verwenden und nur von solchen Stufen abhängen (z. B.
+# sia2gisswmm), werden nur einmal im Ordner "shared" ausgeführt. Ihre Ausgaben werden in die Workspaces der
+# Szenarien kopiert. Die übrigen Stufen werden pro Szenario mit pipeline_functions.run_pipeline ausgeführt,
+# die Szenarien laufen parallel in einem Prozess-Pool. Laufzeiten, Status und Ausgaben aller Szenarien werden
+# in einer Ergebnistabelle (CSV und JSON) zusammengefasst.
+# -----------------------------------------------------------------------------
+"""sweep_functions"""
+import os, csv, json, time, itertools, datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging_functions as lf
+import pipeline_functions as pf
+import storage_functions as sf
+
+# Parameter, die pro Szenario gesetzt werden und nicht Teil des Rasters sein dürfen
+RESERVED = ["sim_nr", "log_folder", "gisswmm_workspace", "out_raster_workspace"]
+
+
+def load_grid(grid_file = None, params = None):
+    """Raster der Parameterwerte aus einer JSON-Datei und/oder Angaben "Parameter=Wert1,Wert2" zusammenstellen
+
+    Optional:
+        grid_file -- JSON-Datei {Parameter: [Werte]}
+        params -- Liste mit Angaben "Parameter=Wert1,Wert2" (ergänzen bzw. ersetzen die Werte der JSON-Datei)
+
+    Return:
+        grid -- Dictionary {Parameter: [Werte]}
+    """
+    grid = {}
+    if grid_file:
+        with open(grid_file, encoding = "utf-8") as f:
+            grid = json.load(f)
+    for param in params or []:
+        if "=" not in param:
+            raise ValueError(f'Ungültige Angabe "{param}" (erwartet: Parameter=Wert1,Wert2)')
+        key, values = param.split("=", 1)
+        grid[key.strip()] = [value.strip() for value in values.split(",")]
+    for key, values in grid.items():
+        if key in RESERVED:
+            raise ValueError(f'Der Parameter "{key}" wird pro Szenario gesetzt und kann nicht variiert werden')
+        if not isinstance(values, list) or not values:
+            raise ValueError(f'Für den Parameter "{key}" ist keine Liste mit Werten angegeben')
+    return grid
+
+
+def expand_grid(grid):
+    """Alle Kombinationen der Parameterwerte (Liste mit Dictionaries {Parameter: Wert})"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def shared_stages(stages, grid):
+    """Stufen, die von keinem Parameter des Rasters abhängen (auch nicht über vorgelagerte Stufen)
+
+    Return:
+        Liste mit den Namen der Stufen (in der Reihenfolge der Abhängigkeiten)
+    """
+    by_name = {stage["name"]: stage for stage in stages}
+    shared = []
+    for name in pf.topological_order(stages):
+        stage = by_name[name]
+        if any(key in grid for key in stage.get("settings", []) + stage.get("paths", [])):
+            continue
+        if all(dep in shared for dep in stage.get("depends", [])):
+            shared.append(name)
+    return shared
+
+
+def plan_stages(stages, grid, selected = None):
+    """Stufen der Parameterstudie planen: gemeinsame Stufen (einmal ausgeführt) und Stufen pro Szenario
+
+    Optional:
+        selected -- Liste mit den auszuführenden Stufen (Default: alle Stufen ohne "optional")
+
+    Return:
+        shared -- Liste mit den gemeinsamen Stufen (siehe shared_stages)
+        scenario_stages -- Liste mit den Stufen, die pro Szenario ausgeführt werden
+    """
+    if selected is None:
+        selected = [stage["name"] for stage in stages if not stage.get("optional")]
+    shared = [name for name in shared_stages(stages, grid) if name in selected]
+    scenario_stages = [name for name in pf.topological_order(stages) if name in selected and name not in shared]
+    return shared, scenario_stages
+
+
+def _workspace_extension(settings):
+    """Hilfsfunktion: Dateiendung der Workspaces (".gpkg" falls "gisswmm_workspace" ein GeoPackage ist)"""
+    extension = os.path.splitext(settings["gisswmm_workspace"])[1].lower()
+    return extension if extension in sf.SQLITE_EXTENSIONS else ".gdb"
+
+
+def dataset_path(workspace, sim_nr, name):
+    """Pfad einer Feature-Klasse der Skripte ("<name>_<sim_nr>", in der File-Geodatabase im Feature-Dataset sim_nr)"""
+    if sf.is_sqlite(workspace):
+        return os.path.join(workspace, name + "_" + sim_nr)
+    return os.path.join(workspace, sim_nr, name + "_" + sim_nr)
+
+
+def scenario_settings(base, sim_nr, folder, params = None):
+    """Parameter eines Szenarios: Kopie der Basis mit den Parameterwerten, eigener sim_nr, eigenem Logfolder und
+    eigenen Workspaces im Ordner "folder" """
+    settings = dict(base)
+    settings.update(params or {})
+    settings["sim_nr"] = sim_nr
+    settings["log_folder"] = folder
+    settings["gisswmm_workspace"] = os.path.join(folder, "gisswmm" + _workspace_extension(base))
+    # Raster werden immer in einer File-Geodatabase gespeichert
+    settings["out_raster_workspace"] = os.path.join(folder, "raster.gdb")
+    return settings
+
+
+def write_settings(settings, folder):
+    """JSON-Datei des Szenarios im Ordner speichern (Ordner wird erstellt)
+
+    Return:
+        Pfad zur JSON-Datei
+    """
+    os.makedirs(folder, exist_ok = True)
+    settings_file = os.path.join(folder, "settings_" + settings["sim_nr"] + ".json")
+    with open(settings_file, "w", encoding = "utf-8") as f:
+        json.dump(settings, f, ensure_ascii = False, indent = 1)
+    return settings_file
+
+
+def stage_outputs(stages, names, settings):
+    """Pfade der Ausgaben (Feature-Klassen) der Stufen ({Parameter: Pfad}, z. B. {"out_node": ".../node_v1"})"""
+    by_name = {stage["name"]: stage for stage in stages}
+    outputs = {}
+    for name in names:
+        for key in by_name[name].get("outputs", []):
+            if key in settings:
+                outputs[key] = dataset_path(settings["gisswmm_workspace"], settings["sim_nr"], settings[key])
+    return outputs
+
+
+def swmm_file(settings):
+    """Pfad der SWMM-Eingabedatei eines Szenarios (wie in gisswmm2swmm.py)"""
+    in_path, in_name = os.path.split(settings["template_swmm_file"])
+    return os.path.join(in_path, settings["sim_nr"], in_name.split(".inp")[0] + "_" + settings["sim_nr"] + ".inp")
+
+
+def create_raster_workspace(stages, names, settings):
+    """Workspace für die Raster erstellen, falls eine der Stufen Raster speichert ("out_raster_workspace")"""
+    by_name = {stage["name"]: stage for stage in stages}
+    if any("out_raster_workspace" in by_name[name].get("settings", []) for name in names):
+        sf.create_workspace(settings["out_raster_workspace"])
+
+
+def seed_scenario(shared_outputs, settings, force = False):
+    """Ausgaben der gemeinsamen Stufen in den Workspace des Szenarios kopieren
+
+    Required:
+        shared_outputs -- Dictionary {Parameter: Pfad} der gemeinsamen Ausgaben (siehe stage_outputs)
+        settings -- Parameter des Szenarios
+    Optional:
+        force -- Falls True werden auch bereits vorhandene Kopien ersetzt (gemeinsame Stufen neu ausgeführt)
+
+    Return:
+        True, falls Datensätze kopiert wurden (die Stufen des Szenarios müssen dann neu ausgeführt werden)
+    """
+    sf.create_workspace(settings["gisswmm_workspace"])
+    copied = False
+    for key, source in shared_outputs.items():
+        target = dataset_path(settings["gisswmm_workspace"], settings["sim_nr"], settings[key])
+        if force or not sf.exists(target):
+            sf.copy_dataset(source, target)
+            copied = True
+    return copied
+
+
+def run_scenario(scenario, stages, root, shared_outputs = None, shared_changed = False, jobs = 1, force = False,
+                 resume = False):
+    """Stufen eines Szenarios ausführen (wird im Prozess-Pool aufgerufen, Log-Datei im Ordner des Szenarios)
+
+    Required:
+        scenario -- Dictionary mit "sim_nr", "params", "folder", "settings_file" und "stages" (auszuführende Stufen)
+        stages -- Liste mit allen Stufen der Pipeline
+        root -- Ordner, in dem die Skripte ausgeführt werden
+    Optional:
+        shared_outputs -- Ausgaben der gemeinsamen Stufen (siehe stage_outputs)
+        shared_changed -- Falls True wurden die gemeinsamen Stufen neu ausgeführt
+        jobs -- Maximale Anzahl parallel ausgeführter Stufen innerhalb des Szenarios
+        force -- Falls True werden alle Stufen ausgeführt
+        resume -- Falls True werden die Skripte mit "--resume" gestartet
+
+    Return:
+        result -- Dictionary mit "sim_nr", "params", "status", "seconds", "stages" ({Stufe: [Status, Dauer]}) und
+                  "outputs" ({Parameter: Pfad})
+    """
+    start_time = time.time()
+    with open(scenario["settings_file"], encoding = "utf-8") as f:
+        settings = json.load(f)
+    logger = lf.init_logging(os.path.join(scenario["folder"], 'run_sweep_' + scenario["sim_nr"] + '.log'))
+    logger.info(f'Szenario {scenario["sim_nr"]}: ' + ", ".join(f'{key} = {value}' for key, value in scenario["params"].items()))
+    results = {}
+    try:
+        if shared_outputs:
+            if seed_scenario(shared_outputs, settings, shared_changed):
+                logger.info('Ausgaben der gemeinsamen Stufen wurden kopiert, alle Stufen werden ausgeführt')
+                force = True
+            sf.reset()
+        create_raster_workspace(stages, scenario["stages"], settings)
+        state_file = os.path.join(scenario["folder"], 'pipeline_state_' + scenario["sim_nr"] + '.json')
+        results = pf.run_pipeline(stages, scenario["settings_file"], state_file, root, selected = scenario["stages"],
+                                  force = force, jobs = jobs, output_folder = scenario["folder"], logger = logger,
+                                  resume = resume)
+        state = pf.load_state(state_file)
+        status = "failed" if any(value in ("failed", "blocked") for value in results.values()) else "ok"
+    except Exception as e:
+        logger.error(f'Szenario {scenario["sim_nr"]} abgebrochen: {e}')
+        state = {}
+        status = "failed"
+    seconds = round(time.time() - start_time, 1)
+    logger.info(f'Szenario {scenario["sim_nr"]} in {seconds} sec. beendet ({status})')
+    lf.close_logging()
+    outputs = stage_outputs(stages, scenario["stages"], settings)
+    if "gisswmm2swmm" in scenario["stages"]:
+        outputs["swmm_file"] = swmm_file(settings)
+    return {"sim_nr": scenario["sim_nr"], "params": scenario["params"], "status": status, "seconds": seconds,
+            # Dauer nur für die in diesem Lauf ausgeführten Stufen
+            "stages": {name: [results.get(name), state.get(name, {}).get("duration") if results.get(name) in ("ok", "failed")
+                              else None] for name in scenario["stages"]},
+            "outputs": outputs}
+
+
+def write_results(results, grid, out_base):
+    """Ergebnistabelle als CSV-Datei (eine Zeile pro Szenario, ";" getrennt) und JSON-Datei speichern
+
+    Return:
+        Pfad zur CSV-Datei
+    """
+    stage_names = list(dict.fromkeys(name for result in results for name in result["stages"]))
+    output_keys = list(dict.fromkeys(key for result in results for key in result["outputs"]))
+    with open(out_base + ".csv", "w", newline = "", encoding = "utf-8") as f:
+        writer = csv.writer(f, delimiter = ";")
+        writer.writerow(["sim_nr"] + list(grid) + ["status", "seconds"] + [name + "_status" for name in stage_names]
+                        + [name + "_seconds" for name in stage_names] + output_keys)
+        for result in results:
+            stages = result["stages"]
+            writer.writerow([result["sim_nr"]] + [result["params"].get(key) for key in grid]
+                            + [result["status"], result["seconds"]]
+                            + [stages.get(name, [None, None])[0] for name in stage_names]
+                            + [stages.get(name, [None, None])[1] for name in stage_names]
+                            + [result["outputs"].get(key) for key in output_keys])
+    with open(out_base + ".json", "w", encoding = "utf-8") as f:
+        json.dump({"finished": datetime.datetime.now().isoformat(timespec = "seconds"), "grid": grid,
+                   "scenarios": results}, f, ensure_ascii = False, indent = 1)
+    return out_base + ".csv"
+
+
+def run_sweep(stages, settings_file, grid, root, folder = None, processes = 2, selected = None, jobs = 1,
+              force = False, resume = False, dry_run = False, logger = None):
+    """Parameterstudie ausführen: Gemeinsame Stufen einmal, danach alle Szenarien parallel in einem Prozess-Pool
+
+    Required:
+        stages -- Liste mit den Stufen der Pipeline (siehe run_pipeline.py)
+        settings_file -- JSON-Datei mit den Basis-Parametern
+        grid -- Raster der Parameterwerte (siehe load_grid)
+        root -- Ordner, in dem die Skripte ausgeführt werden
+    Optional:
+        folder -- Ordner der Parameterstudie (Default: "sweep_<sim_nr>" im Logfolder)
+        processes -- Anzahl parallel ausgeführter Szenarien
+        selected -- Liste mit den auszuführenden Stufen (Default: alle Stufen ohne "optional")
+        jobs -- Maximale Anzahl parallel ausgeführter Stufen innerhalb eines Szenarios
+        force -- Falls True werden alle Stufen ausgeführt
+        resume -- Falls True werden die Skripte mit "--resume" gestartet
+        dry_run -- Falls True werden nur die Szenarien und Stufen ausgegeben
+        logger -- Logger für die Ausgabe von Meldungen
+
+    Return:
+        results -- Liste mit dem Ergebnis pro Szenario (siehe run_scenario)
+        table -- Pfad zur Ergebnistabelle (None bei dry_run)
+    """
+    log = logger.info if logger else print
+    with open(settings_file, encoding = "utf-8") as f:
+        base = json.load(f)
+    by_name = {stage["name"]: stage for stage in stages}
+    if selected is None:
+        selected = [stage["name"] for stage in stages if not stage.get("optional")]
+    unknown = [name for name in selected if name not in by_name]
+    if unknown:
+        raise ValueError(f'Unbekannte Stufe "{unknown[0]}" (vorhanden: {", ".join(by_name)})')
+    unknown = [key for key in grid if key not in base]
+    if unknown:
+        log(f'Der Parameter "{unknown[0]}" ist in der JSON-Datei nicht vorhanden und wird neu gesetzt')
+    folder = os.path.abspath(folder or os.path.join(base["log_folder"], "sweep_" + base["sim_nr"]))
+    shared, scenario_stages = plan_stages(stages, grid, selected)
+    combinations = expand_grid(grid)
+    width = max(2, len(str(len(combinations))))
+    log(f'{len(combinations)} Szenarien, gemeinsame Stufen: {", ".join(shared) or "-"}, '
+        f'Stufen pro Szenario: {", ".join(scenario_stages) or "-"}')
+
+    # Gemeinsame Stufen einmal ausführen (eigene sim_nr und eigener Workspace im Ordner "shared")
+    shared_outputs = {}
+    shared_changed = False
+    if shared:
+        shared_folder = os.path.join(folder, "shared")
+        settings = scenario_settings(base, base["sim_nr"] + "_shared", shared_folder)
+        shared_file = write_settings(settings, shared_folder)
+        log('Gemeinsame Stufen ausführen')
+        if not dry_run:
+            create_raster_workspace(stages, shared, settings)
+        results = pf.run_pipeline(stages, shared_file, os.path.join(shared_folder, 'pipeline_state_' + settings["sim_nr"] + '.json'),
+                                  root, selected = shared, force = force, jobs = jobs, dry_run = dry_run,
+                                  output_folder = shared_folder, logger = logger, resume = resume)
+        if not dry_run and any(status in ("failed", "blocked") for status in results.values()):
+            raise ValueError('Die gemeinsamen Stufen sind fehlgeschlagen, die Szenarien werden nicht ausgeführt')
+        shared_changed = any(status == "ok" for status in results.values())
+        shared_outputs = stage_outputs(stages, shared, settings)
+
+    # Szenarien erstellen
+    scenarios = []
+    for index, params in enumerate(combinations, 1):
+        sim_nr = base["sim_nr"] + "_s" + str(index).zfill(width)
+        scenario_folder = os.path.join(folder, sim_nr)
+        settings_file = write_settings(scenario_settings(base, sim_nr, scenario_folder, params), scenario_folder)
+        scenarios.append({"sim_nr": sim_nr, "params": params, "folder": scenario_folder, "settings_file": settings_file,
+                          "stages": scenario_stages})
+        log(f'Szenario {sim_nr}: ' + ", ".join(f'{key} = {value}' for key, value in params.items()))
+    if dry_run:
+        return [], None
+
+    # Szenarien parallel ausführen (jeder Prozess mit eigenem Logging und eigenen Workspaces)
+    results = []
+    with ProcessPoolExecutor(max_workers = max(1, processes)) as executor:
+        futures = {executor.submit(run_scenario, scenario, stages, root, shared_outputs, shared_changed, jobs, force,
+                                   resume): scenario for scenario in scenarios}
+        for future in lf.progress(as_completed(futures), "Szenarien", total = len(futures), logger = logger):
+            scenario = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"sim_nr": scenario["sim_nr"], "params": scenario["params"], "status": "failed", "seconds": None,
+                          "stages": {}, "outputs": {}}
+                if logger:
+                    logger.error(f'Szenario {scenario["sim_nr"]} konnte nicht ausgeführt werden: {e}')
+            log(f'Szenario {result["sim_nr"]}: {result["status"]} ({result["seconds"]} sec.)')
+            results.append(result)
+    results.sort(key = lambda result: result["sim_nr"])
+    table = write_results(results, grid, os.path.join(folder, "sweep_" + base["sim_nr"]))
+    log(f'Ergebnistabelle: {table}')
+    return results, table
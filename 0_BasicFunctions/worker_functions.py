@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Funktionen für einen langlebigen Worker-Prozess: Der Import von arcpy (inkl. Lizenzprüfung) und von
+# swmmio, swmm_api und pandas dauert bei jedem Skript mehrere Sekunden. Der Worker lädt diese Module
+# einmal und führt danach die Skripte (Stufen) auf Anfrage im eigenen Prozess aus. Die Aufträge (Stufe,
+# JSON-Datei, sim_nr) werden über eine lokale Verbindung (multiprocessing.connection) übergeben, die
+# Konsolen- und Log-Ausgabe der Skripte wird laufend an den Client zurückgeschickt. Die Aufträge werden
+# nacheinander ausgeführt (arcpy ist nicht threadsicher).
+# -----------------------------------------------------------------------------
+"""worker_functions"""
+import os, sys, io, json, time, runpy, importlib, threading, traceback, contextlib
+from multiprocessing.connection import Listener, Client
+import logging_functions as lf
+
+# Standardadresse und Schlüssel des Workers (nur lokale Verbindungen)
+DEFAULT_ADDRESS = ("localhost", 6001)
+DEFAULT_AUTHKEY = os.environ.get("PYGISSWMM_WORKER_KEY", "pygisswmm").encode("utf-8")
+# Module, die beim Start des Workers geladen werden
+PRELOAD_MODULES = ["arcpy", "pandas", "numpy", "swmmio", "swmm_api"]
+
+
+def parse_address(address):
+    """Adresse "host:port" oder "port" in ein Tupel (host, port) umwandeln"""
+    if address is None:
+        return DEFAULT_ADDRESS
+    if isinstance(address, tuple):
+        return address
+    host, _, port = str(address).rpartition(":")
+    return (host or DEFAULT_ADDRESS[0], int(port))
+
+
+def preload_modules(modules = None, logger = None):
+    """Module importieren, damit diese bei den Aufträgen bereits geladen sind
+
+    Optional:
+        modules -- Liste mit den Modulnamen (Default: PRELOAD_MODULES)
+        logger -- Logger für die Ausgabe von Meldungen
+
+    Return:
+        loaded -- Dictionary {Modul: Ladezeit in Sekunden} (nicht vorhandene Module fehlen)
+    """
+    log = logger.info if logger else print
+    loaded = {}
+    for module in modules if modules is not None else PRELOAD_MODULES:
+        start_time = time.time()
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            log(f'Modul "{module}" konnte nicht geladen werden: {e}')
+            continue
+        loaded[module] = round(time.time() - start_time, 1)
+        log(f'Modul "{module}" in {loaded[module]} sec. geladen')
+    return loaded
+
+
+class _ConnectionWriter(io.TextIOBase):
+    """Hilfsklasse: Zeilenweise Weiterleitung von stdout/stderr an den Client (die Log-Meldungen werden vom
+    Thread des QueueListeners geschrieben, deshalb mit Sperre)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.buffer = ""
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            self.buffer += text
+            if "\n" in self.buffer:
+                lines, _, self.buffer = self.buffer.rpartition("\n")
+                self.conn.send(("output", lines + "\n"))
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                self.conn.send(("output", self.buffer))
+                self.buffer = ""
+
+
+def _settings_for_job(settings_file, sim_nr):
+    """Hilfsfunktion: JSON-Datei mit abweichender sim_nr als temporäre Kopie speichern
+
+    Return:
+        Pfad zur JSON-Datei und Pfad zur temporären Kopie (None falls keine Kopie nötig ist)
+    """
+    if sim_nr is None:
+        return settings_file, None
+    with open(settings_file, encoding = "utf-8") as f:
+        data = json.load(f)
+    if data.get("sim_nr") == sim_nr:
+        return settings_file, None
+    data["sim_nr"] = sim_nr
+    temp_file = os.path.join(os.path.dirname(os.path.abspath(settings_file)),
+                             "." + os.path.basename(settings_file).split(".json")[0] + "_" + sim_nr + "_worker.json")
+    with open(temp_file, "w", encoding = "utf-8") as f:
+        json.dump(data, f, ensure_ascii = False, indent = 1)
+    return temp_file, temp_file
+
+
+def _reset_arcpy():
+    """Hilfsfunktion: Umgebungseinstellungen und Workspace-Cache von arcpy nach einem Auftrag zurücksetzen
+    (Sperren der File-Geodatabases werden freigegeben)"""
+    arcpy = sys.modules.get("arcpy")
+    if arcpy is None:
+        return
+    try:
+        arcpy.ResetEnvironments()
+        arcpy.ClearWorkspaceCache_management()
+    except Exception:
+        pass
+
+
+def run_stage_in_process(script, settings_file, cwd, output = None, args = None):
+    """Skript im aktuellen Prozess ausführen (wie "python script settings_file", aber ohne neuen Interpreter)
+
+    Required:
+        script -- Pfad zum Skript (relativ zu cwd)
+        settings_file -- Pfad zur JSON-Datei (wird als Parameter übergeben, arcpy.GetParameterAsText(0))
+        cwd -- Arbeitsverzeichnis während der Ausführung
+    Optional:
+        output -- Datei-Objekt für stdout und stderr (Default: unverändert)
+        args -- Liste mit weiteren Parametern des Skripts (z. B. ["--resume"])
+
+    Return:
+        returncode -- 0 = erfolgreich, 1 = Fehler, sonst Code von sys.exit
+    """
+    saved_argv, saved_path, saved_cwd = sys.argv, list(sys.path), os.getcwd()
+    returncode = 0
+    try:
+        os.chdir(cwd)
+        script_path = os.path.abspath(script)
+        sys.argv = [script_path, settings_file] + list(args or [])
+        with contextlib.ExitStack() as stack:
+            if output is not None:
+                stack.enter_context(contextlib.redirect_stdout(output))
+                stack.enter_context(contextlib.redirect_stderr(output))
+            try:
+                runpy.run_path(script_path, run_name = "__main__")
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                traceback.print_exc()
+                returncode = 1
+            finally:
+                # Log-Datei des Skripts schliessen (Handler werden sonst beim nächsten Auftrag weiterverwendet)
+                lf.close_logging()
+                if output is not None:
+                    output.flush()
+    finally:
+        sys.argv = saved_argv
+        sys.path[:] = saved_path
+        os.chdir(saved_cwd)
+        _reset_arcpy()
+        # Verbindungen zu GeoPackages schliessen (siehe storage_functions)
+        if "storage_functions" in sys.modules:
+            sys.modules["storage_functions"].reset()
+    return returncode
+
+
+def serve(stages, root, address = None, authkey = None, preload = None, logger = None):
+    """Worker starten: Module laden und Aufträge entgegennehmen, bis der Auftrag "stop" eintrifft
+
+    Ein Auftrag ist ein Dictionary {"stage": Name, "settings": Pfad zur JSON-Datei, "sim_nr": Szenario (optional),
+    "args": weitere Parameter des Skripts (optional)}
+    oder {"command": "stop"} bzw. {"command": "ping"}. Der Worker schickt die Ausgabe als ("output", Text) und
+    zum Schluss ("done", {"returncode", "duration", "stage"}) zurück.
+
+    Required:
+        stages -- Liste mit den Stufen (Dictionaries mit "name" und "script", siehe run_pipeline.STAGES)
+        root -- Ordner, in dem die Skripte ausgeführt werden
+    Optional:
+        address -- Adresse (host, port) bzw. "host:port" (Default: DEFAULT_ADDRESS)
+        authkey -- Schlüssel der Verbindung (Default: DEFAULT_AUTHKEY)
+        preload -- Liste mit den Modulen, die beim Start geladen werden (Default: PRELOAD_MODULES)
+        logger -- Logger für die Ausgabe von Meldungen
+    """
+    log = logger.info if logger else print
+    address = parse_address(address)
+    scripts = {stage["name"]: stage["script"] for stage in stages}
+    start_time = time.time()
+    preload_modules(preload, logger)
+    log(f'Worker in {round(time.time() - start_time, 1)} sec. gestartet, wartet auf {address[0]}:{address[1]}')
+    with Listener(address, authkey = authkey or DEFAULT_AUTHKEY) as listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                log(f'Verbindung abgelehnt: {e}')
+                continue
+            with conn:
+                try:
+                    job = conn.recv()
+                except EOFError:
+                    continue
+                command = job.get("command", "run")
+                if command == "stop":
+                    conn.send(("done", {"returncode": 0, "duration": 0.0, "stage": None}))
+                    log('Worker beendet')
+                    return
+                if command == "ping":
+                    conn.send(("done", {"returncode": 0, "duration": round(time.time() - start_time, 1), "stage": None}))
+                    continue
+                stage = job.get("stage")
+                if stage not in scripts:
+                    conn.send(("output", f'Unbekannte Stufe "{stage}" (vorhanden: {", ".join(scripts)})\n'))
+                    conn.send(("done", {"returncode": 2, "duration": 0.0, "stage": stage}))
+                    continue
+                job_time = time.time()
+                log(f'Stufe "{stage}" starten ({job.get("settings")}, sim_nr = {job.get("sim_nr")})')
+                temp_file = None
+                try:
+                    settings_file, temp_file = _settings_for_job(job["settings"], job.get("sim_nr"))
+                    returncode = run_stage_in_process(scripts[stage], settings_file, root, _ConnectionWriter(conn),
+                                                      job.get("args"))
+                except (EOFError, BrokenPipeError, ConnectionError):
+                    log(f'Verbindung zum Client während Stufe "{stage}" unterbrochen')
+                    continue
+                except Exception as e:
+                    conn.send(("output", f'Stufe "{stage}" konnte nicht gestartet werden: {e}\n'))
+                    returncode = 1
+                finally:
+                    if temp_file and os.path.isfile(temp_file):
+                        os.remove(temp_file)
+                duration = round(time.time() - job_time, 1)
+                log(f'Stufe "{stage}" in {duration} sec. beendet (Rückgabewert {returncode})')
+                try:
+                    conn.send(("done", {"returncode": returncode, "duration": duration, "stage": stage}))
+                except (BrokenPipeError, ConnectionError):
+                    pass
+
+
+def submit_job(stage, settings_file, sim_nr = None, address = None, authkey = None, output = None, args = None):
+    """Auftrag an den Worker schicken und auf das Ende warten
+
+    Required:
+        stage -- Name der Stufe
+        settings_file -- Pfad zur JSON-Datei
+    Optional:
+        sim_nr -- Szenario, das die sim_nr der JSON-Datei ersetzt
+        address -- Adresse des Workers (Default: DEFAULT_ADDRESS)
+        authkey -- Schlüssel der Verbindung (Default: DEFAULT_AUTHKEY)
+        output -- Funktion für die Ausgabe des Skripts (Default: sys.stdout.write)
+        args -- Liste mit weiteren Parametern des Skripts (z. B. ["--resume"])
+
+    Return:
+        returncode -- Rückgabewert des Skripts (0 = erfolgreich)
+    """
+    write = output or sys.stdout.write
+    job = {"stage": stage, "settings": os.path.abspath(settings_file), "sim_nr": sim_nr, "args": list(args or [])}
+    with Client(parse_address(address), authkey = authkey or DEFAULT_AUTHKEY) as conn:
+        conn.send(job)
+        while True:
+            kind, value = conn.recv()
+            if kind == "output":
+                write(value)
+            elif kind == "done":
+                return value["returncode"]
+
+
+def send_command(command, address = None, authkey = None):
+    """Befehl ("stop" oder "ping") an den Worker schicken
+
+    Return:
+        Antwort des Workers (Dictionary) oder None, falls der Worker nicht erreichbar ist
+    """
+    try:
+        with Client(parse_address(address), authkey = authkey or DEFAULT_AUTHKEY) as conn:
+            conn.send({"command": command})
+            return conn.recv()[1]
+    except (ConnectionRefusedError, EOFError):
+        return None
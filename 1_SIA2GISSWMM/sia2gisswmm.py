@@ -15,7 +15,17 @@ import os, sys, time, json
 import arcpy
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
 import logging_functions as lf
+import storage_functions as sf
 
+# Zusätzliche Felder für die Applikation SWMM [Name, Typ, Länge], werden in einem Schritt hinzugefügt
+LINK_SCHEMA = [["Length", "FLOAT", None], ["Geom1", "FLOAT", None], ["Geom2", "FLOAT", None], ["Geom3", "FLOAT", None],
+               ["Geom4", "FLOAT", None], ["Barrels", "SHORT", None], ["InOffset", "FLOAT", None],
+               ["OutOffset", "FLOAT", None], ["InitFlow", "FLOAT", None], ["MaxFlow", "FLOAT", None],
+               ["coords", "TEXT", 10000]]
+NODE_SCHEMA = [["coords", "TEXT", 128], ["InitDepth", "FLOAT", None], ["SurchargeDepth", "FLOAT", None],
+               ["PondedArea", "FLOAT", None]]
+
+@lf.profiled()
 def copy_with_fields(in_fc, out_fc, dict_fields, type_mapping = {}, where = '', overwrite = True):
     """Eine Feature-Klasse mit einer Auswahl von bestimmten Felder kopieren.  
     OID- und Geometry-Felder werden alle beibehalten.
@@ -108,6 +118,7 @@ def copy_with_fields(in_fc, out_fc, dict_fields, type_mapping = {}, where = '',
 
 
 # Input-Daten aufbereiten und Funktionen aufrufen
+@lf.profiled()
 def main(in_node, in_link, boundary_workspace, in_boundary, gisswmm_workspace, out_node, 
          out_link, mapping_link, mapping_node, default_values_link, default_values_node, sim_nr):
 
@@ -243,17 +254,7 @@ def main(in_node, in_link, boundary_workspace, in_boundary, gisswmm_workspace, o
                     ucursor.updateRow(urow)
                     
     ## Zusätzliche Attribute zu Link hinzufügen die für die Applikation SWMM benötigt werden
-    arcpy.management.AddField(out_link, "Length", "FLOAT")
-    arcpy.management.AddField(out_link, "Geom1", "FLOAT")
-    arcpy.management.AddField(out_link, "Geom2", "FLOAT")
-    arcpy.management.AddField(out_link, "Geom3", "FLOAT")
-    arcpy.management.AddField(out_link, "Geom4", "FLOAT")
-    arcpy.management.AddField(out_link, "Barrels", "SHORT")
-    arcpy.management.AddField(out_link, "InOffset", "FLOAT")
-    arcpy.management.AddField(out_link, "OutOffset", "FLOAT")
-    arcpy.management.AddField(out_link, "InitFlow", "FLOAT")
-    arcpy.management.AddField(out_link, "MaxFlow", "FLOAT")
-    arcpy.management.AddField(out_link, "coords", "TEXT", field_length=10000)
+    sf.add_fields(out_link, LINK_SCHEMA)
 
     # Felder berechnen
     with arcpy.da.UpdateCursor(out_link, ["Shape_Length", "Length", "SHAPE@", "coords","LICHTE_HOEHE","BREITE",
@@ -287,10 +288,7 @@ def main(in_node, in_link, boundary_workspace, in_boundary, gisswmm_workspace, o
             ucursor.updateRow(urow)
 
     ## Zusätzliche Attribute zu Node hinzufügen die für die Applikation SWMM benötigt werden
-    arcpy.management.AddField(out_node, "coords", "TEXT", field_length=128)
-    arcpy.management.AddField(out_node, "InitDepth", "FLOAT")
-    arcpy.management.AddField(out_node, "SurchargeDepth", "FLOAT")
-    arcpy.management.AddField(out_node, "PondedArea", "FLOAT")
+    sf.add_fields(out_node, NODE_SCHEMA)
 
     # Felder berechnen
     with arcpy.da.UpdateCursor(out_node, ["SHAPE@", "coords"]) as ucursor:
@@ -400,7 +398,7 @@ if __name__ == "__main__":
 
     # Logging abschliessen
     end_time = time.time()
-    i = lf.search_in_file(log, "error")
+    i = lf.error_count()
     logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
     logger.info(str(i) + " Fehler gefunden. Check Log.")
     endtime = time.ctime()
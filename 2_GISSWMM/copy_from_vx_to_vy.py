@@ -14,6 +14,7 @@ import arcpy
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
 import logging_functions as lf
 
+@lf.profiled()
 def main(gisswmm_workspace, overwrite, in_node, in_link, out_node, out_link, to_sim_nrs):
     """Input-Daten aufbereiten und Funktionen aufrufen
 
@@ -156,7 +157,7 @@ if __name__ == "__main__":
 
     # Logging abschliessen
     end_time = time.time()
-    i = lf.search_in_file(log, "error")
+    i = lf.error_count()
     logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
     logger.info(str(i) + " Fehler gefunden. Check Log.")
     endtime = time.ctime()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Diagnose Kanalnetz: Die Haltungen (link) und Knoten (node) werden auf Datenprobleme geprüft,
+# bevor die Topologie erstellt und die Sohlenkoten interpoliert werden. Es werden die zusammen-
+# hängenden Teilnetze (Union-Find) und die gerichteten Zyklen (iterative Tiefensuche) bestimmt sowie
+# Haltungen mit fehlendem Von- oder Bis-Schacht, Knoten ohne Haltungen und doppelte IDs gesucht.
+# Die Ergebnisse werden in eine Tabelle ("diagnostics_sim_nr") geschrieben und in den Feature-Klassen
+# in den Feldern "diag" (Problem) und "diag_comp" (Nummer des Teilnetzes) gekennzeichnet, damit nachfolgende
+# Skripts problematische Bereiche ausschliessen oder abfangen können.
+#
+# Die Input-Parameter werden in einer JSON-Datei angegeben, die als Eingabe dem Skript übergeben wird.
+# -----------------------------------------------------------------------------
+"""gisswmm_diagnostics"""
+import os, sys, time, json
+import arcpy
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import logging_functions as lf
+import network_functions as nf
+import storage_functions as sf
+
+# Feldnamen für die Kennzeichnung in den Feature-Klassen
+diag_field = "diag"
+diag_comp_field = "diag_comp"
+DIAG_SCHEMA = [[diag_field, "TEXT", 128], [diag_comp_field, "LONG", None]]
+
+
+def _write_flags(in_fc, id_field, flags, components):
+    """Hilfsfunktion: Probleme und Teilnetz-Nummer in die Felder "diag" und "diag_comp" schreiben
+
+    Required:
+        in_fc -- Feature-Klasse (node oder link)
+        id_field -- Bezeichnung vom ID-Feld
+        flags -- Dictionary {ID: [Problem, ...]}
+        components -- Dictionary {ID: Nummer des Teilnetzes}
+    """
+    sf.add_fields(in_fc, DIAG_SCHEMA)
+
+    with arcpy.da.UpdateCursor(in_fc, [id_field, diag_field, diag_comp_field]) as ucursor:
+        for urow in ucursor:
+            problems = flags.get(urow[0])
+            urow[1] = ";".join(problems)[:128] if problems else None
+            urow[2] = components.get(urow[0])
+            ucursor.updateRow(urow)
+
+
+@lf.profiled()
+def main(out_node, node_id, out_link, link_id, link_from, link_to, gisswmm_workspace, sim_nr):
+    """Input-Daten aufbereiten und Funktionen für die Diagnose des Kanalnetzes aufrufen
+
+    Required:
+        out_node -- Name der Feature-Klasse mit den Schächten
+        node_id -- Bezeichnung von ID-Feld der Schächte
+        out_link -- Name der Feature-Klasse mit den Haltungen
+        link_id -- Bezeichnung von ID-Feld der Haltungen
+        link_from -- Bezeichnung von Feld mit ID von Von-Schacht
+        link_to -- Bezeichnung von Feld mit ID von Bis-Schacht
+        gisswmm_workspace -- Pfad zu arcpy Workspace (.gdb), in welchem die Diagnose-Tabelle erstellt wird
+        sim_nr -- Wird als Postfix für die Diagnose-Tabelle verwendet
+
+    Return:
+        diagnosis -- Dictionary mit den Ergebnissen (siehe network_functions.diagnose_network)
+    """
+    logger.info('Knoten und Haltungen einlesen')
+    node_ids = [row[0] for row in arcpy.da.SearchCursor(out_node, node_id)]
+    links = [tuple(row) for row in arcpy.da.SearchCursor(out_link, [link_id, link_from, link_to])]
+
+    logger.info(f'Kanalnetz mit {len(node_ids)} Knoten und {len(links)} Haltungen prüfen')
+    diagnosis = nf.diagnose_network(node_ids, links)
+    components = diagnosis["components"]
+
+    # Probleme pro Objekt sammeln
+    node_flags = {}
+    link_flags = {}
+    rows = []
+    for nr, cycle in enumerate(diagnosis["cycles"], start=1):
+        logger.warning(f'Gerichteter Zyklus Nr. {nr} mit {len(cycle)} Knoten gefunden (z. B. Knoten {cycle[0]})')
+        for nid in cycle:
+            node_flags.setdefault(nid, []).append("zyklus")
+            rows.append(("node", nid, "zyklus", components.get(nid), f'Zyklus Nr. {nr}'))
+    for lid in diagnosis["cycle_links"]:
+        link_flags.setdefault(lid, []).append("zyklus")
+        rows.append(("link", lid, "zyklus", None, None))
+    for lid, problem in diagnosis["dangling_links"]:
+        logger.warning(f'Haltung mit ID {lid} referenziert keinen vorhandenen Knoten ({problem})')
+        link_flags.setdefault(lid, []).append(problem)
+        rows.append(("link", lid, "knoten_fehlt", None, problem))
+    for nid in diagnosis["orphan_nodes"]:
+        node_flags.setdefault(nid, []).append("ohne_haltung")
+        rows.append(("node", nid, "ohne_haltung", components.get(nid), None))
+    for nid in diagnosis["duplicate_nodes"]:
+        logger.warning(f'Die Knoten-ID {nid} ist mehrfach vorhanden')
+        node_flags.setdefault(nid, []).append("doppelte_id")
+        rows.append(("node", nid, "doppelte_id", components.get(nid), None))
+    for lid in diagnosis["duplicate_links"]:
+        logger.warning(f'Die Haltungs-ID {lid} ist mehrfach vorhanden')
+        link_flags.setdefault(lid, []).append("doppelte_id")
+        rows.append(("link", lid, "doppelte_id", None, None))
+
+    # Teilnetz-Nummer der Haltungen entspricht der Nummer des Von- bzw. Bis-Schachtes
+    link_components = {}
+    for lid, lfrom, lto in links:
+        link_components[lid] = components.get(lfrom, components.get(lto))
+
+    logger.info(f'{diagnosis["n_components"]} Teilnetze, {len(diagnosis["cycles"])} Zyklen, '
+                f'{len(diagnosis["dangling_links"])} Haltungen mit fehlendem Knoten, '
+                f'{len(diagnosis["orphan_nodes"])} Knoten ohne Haltungen, {len(diagnosis["duplicate_nodes"])} doppelte Knoten-IDs '
+                f'und {len(diagnosis["duplicate_links"])} doppelte Haltungs-IDs gefunden')
+
+    # Diagnose-Tabelle erstellen
+    diag_table = "diagnostics_" + sim_nr
+    diag_table_path = os.path.join(gisswmm_workspace, diag_table)
+    logger.info(f'Tabelle "{diag_table}" erstellen')
+    if arcpy.Exists(diag_table_path):
+        arcpy.management.Delete(diag_table_path)
+    arcpy.management.CreateTable(gisswmm_workspace, diag_table)
+    arcpy.management.AddFields(diag_table_path, [["object_type", "TEXT", "", 16], ["object_id", "TEXT", "", 128],
+                                                 ["problem", "TEXT", "", 32], ["component", "LONG"],
+                                                 ["detail", "TEXT", "", 128]])
+    with arcpy.da.InsertCursor(diag_table_path, ["object_type", "object_id", "problem", "component", "detail"]) as icursor:
+        for row in rows:
+            icursor.insertRow(row)
+
+    # Probleme in den Feature-Klassen kennzeichnen
+    logger.info(f'Felder "{diag_field}" und "{diag_comp_field}" aktualisieren')
+    _write_flags(out_node, node_id, node_flags, components)
+    _write_flags(out_link, link_id, link_flags, link_components)
+
+    return diagnosis
+
+
+# Daten einlesen
+# Logginig initialisieren
+if __name__ == "__main__":
+    # Globale Variabel für logging
+    global logger
+    ### Input JSON-Datei ###
+    # Falls das Skript mittels einer Batch-Datei ausgeführt wird, wird die JSON-Datei als Parameter übergeben:
+    paramFile = arcpy.GetParameterAsText(0)
+    # Falls das Skript direkt ausgeführt wird, wird die JSON-Datei hier angeben:
+    if len(paramFile) == 0:
+        paramFile = os.path.join(os.path.dirname(__file__), '..', 'settings_v1.json')
+
+    if paramFile:
+        # Einlesen der json-Datei
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            # Der Pfad zum Ordner, in dem die log-Datei gespeichert werden soll.
+            log_folder = data["log_folder"]
+            # Die Bezeichnung der aktuellen Simulation (Szenario).
+            sim_nr = data["sim_nr"]
+            # Die arcpy Umgebungseinstellung "overwrite".
+            if "overwrite" in data:
+                overwrite = data["overwrite"]
+            else:
+                overwrite = "True"
+            # Der Pfad zum arcpy Workspace (.gdb) mit den Knoten (out_node) und Haltungen (out_link).
+            gisswmm_workspace = data["gisswmm_workspace"]
+            # Der Name der Feature-Klasse mit den Knoten (ohne Postfix "_sim_nr"!).
+            out_node = data["out_node"]
+            # Die Bezeichnung vom ID-Feld in der Feature-Klasse "out_node".
+            node_id = data["node_id"]
+            # Der Name der Feature-Klasse mit den Haltungen (ohne Postfix "_sim_nr"!).
+            out_link = data["out_link"]
+            # Die Bezeichnung vom ID-Feld in der Feature-Klasse "out_link".
+            link_id = data["link_id"]
+            # Die Bezeichnung vom Feld mit der ID vom Von-Schacht in der Feature-Klasse "out_link".
+            link_from = data["link_from"]
+            # Die Bezeichnung vom Feld mit der ID vom Bis-Schacht in der Feature-Klasse "out_link".
+            link_to = data["link_to"]
+
+    else:
+        raise ValueError('keine json-Datei mit den Parametern angegeben')
+
+    # Prüfen ob Logfolder existiert
+    if not os.path.isdir(log_folder):
+        try:
+            os.mkdir(log_folder)
+        except:
+            raise ValueError(f'Logfolder "{log_folder}" konnte nicht erstellt werden!')
+
+    # overwrite str -> bool
+    if overwrite == 'True':
+        overwrite = True
+    else:
+        overwrite = False
+
+    # Logging initialisieren
+    filename = 'gisswmm_diagnostics_' + sim_nr + '.log'
+    log = os.path.join(log_folder, filename)
+    logger= lf.init_logging(log)
+    logger.info('****************************************************************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    # Aktueller Workspace definieren
+    arcpy.env.workspace = gisswmm_workspace
+
+    # Prüfen ob Eingabedatensätze vorhanden sind
+    postfix = "_" + sim_nr
+    if not postfix in out_node:
+        out_node = out_node + postfix
+    if not postfix in out_link:
+        out_link = out_link + postfix
+    if not arcpy.Exists(out_node):
+        err_txt = f'Die angegebene Feature-Klasse {out_node} ist nicht vorhanden!'
+        logger.error(err_txt)
+        raise ValueError(err_txt)
+    if not arcpy.Exists(out_link):
+        err_txt = f'Die angegebene Feature-Klasse {out_link} ist nicht vorhanden!'
+        logger.error(err_txt)
+        raise ValueError(err_txt)
+
+    # Main module aufrufen
+    with arcpy.EnvManager(workspace = gisswmm_workspace, overwriteOutput = overwrite):
+        main(out_node, node_id, out_link, link_id, link_from, link_to, gisswmm_workspace, sim_nr)
+
+    # Logging abschliessen
+    end_time = time.time()
+    i = lf.error_count()
+    logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
+    logger.info(str(i) + " Fehler gefunden. Check Log.")
+    endtime = time.ctime()
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
@@ -25,16 +25,41 @@
 # werden jeweils als letztes berechnet. Dies gewährleistet, dass bei Einläufen keine Gefällsänderung auftritt.
 # Nachdem die Sohlenkote von allen Schächten bekannt ist wird das Gefälle der Haltungen berechnet. 
 #
+# Probelauf (dry run): Alle Schritte werden im Speicher berechnet und als Änderungssatz (JSON-Datei mit
+# geänderten Feldwerten sowie hinzugefügten und gelöschten Objekten) gespeichert, ohne die Geodatabase
+# zu verändern. Ein gespeicherter Änderungssatz kann anschliessend in einer Transaktion angewendet werden.
+#
+# GeoPackage: Ist "gisswmm_workspace" ein GeoPackage (.gpkg), werden die Feature-Klassen über storage_functions
+# ohne arcpy gelesen und geschrieben. Topologie, Sohlenkote und Steigung werden dann im Speicher berechnet
+# (wie beim Probelauf) und der Änderungssatz direkt angewendet. Die Deckelkote aus dem Höhenmodell (Raster)
+# wird nur mit arcpy berechnet.
+#
 # Die Input-Parameter werden in einer JSON-Datei angegeben, die als Eingabe dem Skript übergeben wird.
 #  -----------------------------------------------------------------------------
 """gisswmm_upd"""
 import os, sys, time, json
-import arcpy
+try:
+    import arcpy
+except ImportError:
+    # Ohne ArcGIS nur mit GeoPackage (siehe storage_functions)
+    arcpy = None
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
 import logging_functions as lf
+import storage_functions as sf
 import basic_functions as bf
+import network_functions as nf
+import changeset_functions as cf
+import checkpoint_functions as ckf
+
+# Schema: Felder, die von den Schritten in den Feature-Klassen erstellt werden [Name, Typ, Länge]. Beim ersten
+# Schritt werden alle fehlenden Felder in einem Schritt hinzugefügt (storage_functions.add_fields).
+NODE_SCHEMA = [["tag", "TEXT", 40], ["OutfallType", "TEXT", 128], ["MaxDepth", "FLOAT", None]]
+LINK_SCHEMA = [["slope", "FLOAT", None]]
+# Suchtoleranz (m) zwischen Einlaufschacht und Haltung beim Trennen der Haltungen (main_topology und plan_topology)
+SPLIT_TOLERANCE = 0.1
 
 ## Funktionen für die Berechnung der Deckelkote
+@lf.profiled()
 def main_shaftheight(out_node, node_dk, dhm_workspace, in_dhm, tag):
     """Input-Daten aufbereiten und Funktionen für die Berechnung der Deckelkote aufrufen
 
@@ -57,37 +82,37 @@ def main_shaftheight(out_node, node_dk, dhm_workspace, in_dhm, tag):
     # Name von neuen Feld mit den extrahierten Rasterwerten
     node_dk_dhm  = node_dk.lower() + "_dhm" 
 
-    # Prüfen ob Felder vorhanden sind
-    fnames =  [field.name for field in arcpy.ListFields(out_node)]
+    # Vorhandenes Feld mit den Rasterwerten löschen und Schema ergänzen
     node_tag = "tag"
-    if node_dk_dhm in fnames:
-        logger.info(f'Vorhandenes Feld Deckelkote berechnet löschen')
-        arcpy.management.DeleteField(out_node, node_dk_dhm)
-    if node_tag not in fnames:
-        logger.info(f'tag-Feld erstellen')
-        arcpy.AddField_management(out_node, node_tag, "TEXT", field_length=40)
+    sf.delete_fields(out_node, [node_dk_dhm])
+    added = sf.add_fields(out_node, NODE_SCHEMA)
+    if added:
+        logger.info(f'Felder {added} erstellen')
 
     # Werte aus Raster extrahieren 
     logger.info(f'Werte aus Höhenmodell extrahieren')
     # ArcGIS env setting "preserveGlobalIds=True" bei dieser Funktion nicht vorhanden, deshalb GlobalID zu Textfeld konvertieren
     arcpy.sa.ExtractMultiValuesToPoints(out_node_lyr, [[in_dhm_path, node_dk_dhm]], 'NONE')
 
-    # Attributbezogene Selektion (Schächte ohne Deckelkote)
-    logger.info(f'Attributbezogene Selektion durchführen')
-    arcpy.management.MakeFeatureLayer(out_node, out_node_lyr)
+    # Deckelkote und Tag in einem Durchgang abfüllen (nur Schächte ohne Deckelkote)
+    logger.info(f'Fehlende Deckelkoten und Tag abfüllen')
     where = '"' + node_dk + '"' + " IS NULL" 
-    arcpy.management.SelectLayerByAttribute(out_node_lyr, 'NEW_SELECTION', where, 'NON_INVERT')
-    # Deckelkote berechnen
-    logger.info(f'Fehlende Deckelkoten abfüllen')
-    expression_dk = "!"+node_dk_dhm+"!"
-    arcpy.management.CalculateField(out_node_lyr, node_dk, expression_dk, "PYTHON3")    
-    logger.info(f'Tag abfüllen')
-    bf.append_text(out_node_lyr, node_tag, tag)
+    cnt = 0
+    with sf.update_cursor(out_node, [node_dk, node_dk_dhm, node_tag], where) as ucursor:
+        for urow in ucursor:
+            urow[0] = urow[1]
+            urow[2] = bf.merge_tags(urow[2], tag)
+            cnt += 1
+            ucursor.updateRow(urow)
+    logger.info(f'Von {cnt} Schächten Deckelkote ergänzt')
 
 ## Funktionen für die Erstellung der Haltung-Knoten-Haltung Topologie
+@lf.profiled()
 def main_topology(out_node, node_id, node_to_link, node_type, type_inlet, out_link, link_id, link_from, 
-                  link_to, link_length, delete = True):
-    """Input-Daten aufbereiten und Funktionen für die Erstellung der Topologie aufrufen
+                  link_to, link_length, delete = True, define_outfalls = True, topology = None, checkpoint = None,
+                  checkpoint_step = "topology"):
+    """Input-Daten aufbereiten und Funktionen für die Erstellung der Topologie aufrufen. Die Haltungen werden beim
+    Einlaufschacht mit denselben Hilfsfunktionen wie beim Probelauf getrennt (siehe plan_topology).
 
     Required:
         out_node -- Name der Input Feature-Klasse mit den Schächten
@@ -103,208 +128,189 @@ def main_topology(out_node, node_id, node_to_link, node_type, type_inlet, out_li
 
     Optional:
         delete -- Falls True werden Schächte und Haltungen gelöscht, die nicht am Netz angeschlossen sind.
-                  Ebenfalls werden Einlausschächte ohne zugehörige Haltungen gelöscht. 
+                  Ebenfalls werden Einlausschächte ohne zugehörige Haltungen gelöscht. Falls False werden
+                  Einlaufschächte, die auf keiner Haltung liegen (z. B. beim PAA-Durchgang), übersprungen.
+        define_outfalls -- Falls True werden Schächte ohne abgehende Haltung als Auslaufschächte definiert.
+        topology -- Topologie eines vorherigen Durchgangs (Rückgabewert dieser Funktion). Einlaufschächte, 
+                    die bereits bearbeitet wurden, werden nicht nochmals getrennt.
+        checkpoint -- Checkpoint (siehe checkpoint_functions). Die bearbeiteten Einlaufschächte werden in Batches
+                      vermerkt, bei "--resume" werden die bereits vermerkten Einlaufschächte übersprungen.
+        checkpoint_step -- Bezeichnung des Arbeitsschrittes im Checkpoint
+
+    Return:
+        topology -- Dictionary mit den IDs der bearbeiteten Einlaufschächte ("inlets")
     """   
+    if topology is None:
+        topology = {"inlets": set()}
+    # Einlaufschächte, die vor einem Abbruch bereits bearbeitet wurden (Checkpoint)
+    resumed_inlets = ckf.batch_keys(checkpoint, checkpoint_step)
+    if resumed_inlets:
+        logger.info(f'Checkpoint: {len(resumed_inlets)} Einlaufschächte wurden bereits bearbeitet')
+        topology["inlets"].update(resumed_inlets)
+
     logger.info('Haltungen mit selben Von- und Bis-Schacht aktualisieren')
     where_link = ('"' + link_from + '"' +" = " + '"' + link_to + '"')   
-    with arcpy.da.UpdateCursor(out_link, [link_id, link_from, link_to], where_link) as ucursor:
+    with sf.update_cursor(out_link, [link_id, link_from, link_to], where_link) as ucursor:
         for urow in ucursor:
             logger.warning(f'Haltung mit ID {urow[0]} hat den selben Von- und Bis-Schacht! Von-Schacht wird auf Null gesetzt')
             urow[1] = None
             ucursor.updateRow(urow)
 
     # Haltungen löschen die keinen vorhandenen Von- oder Bis-Schacht aufweisen
+    # (Mengenvergleich im Speicher, Löschen anhand der ObjectIDs in Batches)
     if delete:
-        node_id_list = [row[0] for row in arcpy.da.SearchCursor(out_node, node_id)]
+        node_id_set = {row[0] for row in sf.search_cursor(out_node, [node_id])}
         logger.info('Haltungen ohne Von- oder Bis-Schacht löschen')
-        where_link = ('"' + link_from + '"' +" NOT IN " + str(node_id_list).replace("[","(").replace("]",")") + " OR " + 
-                    '"' + link_to + '"' +" NOT IN " + str(node_id_list).replace("[","(").replace("]",")"))
-        cnt = 0
-        with arcpy.da.UpdateCursor(out_link, link_id, where_link) as dcursor:
-            for drow in dcursor:
-                logger.warning(f'Haltung mit ID {drow[0]} wird gelöscht')
-                dcursor.deleteRow() 
-                cnt += 1 
+        del_oids = []
+        with sf.search_cursor(out_link, ["OID@", link_id, link_from, link_to]) as cursor:
+            for row in cursor:
+                if ((row[2] is not None and row[2] not in node_id_set) or 
+                    (row[3] is not None and row[3] not in node_id_set)):
+                    logger.warning(f'Haltung mit ID {row[1]} wird gelöscht')
+                    del_oids.append(row[0])
+        cnt = bf.delete_rows(out_link, del_oids, sf.oid_field_name(out_link))
         logger.info(f'{cnt} Haltungen ohne Von- oder Bis-Schacht wurden gelöscht')
 
-    # Listen mit Von- und Bis-Schächten
+    # Mengen mit Von- und Bis-Schächten
     logger.info('Listen mit Von- und Bis-Schächten erstellen')
-    link_from_list = []
-    link_to_list = []
-    with arcpy.da.SearchCursor(out_link, [link_from, link_to]) as cursor:
+    link_from_set = set()
+    link_to_set = set()
+    with sf.search_cursor(out_link, [link_from, link_to]) as cursor:
         for row in cursor:
-            link_from_list.append(row[0])
-            link_to_list.append(row[1])
+            link_from_set.add(row[0])
+            link_to_set.add(row[1])
 
     # Schächte die weder ein Von- noch ein Bis-Schacht sind löschen
     if delete:
         logger.info('Schächte die weder Von- noch Bis-Schacht einer Haltung sind löschen')
-        where_node = ('"' + node_id + '"' +" NOT IN " + str(link_from_list).replace("[","(").replace("]",")") + " AND " +
-                    '"' + node_id + '"' +" NOT IN " + str(link_to_list).replace("[","(").replace("]",")") )
-        cnt = 0
-        with arcpy.da.UpdateCursor(out_node, node_id, where_node) as dcursor:
-            for drow in dcursor:
-                logger.warning(f'Schacht mit ID {drow[0]} wird gelöscht')
-                dcursor.deleteRow()
-                cnt += 1
+        out_node_oid = sf.oid_field_name(out_node)
+        del_oids = []
+        del_inlet_oids = []
+        with sf.search_cursor(out_node, ["OID@", node_id, node_type]) as cursor:
+            for row in cursor:
+                if row[1] is None:
+                    continue
+                if row[1] not in link_from_set and row[1] not in link_to_set:
+                    logger.warning(f'Schacht mit ID {row[1]} wird gelöscht')
+                    del_oids.append(row[0])
+                elif row[2] == type_inlet and row[1] not in link_to_set:
+                    # Einlaufschächte ohne zugehörige Haltung
+                    del_inlet_oids.append((row[0], row[1]))
+        cnt = bf.delete_rows(out_node, del_oids, out_node_oid)
         logger.info(f'{cnt} Schächte ohne zugehehörige Haltungen wurden gelöscht')
 
         # Einlaufschächte ohne zugehörige Haltung löschen
         logger.info('Einlaufschächte ohne Von-Schacht löschen')
-        where_node = ('"' + node_type + '"' + " = "+ "'" + type_inlet + "'"+ " AND " + 
-                    '"' + node_id + '"' +" NOT IN " + str(link_to_list).replace("[","(").replace("]",")") )
-        cnt = 0
-        with arcpy.da.UpdateCursor(out_node, node_id, where_node) as dcursor:
-            for drow in dcursor:
-                logger.warning(f'Einlaufschacht mit ID {drow[0]} wird gelöscht')
-                dcursor.deleteRow()
-                cnt += 1
+        for del_inlet in del_inlet_oids:
+            logger.warning(f'Einlaufschacht mit ID {del_inlet[1]} wird gelöscht')
+        cnt = bf.delete_rows(out_node, [del_inlet[0] for del_inlet in del_inlet_oids], out_node_oid)
         logger.info(f'{cnt} Einlaufschächte ohne Von-Schacht wurden gelöscht')
 
     # Einflaufschächte die eine zugehörige Haltung aufweisen und die referenzierte Einlauf-Haltung noch nicht getrennt ist
-    logger.info('Layer mit relevanten Einlaufschächten erstellen')
-    where_node = ('"' + node_type + '"' + " = " + "'"+ type_inlet + "'" + " AND " + 
-                '"' + node_id + '"' +" NOT IN " + str(link_from_list).replace("[","(").replace("]",")") + " AND " +
-                '"' + node_id + '"' +" IN " + str(link_to_list).replace("[","(").replace("]",")") )
-    out_node_lyr = 'out_node_lyr'
-    arcpy.management.MakeFeatureLayer(out_node, out_node_lyr, where_node)
-
-    # Liste mit ID's der Schächte und ID's der Haltungen in welche die Schächte übergehen
+    # Liste mit ID's, Geometrie der Schächte und ID's der Haltungen in welche die Schächte übergehen
     logger.info('Liste mit den IDs der relevanten Schächte und Haltungen erstellen')
-    node_id_list = []
-    node_to_link_list = []
-    with arcpy.da.SearchCursor(out_node_lyr, [node_id, node_to_link]) as cursor:
+    where_node = '"' + node_type + '"' + " = " + "'"+ type_inlet + "'"
+    inlets = []
+    cnt_skipped = 0
+    with sf.search_cursor(out_node, ["OID@", node_id, node_to_link, "SHAPE@"], where_node) as cursor:
         for row in cursor:
-            node_id_list.append(row[0])
-            node_to_link_list.append(row[1])
+            if row[1] in link_from_set or row[1] not in link_to_set:
+                continue
+            # Einlaufschächte aus vorherigem Durchgang (z. B. PAA-Netz) nicht nochmals bearbeiten
+            if row[1] in topology["inlets"]:
+                cnt_skipped += 1
+                continue
+            inlets.append(row)
+    if cnt_skipped > 0:
+        logger.info(f'{cnt_skipped} Einlaufschächte wurden bereits in einem vorherigen Durchgang bearbeitet')
+
+    # Felder der Haltungen, die auf die getrennten Haltungen übertragen werden
+    link_fields = [field.name for field in sf.list_fields(out_link)
+                   if field.editable and field.type not in ("OID", "Geometry", "GlobalID")]
+    out_link_oid = sf.oid_field_name(out_link)
+    out_node_oid = sf.oid_field_name(out_node)
+    link_workspace = sf.dataset_workspace(out_link)
 
     logger.info('Durch alle relevanten Schächte iterieren')
     cnt_deleted = 0
     cnt_updated = 0
-    for ii, nid in enumerate(node_id_list):
-            # Spezifischer Schacht auswählen
-            logger.info(f'Haltungen mit Schacht {nid} trennen')
-            where_node = '"' + node_id + '"' +" = " + f"'{nid}'"  
-            arcpy.management.MakeFeatureLayer(out_node, out_node_lyr, where_node)
-            
-            # Haltungen auswählen, welche möglicherweise getrennt werden müssen 
+    not_found = set()
+    # Fortschritt mit Durchsatz und Restdauer melden, die Meldungen pro Schacht nur noch auf Stufe DEBUG
+    for oid, nid, node_link, point in lf.progress(inlets, "Einlaufschächte trennen"):
+            topology["inlets"].add(nid)
+            logger.debug(f'Haltungen mit Schacht {nid} trennen')
+
+            # Haltungen, welche möglicherweise getrennt werden müssen 
             # ("LIKE" da ID evtl. bereits mit postifix "_u" oder "_l" aktualisiert wurde)
-            where_link = '"' + link_id + '"'+" LIKE " + f"'{node_to_link_list[ii]}%'"
-            out_link_lyr = 'out_link_lyr'
-            arcpy.management.MakeFeatureLayer(out_link, out_link_lyr, where_link)
-
-            # Haltungen mit dem spezifischen Schacht splitten 
-            link_splited = "link_splited"
-            arcpy.management.SplitLineAtPoint(out_link_lyr, out_node_lyr, link_splited, "0.1 Meters")
-
-            # Feature-Layer von getrennten Haltungen erstellen
-            link_splited_lyr = "link_splited_lyr"
-            arcpy.management.MakeFeatureLayer(link_splited, link_splited_lyr)
-            # Die zwei Haltungen auswählen, welche tatsächlich betroffen sind (da evtl. mehrere Enläufe pro Haltung)
-            arcpy.management.SelectLayerByLocation(link_splited_lyr, "INTERSECT", out_node_lyr, "0.1 Meters", 
-                                                    "SUBSET_SELECTION", "NOT_INVERT")
-
-            # ObjectIDs der betroffenen Haltungen
-            link_objectid_list = [row[0] for row in arcpy.da.SearchCursor(link_splited_lyr, "OBJECTID")]
-            
-            if len(link_objectid_list) == 0:
+            where_link = '"' + link_id + '"'+" LIKE " + f"'{node_link}%'"
+            links = {}
+            with sf.search_cursor(out_link, ["OID@"] + link_fields + ["SHAPE@"], where_link) as cursor:
+                for row in cursor:
+                    links[row[0]] = dict(zip(link_fields, row[1:-1]), **{"SHAPE@": row[-1]})
+            link_oid = _nearest_link(links, point, node_link, link_id, SPLIT_TOLERANCE)
+
+            if link_oid is None and not delete:
+                # Haltung nicht im aktuellen Durchgang (z. B. Einlaufschacht am FAA-Netz beim PAA-Durchgang)
+                # -> nicht löschen und nicht als bearbeitet vermerken, sondern im nächsten Durchgang bearbeiten
+                logger.debug('Schacht befindet sich auf keiner Haltung dieses Durchgangs, wird übersprungen')
+                topology["inlets"].discard(nid)
+                not_found.add(nid)
+                continue
+            elif link_oid is None:
                 # Einlaufschacht auf keiner Haltung -> löschen
-                logger.info('Schacht befindet sich auf keiner Haltung')
-                with arcpy.da.UpdateCursor(out_node, node_id, where_node) as dcursor:
-                    for drow in dcursor:
-                        logger.warning(f'Schacht mit ID {drow[0]} wird gelöscht')
-                        dcursor.deleteRow()
-                        cnt_deleted += 1
+                logger.warning(f'Schacht mit ID {nid} befindet sich auf keiner Haltung und wird gelöscht')
+                cnt_deleted += bf.delete_rows(out_node, [oid], out_node_oid)
+                ckf.add_key(checkpoint, checkpoint_step, nid)
                 continue
-            elif len(link_objectid_list) < 2:
+
+            # Bis-Schacht um die Reihenfolge (Fliessrichtung) herauszufinden
+            where_node = '"' + node_id + '"' +" = " + f"'{links[link_oid][link_to]}'"
+            with sf.search_cursor(out_node, ["SHAPE@"], where_node) as cursor:
+                node_to_point = next((row[0] for row in cursor), None)
+            new_links = _split_link(links[link_oid], point, node_to_point, nid, link_id, link_from, link_to, 
+                                    link_length, SPLIT_TOLERANCE)
+            if new_links is None:
                 # Trennen nicht notwendig
-                logger.info('Schacht liegt nur auf einer Haltung, keine Aktualisierung notwendig')
+                logger.debug('Schacht liegt am Anfang oder Ende der Haltung, keine Aktualisierung notwendig')
+                ckf.add_key(checkpoint, checkpoint_step, nid)
                 continue
 
-            # Bis Schacht auswählen um die Reihenfolge (Fliessrichtung) herauszufinden
-            node_to = [row[0] for row in arcpy.da.SearchCursor(link_splited_lyr, link_to)][0]
-            # Layer mit Bis-Schacht erstellen
-            where_node = '"' + node_id + '"' +" = " + f"'{node_to}'"  
-            arcpy.management.MakeFeatureLayer(out_node, out_node_lyr, where_node)
-            # Haltung auswählen die bei Bis-Schacht liegt
-            arcpy.management.SelectLayerByLocation(link_splited_lyr, "INTERSECT", out_node_lyr, "0.1 Meters", 
-                                                    "SUBSET_SELECTION", "NOT_INVERT")
-            link_objectid_lower = [row[0] for row in arcpy.da.SearchCursor(link_splited_lyr, "OBJECTID")][0]
-
-            for objectid in link_objectid_list:
-                if objectid != link_objectid_lower:
-                    link_objectid_upper = objectid
-            
-            # Erneut Haltungen auswählen, welche aktualisiert werden müssen
-            where_link = '"' + "OBJECTID" + '"'+" IN " + str(link_objectid_list).replace("[","(").replace("]",")")
-            out_link_lyr = 'out_link_lyr'
-            arcpy.management.MakeFeatureLayer(link_splited, out_link_lyr, where_link)
-            # Originale 'link_id'
-            link_id_orig = [row[0] for row in arcpy.da.SearchCursor(out_link_lyr, link_id)][0]
-
-            logger.info('Die zwei neuen Haltungen aktualiseren')
-            # Die zwei neuen Haltungen aktualiseren
-            with arcpy.da.UpdateCursor(out_link_lyr, ["OBJECTID", link_id, link_from, link_to, link_length, "SHAPE@LENGTH"]) as ucursor:
-                for urow in ucursor:
-                    if urow[0] == link_objectid_lower:
-                        # Link id anpassen
-                        urow[1] = urow[1] + "_l"
-                        # Von-Schacht anpassen
-                        urow[2] = nid
-                        # Länge anpassen
-                        urow[4] = urow[5]
-                        
-                    elif urow[0] == link_objectid_upper:
-                        # Link id anpassen
-                        urow[1] = urow[1] + "_u"
-                        # Von-Schacht anpassen
-                        urow[3] = nid
-                        # Länge anpassen
-                        urow[4] = urow[5]
-                    
-                    else:
-                        logger.warning(f'Trennung bei Schacht {nid} führte unerwartet zu mehr als zwei neuen Haltungen!')
-
-                    ucursor.updateRow(urow)
-                    cnt_updated += 1
-
-            logger.info(f'Ursprüngliche Haltung {link_id_orig} löschen')
-            # Ursprüngliche Haltung löschen
-            where_link = '"' + link_id + '"'+" = " + f"'{link_id_orig}'"
-            with arcpy.da.UpdateCursor(out_link, link_id, where_link) as dcursor:
-                for urow in dcursor:
-                    dcursor.deleteRow()
-            
-            # Neue Haltungen hinzufügen
-            logger.info('Neue Haltungen hinzufügen')
-            arcpy.management.Append(out_link_lyr, out_link, 'NO_TEST')
-            
-            # Temporäre Feature Klasse mit getrennten Haltungen löschen
-            logger.info('Temporäre Feature-Klasse mit getrennten Haltungen löschen')
-            arcpy.management.Delete(link_splited)
+            # Ursprüngliche Haltung in einer Transaktion durch die zwei neuen Haltungen ersetzen (bei einem
+            # Abbruch bleibt die Haltung entweder unverändert oder vollständig getrennt)
+            logger.debug(f'Haltung {links[link_oid][link_id]} durch die zwei neuen Haltungen ersetzen')
+            with sf.transaction(link_workspace):
+                bf.delete_rows(out_link, [link_oid], out_link_oid)
+                with sf.insert_cursor(out_link, link_fields + ["SHAPE@"]) as icursor:
+                    for new_link in new_links:
+                        icursor.insertRow([new_link[field] for field in link_fields] + [new_link["SHAPE@"]])
+            # Einlaufschacht erst nach Abschluss der Transaktion als bearbeitet vermerken
+            ckf.add_key(checkpoint, checkpoint_step, nid)
+            cnt_updated += 1
+
+    ckf.mark_done(checkpoint, checkpoint_step)
 
     logger.info(f'{cnt_deleted} Schächte wurden gelöscht')
     logger.info(f'Bei {cnt_updated} Einlaufschächten wurde die Haltung getrennt')
+    if not_found:
+        logger.info(f'{len(not_found)} Einlaufschächte liegen auf keiner Haltung dieses Durchgangs und wurden übersprungen')
+
+    if not define_outfalls:
+        return topology
 
-    # Aktualisierte Listen mit Von- und Bis-Schächten
+    # Aktualisierte Menge mit Von-Schächten
     logger.info('Listen mit aktualisierten Von- und Bis-Schächten erstellen')
-    link_from_list = []
-    link_to_list = []
-    with arcpy.da.SearchCursor(out_link, [link_from, link_to, link_id]) as cursor:
-        for row in cursor:
-            link_from_list.append(row[0])
-            link_to_list.append(row[1])
+    link_from_set = {row[0] for row in sf.search_cursor(out_link, [link_from])}
     
-    # Feld 'OutfallType' (Auslaufschacht) hinzufügen
+    # Feld 'OutfallType' (Auslaufschacht) hinzufügen (Schema der Schächte)
     outfall_type = "OutfallType"
-    arcpy.management.AddField(out_node, outfall_type, "TEXT", field_length=128)
+    sf.add_fields(out_node, NODE_SCHEMA)
 
     # Auslaufschächte definieren
     logger.info('Auslaufschächte definieren')
     cnt = 0
-    with arcpy.da.UpdateCursor(out_node, [node_id, node_type, outfall_type]) as ucursor:
+    with sf.update_cursor(out_node, [node_id, node_type, outfall_type]) as ucursor:
         for urow in ucursor:
-            if urow[0] not in link_from_list:
+            if urow[0] not in link_from_set:
                 urow[1] = "OUTFALL"
                 # Annahme Typ = FREE
                 urow[2] = "FREE"
@@ -313,78 +319,10 @@ def main_topology(out_node, node_id, node_to_link, node_type, type_inlet, out_li
 
     logger.info(f'{cnt} Schächte wurden als Auslaufschächte definiert')
 
-
-## Funktionen für die Interpolation der Sohlenkote
-def _update_current_branch(node_dict, branch, link_ref, link_node, max_nr):
-    """Hilfsfunktion der Funktion _update_current_branches
-    
-    Verfolgt einen spezifischen Kanalnetz-Strang um einen Schritt.
-
-    Return:
-        Aktuallisierter Strang
-    """
-    # Aktuelle Länge des Stranges
-    current_length = branch['length']
-    branchs = []
-    # prüfen ob der Schacht oberhalb bzw. unterhalb Haltungen hat
-    if len(node_dict[branch['node_id']][link_ref])>0:
-        # Durch oberliegende bzw. unterliegende Haltungen iterieren
-        for ii, link in enumerate(node_dict[branch['node_id']][link_ref]):
-            new_branch = branch.copy()
-            new_branch['length'] = current_length + link['link_length']
-            # Strang mit oberhalb bzw. unterhalb liegenden Schacht aktualisieren
-            new_branch['node_id'] = link[link_node]         
-            # Prüfen ob der neue Schacht eine Sohlenkote aufweist
-            try:
-                if node_dict[link[link_node]]['node_sk']:
-                    # Sohlenkote aktualisieren
-                    new_branch['sk'] = node_dict[link[link_node]]['node_sk']
-                    # Strang wird nicht mehr weiterverfolgt
-                    new_branch['finished'] = True
-            except KeyError:
-                logger.warning(f'Schacht mit ID {link[link_node]} ist nicht vorhanden.'
-                               f' Verfolgung des Stranges wird abgebrochen')
-                new_branch['finished'] = True
-            if ii == 0:
-                # Erster Strang ist Fortsetzung des aktuellen Stranges
-                # Strang Nummer aktualisieren falls zusätzliche Stränge dazukommen
-                branch_up_nr = max_nr
-            else:
-                new_branch['nr'] = branch_up_nr
-                # Strang Nummer aktualisieren falls zusätzliche Stränge dazukommen
-                branch_up_nr += 1     
-            # Strang hinzufügen
-            branchs.append(new_branch)
-    else:
-        # Ende des Stranges erreicht falls oberhalb bzw. unterhalb keine Haltungen mehr vorhanden sind.
-        branch['finished'] = True
-        branchs.append(branch)
-
-    return branchs
-
-
-def _update_current_branches(node_dict, branchs, link_ref, link_node):
-    """Hilfsfunktion der Funktion get_interpolated_sk
-    
-    Verfolgt alle Kanalnetz-Stränge (branchs) um einen Schritt.
-
-    Return:
-        Aktuallisierte Stränge
-    """
-    new_branchs = branchs.copy()
-    for branch in branchs:
-        if branch['finished']:
-            branchs_updated = [branch]
-        else:
-            branchs_updated = _update_current_branch(node_dict, branch, link_ref, link_node, len(new_branchs))
-        for branch_updated in branchs_updated:
-            if branch_updated['nr']<len(branchs):
-                new_branchs[branch_updated['nr']]=branch_updated
-            else:
-                new_branchs.append(branch_updated)
-    return new_branchs
+    return topology
 
 
+## Funktionen für die Interpolation der Sohlenkote
 def  _create_surrogat(branchs):
     """Hilfsfunktion der Funktion get_interpolated_sk
 
@@ -423,7 +361,56 @@ def  _create_surrogat(branchs):
     else:
         return None
 
-def get_interpolated_sk(node_dict, id_node, mean_slope = 0.01, mean_depth = 1, min_depth = 0.3):
+def _trace_branchs(node_dict, id_node, link_ref, link_node, trace_cache, max_depth, max_branches):
+    """Hilfsfunktion der Funktion get_interpolated_sk
+
+    Verfolgt alle Kanalnetz-Stränge ausgehend von einem Schacht bis zu einem Schacht mit Sohlenkote
+    (siehe network_functions.trace_known_values) und meldet abgebrochene Verfolgungen.
+
+    Return:
+        Liste mit Dictionaries pro Strang ('sk': Sohlenkote, 'length': Länge, 'node_id': ID Schacht mit Sohlenkote)
+    """
+    branchs, info = nf.trace_known_values(node_dict, id_node, link_ref, link_node, trace_cache, max_depth, max_branches)
+    for missing in info["missing"]:
+        logger.warning(f'Schacht mit ID {missing} ist nicht vorhanden.'
+                       f' Verfolgung des Stranges wird abgebrochen')
+    if info["cycle"]:
+        logger.warning(f'Bei der Verfolgung der Stränge ab Schacht {id_node} ({link_ref}) wurde ein Zyklus gefunden.'
+                       f' Der Strang wird beim Zyklus abgebrochen.')
+    if info["depth_limit"]:
+        logger.warning(f'Bei der Verfolgung der Stränge ab Schacht {id_node} ({link_ref}) wurde die maximale Tiefe'
+                       f' von {max_depth} Haltungen erreicht. Die Verfolgung wird abgebrochen.')
+    if info["branch_limit"]:
+        logger.warning(f'Bei der Verfolgung der Stränge ab Schacht {id_node} ({link_ref}) wurde die maximale Anzahl'
+                       f' von {max_branches} Strängen erreicht. Die Verfolgung wird abgebrochen.')
+    return [{'sk': sk, 'length': length, 'node_id': end} for sk, length, end in branchs]
+
+
+def _mean_slope_beyond(node_dict, branchs, link_ref, link_node, trace_cache, max_depth, max_branches):
+    """Hilfsfunktion der Funktion get_interpolated_sk
+
+    Verfolgt alle Stränge, die einen Schacht mit Sohlenkote aufweisen, weiter bis zu einem zweiten Schacht
+    mit Sohlenkote und berechnet das mittlere Gefälle dieser Stränge.
+
+    Return:
+        Mittleres Gefälle oder None falls kein zweiter Schacht mit Sohlenkote gefunden wurde
+    """
+    nr_slope = 0
+    slope_sum = 0
+    for branch in branchs:
+        # Sohlenkote des zweiten Schachtes mit Sohlenkote suchen
+        for branch_second in _trace_branchs(node_dict, branch['node_id'], link_ref, link_node, trace_cache, 
+                                            max_depth, max_branches):
+            slope_sum += (branch["sk"]-branch_second["sk"])/branch_second["length"]
+            nr_slope += 1
+    if nr_slope>0:
+        return slope_sum/nr_slope
+    else:
+        return None
+
+
+def get_interpolated_sk(node_dict, id_node, mean_slope = 0.01, mean_depth = 1, min_depth = 0.3, trace_cache = None,
+                        max_depth = None, max_branches = None):
     """Sohlenkote für einen bestimmten Schacht mit Berücksichtigung der Topologie berechnen.
 
     Required:
@@ -442,36 +429,22 @@ def get_interpolated_sk(node_dict, id_node, mean_slope = 0.01, mean_depth = 1, m
             keine einzige Sohlenkote bekannt ist.
         min_depth -- Prüft ob die Schachttiefe mindestens diesem Wert entspricht, ansonsten wird die Sohlenkote angepasst
 
+    Optional:
+        trace_cache -- Cache mit den Ergebnissen der Strangverfolgung, der für alle Schächte eines Durchgangs
+            verwendet wird (siehe network_functions.new_trace_cache). Wird einem Schacht eine Sohlenkote 
+            zugewiesen, muss network_functions.invalidate_trace_cache aufgerufen werden.
+        max_depth -- Maximale Anzahl Haltungen, die pro Strang verfolgt werden
+        max_branches -- Maximale Anzahl Stränge, die pro Schacht verfolgt werden
+
     Return:
         sk -- Berechnete Sohlenkote
     """
     # Deckelkote des Schachtes
     dk = node_dict[id_node]['node_dk']
-    # Erster Strang oberhalb des aktuellen Schachtes initialisieren
-    branchs_up = [{'nr':0, 'node_id': id_node, 'length':0, 'sk':None,'finished':False}]
-    finished_up = False
-    while not finished_up:
-        # Alle Stränge aktualisieren
-        branchs_up = _update_current_branches(node_dict, branchs_up, 'links_up', 'link_from')
-        # Kontrollieren ob alle oberliegende Stränge Ende erreicht haben
-        finished_up = True
-        for branch in branchs_up:
-            if not branch['finished']:
-                # Falls ein Strang noch nicht fertig is weiter iterieren
-                finished_up = False
-
-    # Alle Stränge unterhalb verfolgen
-    # Erster Strang unterhalb des aktuellen Schachtes initialisieren
-    branchs_down = [{'nr':0, 'node_id': id_node, 'length':0, 'sk':None, 'finished':False}]
-    finished_down = False
-    while not finished_down:
-        branchs_down = _update_current_branches(node_dict, branchs_down, 'links_down', 'link_to')
-        # Kontrollieren ob alle unterliegenden Stränge Ende erreicht haben
-        finished_down = True
-        for branch in branchs_down:
-            if not branch['finished']:
-                # Falls ein Strang noch nicht fertig is weiter iterieren
-                finished_down = False
+    # Alle Stränge oberhalb des aktuellen Schachtes bis zu einem Schacht mit Sohlenkote verfolgen
+    branchs_up = _trace_branchs(node_dict, id_node, 'links_up', 'link_from', trace_cache, max_depth, max_branches)
+    # Alle Stränge unterhalb des aktuellen Schachtes bis zu einem Schacht mit Sohlenkote verfolgen
+    branchs_down = _trace_branchs(node_dict, id_node, 'links_down', 'link_to', trace_cache, max_depth, max_branches)
     
     # Oberhalb liegender Surrogat-Schacht erstellen
     surrogat_up = _create_surrogat(branchs_up)
@@ -494,38 +467,9 @@ def get_interpolated_sk(node_dict, id_node, mean_slope = 0.01, mean_depth = 1, m
    
     elif surrogat_up:
         # Für jeden oberliegenden Strang einen zweiten Schacht mit sk suchen um mittlere Steigung zu berechnen
-        finished_up = False
-        for branch in branchs_up:
-            # Alle Stränge die einen Schacht mit Sohlenkote haben weiter verfolgen
-            if branch["sk"]:
-                # Stränge mit aktualiseren damit anschliessend Steigung berechnet werden kann
-                branch["finished"]=False
-                # Sohlenkote des ersten Schachtes mit Sohlenkote
-                branch["sk_first"]=branch["sk"]
-                # Sohlenkote des zweiten Schachtes mit Sohlenkote suchen
-                branch["sk"]=None
-                # Länge zu erstem Schacht mit Sohlenkote 
-                branch["length_first"]=branch["length"]
-                # Länge von erstem Schacht bis zu zweitem Schacht mit Sohlenkote suchen
-                branch["length"]=0
-        while not finished_up:    
-            branchs_up = _update_current_branches(node_dict, branchs_up, 'links_up', 'link_from')
-            # Kontrollieren ob alle oberliegende Stränge Ende erreicht haben
-            finished_up = True
-            for branch in branchs_up:
-                if not branch['finished']:
-                    # Falls ein Strang noch nicht fertig ist weiter iterieren
-                    finished_up = False
-        # Steigung für jeden Strang berechnen
-        nr_slope = 0
-        slope_sum = 0
-        for branch in branchs_up:
-            if branch["sk"]:
-                branch["slope"] = (branch["sk_first"]-branch["sk"])/branch["length"]
-                slope_sum += branch["slope"]
-                nr_slope += 1
-        if nr_slope>0:
-            sk = surrogat_up["sk"] + slope_sum/nr_slope*surrogat_up["length"]
+        slope = _mean_slope_beyond(node_dict, branchs_up, 'links_up', 'link_from', trace_cache, max_depth, max_branches)
+        if slope is not None:
+            sk = surrogat_up["sk"] + slope*surrogat_up["length"]
         else:
             # Falls kein zweiter Schacht mit Sohlenkote gefunden wird. Definierte mittlere negative Steigung annehmen.
             sk = surrogat_up["sk"] - mean_slope*surrogat_up["length"]
@@ -543,38 +487,9 @@ def get_interpolated_sk(node_dict, id_node, mean_slope = 0.01, mean_depth = 1, m
 
     elif surrogat_down:
         # Für jeden unterliegenden Strang einen zweiten Schacht mit Sohlenkote (sk) suchen um mittlere Steigung berechnen
-        finished_down = False
-        for branch in branchs_down:
-            # Alle Stränge die einen Schacht mit Sohlenkote haben weiter verfolgen
-            if branch["sk"]:
-                # Stränge mit aktualiseren damit anschliessend Steigung berechnet werden kann
-                branch["finished"]=False
-                # Sohlenkote des ersten Schachtes mit Sohlenkote
-                branch["sk_first"]=branch["sk"]
-                # Sohlenkote des zweiten Schachtes mit Sohlenkote suchen
-                branch["sk"]=None
-                # Länge zu erstem Schacht mit Sohlenkote 
-                branch["length_first"]=branch["length"]
-                # Länge von erstem Schacht bis zu zweitem Schacht mit Sohlenkote suchen
-                branch["length"]=0
-        while not finished_down:
-            branchs_down = _update_current_branches(node_dict, branchs_down, 'links_down', 'link_to')
-            # Kontrollieren ob alle oberliegende Stränge Ende erreicht haben
-            finished_down = True
-            for branch in branchs_down:
-                if not branch['finished']:
-                    # Falls ein Strang noch nicht fertig is weiter iterieren
-                    finished_down = False
-        # Steigung berechnen für jeden Strang
-        nr_slope = 0
-        slope_sum = 0
-        for branch in branchs_down:
-            if branch["sk"]:
-                branch["slope"] = (branch["sk_first"]-branch["sk"])/branch["length"]
-                slope_sum += branch["slope"]
-                nr_slope += 1
-        if nr_slope>0:
-            sk = surrogat_down["sk"] + slope_sum/nr_slope*surrogat_down["length"]
+        slope = _mean_slope_beyond(node_dict, branchs_down, 'links_down', 'link_to', trace_cache, max_depth, max_branches)
+        if slope is not None:
+            sk = surrogat_down["sk"] + slope*surrogat_down["length"]
         else:
             # Falls kein zweiter Schacht mit Sohlenkote gefunden wird. Definierte mittlere positive Steigung annehmen.
             sk = surrogat_down["sk"] + mean_slope*surrogat_down["length"]
@@ -608,79 +523,126 @@ def get_interpolated_sk(node_dict, id_node, mean_slope = 0.01, mean_depth = 1, m
     return sk
 
 
-def main_slope(out_node, node_id, node_dk, node_sk, tag, node_type, type_inlet, min_depth, 
-               mean_depth, out_link, link_id, link_from, link_to, link_length, mean_slope):
-    """Input-Daten aufbereiten und Funktionen für die Interpolation der Sohlenkote aufrufen
+@lf.profiled()
+def build_node_dict(out_node, node_id, node_dk, node_sk, node_type, type_inlet, out_link, link_id, link_from, 
+                    link_to, link_length, node_dict = None):
+    """Dictionary mit allen Schächten und den zugehörigen Haltungen (gemäss Topologie) erstellen.
 
     Required:
         out_node -- Name der Input Feature-Klasse mit den Schächten
         node_id -- Bezeichnung von ID-Feld der Schächte
         node_dk -- Bezeichnung von Feld mit Deckelkote
         node_sk -- Bezeichnung von Feld mit Sohlenkote
-        tag -- Text für tag-Feld um zu kennzeichnen welche Sohlenkoten interpoliert wurden
         node_type -- Bezeichnung vom Feld in welchem der Schachttyp angegeben wird
         type_inlet -- Wert von Schachttyp (node_type) welcher Einlaufschacht entspricht
-        min_depth -- Minimale Schachttiefe die nicht unterschritten werden darf. Annahme: Deckelkote genauer als Solhenkote
-        mean_depth -- Schachttiefe die verwendet wird falls Sohlenkote nicht interpoliert werden konnte .
-                      Dies kommt nur vor falls entlang eines Stranges keine einzige Sohlenkote bekannt ist.
         out_link -- Name der Feature-Klasse mit den Haltungen
         link_id -- Bezeichnung von ID-Feld
         link_from -- Bezeichnung von Feld mit ID von Von-Schacht
         link_to -- Bezeichnung von Feld mit ID von Bis-Schacht
         link_length -- Bezeichnung von Feld mit Haltungslänge
-        mean_slope -- Mittlere Steigung für die Berechnung der Sohlenkote. Diese Steigung wird nur verwendet 
-                      falls enlang eines Stranges nur eine einzige Sohlenkote vorhanden ist.
-    """   
 
-    # Prüfen ob Output-Feld und "tag"-Feld bereits vorhanden sind
-    fnames =  [field.name for field in arcpy.ListFields(out_node)]
-    node_tag = "tag"
-    if node_tag not in fnames:
-        logger.info(f'tag-Feld erstellen')
-        arcpy.AddField_management(out_node, node_tag, "TEXT", field_length=40)
+    Optional:
+        node_dict -- Dictionary aus einem vorherigen Durchgang (z. B. PAA-Netz), welches erweitert wird. 
+                     Die Sohlenkoten und Deckelkoten der bereits vorhandenen Schächte werden übernommen
+                     (interpolierte Sohlenkoten des vorherigen Durchgangs gelten damit als bekannt). Die Haltungen werden 
+                     gemäss der aktuellen Topologie neu zugeordnet.
 
-    ## Sohlenkote interpolieren
+    Return:
+        node_dict -- Dictionary mit den Schächten (Schema siehe get_interpolated_sk)
+    """
+    link_rows = sf.search_cursor(out_link, [link_id, link_from, link_to, link_length])
+    node_rows = sf.search_cursor(out_node, [node_id, node_sk, node_dk, node_type])
+    with link_rows, node_rows:
+        return node_dict_from_rows(link_rows, node_rows, type_inlet, node_dict)
+
+
+def node_dict_from_rows(link_rows, node_rows, type_inlet, node_dict = None):
+    """Dictionary mit allen Schächten und den zugehörigen Haltungen aus Zeilen (Cursor oder Listen) erstellen.
+
+    Required:
+        link_rows -- Zeilen der Haltungen (ID, Von-Schacht, Bis-Schacht, Länge)
+        node_rows -- Zeilen der Schächte (ID, Sohlenkote, Deckelkote, Schachttyp)
+        type_inlet -- Wert von Schachttyp welcher Einlaufschacht entspricht
+
+    Optional:
+        node_dict -- Dictionary aus einem vorherigen Durchgang (siehe build_node_dict)
+
+    Return:
+        node_dict -- Dictionary mit den Schächten (Schema siehe get_interpolated_sk)
+    """
     # Liste mit Haltungen erstellen
     logger.info('Liste mit allen Haltungen erstellen')
-    link_dict_list = []
-    with arcpy.da.SearchCursor(out_link, [link_id, link_from, link_to, link_length]) as cursor:
-        for row in cursor:
-            # Relevante Werte der Haltungen als Dictionary speichern
-            if row[1] == row[2]:
-                logger.warning(f'Haltung mit ID {row[0]} hat selben Von- und Bis-Schacht! Von-Schacht wird auf Null gesetzt')
-                link_dict_list.append({'link_id':row[0],'link_from':None, 'link_to':row[2], 'link_length':row[3]})
-            else:   
-                link_dict_list.append({'link_id':row[0],'link_from':row[1], 'link_to':row[2], 'link_length':row[3]})
-
-    logger.info('Dictionary mit allen Schächten mit den zugehörigen Haltungen (gemäss Topologie) erstellen')
+    links_up_dict = {}
+    links_down_dict = {}
+    for row in link_rows:
+        # Relevante Werte der Haltungen als Dictionary speichern
+        if row[1] == row[2]:
+            logger.warning(f'Haltung mit ID {row[0]} hat selben Von- und Bis-Schacht! Von-Schacht wird auf Null gesetzt')
+            link = {'link_id':row[0],'link_from':None, 'link_to':row[2], 'link_length':row[3]}
+        else:   
+            link = {'link_id':row[0],'link_from':row[1], 'link_to':row[2], 'link_length':row[3]}
+        # Haltungen nach Bis-Schacht (Einlaufhaltungen) und Von-Schacht (Auslaufhaltungen) indexieren
+        links_up_dict.setdefault(link['link_to'], []).append(link)
+        if link['link_from'] is not None:
+            links_down_dict.setdefault(link['link_from'], []).append(link)
+
+    if node_dict:
+        logger.info('Dictionary mit den Schächten aus vorherigem Durchgang erweitern')
+    else:
+        logger.info('Dictionary mit allen Schächten mit den zugehörigen Haltungen (gemäss Topologie) erstellen')
+    prev_node_dict = node_dict or {}
     node_dict = {}
+    cnt_new = 0
     # Dictionary für Schächte mit zugehörigen Haltungen erstellen um iterieren später im Skript zu vereinfachen
-    with arcpy.da.SearchCursor(out_node, [node_id, node_sk, node_dk, node_type]) as cursor:
-        for row in cursor:
-            # Einlaufhaltungen (Haltungen oberhalb Schacht)
-            links_up = []
-            # Auslaufhaltungen (Haltunen unterhalb Schacht)
-            links_down = []
-            # Zugehörige Haltungen eruieren
-            for link in link_dict_list:
-                if link['link_to'] == row[0]:
-                    links_up.append(link)
-                elif link['link_from'] == row[0]:
-                    links_down.append(link)
-
-            # Einlaufschächte kennzeichnen
-            if str(row[3]) == type_inlet:
-                inlet = 1
-            else:
-                inlet = 0
-            
-            # Wert von node_id als key verwenden und zugehörige Informationen innerhalb nested dictionaries speichern
-            node_dict[row[0]] = {"node_sk":row[1],
-                                 "node_dk":row[2],
-                                 "inlet": inlet,
-                                 "links_up":links_up,
-                                 "links_down":links_down}
+    for row in node_rows:
+        # Einlaufhaltungen (Haltungen oberhalb Schacht) und Auslaufhaltungen (Haltunen unterhalb Schacht)
+        links_up = links_up_dict.get(row[0], [])
+        links_down = links_down_dict.get(row[0], [])
+
+        # Einlaufschächte kennzeichnen
+        if str(row[3]) == type_inlet:
+            inlet = 1
+        else:
+            inlet = 0
+
+        if row[0] in prev_node_dict:
+            # Bereits bekannter Schacht: Werte aus vorherigem Durchgang übernehmen
+            prev_node = prev_node_dict[row[0]]
+            node_sk_val = prev_node['node_sk']
+            node_dk_val = prev_node['node_dk']
+        else:
+            node_sk_val = row[1]
+            node_dk_val = row[2]
+            cnt_new += 1
+
+        # Wert von node_id als key verwenden und zugehörige Informationen innerhalb nested dictionaries speichern
+        node_dict[row[0]] = {"node_sk":node_sk_val,
+                             "node_dk":node_dk_val,
+                             "inlet": inlet,
+                             "links_up":links_up,
+                             "links_down":links_down}
+
+    if prev_node_dict:
+        logger.info(f'{cnt_new} Schächte wurden dem Dictionary hinzugefügt')
 
+    return node_dict
+
+
+@lf.profiled()
+def interpolate_node_dict(node_dict, mean_slope, mean_depth, min_depth, max_trace_depth = None, max_trace_branches = None):
+    """Sohlenkote für alle Schächte ohne Sohlenkote im Dictionary interpolieren (siehe get_interpolated_sk).
+
+    Required:
+        node_dict -- Dictionary mit den Schächten (Schema siehe get_interpolated_sk)
+        mean_slope, mean_depth, min_depth -- siehe main_slope
+
+    Optional:
+        max_trace_depth -- Maximale Anzahl Haltungen, die pro Strang verfolgt werden
+        max_trace_branches -- Maximale Anzahl Stränge, die pro Schacht verfolgt werden
+
+    Return:
+        cnt -- Anzahl Schächte mit berechneter Sohlenkote
+    """
     # Dictionary sortieren damit die Sohlenkote von Einlaufschächten als letztes berechnet werden 
     # Nach Ordnung sortieren damit zuerst Sohlentiefe von Schächte ester Ordnung (PAA) berechnet werden
     # Nach Einlaufschächten sortieren damit Sohlenkote dieser Schächte nicht mit "Deckelkote - mean_depth" berechnet wird, da eher tieferliegend als "echte" Schächte
@@ -688,95 +650,519 @@ def main_slope(out_node, node_id, node_dk, node_sk, tag, node_type, type_inlet,
 
     # Durch alle Schächte iterieren
     logger.info('Durch alle Schächte iterieren und Sohlenkote berechnen falls nicht vorhanden')
+    # Ergebnisse der Strangverfolgung für alle Schächte wiederverwenden
+    trace_cache = nf.new_trace_cache()
     cnt = 0
-    for id_node in node_sorted:
+    for id_node in lf.progress(node_sorted, "Sohlenkoten interpolieren"):
         if node_dict[id_node]['node_sk']:
             # Sohlenkote bereits vorhanden
             continue
         else:
             # Sohlenkote interpolieren
             #print(f'Sohlenkote von Schacht {cnt}:{id_node} berechnen')
-            node_dict[id_node]['node_sk'] = get_interpolated_sk(node_dict, id_node, mean_slope, mean_depth, min_depth)
+            node_dict[id_node]['node_sk'] = get_interpolated_sk(node_dict, id_node, mean_slope, mean_depth, min_depth,
+                                                                trace_cache, max_trace_depth, max_trace_branches)
+            # Zwischengespeicherte Stränge, die über diesen Schacht führen, sind nicht mehr gültig
+            nf.invalidate_trace_cache(trace_cache, id_node)
             cnt +=1
 
     logger.info(f'Von {cnt} Schächten Sohlenkote berechnet')
+    stats = trace_cache["stats"]
+    logger.info(f'Strangverfolgung: {stats["traces"]} Verfolgungen, {stats["hits"]} wiederverwendete Ergebnisse, '
+                f'{stats["truncated"]} abgebrochene Verfolgungen')
 
-    # Attributbezogene Selektion (nur Schächte ohne Sohlenkote)
-    logger.info('Schächte ohne Solhenkote selektieren')
-    out_node_lyr = 'out_node_lyr'
-    arcpy.management.MakeFeatureLayer(out_node, out_node_lyr)
-    where = '"' + node_sk + '"' + " IS NULL" 
-    arcpy.management.SelectLayerByAttribute(out_node_lyr, 'NEW_SELECTION', where, 'NON_INVERT')
+    return cnt
 
-    # Sohlenkote aktualisieren
-    logger.info('Sohlenkote aktualisieren')
-    cnt = 0
-    with arcpy.da.UpdateCursor(out_node_lyr, [node_id, node_sk, node_tag]) as ucursor:
-        for urow in ucursor:
-            urow[1] = node_dict[urow[0]]['node_sk']            
-            if urow[2]:
-                urow[2] = urow[2] + ";"+tag
-            else:
-                urow[2] = tag
-            cnt += 1
-            ucursor.updateRow(urow)
 
-    logger.info(f'Von {cnt} Schächten Sohlenkote aktualisiert')
+def get_link_slope(node_dict, id_link, id_from, id_to, length):
+    """Steigung (Gefälle) einer Haltung aus den Sohlenkoten von Von- und Bis-Schacht berechnen.
+
+    Return:
+        slope -- Steigung oder None falls die Steigung aufgrund fehlender Daten nicht berechnet werden kann
+    """
+    # node_sk Wert von Von- und Bisschacht aus node_dict
+    sk_from = node_dict[id_from]['node_sk'] if id_from in node_dict else None
+    sk_to = node_dict[id_to]['node_sk'] if id_to in node_dict else None
+    
+    # Steigung berechnen
+    try:
+        slope = (sk_from - sk_to)/length
+    except:
+        logger.warning(f'Die Steigung für die Haltung mit ID "{id_link}" konnte aufgrund '
+                       f'fehlender Daten nicht berechnet werden.')
+        return None
+    if slope < 0: 
+        logger.warning(f'Die Steigung für die Haltung mit ID "{id_link}" ist negativ.')
+    return slope
+
+
+@lf.profiled()
+def main_slope(out_node, node_id, node_dk, node_sk, tag, node_type, type_inlet, min_depth, 
+               mean_depth, out_link, link_id, link_from, link_to, link_length, mean_slope, node_dict = None,
+               max_trace_depth = None, max_trace_branches = None):
+    """Input-Daten aufbereiten und Funktionen für die Interpolation der Sohlenkote aufrufen
 
-    ## Schachttiefe aktualisieren
-    # Feld Schachttiefe ergänzen
+    Required:
+        out_node -- Name der Input Feature-Klasse mit den Schächten
+        node_id -- Bezeichnung von ID-Feld der Schächte
+        node_dk -- Bezeichnung von Feld mit Deckelkote
+        node_sk -- Bezeichnung von Feld mit Sohlenkote
+        tag -- Text für tag-Feld um zu kennzeichnen welche Sohlenkoten interpoliert wurden
+        node_type -- Bezeichnung vom Feld in welchem der Schachttyp angegeben wird
+        type_inlet -- Wert von Schachttyp (node_type) welcher Einlaufschacht entspricht
+        min_depth -- Minimale Schachttiefe die nicht unterschritten werden darf. Annahme: Deckelkote genauer als Solhenkote
+        mean_depth -- Schachttiefe die verwendet wird falls Sohlenkote nicht interpoliert werden konnte .
+                      Dies kommt nur vor falls entlang eines Stranges keine einzige Sohlenkote bekannt ist.
+        out_link -- Name der Feature-Klasse mit den Haltungen
+        link_id -- Bezeichnung von ID-Feld
+        link_from -- Bezeichnung von Feld mit ID von Von-Schacht
+        link_to -- Bezeichnung von Feld mit ID von Bis-Schacht
+        link_length -- Bezeichnung von Feld mit Haltungslänge
+        mean_slope -- Mittlere Steigung für die Berechnung der Sohlenkote. Diese Steigung wird nur verwendet 
+                      falls enlang eines Stranges nur eine einzige Sohlenkote vorhanden ist.
+
+    Optional:
+        node_dict -- Dictionary mit den Schächten aus einem vorherigen Durchgang (z. B. PAA-Netz). Die bereits
+                     bekannten bzw. interpolierten Sohlenkoten werden nicht mehr verändert (siehe build_node_dict).
+        max_trace_depth -- Maximale Anzahl Haltungen, die bei der Interpolation pro Strang verfolgt werden
+        max_trace_branches -- Maximale Anzahl Stränge, die bei der Interpolation pro Schacht verfolgt werden
+
+    Return:
+        node_dict -- Dictionary mit den Schächten und den berechneten Sohlenkoten
+    """   
+
+    # Fehlende Felder ("tag", "MaxDepth", "slope") in einem Schritt erstellen
+    node_tag = "tag"
     max_depth = "MaxDepth"
-    arcpy.management.AddField(out_node, max_depth, "FLOAT")   
+    link_slope = "slope"
+    for in_fc, schema in ((out_node, NODE_SCHEMA), (out_link, LINK_SCHEMA)):
+        added = sf.add_fields(in_fc, schema)
+        if added:
+            logger.info(f'Felder {added} erstellen')
+
+    ## Sohlenkote interpolieren
+    node_dict = build_node_dict(out_node, node_id, node_dk, node_sk, node_type, type_inlet, out_link, link_id, 
+                                link_from, link_to, link_length, node_dict)
+
+    # Tags für die Schächte ohne Sohlenkote vormerken (vor der Interpolation)
+    tags = bf.new_tag_buffer()
+    for nid, node in node_dict.items():
+        if node['node_sk'] is None:
+            bf.add_tag(tags, nid, tag)
 
-    logger.info('Schachttiefe aktualisieren')
+    interpolate_node_dict(node_dict, mean_slope, mean_depth, min_depth, max_trace_depth, max_trace_branches)
+
+    # Sohlenkote, Schachttiefe und Tag in einem Durchgang aktualisieren
+    logger.info('Sohlenkote und Schachttiefe aktualisieren')
     cnt = 0
-    with arcpy.da.UpdateCursor(out_node, [node_dk, node_sk, max_depth]) as ucursor:
+    with sf.update_cursor(out_node, [node_id, node_dk, node_sk, max_depth, node_tag]) as ucursor:
         for urow in ucursor:
-            urow[2] = float(urow[0]-urow[1])     
+            if urow[2] is None and urow[0] in node_dict:
+                urow[2] = node_dict[urow[0]]['node_sk']
+                cnt += 1
+            if urow[1] is not None and urow[2] is not None:
+                urow[3] = float(urow[1]-urow[2])
+            else:
+                urow[3] = None
+            urow[4] = bf.apply_tags(tags, urow[0], urow[4])
             ucursor.updateRow(urow)
 
-   ## Steigung berechenen
-   # Feld "slope" neu erstellen falls bereits vorhanden 
-    fnames = arcpy.ListFields(out_link)
-    link_slope = "slope"
-    for in_field in fnames:
-        if in_field.name == link_slope:
-            logger.info(f'Vorhandenes slope-Feld löschen')
-            arcpy.management.DeleteField(out_link, in_field.name)
-    
-    logger.info(f'slope-Feld erstellen')
-    arcpy.AddField_management(out_link, link_slope, "FLOAT")
+    logger.info(f'Von {cnt} Schächten Sohlenkote aktualisiert')
 
+   ## Steigung berechenen
+    # Alle Werte im Feld "slope" neu setzen (Haltungen ohne Von- oder Bisschacht bzw. ohne Steigung = Null)
     logger.info(f'Steigung (Gefälle) berechnen und Feldwert abfüllen')
-    # where (nur Haltungen mit Von- und Bisschacht)
-    where = '"' + link_from + '"' + " IS NOT NULL" + " AND " + '"' + link_to + '"' + " IS NOT NULL"
     cnt = 0
-    with arcpy.da.UpdateCursor(out_link, [link_id, link_from, link_to, link_length, link_slope], where) as cursor:
+    with sf.update_cursor(out_link, [link_id, link_from, link_to, link_length, link_slope]) as cursor:
         for row in cursor:
-            # get node_sk Wert von Vonschacht
-            where_from = '"' + node_id + '"' + " = " + f"'{row[1]}'" 
-            with arcpy.da.SearchCursor(out_node, [node_id, node_sk], where_from) as scursor:
-                for srow in scursor:
-                    sk_from = srow[1]
-            # get node_sk Wert von Bisschacht
-            where_to = '"' + node_id + '"' + " = " + f"'{row[2]}'" 
-            with arcpy.da.SearchCursor(out_node, [node_id, node_sk], where_to) as scursor:
-                for srow in scursor:
-                    sk_to = srow[1]
-            
-            # Steigung berechnen
-            try:
-                slope = (sk_from - sk_to)/row[3]
-                row[4] = slope
-                cursor.updateRow(row)
+            row[4] = None
+            if row[1] is not None and row[2] is not None:
+                row[4] = get_link_slope(node_dict, row[0], row[1], row[2], row[3])
+            if row[4] is not None:
                 cnt += 1
-                if slope < 0: 
-                    logger.warning(f'Die Steigung für die Haltung mit ID "{row[0]}" ist negativ.')                  
-            except:
-                logger.warning(f'Die Steigung für die Haltung mit ID "{row[0]}" konnte aufgrund '
-                               f'fehlender Daten nicht berechnet werden.')        
+            cursor.updateRow(row)
 
     logger.info(f'Von {cnt} Leitungen Steigung berechnet')
+
+    return node_dict
+
+
+## Funktionen für den Probelauf (dry run) mit Änderungssatz
+@lf.profiled()
+def read_network(out_node, node_fields, out_link, link_fields):
+    """Schächte und Haltungen mit allen benötigten Feldern und der Geometrie in den Speicher lesen.
+
+    Required:
+        out_node -- Name der Feature-Klasse mit den Schächten
+        node_fields -- Liste mit den Feldern der Schächte
+        out_link -- Name der Feature-Klasse mit den Haltungen
+        link_fields -- Liste mit den Feldern der Haltungen (zusätzlich werden alle editierbaren Felder gelesen,
+                       damit diese bei getrennten Haltungen übernommen werden können)
+
+    Return:
+        network -- Dictionary {"nodes": {ObjectID: {Feld: Wert, "SHAPE@": Geometrie}}, "links": {...},
+                   "orig_nodes": {...}, "orig_links": {...}, "new_fields": {...}}. Die Einträge "orig_nodes" und
+                   "orig_links" enthalten die ursprünglichen Feldwerte (ohne Geometrie).
+    """
+    network = {"new_fields": {out_node: [], out_link: []}, "fields": {}}
+    for key, in_fc, fields in (("nodes", out_node, node_fields), ("links", out_link, link_fields)):
+        fnames = [field.name for field in sf.list_fields(in_fc) 
+                  if field.editable and field.type not in ("OID", "Geometry", "GlobalID")]
+        read_fields = [field for field in fnames if field not in fields]
+        read_fields = [field for field in fields if field in fnames] + read_fields
+        # Nicht vorhandene Felder werden beim Anwenden des Änderungssatzes erstellt
+        missing = [field for field in fields if field not in fnames]
+        network["fields"][in_fc] = read_fields
+        rows = {}
+        with sf.search_cursor(in_fc, ["OID@"] + read_fields + ["SHAPE@"]) as cursor:
+            for row in cursor:
+                values = dict(zip(read_fields, row[1:-1]))
+                for field in missing:
+                    values[field] = None
+                values["SHAPE@"] = row[-1]
+                rows[row[0]] = values
+        network[key] = rows
+        network["orig_" + key] = {oid: {field: value for field, value in values.items() if field != "SHAPE@"}
+                                  for oid, values in rows.items()}
+    network["next_new"] = 1
+    return network
+
+
+@lf.profiled()
+def plan_shaftheight(network, out_node, node_id, node_dk, dhm_workspace, in_dhm, tag):
+    """Fehlende Deckelkoten im Speicher aus einem Höhenmodell ergänzen (siehe main_shaftheight).
+    Die Rasterwerte werden in eine temporäre Feature-Klasse im Workspace "memory" extrahiert. Ohne arcpy
+    (GeoPackage) wird dieser Schritt übersprungen.
+    """
+    if sf.backend(out_node) != "arcpy":
+        logger.warning('Deckelkote aus Höhenmodell wird nur mit arcpy berechnet, fehlende Deckelkoten bleiben leer')
+        return
+    in_dhm_path = os.path.join(dhm_workspace, in_dhm)
+    node_dhm = r"memory\node_dhm"
+    logger.info(f'Werte aus Höhenmodell extrahieren')
+    arcpy.sa.ExtractValuesToPoints(out_node, in_dhm_path, node_dhm, "NONE", "VALUE_ONLY")
+    dhm_dict = {}
+    with arcpy.da.SearchCursor(node_dhm, [node_id, "RASTERVALU"]) as cursor:
+        for row in cursor:
+            # NoData wird mit -9999 angegeben
+            dhm_dict[row[0]] = row[1] if row[1] != -9999 else None
+    arcpy.management.Delete(node_dhm)
+
+    logger.info(f'Fehlende Deckelkoten abfüllen')
+    cnt = 0
+    for node in network["nodes"].values():
+        if node[node_dk] is None:
+            node[node_dk] = dhm_dict.get(node[node_id])
+            node["tag"] = bf.merge_tags(node["tag"], tag)
+            cnt += 1
+    logger.info(f'Von {cnt} Schächten Deckelkote ergänzt')
+
+
+def _nearest_link(links, point, prefix, link_id, tolerance):
+    """Hilfsfunktion der Funktionen main_topology und plan_topology: Haltung, auf welcher der Einlaufschacht liegt.
+    Berücksichtigt werden die Haltungen, deren ID mit der ID der Einlauf-Haltung beginnt (evtl. bereits mit
+    Postfix "_u" oder "_l"), gewählt wird die nächste Haltung innerhalb der Toleranz.
+
+    Required:
+        links -- Dictionary {ObjectID: {Feld: Wert, "SHAPE@": Geometrie}} mit den Haltungen
+        point -- Geometrie des Einlaufschachtes
+        prefix -- ID der Haltung, auf welcher der Einlaufschacht liegt (Feld node_to_link)
+        link_id -- Bezeichnung von ID-Feld der Haltungen
+        tolerance -- Suchtoleranz (m) zwischen Einlaufschacht und Haltung
+
+    Return:
+        ObjectID der Haltung, None falls keine Haltung innerhalb der Toleranz liegt
+    """
+    prefix = str(prefix)
+    candidates = [(link["SHAPE@"].distanceTo(point), oid) for oid, link in links.items() 
+                  if str(link[link_id]).startswith(prefix)]
+    candidates = [candidate for candidate in candidates if candidate[0] is not None and candidate[0] <= tolerance]
+    if not candidates:
+        return None
+    return min(candidates, key = lambda candidate: candidate[0])[1]
+
+
+def _split_link(link, split_point, node_to_point, nid, link_id, link_from, link_to, link_length, tolerance):
+    """Hilfsfunktion der Funktionen main_topology und plan_topology: Haltung beim Einlaufschacht mit der 
+    Geometrie-Methode segmentAlongLine trennen. Die Haltung, die beim Bis-Schacht liegt, wird zur unteren Haltung
+    (ID + "_l", Von-Schacht = Einlaufschacht), die andere zur oberen Haltung (ID + "_u", Bis-Schacht = Einlaufschacht).
+    Die übrigen Feldwerte werden übernommen, die Länge entspricht der Länge der Geometrie.
+
+    Return:
+        (obere Haltung, untere Haltung) als Dictionaries wie link, None falls der Schacht am Anfang oder Ende der
+        Haltung liegt (Trennen nicht notwendig)
+    """
+    line = link["SHAPE@"]
+    measure = line.queryPointAndDistance(split_point)[1]
+    if measure <= tolerance or measure >= line.length - tolerance:
+        return None
+    first = line.segmentAlongLine(0, measure)
+    second = line.segmentAlongLine(measure, line.length)
+    # Haltung, die beim Bis-Schacht liegt, ist die untere Haltung
+    if node_to_point is not None and first.distanceTo(node_to_point) < second.distanceTo(node_to_point):
+        lower, upper = first, second
+    else:
+        lower, upper = second, first
+
+    link_upper = dict(link)
+    link_upper.update({link_id: link[link_id] + "_u", link_to: nid, link_length: upper.length, "SHAPE@": upper})
+    link_lower = dict(link)
+    link_lower.update({link_id: link[link_id] + "_l", link_from: nid, link_length: lower.length, "SHAPE@": lower})
+    return link_upper, link_lower
+
+
+@lf.profiled()
+def plan_topology(network, node_id, node_to_link, node_type, type_inlet, link_id, link_from, link_to, 
+                  link_length, delete = True, define_outfalls = True, topology = None, subset = None,
+                  tolerance = SPLIT_TOLERANCE):
+    """Topologie im Speicher erstellen (entspricht main_topology). Die Auswahl und das Trennen der Haltungen
+    erfolgt mit denselben Hilfsfunktionen (_nearest_link und _split_link), sodass der Änderungssatz dem Ergebnis
+    von main_topology entspricht. Abweichungen: Die ObjectIDs der neuen Haltungen werden erst beim Anwenden des
+    Änderungssatzes vergeben und die Einlaufschächte werden in der Reihenfolge der ObjectIDs bearbeitet (wie die
+    Cursors von main_topology bei einer File-Geodatabase bzw. einem GeoPackage).
+
+    Optional:
+        delete, define_outfalls, topology -- siehe main_topology
+        subset -- Funktion, die für die zu berücksichtigenden Schächte und Haltungen True zurückgibt (z. B. PAA-Netz,
+                  entspricht den Feature-Layern beim gestaffelten Durchgang von main_topology)
+        tolerance -- Suchtoleranz (m) zwischen Einlaufschacht und Haltung
+
+    Return:
+        topology -- Dictionary mit den IDs der bearbeiteten Einlaufschächte ("inlets")
+    """
+    if topology is None:
+        topology = {"inlets": set()}
+    all_nodes = network["nodes"]
+    all_links = network["links"]
+    nodes = {oid: node for oid, node in all_nodes.items() if subset is None or subset(node)}
+    links = {oid: link for oid, link in all_links.items() if subset is None or subset(link)}
+
+    logger.info('Haltungen mit selben Von- und Bis-Schacht aktualisieren')
+    for link in links.values():
+        if link[link_from] is not None and link[link_from] == link[link_to]:
+            logger.warning(f'Haltung mit ID {link[link_id]} hat den selben Von- und Bis-Schacht! Von-Schacht wird auf Null gesetzt')
+            link[link_from] = None
+
+    if delete:
+        logger.info('Haltungen ohne Von- oder Bis-Schacht löschen')
+        node_id_set = {node[node_id] for node in nodes.values()}
+        for oid in list(links):
+            link = links[oid]
+            if ((link[link_from] is not None and link[link_from] not in node_id_set) or 
+                (link[link_to] is not None and link[link_to] not in node_id_set)):
+                logger.warning(f'Haltung mit ID {link[link_id]} wird gelöscht')
+                del links[oid], all_links[oid]
+
+    link_from_set = {link[link_from] for link in links.values()}
+    link_to_set = {link[link_to] for link in links.values()}
+
+    if delete:
+        logger.info('Schächte die weder Von- noch Bis-Schacht einer Haltung sind löschen')
+        for oid in list(nodes):
+            node = nodes[oid]
+            if node[node_id] is None:
+                continue
+            if node[node_id] not in link_from_set and node[node_id] not in link_to_set:
+                logger.warning(f'Schacht mit ID {node[node_id]} wird gelöscht')
+                del nodes[oid], all_nodes[oid]
+            elif node[node_type] == type_inlet and node[node_id] not in link_to_set:
+                logger.warning(f'Einlaufschacht mit ID {node[node_id]} wird gelöscht')
+                del nodes[oid], all_nodes[oid]
+
+    logger.info('Durch alle relevanten Schächte iterieren')
+    cnt_deleted = 0
+    cnt_updated = 0
+    cnt_not_found = 0
+    for oid in sorted(nodes):
+        node = nodes[oid]
+        nid = node[node_id]
+        if node[node_type] != type_inlet or nid in link_from_set or nid not in link_to_set:
+            continue
+        if nid in topology["inlets"]:
+            continue
+        topology["inlets"].add(nid)
+        link_oid = _nearest_link(links, node["SHAPE@"], node[node_to_link], link_id, tolerance)
+        if link_oid is None and not delete:
+            # Haltung nicht im aktuellen Durchgang -> im nächsten Durchgang bearbeiten (siehe main_topology)
+            topology["inlets"].discard(nid)
+            cnt_not_found += 1
+            continue
+        elif link_oid is None:
+            # Einlaufschacht auf keiner Haltung -> löschen
+            logger.warning(f'Schacht mit ID {nid} befindet sich auf keiner Haltung und wird gelöscht')
+            del nodes[oid], all_nodes[oid]
+            cnt_deleted += 1
+            continue
+        node_to_point = next((node_to["SHAPE@"] for node_to in nodes.values() 
+                              if node_to[node_id] == links[link_oid][link_to]), None)
+        new_links = _split_link(links[link_oid], node["SHAPE@"], node_to_point, nid, link_id, link_from, link_to, 
+                                link_length, tolerance)
+        if new_links is None:
+            continue
+        del links[link_oid], all_links[link_oid]
+        for new_link in new_links:
+            new_oid = "new_" + str(network["next_new"])
+            links[new_oid] = all_links[new_oid] = new_link
+            network["next_new"] += 1
+        cnt_updated += 1
+
+    logger.info(f'{cnt_deleted} Schächte wurden gelöscht')
+    logger.info(f'Bei {cnt_updated} Einlaufschächten wurde die Haltung getrennt')
+    if cnt_not_found:
+        logger.info(f'{cnt_not_found} Einlaufschächte liegen auf keiner Haltung dieses Durchgangs und wurden übersprungen')
+
+    if not define_outfalls:
+        return topology
+
+    logger.info('Auslaufschächte definieren')
+    outfall_type = "OutfallType"
+    link_from_set = {link[link_from] for link in links.values()}
+    cnt = 0
+    for node in nodes.values():
+        node.setdefault(outfall_type, None)
+        if node[node_id] not in link_from_set:
+            node[node_type] = "OUTFALL"
+            # Annahme Typ = FREE
+            node[outfall_type] = "FREE"
+            cnt += 1
+    logger.info(f'{cnt} Schächte wurden als Auslaufschächte definiert')
+
+    return topology
+
+
+@lf.profiled()
+def plan_slope(network, node_id, node_dk, node_sk, tag, node_type, type_inlet, min_depth, mean_depth, link_id, 
+               link_from, link_to, link_length, mean_slope, out_node, out_link, node_dict = None, subset = None,
+               max_trace_depth = None, max_trace_branches = None):
+    """Sohlenkoten, Schachttiefen und Steigungen im Speicher berechnen (siehe main_slope).
+
+    Optional:
+        node_dict -- Dictionary mit den Schächten aus einem vorherigen Durchgang (siehe build_node_dict)
+        subset -- Funktion, die für die zu berücksichtigenden Schächte und Haltungen True zurückgibt (z. B. PAA-Netz)
+
+    Return:
+        node_dict -- Dictionary mit den Schächten und den berechneten Sohlenkoten
+    """
+    nodes = [node for node in network["nodes"].values() if subset is None or subset(node)]
+    links = [link for link in network["links"].values() if subset is None or subset(link)]
+    node_dict = node_dict_from_rows([(link[link_id], link[link_from], link[link_to], link[link_length]) for link in links],
+                                    [(node[node_id], node[node_sk], node[node_dk], node[node_type]) for node in nodes],
+                                    type_inlet, node_dict)
+    interpolate_node_dict(node_dict, mean_slope, mean_depth, min_depth, max_trace_depth, max_trace_branches)
+
+    logger.info('Sohlenkote und Schachttiefe aktualisieren')
+    max_depth = "MaxDepth"
+    for node in nodes:
+        if node[node_sk] is None:
+            node[node_sk] = node_dict[node[node_id]]['node_sk']
+            node["tag"] = bf.merge_tags(node["tag"], tag)
+        if node[node_dk] is not None and node[node_sk] is not None:
+            node[max_depth] = float(node[node_dk] - node[node_sk])
+        else:
+            node[max_depth] = None
+
+    logger.info(f'Steigung (Gefälle) berechnen')
+    link_slope = "slope"
+    for link in links:
+        link[link_slope] = None
+        if link[link_from] is not None and link[link_to] is not None:
+            link[link_slope] = get_link_slope(node_dict, link[link_id], link[link_from], link[link_to], link[link_length])
+
+    return node_dict
+
+
+@lf.profiled()
+def network_change_set(network, out_node, node_id, out_link, link_id, settings = None):
+    """Änderungssatz aus dem Vergleich der Schächte und Haltungen im Speicher mit den ursprünglichen Werten erstellen.
+
+    Return:
+        change_set -- Änderungssatz (siehe changeset_functions.new_change_set)
+    """
+    change_set = cf.new_change_set(settings)
+    for key, table, id_field in (("nodes", out_node, node_id), ("links", out_link, link_id)):
+        for field_name, field_type, field_length in network["new_fields"][table]:
+            cf.add_field(change_set, table, id_field, field_name, field_type, field_length)
+        # Nur vorhandene oder neu erstellte Felder berücksichtigen
+        fields_valid = network["fields"][table] + [field[0] for field in network["new_fields"][table]]
+        rows = network[key]
+        orig_rows = network["orig_" + key]
+        for oid, orig in orig_rows.items():
+            if oid not in rows:
+                cf.remove_row(change_set, table, id_field, oid, orig[id_field])
+                continue
+            for field_name, value in rows[oid].items():
+                if field_name in fields_valid:
+                    cf.set_value(change_set, table, id_field, oid, orig[id_field], field_name, orig.get(field_name), value)
+        for oid, row in rows.items():
+            if oid not in orig_rows:
+                fields = {field_name: value for field_name, value in row.items() if field_name in fields_valid}
+                cf.add_row(change_set, table, id_field, row[id_field], fields, row["SHAPE@"].JSON)
+    return change_set
+
+
+@lf.profiled()
+def main_dry_run(out_node, node_id, node_to_link, node_dk, node_sk, tag_dk, tag_sk, node_type, type_inlet, min_depth,
+                 mean_depth, mean_slope, out_link, link_id, link_from, link_to, link_length, dhm_workspace, in_dhm,
+                 staged, change_set_file, max_trace_depth = None, max_trace_branches = None, settings = None):
+    """Alle Schritte (Deckelkote, Topologie, Sohlenkote und Steigung) im Speicher berechnen und als Änderungssatz
+    speichern, ohne die Geodatabase zu verändern. Der Änderungssatz kann anschliessend geprüft, mit einem
+    anderen Parametersatz verglichen oder mit "apply_change_set" angewendet werden.
+
+    Required:
+        change_set_file -- Pfad zur JSON-Datei, in welcher der Änderungssatz gespeichert wird
+        (übrige Parameter siehe main_shaftheight, main_topology und main_slope)
+
+    Return:
+        change_set -- Änderungssatz (siehe changeset_functions.new_change_set)
+    """
+    logger.info('Schächte und Haltungen in den Speicher lesen')
+    node_fields = [node_id, node_to_link, node_dk, node_sk, node_type, "tag", "TYP_AA"]
+    link_fields = [link_id, link_from, link_to, link_length, "TYP_AA"]
+    network = read_network(out_node, node_fields, out_link, link_fields)
+    # Fehlende Felder gemäss Schema werden beim Anwenden des Änderungssatzes in einem Schritt erstellt
+    for in_fc, schema in ((out_node, NODE_SCHEMA), (out_link, LINK_SCHEMA)):
+        network["new_fields"][in_fc] = [field for field in schema if field[0] not in network["fields"][in_fc]]
+
+    logger.info('Deckelkote berechnen')
+    plan_shaftheight(network, out_node, node_id, node_dk, dhm_workspace, in_dhm, tag_dk)
+
+    # Sohlenkote zuerst nur von PAA Netz interpolieren, da üblicherweise präzisere Daten (Reihenfolge wie beim
+    # Lauf mit arcpy, beim gestaffelten Durchgang wird zuerst die Topologie des PAA-Netzes erstellt)
+    def is_paa(row):
+        return row["TYP_AA"] == 1
+    topology = None
+    node_dict = None
+    if sum(1 for node in network["nodes"].values() if is_paa(node)) < len(network["nodes"]):
+        logger.info('Topologie von PAA-Netz erstellen')
+        if staged:
+            topology = plan_topology(network, node_id, node_to_link, node_type, type_inlet, link_id, link_from, link_to,
+                                     link_length, delete = False, define_outfalls = False, subset = is_paa)
+        else:
+            plan_topology(network, node_id, node_to_link, node_type, type_inlet, link_id, link_from, link_to,
+                          link_length, delete = False)
+        logger.info('Sohlenkote von PAA-Netz interpolieren')
+        node_dict = plan_slope(network, node_id, node_dk, node_sk, tag_sk, node_type, type_inlet, min_depth, mean_depth, 
+                               link_id, link_from, link_to, link_length, mean_slope, out_node, out_link, subset = is_paa,
+                               max_trace_depth = max_trace_depth, max_trace_branches = max_trace_branches)
+        if not staged:
+            node_dict = None
+    logger.info('Topologie für gesamtes Netz erstellen')
+    plan_topology(network, node_id, node_to_link, node_type, type_inlet, link_id, link_from, link_to, 
+                  link_length, topology = topology)
+    logger.info('Sohlenkote für gesamtes Netz interpolieren')
+    plan_slope(network, node_id, node_dk, node_sk, tag_sk, node_type, type_inlet, min_depth, mean_depth, link_id, 
+               link_from, link_to, link_length, mean_slope, out_node, out_link, node_dict, 
+               max_trace_depth = max_trace_depth, max_trace_branches = max_trace_branches)
+
+    logger.info('Änderungssatz erstellen')
+    change_set = network_change_set(network, out_node, node_id, out_link, link_id, settings)
+    for table, summary in cf.summarize(change_set).items():
+        logger.info(f'{table}: {summary["updated"]} Objekte mit {summary["values"]} geänderten Werten, '
+                    f'{summary["added"]} hinzugefügt, {summary["removed"]} gelöscht')
+    cf.save_change_set(change_set, change_set_file)
+    logger.info(f'Änderungssatz gespeichert: {change_set_file}')
+
+    return change_set
       
 
 # Daten einlesen 
@@ -786,7 +1172,7 @@ if __name__ == "__main__":
     global logger
     ### Input JSON-Datei ###
     # Falls das Skript mittels einer Batch-Datei ausgeführt wird, wird die JSON-Datei als Parameter übergeben:
-    paramFile = arcpy.GetParameterAsText(0)
+    paramFile = sf.parameter_as_text(0)
     # Falls das Skript direkt ausgeführt wird, wird die JSON-Datei hier angeben:
     if len(paramFile) == 0:
         paramFile = os.path.join(os.path.dirname(__file__), '..', 'settings_v1.json')
@@ -804,7 +1190,7 @@ if __name__ == "__main__":
                 overwrite = data["overwrite"]
             else: 
                 overwrite = "True"
-            # Der Pfad zum arcpy Workspace (.gdb) mit den Knoten (out_node) und Haltungen (out_link).
+            # Der Pfad zum Workspace (.gdb oder .gpkg) mit den Knoten (out_node) und Haltungen (out_link).
             gisswmm_workspace = data["gisswmm_workspace"]
             # Der Name der Feature-Klasse mit den Knoten (ohne Postfix "_sim_nr"!).
             out_node = data["out_node"]
@@ -853,6 +1239,37 @@ if __name__ == "__main__":
             # Ein mittleres Gefälle für die Berechnung der Sohlenkote. Dieses Gefälle wird nur verwendet, 
             # falls entlang eines Haltungsstranges nur eine einzige Sohlenkote vorhanden ist.
             mean_slope = float(data["mean_slope"])  
+            # Gestaffelte Berechnung: Die Topologie und die Sohlenkoten des PAA-Netzes werden beim gesamten Netz
+            # übernommen und nur noch das SAA-Netz wird ergänzt.
+            if "staged" in data:
+                staged = data["staged"]
+            else:
+                staged = "False"
+            # Maximale Anzahl Haltungen, die bei der Interpolation pro Strang verfolgt werden (ohne Angabe unbegrenzt).
+            if "max_trace_depth" in data:
+                max_trace_depth = int(data["max_trace_depth"])
+            else:
+                max_trace_depth = None
+            # Maximale Anzahl Stränge, die bei der Interpolation pro Schacht verfolgt werden (ohne Angabe unbegrenzt).
+            if "max_trace_branches" in data:
+                max_trace_branches = int(data["max_trace_branches"])
+            else:
+                max_trace_branches = None
+            # Probelauf: Alle Änderungen werden nur im Speicher berechnet und als Änderungssatz (JSON-Datei) gespeichert.
+            if "dry_run" in data:
+                dry_run = data["dry_run"]
+            else:
+                dry_run = "False"
+            # Der Pfad zur JSON-Datei, in welcher der Änderungssatz beim Probelauf gespeichert wird.
+            if "change_set" in data:
+                change_set_file = data["change_set"]
+            else:
+                change_set_file = None
+            # Der Pfad zu einem gespeicherten Änderungssatz, der in einer Transaktion angewendet werden soll.
+            if "apply_change_set" in data:
+                apply_change_set = data["apply_change_set"]
+            else:
+                apply_change_set = None
 
     else:
         raise ValueError('keine json-Datei mit den Parametern angegeben')
@@ -870,6 +1287,20 @@ if __name__ == "__main__":
     else:
         overwrite = False
 
+    # staged str -> bool
+    if staged == 'True':
+        staged = True
+    else:
+        staged = False
+
+    # dry_run str -> bool
+    if dry_run == 'True':
+        dry_run = True
+    else:
+        dry_run = False
+    if not change_set_file:
+        change_set_file = os.path.join(log_folder, 'gisswmm_upd_changes_' + sim_nr + '.json')
+
     # Logging initialisieren
     filename = 'gisswmm_upd_' + sim_nr + '.log'
     log = os.path.join(log_folder, filename)
@@ -879,7 +1310,7 @@ if __name__ == "__main__":
     start_time = time.time()
 
     # Aktueller Workspace definieren
-    arcpy.env.workspace = gisswmm_workspace
+    sf.set_workspace(gisswmm_workspace)
     
     # Prüfen ob Eingabedatensätze vorhanden sind
     postfix = "_" + sim_nr
@@ -887,58 +1318,113 @@ if __name__ == "__main__":
         out_node = out_node + postfix
     if not postfix in out_link:
         out_link = out_link + postfix
-    if not arcpy.Exists(out_node):
+    if not sf.exists(out_node):
         err_txt = f'Die angegebene Feature-Klasse {out_node} ist nicht vorhanden!'
         logger.error(err_txt)
         raise ValueError(err_txt)  
-    if not arcpy.Exists(out_link):
+    if not sf.exists(out_link):
         err_txt = f'Die angegebene Feature-Klasse {out_link} ist nicht vorhanden!'
         logger.error(err_txt)
         raise ValueError(err_txt)
 
-    # Koordinatensystem
-    spatial_ref = arcpy.Describe(out_node).spatialReference
+    # Koordinatensystem (nur arcpy, im GeoPackage wird das Koordinatensystem der Feature-Klassen verwendet)
+    geopackage = sf.backend(out_node) == "sqlite"
+    spatial_ref = arcpy.Describe(out_node).spatialReference if not geopackage else None
+
+    if apply_change_set:
+        ## Gespeicherten Änderungssatz in einer Transaktion anwenden
+        logger.info(f'Änderungssatz {apply_change_set} anwenden')
+        change_set = cf.load_change_set(apply_change_set)
+        with sf.environment(workspace = gisswmm_workspace, overwriteOutput = overwrite):
+            summary = cf.apply_change_set(change_set, gisswmm_workspace, logger)
+        logger.info(f'Änderungssatz angewendet: {summary}')
+
+    elif dry_run or geopackage:
+        ## Probelauf: Alle Schritte im Speicher berechnen und als Änderungssatz speichern
+        settings = {"min_depth": min_depth, "mean_depth": mean_depth, "mean_slope": mean_slope, "staged": staged,
+                    "max_trace_depth": max_trace_depth, "max_trace_branches": max_trace_branches}
+        if dry_run:
+            logger.info('Probelauf: Die Feature-Klassen werden nicht verändert')
+        else:
+            logger.info('GeoPackage: Alle Schritte im Speicher berechnen und als Änderungssatz anwenden')
+        with sf.environment(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref, overwriteOutput = overwrite):
+            change_set = main_dry_run(out_node, node_id, node_to_link, node_dk, node_sk, tag, tag_sk, node_type, type_inlet,
+                                      min_depth, mean_depth, mean_slope, out_link, link_id, link_from, link_to, link_length,
+                                      dhm_workspace, in_dhm, staged, change_set_file, max_trace_depth, max_trace_branches,
+                                      settings)
+            if not dry_run:
+                logger.info('Änderungssatz im GeoPackage anwenden')
+                summary = cf.apply_change_set(change_set, gisswmm_workspace, logger)
+                logger.info(f'Änderungssatz angewendet: {summary}')
+
+    else:
+        ## Checkpoints: Bei "--resume" werden abgeschlossene Arbeitsschritte eines abgebrochenen Laufs übersprungen
+        checkpoint = ckf.open_checkpoint(ckf.checkpoint_file(log_folder, 'gisswmm_upd', sim_nr), data, [dhm_workspace],
+                                         ckf.resume_requested(), ckf.upstream_requested())
+        if checkpoint["resumed"]:
+            logger.info(f'Lauf wird beim letzten Checkpoint fortgesetzt ({checkpoint["file"]})')
+        elif checkpoint["discarded"]:
+            logger.warning('Checkpoint verworfen, die Parameter oder vorgelagerten Stufen wurden verändert. '
+                           'Der Lauf wird neu begonnen.')
+
+        ## Von allen Knoten Deckelkote ermitteln 
+        if ckf.step_done(checkpoint, "shaftheight"):
+            logger.info('Checkpoint: Deckelkote wurde bereits berechnet')
+        else:
+            logger.info('Deckelkote berechnen')
+            with arcpy.EnvManager(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref, overwriteOutput = overwrite):
+                main_shaftheight(out_node, node_dk, dhm_workspace, in_dhm, tag)
+            ckf.mark_done(checkpoint, "shaftheight")
+
+        ## Zunächst nur PAA-Netz berücksichtigen
+        count_input = arcpy.GetCount_management(out_node)
+        where_clause_paa = "TYP_AA = 1"    
+        node_paa = "node_lyr_paa"
+        link_paa = "link_lyr_paa"
+        arcpy.management.MakeFeatureLayer(out_node, node_paa, where_clause_paa)
+        arcpy.management.MakeFeatureLayer(out_link, link_paa, where_clause_paa)
+        count_paa = arcpy.GetCount_management(node_paa)
+
+        # Sohlenkote zuerst nur von PAA Netz interpolieren, da üblicherweise präzisere Daten
+        # Bei der gestaffelten Berechnung ("staged") werden Topologie und Sohlenkoten des PAA-Netzes beim gesamten Netz weiterverwendet
+        topology = None
+        node_dict = None
+        if int(count_paa[0])<int(count_input[0]):
+            with arcpy.EnvManager(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref, overwriteOutput = overwrite):
+                ## Topologie für PAA-Netz erstellen
+                logger.info('Topologie von PAA-Netz erstellen')
+                if staged:
+                    # Nur Einlaufschächte und Haltungen des PAA-Netzes bearbeiten, Auslaufschächte erst beim gesamten Netz definieren
+                    topology = main_topology(node_paa, node_id, node_to_link, node_type, type_inlet, link_paa, link_id, link_from, 
+                                             link_to, link_length, delete = False, define_outfalls = False,
+                                             checkpoint = checkpoint, checkpoint_step = "topology_paa")
+                else:
+                    main_topology(out_node, node_id, node_to_link, node_type, type_inlet, out_link, link_id, link_from, 
+                                  link_to, link_length, delete = False, checkpoint = checkpoint, checkpoint_step = "topology_paa")
+                ## Sohlenkote für PAA-Netz interpolieren
+                logger.info('Sohlenkote von PAA-Netz interpolieren')
+                node_dict = main_slope(node_paa, node_id, node_dk, node_sk, tag_sk, node_type, type_inlet, min_depth, 
+                                       mean_depth, link_paa, link_id, link_from, link_to, link_length, mean_slope, 
+                                       max_trace_depth = max_trace_depth, max_trace_branches = max_trace_branches)
+                if not staged:
+                    node_dict = None
+
 
-    ## Von allen Knoten Deckelkote ermitteln 
-    logger.info('Deckelkote berechnen')
-    with arcpy.EnvManager(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref, overwriteOutput = overwrite):
-        main_shaftheight(out_node, node_dk, dhm_workspace, in_dhm, tag)
-
-    ## Zunächst nur PAA-Netz berücksichtigen
-    count_input = arcpy.GetCount_management(out_node)
-    where_clause_paa = "TYP_AA = 1"    
-    node_paa = "node_lyr_paa"
-    link_paa = "link_lyr_paa"
-    arcpy.management.MakeFeatureLayer(out_node, node_paa, where_clause_paa)
-    arcpy.management.MakeFeatureLayer(out_link, link_paa, where_clause_paa)
-    count_paa = arcpy.GetCount_management(node_paa)
-
-    # Sohlenkote zuerst nur von PAA Netz interpolieren, da üblicherweise präzisere Daten
-    
-    if int(count_paa[0])<int(count_input[0]):
         with arcpy.EnvManager(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref, overwriteOutput = overwrite):
-            ## Topologie für PAA-Netz erstellen
-            logger.info('Topologie von PAA-Netz erstellen')
-            main_topology(out_node, node_id, node_to_link, node_type, type_inlet, out_link, link_id, link_from, 
-                          link_to, link_length, delete = False)
-            ## Sohlenkote für PAA-Netz interpolieren
-            logger.info('Sohlenkote von PAA-Netz interpolieren')
-            main_slope(node_paa, node_id, node_dk, node_sk, tag_sk, node_type, type_inlet, min_depth, 
-                       mean_depth, link_paa, link_id, link_from, link_to, link_length, mean_slope)
-
-
-    with arcpy.EnvManager(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref, overwriteOutput = overwrite):
-        ## Topologie für gesamtes Netz erstellen
-        logger.info('Topologie für gesamte Netz erstellen')
-        main_topology(out_node, node_id, node_to_link, node_type, type_inlet, out_link, link_id, link_from, link_to, link_length)
-        ## Sohlenkote für gesamtes Netz interpolieren
-        logger.info('Sohlenkote für gesamtes Netz interpolieren')
-        main_slope(out_node, node_id, node_dk, node_sk, tag_sk, node_type, type_inlet, min_depth, 
-                   mean_depth, out_link, link_id, link_from, link_to, link_length, mean_slope)
+            ## Topologie für gesamtes Netz erstellen (bei "staged" wird die Topologie des PAA-Netzes erweitert)
+            logger.info('Topologie für gesamte Netz erstellen')
+            main_topology(out_node, node_id, node_to_link, node_type, type_inlet, out_link, link_id, link_from, link_to, link_length,
+                          topology = topology, checkpoint = checkpoint)
+            ## Sohlenkote für gesamtes Netz interpolieren (bei "staged" bleiben die Sohlenkoten des PAA-Netzes unverändert)
+            logger.info('Sohlenkote für gesamtes Netz interpolieren')
+            main_slope(out_node, node_id, node_dk, node_sk, tag_sk, node_type, type_inlet, min_depth, 
+                       mean_depth, out_link, link_id, link_from, link_to, link_length, mean_slope, node_dict,
+                       max_trace_depth, max_trace_branches)
+        ckf.close_checkpoint(checkpoint)
 
     # Logging abschliessen
     end_time = time.time()
-    i = lf.search_in_file(log, "error")
+    i = lf.error_count()
     logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
     logger.info(str(i) + " Fehler gefunden. Check Log.")
     endtime = time.ctime()
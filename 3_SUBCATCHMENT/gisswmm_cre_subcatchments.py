@@ -45,10 +45,26 @@
 # -----------------------------------------------------------------------------
 """gisswmm_cre_subcatchments"""
 import os, sys, time, json, math
-import arcpy
+try:
+    import arcpy
+except ImportError:
+    # Ohne ArcGIS ist nur die Parametrisierung über storage_functions möglich (GeoPackage)
+    arcpy = None
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
 import logging_functions as lf
-
+import storage_functions as sf
+import checkpoint_functions as ckf
+
+# Felder der Teileinzugsgebiete, die in der Software "SWMM" benötigt werden [Name, Typ, Länge]
+SUBCATCHMENT_SCHEMA = [["Name", "TEXT", 128], ["Raingage", "TEXT", 128], ["Outlet", "TEXT", 128], ["Width", "FLOAT", None],
+                       ["PercImperv", "FLOAT", None], ["PercSlope", "FLOAT", None], ["N_Imperv", "FLOAT", None],
+                       ["N_Perv", "FLOAT", None], ["S_Imperv", "FLOAT", None], ["S_Perv", "FLOAT", None],
+                       ["PctZero", "FLOAT", None], ["Area", "FLOAT", None], ["RouteTo", "TEXT", 128],
+                       ["MaxRate", "FLOAT", None], ["MinRate", "FLOAT", None], ["Decay", "FLOAT", None],
+                       ["DryTime", "FLOAT", None], ["MaxInfil", "FLOAT", None], ["CurbLength", "FLOAT", None],
+                       ["SnowPack", "TEXT", 128], ["coords", "TEXT", 10000]]
+
+@lf.profiled()
 def del_small_polygons(in_feature, min_area):
     """Polygone der Feature-Klasse "in_feature", welche eine geringere Fläche als "min_area" aufweisen, werden gelöscht.
 
@@ -57,15 +73,123 @@ def del_small_polygons(in_feature, min_area):
         min_area -- Minimale Fläche
     """
     # Polygone mit geringer Fläche löschen (überbleibsel von clip-Funktion)
-    with arcpy.da.UpdateCursor(in_feature, ["Shape_Area"]) as dcursor:
+    with sf.update_cursor(in_feature, ["SHAPE@AREA"]) as dcursor:
         for drow in dcursor:
             if drow[0] <= min_area:  
                 dcursor.deleteRow()
 
+
+def overlay(checkpoint, tool, in_features, overlay_features, out_feature, min_area = None):
+    """Verschneidung (Clip oder Identity) ausführen, falls kein gültiger Checkpoint vorhanden ist. Bei Identity 
+    werden anschliessend die Polygone mit einer geringeren Fläche als "min_area" gelöscht.
+
+    Required:
+        checkpoint -- Checkpoint (siehe checkpoint_functions) oder None
+        tool -- "Clip" oder "Identity"
+        in_features -- Input Feature-Klasse
+        overlay_features -- Feature-Klasse, mit welcher verschnitten wird
+        out_feature -- Pfad der Output Feature-Klasse
+    Optional:
+        min_area -- Minimale Fläche (nur Identity)
+    """
+    name = os.path.basename(out_feature)
+    if ckf.step_done(checkpoint, name, [out_feature]):
+        logger.info(f'Checkpoint: "{name}" ist bereits vorhanden')
+        return
+    if tool == "Clip":
+        arcpy.analysis.Clip(in_features, overlay_features, out_feature)
+    else:
+        arcpy.analysis.Identity(in_features, overlay_features, out_feature, "ALL")
+        if min_area is not None:
+            del_small_polygons(out_feature, min_area)
+    ckf.mark_done(checkpoint, name)
+
+
+def write_batch(checkpoint, out_subcatchment, out_subcatchment_fields, batch_rows, batch_names):
+    """Batch mit Teileinzugsgebieten schreiben und im Checkpoint vermerken. Die Listen werden anschliessend geleert.
+
+    Required:
+        checkpoint -- Checkpoint (siehe checkpoint_functions) oder None
+        out_subcatchment -- Output Feature-Klasse mit den Teileinzugsgebieten
+        out_subcatchment_fields -- Felder des Insert-Cursors
+        batch_rows -- Liste mit den Zeilen
+        batch_names -- Liste mit den Namen der bearbeiteten Teileinzugsgebiete (inkl. Teileinzugsgebiete ohne Auslaufschacht)
+    """
+    if batch_rows:
+        with sf.insert_cursor(out_subcatchment, out_subcatchment_fields) as cursor:
+            for row in batch_rows:
+                cursor.insertRow(row)
+    ckf.add_batch(checkpoint, "subcatchments", batch_names)
+    del batch_rows[:]
+    del batch_names[:]
+
+
+def land_parameters(land_rows, mapping_land_imperv, mapping_land_roughness, mapping_land_depression_storage):
+    """Kennwerte eines Teileinzugsgebietes aus den Flächen der Bodenbedeckung berechnen (flächengewichtet)
+
+    Required:
+        land_rows -- Zeilen (Fläche, Bodenbedeckungsart) der Bodenbedeckung innerhalb des Teileinzugsgebietes
+        mapping_land_imperv, mapping_land_roughness, mapping_land_depression_storage -- Zuordnung der Kennwerte
+            zur Bodenbedeckungsart (siehe JSON-Datei)
+
+    Return:
+        PercImperv, N_Imperv, N_Perv, S_Imperv, S_Perv
+    """
+    # Gesamtfläche effektives Teileinzugsgebiet
+    sum_area_land = 0
+    # Summe "Imperv*Area" Werte pro effektives Teileinzugsgebiet
+    sum_imperv_area = 0
+    # Summe "Roughness*AreaImperv" Werte pro effektives Teileinzugsgebiet
+    sum_roughness_imperv_area = 0
+    # Summe "Roughness*AreaPerv" Werte pro effektives Teileinzugsgebiet
+    sum_roughness_perv_area = 0
+    # Summe "DepressionStorage*AreaImperv" Werte pro effektives Teileinzugsgebiet
+    sum_ds_imperv_area = 0
+    # Summe "DepressionStorage*AreaPerv" Werte pro effektives Teileinzugsgebiet
+    sum_ds_perv_area = 0    
+    for row in land_rows:
+        # Prüfen ob bereits ein Wert vorhanden
+        imperv = float(mapping_land_imperv['mapping'][str(row[1])])
+        roughness = float(mapping_land_roughness['mapping'][str(row[1])])
+        depression_storage = float(mapping_land_depression_storage['mapping'][str(row[1])])
+        sum_area_land += row[0]
+        sum_imperv_area += row[0] * imperv * 0.01
+        # Prüfen ob Imperv oder Perv
+        sum_roughness_imperv_area += row[0] * imperv * 0.01 * roughness
+        sum_ds_imperv_area += row[0] * imperv * 0.01 * depression_storage  
+        sum_roughness_perv_area += row[0] * (1-imperv*0.01) * roughness
+        sum_ds_perv_area += row[0]*(1-imperv*0.01) * depression_storage            
+
+    # Kennwerte berechnen
+    if sum_area_land>0:
+        PercImperv = sum_imperv_area / sum_area_land *100
+        if sum_imperv_area < sum_area_land:
+            N_Perv = sum_roughness_perv_area / (sum_area_land-sum_imperv_area)
+            S_Perv = sum_ds_perv_area / (sum_area_land-sum_imperv_area)
+        else:
+            N_Perv = 0
+            S_Perv =0
+        if sum_imperv_area>0:
+            N_Imperv = sum_roughness_imperv_area / sum_imperv_area
+            S_Imperv = sum_ds_imperv_area / sum_imperv_area
+        else:
+            N_Imperv = 0
+            S_Imperv = 0
+    else:
+        PercImperv = 0
+        N_Imperv = 0
+        N_Perv = 0
+        S_Imperv = 0
+        S_Perv = 0
+    return PercImperv, N_Imperv, N_Perv, S_Imperv, S_Perv
+
+
 # Main module: Input-Daten aufbereiten und Funktionen aufrufen
+@lf.profiled()
 def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_workspace, in_land, mapping_land_imperv, 
          mapping_land_roughness, mapping_land_depression_storage, infiltration, out_raster_workspace, out_raster_prefix, 
-         gisswmm_workspace, out_node, node_id, node_type, type_inlet, snap_distance, min_area, method, out_subcatchment, sim_nr):
+         gisswmm_workspace, out_node, node_id, node_type, type_inlet, snap_distance, min_area, method, out_subcatchment, sim_nr,
+         checkpoint = None):
     """Input-Daten aufbereiten und Funktionen für die Erstellung der Teileinzugsgebiete aufrufen
 
     Required:
@@ -93,14 +217,19 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
         method -- Methode mit der die Teileinzugsgebiete erstellt werden sollen ('1', '2', '3' oder '4')
         out_subcatchment -- Name der Output Feature-Klasse mit den Teileinzugsgebieten
         sim_nr -- Wird als Postfix für Log-Dateinamen und Feature-Klassen verwendet
+    Optional:
+        checkpoint -- Checkpoint (siehe checkpoint_functions). Die Raster, die Verschneidungen und die Teileinzugsgebiete
+                      (in Batches) werden vermerkt. Bei "--resume" werden die vermerkten Arbeitsschritte übersprungen.
     """   
     # Feature Dataset für temporäre Daten erstellen
     temp_dataset_name = "temp"
     temp_dataset_path = os.path.join(gisswmm_workspace, temp_dataset_name)
-    if arcpy.Exists(temp_dataset_path):
+    resumed = checkpoint is not None and checkpoint["resumed"]
+    if arcpy.Exists(temp_dataset_path) and not resumed:
         logger.info(f'Vorhande Feature-Dataset "{temp_dataset_name}" wird gelöscht')
         arcpy.management.Delete(temp_dataset_name)
-    arcpy.management.CreateFeatureDataset(gisswmm_workspace, temp_dataset_name)
+    if not arcpy.Exists(temp_dataset_path):
+        arcpy.management.CreateFeatureDataset(gisswmm_workspace, temp_dataset_name)
 
     # Ausagbefeature mit Nr. der Simulation ergänzen und Pfad zu Ausgabedataset definieren
     out_subcatchment = out_subcatchment + "_" + sim_nr
@@ -110,6 +239,7 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
     in_dhm_path = os.path.join(dhm_workspace, in_dhm)
 
     # Senken von DHM füllen
+    lf.step("Fliessrichtung und Abflussakkumulation")
     out_surface_raster_path = os.path.join(out_raster_workspace, out_raster_prefix + "_fill")
     if arcpy.Exists(out_surface_raster_path):
         logger.info(f'Raster "{out_surface_raster_path}" existiert bereits und wird nicht neu erstellt')
@@ -139,87 +269,80 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
         out_accumulation_raster = arcpy.sa.FlowAccumulation(out_flow_direction_raster, None, "FLOAT", "D8")
         out_accumulation_raster.save(out_accumulation_raster_path)        
 
-    # Layer mit Schächten, für welche ein Teileinzugsgebiet berechnet werden soll (ohne Einlaufschächte), erstellen
-    logger.info(f'Layer mit Schächten, für welche ein Teileinzugsgebiet berechnet werden soll, erstellen')
-    out_node_lyr = 'out_node_lyr'
-    where_node = ('"' + node_type + '"' + " <> " + f"'{type_inlet}'" )
+    # Die vorhandenen Raster werden wiederverwendet, vermerkt wird nur die Reihenfolge der Arbeitsschritte
+    for name, path in (("fill", out_surface_raster_path), ("flowdir", out_flow_direction_raster_path), 
+                       ("flowaccu", out_accumulation_raster_path)):
+        if not ckf.step_done(checkpoint, name, [path]):
+            ckf.mark_done(checkpoint, name)
 
-    # Feature Layer mit den Schächten erstellen
-    arcpy.management.MakeFeatureLayer(out_node, out_node_lyr, where_node)
- 
+    # Layer mit Schächten, für welche ein Teileinzugsgebiet berechnet werden soll (ohne Einlaufschächte), erstellen
+    lf.step("Topographische Teileinzugsgebiete")
     # Abflusspunkte zu den Schächten zuordnen (innerhalb snap_distance)
     out_pourpoint_raster_path = os.path.join(out_raster_workspace, out_raster_prefix + "_pourpoint")
-    logger.info(f'Raster "{out_pourpoint_raster_path}" erstellen')
-    out_pourpoint_raster = arcpy.sa.SnapPourPoint(out_node_lyr, out_accumulation_raster, snap_distance, "OBJECTID")
-    out_pourpoint_raster.save(out_pourpoint_raster_path)        
+    if ckf.step_done(checkpoint, "pourpoint", [out_pourpoint_raster_path]):
+        logger.info(f'Checkpoint: Raster "{out_pourpoint_raster_path}" ist bereits vorhanden')
+        out_pourpoint_raster = out_pourpoint_raster_path
+    else:
+        logger.info(f'Layer mit Schächten, für welche ein Teileinzugsgebiet berechnet werden soll, erstellen')
+        out_node_lyr = 'out_node_lyr'
+        where_node = ('"' + node_type + '"' + " <> " + f"'{type_inlet}'" )
+
+        # Feature Layer mit den Schächten erstellen
+        arcpy.management.MakeFeatureLayer(out_node, out_node_lyr, where_node)
+
+        logger.info(f'Raster "{out_pourpoint_raster_path}" erstellen')
+        out_pourpoint_raster = arcpy.sa.SnapPourPoint(out_node_lyr, out_accumulation_raster, snap_distance, "OBJECTID")
+        out_pourpoint_raster.save(out_pourpoint_raster_path)        
+        ckf.mark_done(checkpoint, "pourpoint")
 
     # Topographische Teileinzugsgebiete erstellen (Raster)
     out_watershed_raster_path = os.path.join(out_raster_workspace, out_raster_prefix + "_watershed")
-    logger.info(f'Raster "{out_watershed_raster_path}" erstellen')
-    out_watershed_raster = arcpy.sa.Watershed(out_flow_direction_raster, out_pourpoint_raster, "Value")
-    out_watershed_raster.save(out_watershed_raster_path)        
-
-    # Raster zu Polygon konvertieren
-    subcatchment_ras2poly = "subcatchment_ras2poly"
-    subcatchment_ras2poly_path = os.path.join(temp_dataset_path, subcatchment_ras2poly)
-    logger.info(f'Raster "{out_watershed_raster_path}" zu Polygon {subcatchment_ras2poly} konvertieren')
-    arcpy.conversion.RasterToPolygon(out_watershed_raster, subcatchment_ras2poly_path, "SIMPLIFY", "Value", "MULTIPLE_OUTER_PART", None)
-
-    # Field-Mapping initialisieren
-    fmap = arcpy.FieldMappings()
-    fmap.addTable(subcatchment_ras2poly_path)
-    # Liste mit allen Felder erstellen
-    flds = fmap.fieldMappings
-    fnames = {f.getInputFieldName(0) for f in flds}
-    # Unnötige Felder entfernen
-    del_fields = ["InPoly_FID", "SimPgnFlag", "MaxSimpTol", "MinSimpTol"]
-    for del_field in del_fields:
-        if del_field in fnames:
-            arcpy.management.DeleteField(subcatchment_ras2poly_path, del_field)
+    if ckf.step_done(checkpoint, "watershed", [out_watershed_raster_path]):
+        logger.info(f'Checkpoint: Raster "{out_watershed_raster_path}" ist bereits vorhanden')
+        out_watershed_raster = out_watershed_raster_path
+    else:
+        logger.info(f'Raster "{out_watershed_raster_path}" erstellen')
+        out_watershed_raster = arcpy.sa.Watershed(out_flow_direction_raster, out_pourpoint_raster, "Value")
+        out_watershed_raster.save(out_watershed_raster_path)        
+        ckf.mark_done(checkpoint, "watershed")
 
-    # Polygongeometrie vereinfachen damit die Geometrieobjekte nicht zu lange werden
+    # Unnötige Felder der Polygone aus dem Raster
+    del_fields = ["InPoly_FID", "SimPgnFlag", "MaxSimpTol", "MinSimpTol"]
     hyd_subcatchment = "hyd_subcatchment"
     hyd_subcatchment_path = os.path.join(temp_dataset_path, hyd_subcatchment)
-    algorithm = "POINT_REMOVE"
-    tolerance = "1 Meters"
-    arcpy.cartography.SimplifyPolygon(subcatchment_ras2poly_path, hyd_subcatchment_path, algorithm, tolerance, "0 SquareMeters", 
-                                     "RESOLVE_ERRORS", "KEEP_COLLAPSED_POINTS", None)
-    
-    # Felder zur Feature-Klasse mit den topograhische Teileinzugsgebieten hinzufügen, die in der Software "SWMM" benötigt werden.
-    logger.info(f'Der Featureklasse "{hyd_subcatchment}" Felder hinzufügen')
-    arcpy.management.AddField(hyd_subcatchment_path, "Name", "TEXT", field_length=128)
-    arcpy.management.AddField(hyd_subcatchment_path, "Raingage", "TEXT", field_length=128)
-    arcpy.management.AddField(hyd_subcatchment_path, "Outlet", "TEXT", field_length=128)
-    arcpy.management.AddField(hyd_subcatchment_path, "Width", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "PercImperv", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "PercSlope", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "N_Imperv", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "N_Perv", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "S_Imperv", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "S_Perv", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "PctZero", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "Area", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "RouteTo", "TEXT", field_length=128)
-    arcpy.management.AddField(hyd_subcatchment_path, "MaxRate", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "MinRate", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "Decay", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "DryTime", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "MaxInfil", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "MaxInfil", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "CurbLength", "FLOAT")
-    arcpy.management.AddField(hyd_subcatchment_path, "SnowPack", "TEXT", field_length=128)
-    arcpy.management.AddField(hyd_subcatchment_path, "coords", "TEXT", field_length=10000)
-
-
-    # JOIN node on OBJECTID -> node ID Feld befüllen
-    logger.info(f'Schächte und Teileinzugebiete miteinander joinen um den Teileinzugsgebieten die ID des Auslaufschachtes zu übergeben')
-    out_subcatchment_node = arcpy.management.AddJoin(hyd_subcatchment_path, "gridcode", out_node, "OBJECTID", "KEEP_ALL", "NO_INDEX_JOIN_FIELDS")
-    # Das Feld "Outlet" (Auslaufschacht) mit der ID der Schächte befüllen
-    logger.info(f'Feld Outlet berechnen')
-    expression = "!"+out_node+"."+node_id+"!"
-    arcpy.management.CalculateField(out_subcatchment_node, 'Outlet', expression, "PYTHON3")    
-    # Join entfernen
-    arcpy.management.RemoveJoin(out_subcatchment_node, out_node)
+    if ckf.step_done(checkpoint, hyd_subcatchment, [hyd_subcatchment_path]):
+        logger.info(f'Checkpoint: Feature-Klasse "{hyd_subcatchment}" ist bereits vorhanden')
+    else:
+        # Raster zu Polygon konvertieren
+        subcatchment_ras2poly = "subcatchment_ras2poly"
+        subcatchment_ras2poly_path = os.path.join(temp_dataset_path, subcatchment_ras2poly)
+        logger.info(f'Raster "{out_watershed_raster_path}" zu Polygon {subcatchment_ras2poly} konvertieren')
+        arcpy.conversion.RasterToPolygon(out_watershed_raster, subcatchment_ras2poly_path, "SIMPLIFY", "Value", "MULTIPLE_OUTER_PART", None)
+
+        # Unnötige Felder entfernen
+        sf.delete_fields(subcatchment_ras2poly_path, del_fields)
+
+        # Polygongeometrie vereinfachen damit die Geometrieobjekte nicht zu lange werden
+        algorithm = "POINT_REMOVE"
+        tolerance = "1 Meters"
+        arcpy.cartography.SimplifyPolygon(subcatchment_ras2poly_path, hyd_subcatchment_path, algorithm, tolerance, "0 SquareMeters", 
+                                         "RESOLVE_ERRORS", "KEEP_COLLAPSED_POINTS", None)
+        
+        # Felder zur Feature-Klasse mit den topograhische Teileinzugsgebieten hinzufügen, die in der Software "SWMM" benötigt werden.
+        logger.info(f'Der Featureklasse "{hyd_subcatchment}" Felder hinzufügen')
+        sf.add_fields(hyd_subcatchment_path, SUBCATCHMENT_SCHEMA)
+
+
+        # JOIN node on OBJECTID -> node ID Feld befüllen
+        logger.info(f'Schächte und Teileinzugebiete miteinander joinen um den Teileinzugsgebieten die ID des Auslaufschachtes zu übergeben')
+        out_subcatchment_node = arcpy.management.AddJoin(hyd_subcatchment_path, "gridcode", out_node, "OBJECTID", "KEEP_ALL", "NO_INDEX_JOIN_FIELDS")
+        # Das Feld "Outlet" (Auslaufschacht) mit der ID der Schächte befüllen
+        logger.info(f'Feld Outlet berechnen')
+        expression = "!"+out_node+"."+node_id+"!"
+        arcpy.management.CalculateField(out_subcatchment_node, 'Outlet', expression, "PYTHON3")    
+        # Join entfernen
+        arcpy.management.RemoveJoin(out_subcatchment_node, out_node)
+        ckf.mark_done(checkpoint, hyd_subcatchment)
 
     # Pfad zur Bodenbedeckung definieren
     in_land_path = os.path.join(land_workspace, in_land)
@@ -230,8 +353,10 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
     # Methode "3": Topographische Teileinzugsgebiete verwenden
     # Methode "2": Topographische Teileinzugsgebiete zusätzlich mit Bodenbedeckung verschneiden
     logger.info(f'Teileinzugsgebiete mit Methode "{method}" erstellen')
-    # Feature mit effektiven Teileinzugsgebiet löschen, falls bereits vorhanden
-    if arcpy.Exists(out_subcatchment):
+    lf.step("Verschneiden Methode " + str(method))
+    # Feature mit effektiven Teileinzugsgebiet löschen, falls bereits vorhanden (bei "--resume" erst nach der Prüfung 
+    # des Checkpoints, siehe unten)
+    if arcpy.Exists(out_subcatchment) and not resumed:
         logger.info(f'Bestehendes Feature "{out_subcatchment}" löschen')
         arcpy.management.Delete(out_subcatchment)
 
@@ -249,13 +374,11 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
         # Bodenbedeckung mit Liegenschaften ausschneiden (Extend von Bodenbedeckungsfeature auf Untersuchungsgebiet anpassen)
         clip_land_parcel = "clip_land_parcel"
         clip_land_parcel_path = os.path.join(temp_dataset_path, clip_land_parcel)
-        arcpy.analysis.Clip(in_land_path, in_parcel_path, clip_land_parcel_path)
-        # Bodenbedeckung mit Liegenschaften verschneiden
+        overlay(checkpoint, "Clip", in_land_path, in_parcel_path, clip_land_parcel_path)
+        # Bodenbedeckung mit Liegenschaften verschneiden und Polygone mit geringer Fläche löschen
         identity_land_parcel = "identity_land_parcel"
         identity_land_parcel_path = os.path.join(temp_dataset_path, identity_land_parcel)
-        arcpy.analysis.Identity(clip_land_parcel_path, in_parcel_path, identity_land_parcel_path, "ALL")
-        # Polygone mit geringer Fläche löschen
-        del_small_polygons(identity_land_parcel_path, min_area)                                   
+        overlay(checkpoint, "Identity", clip_land_parcel_path, in_parcel_path, identity_land_parcel_path, min_area)
         # Die Geometrie der effektiven Teileinzugsgebiete entsprechen dem Verschnitt von den Liegenschaften mit der Bodenbedeckung
         subcatchment_geom = identity_land_parcel_path
 
@@ -266,12 +389,12 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
             # Bodenbedeckung mit topographischen Teileinzugsgebieten ausschneiden
             clip_land_hyd_subcatchment = "clip_land_hyd_subcatchment"
             clip_land_hyd_subcatchment_path = os.path.join(temp_dataset_path, clip_land_hyd_subcatchment)
-            arcpy.analysis.Clip(in_land_path, hyd_subcatchment_path, clip_land_hyd_subcatchment_path)
+            overlay(checkpoint, "Clip", in_land_path, hyd_subcatchment_path, clip_land_hyd_subcatchment_path)
             # Bodenbedeckung mit Teileinzugsgebieten verschneiden
             identity_land_hyd_subcatchment = "identity_land_hyd_subcatchment"
             identity_land_hyd_subcatchment_path = os.path.join(temp_dataset_path, identity_land_hyd_subcatchment)
-            arcpy.analysis.Identity(clip_land_hyd_subcatchment_path, hyd_subcatchment_path, identity_land_hyd_subcatchment_path, "ALL")
-            del_small_polygons(identity_land_hyd_subcatchment_path, min_area)  
+            overlay(checkpoint, "Identity", clip_land_hyd_subcatchment_path, hyd_subcatchment_path, 
+                    identity_land_hyd_subcatchment_path, min_area)
             # Die Geometrie der effektiven Teileinzugsgebiete entsprechen dem Verschnitt der topographischen Teileinzugsgebiete mit der Bodenbedeckung
             subcatchment_geom = identity_land_hyd_subcatchment_path
     else:
@@ -282,13 +405,13 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
         # Geometrie der effektiven Teileinzugsgebiete mit topographischen Teileinzugsgbieten ausschneiden
         clip_geom_hyd_subcatchment = "clip_geom_hyd_subcatchment"
         clip_geom_hyd_subcatchment_path = os.path.join(temp_dataset_path, clip_geom_hyd_subcatchment)
-        arcpy.analysis.Clip(subcatchment_geom, hyd_subcatchment_path, clip_geom_hyd_subcatchment_path)
+        overlay(checkpoint, "Clip", subcatchment_geom, hyd_subcatchment_path, clip_geom_hyd_subcatchment_path)
         # Geometrie der effektiven Teileinzugsgebiete mit topographischen Teileinzugsgbieten verschneiden
+        # und Polygone mit geringer Fläche löschen
         identity_geom_hyd_subcatchment = "identity_geom_hyd_subcatchment"
         identity_geom_hyd_subcatchment_path = os.path.join(temp_dataset_path, identity_geom_hyd_subcatchment)
-        arcpy.analysis.Identity(clip_geom_hyd_subcatchment_path, hyd_subcatchment_path, identity_geom_hyd_subcatchment_path, "ALL")     
-        # Polygone mit geringer Fläche löschen
-        del_small_polygons(identity_geom_hyd_subcatchment_path, min_area)  
+        overlay(checkpoint, "Identity", clip_geom_hyd_subcatchment_path, hyd_subcatchment_path, 
+                identity_geom_hyd_subcatchment_path, min_area)
         subcatchment_geom_hyd = identity_geom_hyd_subcatchment_path
     else: 
         # Bei der Methode "3" und "4" sind die Informationen der topographischen Teileinzugsgebiete bereits vorhanden
@@ -300,26 +423,40 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
         clip_subcatchment_geom_hyd_land = "clip_subcatchment_geom_hyd_land"
         clip_subcatchment_geom_hyd_land_path = os.path.join(temp_dataset_path, clip_subcatchment_geom_hyd_land)
         # Bodenbedeckung mit subcatchment ausschneiden
-        arcpy.analysis.Clip(in_land_path, subcatchment_geom_hyd, clip_subcatchment_geom_hyd_land_path)
-        # Bodenbedeckung mit subcatchment verschneiden
+        overlay(checkpoint, "Clip", in_land_path, subcatchment_geom_hyd, clip_subcatchment_geom_hyd_land_path)
+        # Bodenbedeckung mit subcatchment verschneiden und Polygone mit geringer Fläche löschen
         identitiy_subcatchment_geom_hyd_land = "identitiy_subcatchment_geom_hyd_land"
         identitiy_subcatchment_geom_hyd_land_path = os.path.join(temp_dataset_path, identitiy_subcatchment_geom_hyd_land)
-        arcpy.analysis.Identity(clip_subcatchment_geom_hyd_land_path, subcatchment_geom_hyd, identitiy_subcatchment_geom_hyd_land_path, "ALL")
-        # Polygone mit geringer Fläche löschen
-        del_small_polygons(identitiy_subcatchment_geom_hyd_land_path, min_area)      
+        overlay(checkpoint, "Identity", clip_subcatchment_geom_hyd_land_path, subcatchment_geom_hyd, 
+                identitiy_subcatchment_geom_hyd_land_path, min_area)
         subcatchment_geom_hyd_land = identitiy_subcatchment_geom_hyd_land_path
     else:
         # Bei der Methode "2" und "4" sind die Informationen aus der Bodenbedeckung bereits vorhanden
         subcatchment_geom_hyd_land = subcatchment_geom_hyd
 
-    # Ausgabe Feature-Klasse mit effektiven Teileinzugsgebieten (out_subcatchment) erstellen
-    arcpy.management.CreateFeatureclass(sim_dataset_path, out_subcatchment, template = hyd_subcatchment_path)
+    # Bereits bearbeitete Teileinzugsgebiete (Checkpoint). Teileinzugsgebiete, die nach dem letzten Checkpoint 
+    # hinzugefügt wurden, werden wieder gelöscht und neu berechnet.
+    done_names = ckf.batch_keys(checkpoint, "subcatchments")
+    if done_names and arcpy.Exists(out_subcatchment):
+        logger.info(f'Checkpoint: {len(done_names)} Teileinzugsgebiete wurden bereits bearbeitet')
+        with sf.update_cursor(out_subcatchment, ["Name"]) as dcursor:
+            for drow in dcursor:
+                if drow[0] not in done_names:
+                    dcursor.deleteRow()
+    else:
+        done_names = set()
+        if arcpy.Exists(out_subcatchment):
+            logger.info(f'Bestehendes Feature "{out_subcatchment}" löschen')
+            arcpy.management.Delete(out_subcatchment)
+        # Ausgabe Feature-Klasse mit effektiven Teileinzugsgebieten (out_subcatchment) erstellen
+        arcpy.management.CreateFeatureclass(sim_dataset_path, out_subcatchment, template = hyd_subcatchment_path)
 
     # Felder der Ausgabefeature-Klasse 
     out_subcatchment_fields = ["SHAPE@", "Name", "Outlet", "PercImperv", "N_Imperv", "N_Perv", "S_Imperv", "S_Perv", "PctZero", "Raingage", "Area",
                                "RouteTo", "MaxRate","MinRate","Decay","DryTime","MaxInfil", "CurbLength", "coords"]
-    # Insert-Cursor initialisieren
-    cursor = arcpy.da.InsertCursor(out_subcatchment, out_subcatchment_fields)
+    # Die Teileinzugsgebiete werden in Batches geschrieben und im Checkpoint vermerkt
+    batch_rows = []
+    batch_names = []
 
     # Felder für "subcatchment_geom" cursor je nach Methode anpassen
     if method == "1":
@@ -336,15 +473,18 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
         subcatchment_geom_fields = ["SHAPE@", objectid, "Outlet", "Shape_Area", mapping_land_imperv['in_field']]
 
     # Durch alle Geometrien iterieren und effektive Teileinzugsgebiete erstellen
-    with arcpy.da.SearchCursor(subcatchment_geom, subcatchment_geom_fields) as gcursor:
-            for grow in gcursor:
+    lf.step("Teileinzugsgebiete parametrisieren")
+    with sf.search_cursor(subcatchment_geom, subcatchment_geom_fields) as gcursor:
+            # Fortschritt mit Durchsatz und Restdauer melden (bereits bearbeitete Teileinzugsgebiete zählen mit)
+            for grow in lf.progress(gcursor, "Teileinzugsgebiete parametrisieren", sf.count_rows(subcatchment_geom)):
                 # Name der effektiven Teileinzugsgebiete = "s" + OBJECTID von subcatchment_geom
                 shape = grow[0]
                 name =  "s" + str(grow[1])
+                if name in done_names:
+                    continue
                 ## Auslaufschacht ("Outlet") für jedes Teieinzugsgebiete bestimmen
                 if method == "1" or method == "2":
                     # Bei der Methode 1 und 2 müssen die topographischen Informationen aus "subcatchment_geom_hyd" extrahiert werden
-                    subcatchment_geom_hyd_lyr = arcpy.management.SelectLayerByLocation(subcatchment_geom_hyd, "WITHIN", grow[0], "", "NEW_SELECTION")
                     # Grösste Teileinzugsgebietseinheiten innerhalb des effektiven Teileinzugsgebiets 
                     max_area = 0
                     # Fläche effektives Teileinzugsgebiet initialisieren
@@ -352,15 +492,14 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
                     # Auslaufschacht der grössten Teileinzugsgebietseinheiten innerhalb des effektiven Teileinzugsgebiets
                     outlet = None
                     # Durch alle topographischen Teileinzugsgebietseinheiten innerhalb des effektiven Teileinzugsgebiets iterieren 
-                    with arcpy.da.SearchCursor(subcatchment_geom_hyd_lyr, ["Shape_Area", "Outlet"]) as scursor:
-                        for srow in scursor:
-                            # Fläche effektives aktualisieren
-                            sum_area += srow[0]
-                            if srow[0] > max_area and srow[1] is not None:
-                                if len(srow[1])>0:
-                                    # Für "outlet" den Wert des topographischen Teileinzugsgebietes mit der grössten Fläche innerhalb des effektiven Teileinzugsgebietes übernehmen
-                                    max_area = srow[0]    
-                                    outlet = srow[1]
+                    for srow in sf.search_within(subcatchment_geom_hyd, ["Shape_Area", "Outlet"], grow[0]):
+                        # Fläche effektives aktualisieren
+                        sum_area += srow[0]
+                        if srow[0] > max_area and srow[1] is not None:
+                            if len(srow[1])>0:
+                                # Für "outlet" den Wert des topographischen Teileinzugsgebietes mit der grössten Fläche innerhalb des effektiven Teileinzugsgebietes übernehmen
+                                max_area = srow[0]    
+                                outlet = srow[1]
 
                 else:
                     # Fläche effektives Teileinzugsgebiet
@@ -371,56 +510,11 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
                 ## Kennwerte in Abhängigkeit der Bodenbedeckung extrahieren
                 if method == "1" or method == "3":
                     # Bei der Methode 1 und 3 müssen die Kennwerte aus "subcatchment_geom_hyd_land" extrahiert werden                
-                    subcatchment_geom_hyd_land_lyr = arcpy.management.SelectLayerByLocation(subcatchment_geom_hyd_land, "WITHIN", grow[0], "", "NEW_SELECTION")
-                    # Gesamtfläche effektives Teileinzugsgebiet
-                    sum_area_land = 0
-                    # Summe "Imperv*Area" Werte pro effektives Teileinzugsgebiet
-                    sum_imperv_area = 0
-                    # Summe "Roughness*AreaImperv" Werte pro effektives Teileinzugsgebiet
-                    sum_roughness_imperv_area = 0
-                    # Summe "Roughness*AreaPerv" Werte pro effektives Teileinzugsgebiet
-                    sum_roughness_perv_area = 0
-                    # Summe "DepressionStorage*AreaImperv" Werte pro effektives Teileinzugsgebiet
-                    sum_ds_imperv_area = 0
-                    # Summe "DepressionStorage*AreaPerv" Werte pro effektives Teileinzugsgebiet
-                    sum_ds_perv_area = 0    
+                    land_rows = sf.search_within(subcatchment_geom_hyd_land, ["Shape_Area", mapping_land_imperv['in_field']], grow[0])
                     # Werte extrahieren
-                    with arcpy.da.SearchCursor(subcatchment_geom_hyd_land_lyr, ["Shape_Area", mapping_land_imperv['in_field']]) as scursor:
-                        for row in scursor:
-                            # Prüfen ob bereits ein Wert vorhanden
-                            imperv = float(mapping_land_imperv['mapping'][str(row[1])])
-                            roughness = float(mapping_land_roughness['mapping'][str(row[1])])
-                            depression_storage = float(mapping_land_depression_storage['mapping'][str(row[1])])
-                            sum_area_land += row[0]
-                            sum_imperv_area += row[0] * imperv * 0.01
-                            # Prüfen ob Imperv oder Perv
-                            sum_roughness_imperv_area += row[0] * imperv * 0.01 * roughness
-                            sum_ds_imperv_area += row[0] * imperv * 0.01 * depression_storage  
-                            sum_roughness_perv_area += row[0] * (1-imperv*0.01) * roughness
-                            sum_ds_perv_area += row[0]*(1-imperv*0.01) * depression_storage            
-
-                    # Kennwerte berechnen
-                    if sum_area_land>0:
-                        PercImperv = sum_imperv_area / sum_area_land *100
-                        if sum_imperv_area < sum_area_land:
-                            N_Perv = sum_roughness_perv_area / (sum_area_land-sum_imperv_area)
-                            S_Perv = sum_ds_perv_area / (sum_area_land-sum_imperv_area)
-                        else:
-                            N_Perv = 0
-                            S_Perv =0
-                        if sum_imperv_area>0:
-                            N_Imperv = sum_roughness_imperv_area / sum_imperv_area
-                            S_Imperv = sum_ds_imperv_area / sum_imperv_area
-                        else:
-                            N_Imperv = 0
-                            S_Imperv = 0
+                    PercImperv, N_Imperv, N_Perv, S_Imperv, S_Perv = land_parameters(land_rows, mapping_land_imperv, 
+                                                                    mapping_land_roughness, mapping_land_depression_storage)
 
-                    else:
-                        PercImperv = 0
-                        N_Imperv = 0
-                        N_Perv = 0
-                        S_Imperv = 0
-                        S_Perv = 0
                 else:
                     # Bei der Methode 2 und 4 sind die Informationen zur Bodenbedeckung bereits in subcatchment_geom enthalten 
                     imperv = float(mapping_land_imperv['mapping'][str(grow[4])])
@@ -465,13 +559,18 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
 
                 # Teileinzugsgebiet nur hinzufügen falls outlet vorhanden
                 if outlet:
-                    cursor.insertRow([shape, name, outlet, PercImperv, N_Imperv, N_Perv, S_Imperv, S_Perv, PctZero, Raingage, Area,RouteTo, MaxRate,MinRate,Decay,DryTime,MaxInfil, CurbLength, coords])                                                                   
+                    batch_rows.append([shape, name, outlet, PercImperv, N_Imperv, N_Perv, S_Imperv, S_Perv, PctZero, Raingage, Area,RouteTo, MaxRate,MinRate,Decay,DryTime,MaxInfil, CurbLength, coords])                                                                   
+                batch_names.append(name)
+                if len(batch_names) >= ckf.DEFAULT_BATCH_SIZE:
+                    write_batch(checkpoint, out_subcatchment, out_subcatchment_fields, batch_rows, batch_names)
 
-    del cursor
+    write_batch(checkpoint, out_subcatchment, out_subcatchment_fields, batch_rows, batch_names)
+    ckf.mark_done(checkpoint, "subcatchments")
 
     ## Gebietsweite berechnen
+    lf.step("Gebietsweite und Steigung")
     logger.info(f'Gebietsweite pro subcatchment berechnen')
-    with arcpy.da.UpdateCursor(out_subcatchment, ["Shape_Area","Width"]) as ucursor:
+    with sf.update_cursor(out_subcatchment, ["Shape_Area","Width"]) as ucursor:
         for urow in ucursor:
             urow[1] = math.sqrt(urow[0])
             ucursor.updateRow(urow)
@@ -511,16 +610,8 @@ def main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_wor
     # Remove Join
     arcpy.management.RemoveJoin(out_subcatchment_slope, "slope_table")
 
-    # Field-Mapping initialisieren
-    fmap = arcpy.FieldMappings()
-    fmap.addTable(out_subcatchment)
-    # Liste mit allen Felder erstellen
-    flds = fmap.fieldMappings
-    fnames = {f.getInputFieldName(0) for f in flds}
     ## Unnötige Felder löschen
-    for del_field in del_fields:
-        if del_field in fnames:
-            arcpy.management.DeleteField(out_subcatchment, del_field)
+    sf.delete_fields(out_subcatchment, del_fields)
 
     # Temporäre Datensätze wieder löschen
     if arcpy.Exists("slope_table"):
@@ -647,15 +738,29 @@ if __name__ == "__main__":
     # Koordinatensystem
     spatial_ref = arcpy.Describe(out_node).spatialReference
 
+    # Checkpoints: Bei "--resume" werden abgeschlossene Arbeitsschritte eines abgebrochenen Laufs übersprungen
+    # (Eingaben: Parameter, externe Workspaces und die Schächte)
+    checkpoint = ckf.open_checkpoint(ckf.checkpoint_file(log_folder, 'gisswmm_cre_subcatchments', sim_nr),
+                                     {"settings": data, "nodes": ckf.fingerprint_rows(out_node, ["OID@", node_id, node_type, "SHAPE@XY"])},
+                                     [dhm_workspace, land_workspace, parcel_workspace], ckf.resume_requested(),
+                                     ckf.upstream_requested())
+    if checkpoint["resumed"]:
+        logger.info(f'Lauf wird beim letzten Checkpoint fortgesetzt ({checkpoint["file"]})')
+    elif checkpoint["discarded"]:
+        logger.warning('Checkpoint verworfen, die Parameter, Schächte oder vorgelagerten Stufen wurden verändert. '
+                       'Der Lauf wird neu begonnen.')
+
     # Main module aufrufen
     with arcpy.EnvManager(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref, overwriteOutput = overwrite):
         main(dhm_workspace, in_dhm, max_slope, parcel_workspace, in_parcel, land_workspace, in_land, mapping_land_imperv, 
              mapping_land_roughness, mapping_land_depression_storage, infiltration, out_raster_workspace, out_raster_prefix, 
-             gisswmm_workspace, out_node, node_id, node_type, type_inlet, snap_distance, min_area, method, out_subcatchment, sim_nr)
+             gisswmm_workspace, out_node, node_id, node_type, type_inlet, snap_distance, min_area, method, out_subcatchment, sim_nr,
+             checkpoint)
+    ckf.close_checkpoint(checkpoint)
 
     # Logging abschliessen
     end_time = time.time()
-    i = lf.search_in_file(log, "error")
+    i = lf.error_count()
     logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
     logger.info(str(i) + " Fehler gefunden. Check Log.")
     endtime = time.ctime()
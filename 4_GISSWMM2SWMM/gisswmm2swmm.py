@@ -14,15 +14,24 @@
 # Die SWMM-Objekte EVAPORATION, RAINGAGES, MAP, REPORT, STORAGE, DWF, CURVES, ORIFICES, WEIRS, LOSSES, TIMESERIES, 
 # TAGS, SYMBOLS, LABELS sind noch nicht berücksichtigt und müssten bei Bedarf in der SWMM-Software erstellt werden.
 # Bei den SWMM-Objekten OUTFALLS und PUMPS werden nicht alle Felder berücksichtigt.
+#
+# Die GIS-Datensätze werden über storage_functions gelesen: "gisswmm_workspace" kann eine File-Geodatabase
+# (arcpy) oder ein GeoPackage (.gpkg, ohne arcpy) sein.
 # -----------------------------------------------------------------------------
 """gisswmm2swmm"""
 import os, sys, time, json, shutil, re
-import arcpy
+try:
+    import arcpy
+except ImportError:
+    # Ohne ArcGIS nur mit GeoPackage (siehe storage_functions)
+    arcpy = None
 import swmmio
 from swmm_api import swmm5_run
 import pandas as pd
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
 import logging_functions as lf
+import inp_functions as inpf
+import storage_functions as sf
 
 def coords_to_list(coords):
     """Konvertiert einen String mit Koordinaten zu einer Liste aus Koordinatenpaaren
@@ -55,7 +64,114 @@ def coords_to_list(coords):
     return coords_list
 
 
+# GISSWMM-Felder definieren  (erstes Feld -> Index, zweites Feld -> Typ)
+NODE_FIELDS_GIS = ["Name", "SWMM_TYPE", "InvertElev", "InitDepth", "MaxDepth", "SurchargeDepth", "PondedArea", "OutfallType", "coords", "tag"]
+LINK_FIELDS_GIS = ["Name", "SWMM_TYPE", "InletNode", "OutletNode", "Length", "Roughness", "InOffset", "OutOffset", 
+                   "InitFlow", "MaxFlow", "ShapeType", "Geom1", "Geom2", "Geom3" , "Geom4", "Barrels", "coords"]
+SUBCATCHMENT_FIELDS_GIS = ["Name", "Raingage", "Outlet", "Area", "PercImperv", "Width", "PercSlope", "N_Imperv", 
+                           "N_Perv", "S_Imperv", "S_Perv", "PctZero", "RouteTo", "CurbLength", "SnowPack",
+                           "MaxRate", "MinRate", "Decay", "DryTime", "MaxInfil", "coords"]
+
+
+def add_nodes(rows, junctions, outfalls, coordinates):
+    """Knoten (Zeilen mit den Feldern NODE_FIELDS_GIS) in die swmmio-Dataframes übernehmen
+
+    Required:
+        rows -- Zeilen der Knoten (Cursor oder Liste)
+        junctions, outfalls, coordinates -- swmmio-Dataframes, werden direkt verändert
+    """
+    # Mapping GISSWMM-Feld:swmmio-Feld für junction
+    junction_fields = {"InvertElev":"InvertElev", "MaxDepth":"MaxDepth", "InitDepth":"InitDepth", "SurchargeDepth":"SurchargeDepth", "PondedArea":"PondedArea"}
+    # Mapping GISSWMM-Feld:swmmio-Feld für outfall    
+    outfall_fields = {"InvertElev":"InvertElev", "OutfallType":"OutfallType"}
+    for row in rows:
+        for ii, val in enumerate(row):
+            in_field = NODE_FIELDS_GIS[ii]
+            if row[1] in ["INLET", "JUNCTION"] and  in_field in list(junction_fields.keys()):
+                junctions.loc[row[0], junction_fields[in_field]]= val
+            elif row[1] == "OUTFALL" and  in_field in list(outfall_fields.keys()):
+                outfalls.loc[row[0], outfall_fields[in_field]] = val
+            elif in_field == "coords":
+                coordinates.loc[row[0]] = coords_to_list(val)[0]
+            #elif in_field == "tag":
+
+
+def add_links(rows, conduits, pumps, xsections, vertices):
+    """Haltungen (Zeilen mit den Feldern LINK_FIELDS_GIS) in die swmmio-Dataframes übernehmen
+
+    Required:
+        rows -- Zeilen der Haltungen (Cursor oder Liste)
+        conduits, pumps, xsections -- swmmio-Dataframes, werden direkt verändert
+        vertices -- swmmio-Dataframe mit den Stützpunkten
+
+    Return:
+        vertices -- Dataframe mit den ergänzten Stützpunkten
+    """
+    # Mapping GISSWMM-Feld:swmmio-Feld für conduit (muss evtl. je nach SWMM-Version angepasst werden)
+    conduit_fields = {"InletNode":"InletNode", "OutletNode":"OutletNode", "Length":"Length",  "Roughness":"Roughness", 
+                      "InOffset": "InOffset", "OutOffset":"OutOffset", "InitFlow":"InitFlow", "MaxFlow":"MaxFlow"}
+    # Mapping GISSWMM-Feld:swmmio-Feld für pump
+    pump_fields = {"InletNode":"InletNode", "OutletNode":"OutletNode"} #  PumpCurve, InitStatus, StartupDepth, ShutoffDepth nicht berücksichtigt
+    # Mapping GISSWMM-Feld:swmmio-Feld für xsection
+    xsections_fields = {"ShapeType":"Shape", "Geom1":"Geom1", "Geom2":"Geom2", "Geom3":"Geom3", "Geom4":"Geom4", "Barrels":"Barrels"} # Geom3, Geom4, Barrels nicht berücksichtigt
+    for row in rows:
+        for ii, val in enumerate(row):
+            in_field = LINK_FIELDS_GIS[ii]
+            if row[1] == "CONDUIT" and  in_field in list(conduit_fields.keys()):
+                conduits.loc[row[0], conduit_fields[in_field]] = val
+            elif row[1] == "PUMP" and  in_field in list(pump_fields.keys()):
+                pumps.loc[row[0], pump_fields[in_field]] = val
+            elif in_field in list(xsections_fields.keys()):
+                xsections.loc[row[0], xsections_fields[in_field]] = val
+            elif in_field == "coords":
+                coords_list = coords_to_list(val)
+                for coords in coords_list:
+                    # temp dataframe
+                    df = pd.DataFrame({"X":coords[0],"Y":coords[1]},  index = [row[0]] )
+                    df.index.name = "Link"
+                    vertices = pd.concat([vertices, df])
+            #elif in_field == "tag":
+    return vertices
+
+
+def add_subcatchments(rows, subcatchments, subareas, infiltration, polygons):
+    """Teileinzugsgebiete (Zeilen mit den Feldern SUBCATCHMENT_FIELDS_GIS) in die swmmio-Dataframes übernehmen
+
+    Required:
+        rows -- Zeilen der Teileinzugsgebiete (Cursor oder Liste)
+        subcatchments, subareas, infiltration -- swmmio-Dataframes, werden direkt verändert
+        polygons -- swmmio-Dataframe mit den Stützpunkten der Polygone
+
+    Return:
+        polygons -- Dataframe mit den ergänzten Stützpunkten
+    """
+    # Mapping GISSWMM-Feld:swmmio-Feld für conduit (muss evtl. je nach SWMM-Version angepasst werden)
+    subcatchments_fields = {"Raingage":"Raingage", "Outlet":"Outlet", "Area":"Area",  "PercImperv":"PercImperv", 
+                            "Width": "Width", "PercSlope":"PercSlope", "CurbLength":"CurbLength", "SnowPack":"SnowPack"}
+    subareas_fields = {"N_Imperv":"N-Imperv", "N_Perv":"N-Perv", "S_Imperv":"S-Imperv", "S_Perv":"S-Perv", 
+                       "PctZero":"PctZero", "RouteTo": "RouteTo"}
+    infiltration_fields = {"MaxRate":"MaxRate", "MinRate":"MinRate", "Decay":"Decay", "DryTime":"DryTime", "MaxInfil":"MaxInfil"}                      
+    for row in rows:
+        for ii, val in enumerate(row):
+            in_field = SUBCATCHMENT_FIELDS_GIS[ii]
+            if in_field in list(subcatchments_fields.keys()):
+                subcatchments.loc[row[0], subcatchments_fields[in_field]] = val
+            elif in_field in list(subareas_fields.keys()):
+                subareas.loc[row[0], subareas_fields[in_field]] = val
+            elif in_field in list(infiltration_fields.keys()):
+                infiltration.loc[row[0], infiltration_fields[in_field]] = val      
+            elif in_field == "coords":
+                coords_list = coords_to_list(val)
+                for coords in coords_list:
+                    # temp dataframe
+                    df = pd.DataFrame({"X":coords[0],"Y":coords[1]},  index = [row[0]] )
+                    df.index.name = "Subcatchment"
+                    polygons = pd.concat([polygons, df])
+    return polygons
+
+
 # Main module: Input-Daten aufbereiten und Funktionen aufrufen
+@lf.profiled()
 def main(out_node, out_link, out_subcatchment, template_swmm_file, sim_nr):
     """Input-Daten aufbereiten und Funktionen für die Konvertierung der GIS Feature-Klassen (node, link, subcatchment)
     in das SWMM-Datenformat (.inp) aufrufen.
@@ -78,6 +194,14 @@ def main(out_node, out_link, out_subcatchment, template_swmm_file, sim_nr):
 
     swmm_out_file = os.path.join(out_path, out_name)
 
+    # Berechnungsoptionen der Template-Datei protokollieren (nur Abschnitt OPTIONS lesen)
+    options = inpf.read_inp_section(template_swmm_file, "OPTIONS", inpf.get_inp_index(template_swmm_file, cache = False))
+    if options is None:
+        logger.warning(f'Die Template-Datei {template_swmm_file} enthält keinen Abschnitt [OPTIONS]')
+    else:
+        logger.info('Template-Optionen: ' + ", ".join(f'{key}={options.get(key)}' for key in 
+                    ["FLOW_UNITS", "INFILTRATION", "FLOW_ROUTING", "START_DATE", "END_DATE", "ROUTING_STEP"]))
+
     # swmmio Objekt erstellen
     mymodel = swmmio.Model(template_swmm_file)
 
@@ -90,24 +214,9 @@ def main(out_node, out_link, out_subcatchment, template_swmm_file, sim_nr):
     junctions.index.name = "Name"
     coordinates.index.name = "Name"
     outfalls.index.name = "Name"
-    # GISSWMM-Felder definieren  (erstes Feld -> Index, zweites Feld -> Typ)
-    node_fields_gis = ["Name", "SWMM_TYPE", "InvertElev", "InitDepth", "MaxDepth", "SurchargeDepth", "PondedArea", "OutfallType", "coords", "tag"]
-    # Mapping GISSWMM-Feld:swmmio-Feld für junction
-    junction_fields = {"InvertElev":"InvertElev", "MaxDepth":"MaxDepth", "InitDepth":"InitDepth", "SurchargeDepth":"SurchargeDepth", "PondedArea":"PondedArea"}
-    # Mapping GISSWMM-Feld:swmmio-Feld für outfall    
-    outfall_fields = {"InvertElev":"InvertElev", "OutfallType":"OutfallType"}
     # Daten aus GIS-Datensatz extrahieren
-    with arcpy.da.SearchCursor(out_node, node_fields_gis) as cursor:
-        for row in cursor:
-            for ii, val in enumerate(row):
-                in_field = node_fields_gis[ii]
-                if row[1] in ["INLET", "JUNCTION"] and  in_field in list(junction_fields.keys()):
-                    junctions.loc[row[0], junction_fields[in_field]]= val
-                elif row[1] == "OUTFALL" and  in_field in list(outfall_fields.keys()):
-                    outfalls.loc[row[0], outfall_fields[in_field]] = val
-                elif in_field == "coords":
-                    coordinates.loc[row[0]] = coords_to_list(val)[0]
-                #elif in_field == "tag":
+    with sf.search_cursor(out_node, NODE_FIELDS_GIS) as cursor:
+        add_nodes(cursor, junctions, outfalls, coordinates)
     # Modell aktualisieren
     mymodel.inp.junctions = junctions
     mymodel.inp.outfalls = outfalls
@@ -123,35 +232,9 @@ def main(out_node, out_link, out_subcatchment, template_swmm_file, sim_nr):
     pumps.index.name = "Name"
     xsections.index.name = "Link"
     vertices.index.name = "Link"
-    # GISSWMM-Felder definieren  (erstes Feld -> Index, zweites Feld -> Typ)
-    link_fields_gis = ["Name", "SWMM_TYPE", "InletNode", "OutletNode", "Length", "Roughness", "InOffset", "OutOffset", 
-                       "InitFlow", "MaxFlow", "ShapeType", "Geom1", "Geom2", "Geom3" , "Geom4", "Barrels", "coords"]
-    # Mapping GISSWMM-Feld:swmmio-Feld für conduit (muss evtl. je nach SWMM-Version angepasst werden)
-    conduit_fields = {"InletNode":"InletNode", "OutletNode":"OutletNode", "Length":"Length",  "Roughness":"Roughness", 
-                      "InOffset": "InOffset", "OutOffset":"OutOffset", "InitFlow":"InitFlow", "MaxFlow":"MaxFlow"}
-    # Mapping GISSWMM-Feld:swmmio-Feld für pump
-    pump_fields = {"InletNode":"InletNode", "OutletNode":"OutletNode"} #  PumpCurve, InitStatus, StartupDepth, ShutoffDepth nicht berücksichtigt
-    # Mapping GISSWMM-Feld:swmmio-Feld für xsection
-    xsections_fields = {"ShapeType":"Shape", "Geom1":"Geom1", "Geom2":"Geom2", "Geom3":"Geom3", "Geom4":"Geom4", "Barrels":"Barrels"} # Geom3, Geom4, Barrels nicht berücksichtigt
     # Daten aus GIS-Datensatz extrahieren
-    with arcpy.da.SearchCursor(out_link, link_fields_gis) as cursor:
-        for row in cursor:
-            for ii, val in enumerate(row):
-                in_field = link_fields_gis[ii]
-                if row[1] == "CONDUIT" and  in_field in list(conduit_fields.keys()):
-                    conduits.loc[row[0], conduit_fields[in_field]] = val
-                elif row[1] == "PUMP" and  in_field in list(pump_fields.keys()):
-                    pumps.loc[row[0], pump_fields[in_field]] = val
-                elif in_field in list(xsections_fields.keys()):
-                    xsections.loc[row[0], xsections_fields[in_field]] = val
-                elif in_field == "coords":
-                    coords_list = coords_to_list(val)
-                    for coords in coords_list:
-                        # temp dataframe
-                        df = pd.DataFrame({"X":coords[0],"Y":coords[1]},  index = [row[0]] )
-                        df.index.name = "Link"
-                        vertices = vertices.append(df)
-                #elif in_field == "tag":
+    with sf.search_cursor(out_link, LINK_FIELDS_GIS) as cursor:
+        vertices = add_links(cursor, conduits, pumps, xsections, vertices)
 
     # Modell aktualisieren
     mymodel.inp.conduits = conduits
@@ -171,35 +254,9 @@ def main(out_node, out_link, out_subcatchment, template_swmm_file, sim_nr):
     subareas.index.name = "Subcatchment"
     polygons.index.name = "Subcatchment"
 
-    # GISSWMM-Felder definieren  (erstes Feld -> Index, zweites Feld -> Typ)
-    subcatchments_fields_gis = ["Name", "Raingage", "Outlet", "Area", "PercImperv", "Width", "PercSlope", "N_Imperv", 
-                                "N_Perv", "S_Imperv", "S_Perv", "PctZero", "RouteTo", "CurbLength", "SnowPack",
-                                "MaxRate", "MinRate", "Decay", "DryTime", "MaxInfil", "coords"]
-    # Mapping GISSWMM-Feld:swmmio-Feld für conduit (muss evtl. je nach SWMM-Version angepasst werden)
-    subcatchments_fields = {"Raingage":"Raingage", "Outlet":"Outlet", "Area":"Area",  "PercImperv":"PercImperv", 
-                            "Width": "Width", "PercSlope":"PercSlope", "CurbLength":"CurbLength", "SnowPack":"SnowPack"}
-    subareas_fields = {"N_Imperv":"N-Imperv", "N_Perv":"N-Perv", "S_Imperv":"S-Imperv", "S_Perv":"S-Perv", 
-                       "PctZero":"PctZero", "RouteTo": "RouteTo"}
-    infiltration_fields = {"MaxRate":"MaxRate", "MinRate":"MinRate", "Decay":"Decay", "DryTime":"DryTime", "MaxInfil":"MaxInfil"}                      
-
     # Daten aus GIS-Datensatz extrahieren
-    with arcpy.da.SearchCursor(out_subcatchment, subcatchments_fields_gis) as cursor:
-        for row in cursor:
-            for ii, val in enumerate(row):
-                in_field = subcatchments_fields_gis[ii]
-                if in_field in list(subcatchments_fields.keys()):
-                    subcatchments.loc[row[0], subcatchments_fields[in_field]] = val
-                elif in_field in list(subareas_fields.keys()):
-                    subareas.loc[row[0], subareas_fields[in_field]] = val
-                elif in_field in list(infiltration_fields.keys()):
-                    infiltration.loc[row[0], infiltration_fields[in_field]] = val      
-                elif in_field == "coords":
-                    coords_list = coords_to_list(val)
-                    for coords in coords_list:
-                        # temp dataframe
-                        df = pd.DataFrame({"X":coords[0],"Y":coords[1]},  index = [row[0]] )
-                        df.index.name = "Subcatchment"
-                        polygons = polygons.append(df)
+    with sf.search_cursor(out_subcatchment, SUBCATCHMENT_FIELDS_GIS) as cursor:
+        polygons = add_subcatchments(cursor, subcatchments, subareas, infiltration, polygons)
 
     # Modell aktualisieren
     mymodel.inp.subcatchments = subcatchments
@@ -210,6 +267,10 @@ def main(out_node, out_link, out_subcatchment, template_swmm_file, sim_nr):
     ## save model to new file
     mymodel.inp.save(swmm_out_file)
 
+    # Anzahl Objekte in der erstellten Datei kontrollieren (Index der Abschnitte wird neben der Datei gespeichert)
+    counts = inpf.count_inp_rows(swmm_out_file, ["JUNCTIONS", "OUTFALLS", "CONDUITS", "PUMPS", "SUBCATCHMENTS"])
+    logger.info(f'SWMM-Datei {swmm_out_file} erstellt: ' + ", ".join(f'{count} {section}' for section, count in counts.items()))
+
     ## run model
     #swmm5_run(swmm_out_file)
 
@@ -221,7 +282,7 @@ if __name__ == "__main__":
     global logger
     # Input JSON-Datei
     # Falls das Skript mittels einer Batch-Datei ausgeführt wird, wird die JSON-Datei als Parameter übergeben:
-    paramFile = arcpy.GetParameterAsText(0)
+    paramFile = sf.parameter_as_text(0)
     # Falls das Skript direkt ausgeführt wird, wird die JSON-Datei hier angeben:
     if len(paramFile) == 0:
         paramFile = os.path.join(os.path.dirname(__file__), '..', 'settings_v1.json')
@@ -235,7 +296,7 @@ if __name__ == "__main__":
             log_folder = data["log_folder"]
             # Wird als Postfix für Log-Dateinamen und die SWMM Feature-Klassen (node, link, subcatchment) verwendet.
             sim_nr = data["sim_nr"]
-            # Pfad zu arcpy Workspace GISSWMM (.gdb)  mit dem Knoten (out_node), Haltungen (out_link) und Teileinzugsgebieten (out_subcatchment).
+            # Pfad zum Workspace GISSWMM (.gdb oder .gpkg) mit dem Knoten (out_node), Haltungen (out_link) und Teileinzugsgebieten (out_subcatchment).
             gisswmm_workspace = data["gisswmm_workspace"]
             # Der Name der Feature-Klasse mit den Knoten (ohne Postfix "_sim_nr"!).
             out_node = data["out_node"]
@@ -264,7 +325,7 @@ if __name__ == "__main__":
     start_time = time.time()
 
     # Aktuelle Workspace definieren
-    arcpy.env.workspace = gisswmm_workspace
+    sf.set_workspace(gisswmm_workspace)
 
     # Prüfen ob Eingabedatensätze vorhanden sind
     postfix = "_" + sim_nr
@@ -274,29 +335,29 @@ if __name__ == "__main__":
         out_link = out_link + postfix
     if not postfix in out_subcatchment:
         out_subcatchment = out_subcatchment + postfix
-    if not arcpy.Exists(out_node):
+    if not sf.exists(out_node):
         err_txt = f'Die angegebene Feature-Klasse {out_node} ist nicht vorhanden!'
         logger.error(err_txt)
         raise ValueError(err_txt)  
-    if not arcpy.Exists(out_link):
+    if not sf.exists(out_link):
         err_txt = f'Die angegebene Feature-Klasse {out_link} ist nicht vorhanden!'
         logger.error(err_txt)
         raise ValueError(err_txt)
-    if not arcpy.Exists(out_subcatchment):
+    if not sf.exists(out_subcatchment):
         err_txt = f'Die angegebene Feature-Klasse {out_subcatchment} ist nicht vorhanden!'
         logger.error(err_txt)
         raise ValueError(err_txt)
 
-    # Koordinatensystem
-    spatial_ref = arcpy.Describe(out_node).spatialReference
+    # Koordinatensystem (nur arcpy)
+    spatial_ref = arcpy.Describe(out_node).spatialReference if sf.backend(out_node) == "arcpy" else None
 
     # Main module aufrufen
-    with arcpy.EnvManager(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref):
+    with sf.environment(workspace = gisswmm_workspace, outputCoordinateSystem = spatial_ref):
         main(out_node, out_link, out_subcatchment, template_swmm_file, sim_nr)
 
     # Logging abschliessen
     end_time = time.time()
-    i = lf.search_in_file(log, "error")
+    i = lf.error_count()
     logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
     logger.info(str(i) + " Fehler gefunden. Check Log.")
     endtime = time.ctime()
@@ -7,11 +7,11 @@
 # -----------------------------------------------------------------------------
 """swmm_analyze_inp"""
 import os, sys, json
-from swmm_api import read_inp_file 
-import pandas as pd6
 from mpl_toolkits.axisartist.parasite_axes import HostAxes, ParasiteAxes
 import matplotlib, matplotlib.pyplot as plt, matplotlib.dates as mdates
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import inp_functions as inpf
+import archive_functions as af
 
 def print_dict(obj):
     print(json.dumps(obj, indent=4))
@@ -23,6 +23,8 @@ matplotlib.rcParams.update({'font.size': 16})
 swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM' 
 # Pfad zu Ordner in welchem Plots gespeichert werden
 fig_folder = r'C:\pygisswmm\5_RESULT\figures'
+# Register der Simulationen (siehe swmm_out2archive.py)
+registry_file = os.path.join(swmm_folder, "scenarios.json")
 
 ## Plot Options
 line_width = 2.7
@@ -33,12 +35,12 @@ linestyles = {"v0":"dashed","v5":"dashed","v6":"dashed","v7":"dashed","v8":"dash
 #simulations = ["v9", "v11", "v3", "v10"]
 simulations = ["v1"]
 
+# Nur den Abschnitt SUBCATCHMENTS lesen (Index der Abschnitte wird neben der .inp-Datei gespeichert)
 dfs = {}
-inps = []
 for ii, simulation in enumerate(simulations):
-    inp_file = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".inp")
-    inps.append(read_inp_file(inp_file))
-    dfs[simulation] = inps[ii].SUBCATCHMENTS.frame
+    inp_file = af.scenario_file(registry_file, simulation, "inp_file",
+                                os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".inp"))
+    dfs[simulation] = inpf.read_inp_section(inp_file, "SUBCATCHMENTS")
 
 fig_size = (14,7)
 ## Plot 1 - Flächenverteilung
@@ -53,8 +55,7 @@ legend_loc = "upper right"
 n_bins = 100
 rc_range = [0, 1000]
 for ii, simulation in enumerate(simulations):
-    dist = dfs[simulation]["Area"].tolist()
-    dist = [val*10000 for val in dist]
+    dist = dfs[simulation]["Area"]*10000
     if simulation in colors.keys():
         line_color = colors[simulation]
     else:
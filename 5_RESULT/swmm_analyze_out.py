@@ -3,30 +3,53 @@
 # author: Timo Wicki
 # date: 16.06.2022
 #
-# Mit SWMM-Ergebnisdatei ".out" Diagramme erstellen.
+# Mit SWMM-Ergebnisdatei ".out" Diagramme erstellen. Die Zeitreihen werden aus dem Ergebnisarchiv der
+# Simulation gelesen (siehe swmm_out2archive.py), welches bei Bedarf erstellt wird.
 # -----------------------------------------------------------------------------
 """swmm_analyze_out"""
 import os, sys, datetime
-from swmm_api import read_out_file 
-from swmm_api.output_file import VARIABLES, OBJECTS
 from mpl_toolkits.axisartist.parasite_axes import HostAxes, ParasiteAxes
 import matplotlib, matplotlib.pyplot as plt, matplotlib.dates as mdates
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
-
-## Funktionen für die Berechnung der Deckelkote
-def plot_swmm_variable(outs, node_name, smmw_variable, simulations, legends, colors = None, linestyles = None, line_width = 2.7, node_label = None,
-                       fig_size=(14,7), rain_label = "Regen", xmin=None, xmax=None, ymin=None, ymax=None, legend_loc="lower left", legend_bbox=None):
-    """Hilfsfunktion zum plotten
-    """   
+import archive_functions as af
+import downsample_functions as dsf
+
+## Funktionen zum Plotten
+def plot_swmm_variable(archives, node_name, smmw_variable, simulations, legends, colors = None, linestyles = None, line_width = 2.7, node_label = None,
+                       fig_size=(14,7), rain_label = "Regen", xmin=None, xmax=None, ymin=None, ymax=None, legend_loc="lower left", legend_bbox=None,
+                       fig_file = None, object_type = "node", dpi = 600, show = True, load = af.read_archive,
+                       max_points = None, downsample_method = "minmax"):
+    """Zeitreihe einer Variable (z. B. Abfluss bei einem Knoten) für mehrere Simulationen zusammen mit dem Regen plotten
+
+    Required:
+        archives -- Dictionary {Simulation: Pfad zum Ergebnisarchiv}
+        node_name -- Name des Objektes
+        smmw_variable -- Bezeichnung der Variable (z. B. "total_inflow")
+        simulations -- Liste mit den Simulationen
+        legends -- Liste mit den Legendeneinträgen der Simulationen
+    Optional:
+        fig_file -- Pfad der Bilddatei (falls None wird die Abbildung nicht gespeichert)
+        object_type -- Objekttyp ("node", "link" oder "subcatchment")
+        dpi -- Auflösung der Bilddatei
+        show -- Falls True wird die Abbildung angezeigt (blockiert bis das Fenster geschlossen wird)
+        load -- Funktion zum Lesen der Zeitreihen (Signatur wie archive_functions.read_archive)
+        max_points -- Zeitreihen mit mehr Punkten werden vor dem Plotten ausgedünnt (Spitzen bleiben erhalten,
+                      siehe downsample_functions). Default: keine Ausdünnung
+        downsample_method -- "minmax" oder "lttb"
+
+    Return:
+        reduction -- Dictionary {Linie: {"n_in": Anzahl Punkte, "n_out": Anzahl geplottete Punkte}}
+    """
+    reduction = {}
+    colors = colors or {}
+    linestyles = linestyles or {}
     fig, ax1 = plt.subplots(constrained_layout=True, figsize=fig_size)
 
     for ii, simulation in enumerate(simulations):
-        inflow = outs[simulation].get_part(OBJECTS.NODE, node_name, smmw_variable).to_frame()
-        x_values = inflow.index
-        y_values = inflow.values
-        rain = outs[simulation].get_part(OBJECTS.SYSTEM)['rainfall']
-        a_values = rain.index
-        b_values = rain.values
+        x_values, y_values = load(archives[simulation], object_type, smmw_variable, names = [node_name], start = xmin, end = xmax)
+        y_values = y_values[:, 0]
+        a_values, b_values = load(archives[simulation], "system", "rainfall", start = xmin, end = xmax)
+        x_values, y_values, reduction[simulation] = dsf.downsample(x_values, y_values, max_points, downsample_method)
         if simulation in colors.keys():
             line_color = colors[simulation]
         else:
@@ -43,25 +66,39 @@ def plot_swmm_variable(outs, node_name, smmw_variable, simulations, legends, col
         ax1.grid(True)
         ax1.tick_params(axis='x', labelrotation = 25)
         ax1.set_xlim([xmin, xmax])
-        ax1.set_xlim([ymin, ymax])
+        ax1.set_ylim([ymin, ymax])
         ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    a_values, b_values, reduction[rain_label] = dsf.downsample(a_values, b_values, max_points, downsample_method)
     ax2 = ax1.twinx()
     ax2.plot(a_values, b_values, linewidth = line_width, color='grey', label = rain_label, linestyle='dotted')
     ax2.set_ylabel("Regenintensität [mm/h]")
     ax2.legend(loc='upper right')
 
-    plt.savefig(fig_file, dpi=600, format="png")
-    plt.show() 
-
-def plot_rain(outs, line_width = 2.7, fig_size=(14,7), rain_label = "Regen", xmin=None, xmax=None, ymin=None, ymax=None,
-             legend_loc="lower left", legend_bbox=None):
-    """Hilfsfunktion zum plotten
-    """   
+    if fig_file:
+        fig.savefig(fig_file, dpi=dpi, format="png")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return reduction
+
+def plot_rain(archives, simulation, line_width = 2.7, fig_size=(14,7), rain_label = "Regen", xmin=None, xmax=None, ymin=None, ymax=None,
+             legend_loc="lower left", legend_bbox=None, fig_file = None, dpi = 600, show = True, load = af.read_archive,
+             max_points = None, downsample_method = "minmax"):
+    """Regenintensität einer Simulation plotten
+
+    Required:
+        archives -- Dictionary {Simulation: Pfad zum Ergebnisarchiv}
+        simulation -- Simulation, deren Regen geplottet wird
+    Optional:
+        fig_file, dpi, show, load, max_points, downsample_method -- siehe plot_swmm_variable
+
+    Return:
+        reduction -- siehe plot_swmm_variable
+    """
     fig, ax1 = plt.subplots(constrained_layout=True, figsize=fig_size)
 
-    rain = outs[simulation].get_part(OBJECTS.SYSTEM)['rainfall']
-    a_values = rain.index
-    b_values = rain.values
+    a_values, b_values = load(archives[simulation], "system", "rainfall", start = xmin, end = xmax)
+    a_values, b_values, info = dsf.downsample(a_values, b_values, max_points, downsample_method)
  
     ax1.plot(a_values, b_values, linewidth = line_width, color='blue', label = rain_label, linestyle='dotted')
     ax1.set_ylabel("Regenintensität [mm/h]")
@@ -70,11 +107,15 @@ def plot_rain(outs, line_width = 2.7, fig_size=(14,7), rain_label = "Regen", xmi
     ax1.grid(True)
     ax1.tick_params(axis='x', labelrotation = 25)
     ax1.set_xlim([xmin, xmax])
-    ax1.set_xlim([ymin, ymax])
+    ax1.set_ylim([ymin, ymax])
     ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
 
-    plt.savefig(fig_file, dpi=600, format="png")
-    plt.show() 
+    if fig_file:
+        fig.savefig(fig_file, dpi=dpi, format="png")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return {rain_label: info}
 
 
 if __name__ == "__main__":
@@ -84,16 +125,30 @@ if __name__ == "__main__":
     swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM' 
     # Pfad zu Ordner in welchem Plots gespeichert werden
     fig_folder = r'C:\pygisswmm\5_RESULT\figures'
+    # Register der Simulationen (siehe swmm_out2archive.py)
+    registry_file = os.path.join(swmm_folder, "scenarios.json")
 
     # Durchgeführte Simulationen
     all_simulations = [ "v1"]
 
-    # Dictionary mit allen SWMM out-Dateien erstellen    
+    # Dictionary mit den Ergebnisarchiven aller Simulationen erstellen (Archiv wird erstellt, falls nicht registriert
+    # oder nicht mehr aktuell, z. B. nach einer erneuten Simulation)
     prefix_5yr = "swmm_template_5-yr_"
     outs_5yr =  {}
     for ii, simulation in enumerate(all_simulations):
-        out_file = os.path.join(swmm_folder, simulation, prefix_5yr + simulation + ".out")
-        outs_5yr[simulation] = read_out_file(out_file)
+        sim_folder = os.path.join(swmm_folder, simulation)
+        out_file = af.scenario_file(registry_file, simulation, "out_file",
+                                    os.path.join(sim_folder, prefix_5yr + simulation + ".out"))
+        archive_dir = af.scenario_file(registry_file, simulation, "archive",
+                                       os.path.join(sim_folder, prefix_5yr + simulation + "_archive"))
+        if not af.archive_is_current(out_file, archive_dir):
+            index = af.out_to_archive(out_file, archive_dir)
+            af.register_scenario(registry_file, simulation, out_file = out_file, archive = archive_dir,
+                                 rpt_file = os.path.join(sim_folder, prefix_5yr + simulation + ".rpt"),
+                                 inp_file = os.path.join(sim_folder, prefix_5yr + simulation + ".inp"),
+                                 start_date = index["start_date"], report_step = index["report_step"],
+                                 n_periods = index["n_periods"])
+        outs_5yr[simulation] = archive_dir
 
     ## Plot Options
     line_width = 2.7
@@ -112,8 +167,8 @@ if __name__ == "__main__":
     legend_loc = "upper right"
 
     fig_file = os.path.join(fig_folder, fig_name)
-    plot_rain(outs_5yr, line_width = 4, fig_size = fig_size_1, rain_label = rain_label, 
-              xmin = x_min, xmax = x_max, legend_loc = legend_loc)
+    plot_rain(outs_5yr, "v1", line_width = 4, fig_size = fig_size_1, rain_label = rain_label, 
+              xmin = x_min, xmax = x_max, legend_loc = legend_loc, fig_file = fig_file)
 
     # Abfluss Auslaufschacht
     fig_size = (14,7)
@@ -125,7 +180,7 @@ if __name__ == "__main__":
     node_label = 'Auslaufschacht'
     rain_label = 'Regen'
     fig_name = "Abfluss_Auslaufschacht.png" 
-    smmw_variable = VARIABLES.NODE.TOTAL_INFLOW    
+    smmw_variable = "total_inflow"
     x_min = datetime.datetime(2006, 6, 17, 15, 40, 0)
     x_max = datetime.datetime(2006, 6, 17, 17, 0, 0)
     legend_loc = "lower left"
@@ -135,7 +190,7 @@ if __name__ == "__main__":
     fig_file = os.path.join(fig_folder, fig_name)
     plot_swmm_variable(outs_5yr, node_name, smmw_variable, simulations, legends, colors = colors, linestyles = linestyles,
                        line_width = line_width, node_label = node_label, fig_size = fig_size, rain_label = rain_label, 
-                       xmin = x_min, xmax = x_max, legend_loc = legend_loc, legend_bbox = legend_bbox)
+                       xmin = x_min, xmax = x_max, legend_loc = legend_loc, legend_bbox = legend_bbox, fig_file = fig_file)
 
     
 
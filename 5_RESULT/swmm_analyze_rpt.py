@@ -7,9 +7,10 @@
 # -----------------------------------------------------------------------------
 """swmm_analyze_rpt"""
 import os, sys
-from swmm_api import read_rpt_file 
 import matplotlib, matplotlib.pyplot as plt, matplotlib.dates as mdates
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import rpt_functions as rf
+import archive_functions as af
 
 # matplotlibe Schriftgrösse erhöhen
 matplotlib.rcParams.update({'font.size': 16})
@@ -18,6 +19,8 @@ matplotlib.rcParams.update({'font.size': 16})
 swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM' 
 # Pfad zu Ordner in welchem Plots gespeichert werden
 fig_folder = r'C:\pygisswmm\5_RESULT\figures'
+# Register der Simulationen (siehe swmm_out2archive.py)
+registry_file = os.path.join(swmm_folder, "scenarios.json")
 
 ## Plot Options
 line_width = 2.7
@@ -33,12 +36,10 @@ simulations = ["v1"]
 fig_size_1 = (14,7)
 # Dictionary mit Simulationen und zugehörige runoff summary
 dfs = {}
-# Liste mit SWMM rpt-Dateien
-rpts_5yr = []
-for ii, simulation in enumerate(simulations):
-    rpt_file = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".rpt")
-    rpts_5yr.append(read_rpt_file(rpt_file))
-    dfs[simulation] = rpts_5yr[ii].subcatchment_runoff_summary
+for simulation in simulations:
+    rpt_file = af.scenario_file(registry_file, simulation, "rpt_file",
+                                os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".rpt"))
+    dfs[simulation] = rf.read_rpt_tables(rpt_file, ["subcatchment_runoff_summary"])["subcatchment_runoff_summary"]
 
 ## Abflussbeiwert 5 yr.
 fig, ax1 = plt.subplots(constrained_layout=True, figsize=fig_size_1)
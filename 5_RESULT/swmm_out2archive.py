@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Die SWMM-Ergebnisdateien ".out" der Simulationen werden einmal in ein spaltenorientiertes Archiv
+# umgewandelt (Blöcke mit komprimierten Arrays pro Objekttyp und Variable, siehe archive_functions).
+# Die Simulationen werden mit den Pfaden zu den SWMM-Dateien und zum Archiv im Register
+# "scenarios.json" erfasst, welches von den Analyse-Skripten in 5_RESULT verwendet wird.
+# Ein Archiv wird nur neu erstellt, falls sich die .out-Datei geändert hat.
+# -----------------------------------------------------------------------------
+"""swmm_out2archive"""
+import os, sys, time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import archive_functions as af
+
+# Pfad zu Ordner wo sich die Ordner der unterschiedlichen SWMM-Simulationsergebnissen befinden
+swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM'
+# Pfad zum Register der Simulationen
+registry_file = os.path.join(swmm_folder, "scenarios.json")
+# Präfix der SWMM-Dateien (Name der Template .inp-Datei)
+prefix = "swmm_template_5-yr_"
+
+# Simulationen (Szenarien), die umgewandelt werden
+all_simulations = ["v1"]
+
+# Anzahl Zeitschritte pro Block
+block_periods = 1000
+
+for simulation in all_simulations:
+    start_time = time.time()
+    sim_folder = os.path.join(swmm_folder, simulation)
+    out_file = os.path.join(sim_folder, prefix + simulation + ".out")
+    if not os.path.isfile(out_file):
+        print(f'Die Datei "{out_file}" ist nicht vorhanden!')
+        continue
+    archive_dir = os.path.join(sim_folder, prefix + simulation + "_archive")
+    index = af.out_to_archive(out_file, archive_dir, block_periods = block_periods)
+    af.register_scenario(registry_file, simulation, out_file = out_file, archive = archive_dir,
+                         rpt_file = os.path.join(sim_folder, prefix + simulation + ".rpt"),
+                         inp_file = os.path.join(sim_folder, prefix + simulation + ".inp"),
+                         start_date = index["start_date"], report_step = index["report_step"],
+                         n_periods = index["n_periods"])
+    print(f'Simulation {simulation}: Archiv mit {len(index["chunks"])} Blöcken in {round(time.time() - start_time, 1)} sec. erstellt')
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Ereignisse aus den SWMM-Ergebnisdateien ".out" bestimmen: Für alle Knoten, Haltungen und
+# Teileinzugsgebiete wird ermittelt, wann und wie lange ein Schwellenwert überschritten wird (z. B.
+# Einstau, Überflutung, Vollfüllung), inklusive Maximum und Zeitpunkt vom Maximum. Die .out-Datei wird
+# blockweise in einem Durchlauf gelesen (siehe out_functions.out_events). Pro Simulation und Objekttyp
+# wird eine Ereignistabelle gespeichert.
+# -----------------------------------------------------------------------------
+"""swmm_out_events"""
+import os, sys, time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import out_functions as of
+import rpt_functions as rf
+import archive_functions as af
+
+# Pfad zu Ordner wo sich die Ordner der unterschiedlichen SWMM-Simulationsergebnissen befinden
+swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM'
+# Register der Simulationen (siehe swmm_out2archive.py)
+registry_file = os.path.join(swmm_folder, "scenarios.json")
+
+# Simulationen (Szenarien), die ausgewertet werden
+all_simulations = ["v1"]
+
+# Schwellenwerte {Objekttyp: {Name: (Variable, Vergleich, Schwellenwert, Eigenschaft)}}.
+# Ist eine Eigenschaft angegeben (z. B. "max_depth"), wird der Schwellenwert mit dieser multipliziert. Mit
+# "crown_depth" wird der Einstau über dem höchsten Scheitel der angeschlossenen Haltungen bestimmt (.inp-Datei).
+thresholds = {
+    "node": {"surcharge": ("depth", ">", 1.0, "crown_depth"), "flooding": ("flooding", ">", 0.0, None)},
+    "link": {"capacity": ("capacity", ">=", 1.0, None)},
+}
+# Minimale Anzahl Zeitschritte eines Ereignisses
+min_periods = 1
+
+# Ausgabeformate: "csv", "parquet" (benötigt pyarrow) und/oder "xlsx" (benötigt openpyxl, langsam)
+out_formats = ["csv"]
+
+for simulation in all_simulations:
+    start_time = time.time()
+    out_file = af.scenario_file(registry_file, simulation, "out_file",
+                                os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".out"))
+    if not os.path.isfile(out_file):
+        print(f'Die Datei "{out_file}" ist nicht vorhanden!')
+        continue
+    # .inp-Datei für den Scheitel der Haltungen (Default: .inp-Datei mit dem Namen der .out-Datei)
+    inp_file = af.scenario_file(registry_file, simulation, "inp_file")
+    tables = of.out_events(out_file, thresholds = thresholds, min_periods = min_periods, inp_file = inp_file)
+    for object_type, table in tables.items():
+        if object_type not in thresholds:
+            continue
+        out_base = os.path.join(os.path.dirname(out_file), "swmm_template_5-yr_" + simulation + "_" + object_type + "_events")
+        for out_format in out_formats:
+            try:
+                rf.write_table(table, out_base, object_type, out_format)
+            except Exception as e:
+                print(f'Tabelle "{object_type}" konnte nicht als "{out_format}" gespeichert werden: {e}')
+                continue
+        print(f'Simulation {simulation}: {len(table["Name"])} Ereignisse für "{object_type}"')
+    print(f'Simulation {simulation}: Ereignisse in {round(time.time() - start_time, 1)} sec. bestimmt')
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Aus den SWMM-Ergebnisdateien ".out" werden Kennwerte pro Teileinzugsgebiet, Knoten und Haltung
+# berechnet (Maximum, Zeitpunkt vom Maximum, Volumen und Dauer über einem Schwellenwert, z. B. Einstau,
+# Vollfüllung oder Überflutung). Die .out-Datei wird dabei blockweise in einem Durchlauf gelesen.
+# Pro Objekttyp wird eine Tabelle gespeichert (Spalte "Name" entspricht der ID der GIS-Datensätze),
+# die anschliessend zu den GIS-Datensätzen (node, link, subcatchment) zurückgeschrieben werden kann.
+# -----------------------------------------------------------------------------
+"""swmm_out_statistics"""
+import os, sys, time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import out_functions as of
+import rpt_functions as rf
+
+# Pfad zu Ordner wo sich die Ordner der unterschiedlichen SWMM-Simulationsergebnissen befinden
+swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM'
+
+# Simulationen (Szenarien), die ausgewertet werden
+all_simulations = ["v1"]
+
+# Schwellenwerte für die Dauer {Objekttyp: {Name: (Variable, Vergleich, Schwellenwert, Eigenschaft)}}.
+# Ist eine Eigenschaft angegeben (z. B. "max_depth"), wird der Schwellenwert mit dieser multipliziert. Mit
+# "crown_depth" wird der Einstau über dem höchsten Scheitel der angeschlossenen Haltungen bestimmt (.inp-Datei).
+thresholds = {
+    "subcatchment": {"runoff": ("runoff", ">", 0.0, None)},
+    "node": {"surcharge": ("depth", ">", 1.0, "crown_depth"), "flooding": ("flooding", ">", 0.0, None)},
+    "link": {"capacity": ("capacity", ">=", 1.0, None)},
+}
+
+# Ausgabeformate: "csv", "parquet" (benötigt pyarrow) und/oder "xlsx" (benötigt openpyxl, langsam)
+out_formats = ["csv"]
+
+for simulation in all_simulations:
+    start_time = time.time()
+    out_file = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".out")
+    if not os.path.isfile(out_file):
+        print(f'Die Datei "{out_file}" ist nicht vorhanden!')
+        continue
+    tables = of.out_statistics(out_file, thresholds = thresholds)
+    for object_type, table in tables.items():
+        if len(table["Name"]) == 0:
+            continue
+        out_base = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + "_" + object_type + "_statistics")
+        for out_format in out_formats:
+            try:
+                rf.write_table(table, out_base, object_type, out_format)
+            except Exception as e:
+                print(f'Tabelle "{object_type}" konnte nicht als "{out_format}" gespeichert werden: {e}')
+                continue
+    print(f'Simulation {simulation}: Kennwerte in {round(time.time() - start_time, 1)} sec. berechnet')
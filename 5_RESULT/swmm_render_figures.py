@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Diagramme im Batch erstellen: Die Diagramme werden in einer Liste (FIGURES) beschrieben (Art, Simulationen,
+# Objekte, Variable, Zeitfenster) und ohne Bildschirmausgabe (Matplotlib-Backend "Agg") parallel in
+# mehreren Prozessen gezeichnet. Jeder Prozess hält die gelesenen Zeitreihen (eine Variable aller Objekte
+# einer Simulation) im Speicher, sodass z. B. hunderte Ganglinien von Knoten nur einmal gelesen werden.
+# Die Diagramme werden mit den Funktionen aus swmm_analyze_out.py gezeichnet. Lange Zeitreihen werden
+# vor dem Plotten auf etwa zwei Punkte pro Pixel ausgedünnt, wobei die Spitzen erhalten bleiben.
+# -----------------------------------------------------------------------------
+"""swmm_render_figures"""
+import os, sys, time, math, datetime
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+sys.path.append(os.path.dirname(__file__))
+import archive_functions as af
+import swmm_analyze_out as sao
+
+# Zeitreihen im Speicher des Prozesses {(Archiv, Objekttyp, Variable): (Zeit, Werte, {Name: Position})}
+_series_cache = {}
+# Maximale Anzahl Zeitreihen im Speicher pro Prozess
+max_cached_series = 8
+
+
+def cached_read_archive(archive_dir, object_type, variable, names = None, start = None, end = None):
+    """Zeitreihen wie archive_functions.read_archive lesen. Die gesamte Variable (alle Objekte) wird beim ersten
+    Zugriff gelesen und im Speicher des Prozesses gehalten, weitere Zugriffe schneiden nur noch aus."""
+    key = (archive_dir, object_type, variable)
+    if key not in _series_cache:
+        if len(_series_cache) >= max_cached_series:
+            # Älteste Zeitreihe entfernen
+            _series_cache.pop(next(iter(_series_cache)))
+        index = af.open_archive(archive_dir)
+        times, values = af.read_archive(archive_dir, object_type, variable, index = index)
+        lookup = {name: ii for ii, name in enumerate(index["names"].get(object_type, []))}
+        _series_cache[key] = (times, values, lookup)
+    times, values, lookup = _series_cache[key]
+    mask = np.ones(len(times), dtype = bool)
+    if start is not None:
+        mask &= times >= np.datetime64(start, "s")
+    if end is not None:
+        mask &= times <= np.datetime64(end, "s")
+    if object_type != "system" and names is not None:
+        missing = [name for name in names if name not in lookup]
+        if missing:
+            raise ValueError(f'Objekt "{missing[0]}" ist im Archiv nicht vorhanden')
+        values = values[:, [lookup[name] for name in names]]
+    return times[mask], values[mask]
+
+
+def expand_figures(figures, archives, fig_folder):
+    """Beschreibungen mit mehreren Objekten in einzelne Diagramme aufteilen
+
+    Required:
+        figures -- Liste mit den Beschreibungen der Diagramme (siehe FIGURES)
+        archives -- Dictionary {Simulation: Pfad zum Ergebnisarchiv}
+        fig_folder -- Ordner, in dem die Bilddateien gespeichert werden
+
+    Return:
+        specs -- Liste mit einer Beschreibung pro Diagramm (sortiert nach Variable, damit die Prozesse die
+                 gelesenen Zeitreihen wiederverwenden können)
+    """
+    specs = []
+    for figure in figures:
+        if figure["type"] == "rain":
+            specs.append(dict(figure, fig_file = os.path.join(fig_folder, figure["fig_name"])))
+            continue
+        objects = figure["objects"]
+        if objects == "*":
+            # Alle Objekte der ersten Simulation
+            objects = af.open_archive(archives[figure["simulations"][0]])["names"][figure.get("object_type", "node")]
+        labels = figure.get("labels", {})
+        for name in objects:
+            fig_name = figure["fig_name"].format(object = "".join(c for c in name if c.isalnum() or c in "-_"))
+            specs.append(dict(figure, objects = None, object = name, label = labels.get(name, name),
+                              fig_file = os.path.join(fig_folder, fig_name)))
+    specs.sort(key = lambda spec: (spec["type"], spec.get("object_type", ""), spec.get("variable", "")))
+    return specs
+
+
+def render_figure(spec, archives, options):
+    """Ein Diagramm gemäss Beschreibung zeichnen und speichern (wird in den Prozessen ausgeführt)
+
+    Return:
+        (Pfad der Bilddatei, Laufzeit in Sekunden, Ausdünnung pro Linie)
+    """
+    start_time = time.time()
+    matplotlib.rcParams.update({'font.size': options.get("font_size", 16)})
+    # Anzahl Punkte pro Linie (Default: zwei Punkte pro Pixel der Abbildungsbreite)
+    fig_size = options.get("fig_size", (14,7))
+    dpi = options.get("dpi", 150)
+    max_points = options.get("max_points", 2 * int(fig_size[0] * dpi))
+    method = options.get("downsample_method", "minmax")
+    if spec["type"] == "rain":
+        reduction = sao.plot_rain(archives, spec["simulation"], line_width = options.get("line_width", 2.7),
+                      fig_size = fig_size, rain_label = spec.get("label", "Regen"),
+                      xmin = spec.get("start"), xmax = spec.get("end"), legend_loc = spec.get("legend_loc", "upper right"),
+                      fig_file = spec["fig_file"], dpi = dpi, show = False, load = cached_read_archive,
+                      max_points = max_points, downsample_method = method)
+    else:
+        simulations = spec["simulations"]
+        legends = ["Simulation " + simulation for simulation in simulations]
+        reduction = sao.plot_swmm_variable(archives, spec["object"], spec["variable"], simulations, legends,
+                               colors = options.get("colors"), linestyles = options.get("linestyles"),
+                               line_width = options.get("line_width", 2.7), node_label = spec["label"],
+                               fig_size = fig_size, xmin = spec.get("start"), xmax = spec.get("end"),
+                               legend_loc = spec.get("legend_loc", "lower left"), fig_file = spec["fig_file"],
+                               object_type = spec.get("object_type", "node"), dpi = dpi,
+                               show = False, load = cached_read_archive, max_points = max_points, downsample_method = method)
+    return spec["fig_file"], time.time() - start_time, reduction
+
+
+def _render_batch(batch, archives, options):
+    """Hilfsfunktion: Mehrere Diagramme nacheinander im gleichen Prozess zeichnen"""
+    results = []
+    for spec in batch:
+        try:
+            results.append(render_figure(spec, archives, options) + (None,))
+        except Exception as e:
+            results.append((spec["fig_file"], 0.0, {}, str(e)))
+    return results
+
+
+def render_figures(figures, archives, fig_folder, options = None, processes = None):
+    """Alle Diagramme parallel zeichnen
+
+    Required:
+        figures -- Liste mit den Beschreibungen der Diagramme (siehe FIGURES)
+        archives -- Dictionary {Simulation: Pfad zum Ergebnisarchiv}
+        fig_folder -- Ordner, in dem die Bilddateien gespeichert werden
+    Optional:
+        options -- Dictionary mit Darstellungsoptionen (dpi, fig_size, line_width, font_size, colors, linestyles,
+                   max_points, downsample_method)
+        processes -- Anzahl Prozesse (Default: Anzahl CPU)
+
+    Return:
+        results -- Liste mit (Pfad der Bilddatei, Laufzeit, Ausdünnung pro Linie, Fehlermeldung oder None)
+    """
+    options = options or {}
+    if not os.path.isdir(fig_folder):
+        os.makedirs(fig_folder)
+    specs = expand_figures(figures, archives, fig_folder)
+    processes = processes or os.cpu_count() or 1
+    # Zusammenhängende Pakete, damit Diagramme mit der gleichen Variable im gleichen Prozess gezeichnet werden
+    batch_size = max(1, math.ceil(len(specs) / (processes * 4)))
+    batches = [specs[ii:ii + batch_size] for ii in range(0, len(specs), batch_size)]
+    results = []
+    if processes == 1:
+        for batch in batches:
+            results.extend(_render_batch(batch, archives, options))
+        return results
+    with ProcessPoolExecutor(max_workers = processes) as executor:
+        for batch_results in executor.map(_render_batch, batches, [archives] * len(batches), [options] * len(batches)):
+            results.extend(batch_results)
+    return results
+
+
+if __name__ == "__main__":
+    ## Pfad zu Ordner wo sich die Ordner der unterschiedlichen SWMM-Simulationsergebnissen befinden
+    swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM'
+    # Pfad zu Ordner in welchem Plots gespeichert werden
+    fig_folder = r'C:\pygisswmm\5_RESULT\figures'
+    # Register der Simulationen (siehe swmm_out2archive.py)
+    registry_file = os.path.join(swmm_folder, "scenarios.json")
+    # Anzahl Prozesse (None: Anzahl CPU)
+    processes = None
+
+    # Darstellungsoptionen
+    options = {
+        "dpi": 150,
+        "fig_size": (14,7),
+        "line_width": 2.7,
+        "font_size": 16,
+        "colors": {"v0":"dimgray", "v1":"tab:blue", "v2":"tab:orange", "v3":"tab:green", "v4":"tab:pink", "v5":"tab:blue",
+                   "v6":"tab:orange", "v7":"tab:green", "v8":"tab:pink", "v9":"tab:red", "v10":"tab:cyan", "v11":"tab:olive"},
+        "linestyles": {"v0":"dashed","v5":"dashed","v6":"dashed","v7":"dashed","v8":"dashed"},
+        # Ausdünnen der Zeitreihen: "minmax" oder "lttb" ("max_points": None = keine Ausdünnung,
+        # Default = zwei Punkte pro Pixel der Abbildungsbreite)
+        "downsample_method": "minmax",
+    }
+
+    # Beschreibung der Diagramme:
+    # - "type": "rain" (Regen einer Simulation) oder "series" (Zeitreihe einer Variable pro Objekt)
+    # - "simulation" bzw. "simulations": Simulation(en)
+    # - "object_type", "variable": Objekttyp und Variable (siehe out_functions.VARIABLES)
+    # - "objects": Liste mit Namen der Objekte oder "*" für alle Objekte (ein Diagramm pro Objekt)
+    # - "labels": Dictionary {Name: Titel} (optional)
+    # - "start", "end": Zeitfenster
+    # - "fig_name": Name der Bilddatei ("{object}" wird durch den Namen des Objektes ersetzt)
+    x_min = datetime.datetime(2006, 6, 17, 15, 40, 0)
+    x_max = datetime.datetime(2006, 6, 17, 17, 0, 0)
+    FIGURES = [
+        {"type": "rain", "simulation": "v1", "label": 'Starkregen, Jährlichkeit = 5 J.', "start": x_min, "end": x_max,
+         "fig_name": "starkregen.png"},
+        {"type": "series", "simulations": ["v1"], "object_type": "node", "variable": "total_inflow",
+         "objects": ['{A5D5075A-8BCE-47C7-9767-62272B1BE103}'], "labels": {'{A5D5075A-8BCE-47C7-9767-62272B1BE103}': 'Auslaufschacht'},
+         "start": x_min, "end": x_max, "fig_name": "Abfluss_Auslaufschacht.png"},
+        {"type": "series", "simulations": ["v1"], "object_type": "node", "variable": "total_inflow", "objects": "*",
+         "start": x_min, "end": x_max, "fig_name": "node_total_inflow_{object}.png"},
+    ]
+
+    # Archive der Simulationen aus dem Register
+    archives = {simulation: entry["archive"] for simulation, entry in
+                af.get_scenarios(registry_file, required = "archive").items()}
+
+    start_time = time.time()
+    results = render_figures(FIGURES, archives, fig_folder, options, processes)
+    errors = [result for result in results if result[3]]
+    for fig_file, duration, reduction, error in errors:
+        print(f'Diagramm "{fig_file}" konnte nicht erstellt werden: {error}')
+    n_in = sum(info["n_in"] for result in results for info in result[2].values())
+    n_out = sum(info["n_out"] for result in results for info in result[2].values())
+    if n_in:
+        print(f'Zeitreihen von {n_in} auf {n_out} Punkte ausgedünnt ({round(100 * n_out / n_in, 1)} %)')
+    print(f'{len(results) - len(errors)} Diagramme in {round(time.time() - start_time, 1)} sec. erstellt, {len(errors)} Fehler')
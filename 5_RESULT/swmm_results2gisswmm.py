@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Simulationsergebnisse in die GISSWMM-Datensätze zurückschreiben: Aus den SWMM-Ergebnisdateien
+# (.out oder .rpt) einer oder mehrerer Simulationen werden Ergebnistabellen pro Objekttyp erstellt
+# (siehe out_functions bzw. rpt_functions) und die gewünschten Ergebnisse über die ID ("Name") in die
+# Feature-Klassen "node_sim_nr", "link_sim_nr" und "subcatchment_sim_nr" geschrieben. Die Ergebnisse
+# werden zuerst in einem Dictionary {ID: Werte} gesammelt und anschliessend pro Feature-Klasse mit
+# einem einzigen UpdateCursor geschrieben (kein AddJoin/CalculateField). Die Feldnamen setzen sich
+# aus der Simulation und der Ergebnisvariable zusammen (z. B. "v1_flow_max"). Die Feature-Klassen werden
+# über storage_functions gelesen und geschrieben (File-Geodatabase mit arcpy oder GeoPackage ohne arcpy).
+#
+# Die Input-Parameter werden in einer JSON-Datei angegeben, die als Eingabe dem Skript übergeben wird.
+# -----------------------------------------------------------------------------
+"""swmm_results2gisswmm"""
+import os, sys, time, json, datetime
+import numpy as np
+try:
+    import arcpy
+except ImportError:
+    # Ohne ArcGIS nur mit GeoPackage (siehe storage_functions)
+    arcpy = None
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import logging_functions as lf
+import storage_functions as sf
+import out_functions as of
+import rpt_functions as rf
+
+# Tabellen der .rpt-Datei pro Objekttyp
+RPT_TABLES = {
+    "subcatchment": ["subcatchment_runoff_summary"],
+    "node": ["node_depth_summary", "node_inflow_summary", "node_surcharge_summary", "node_flooding_summary"],
+    "link": ["link_flow_summary", "conduit_surcharge_summary"],
+}
+
+# Default Ergebnisvariablen pro Objekttyp und Quelle
+DEFAULT_VARIABLES = {
+    "out": {
+        "subcatchment": ["runoff_max", "runoff_vol"],
+        "node": ["depth_max", "total_inflow_max", "flooding_vol", "surcharge_dur", "flooding_dur"],
+        "link": ["flow_max", "velocity_max", "capacity_max", "capacity_dur"],
+    },
+    "rpt": {
+        "subcatchment": ["Peak_Runoff_CMS", "Runoff_Coeff"],
+        "node": ["Maximum_Depth_Meters", "Maximum_Total_Inflow_CMS"],
+        "link": ["Maximum_|Flow|_CMS", "Max/_Full_Depth"],
+    },
+}
+
+
+def result_file(template_swmm_file, simulation, extension):
+    """Pfad zur SWMM-Ergebnisdatei einer Simulation (gleiche Ablage wie in gisswmm2swmm)"""
+    in_path, in_name = os.path.split(template_swmm_file)
+    return os.path.join(in_path, simulation, in_name.split(".inp")[0] + "_" + simulation + extension)
+
+
+def read_result_tables(template_swmm_file, simulation, result_source):
+    """Ergebnistabellen einer Simulation pro Objekttyp lesen
+
+    Required:
+        template_swmm_file -- Pfad zur Template .inp-Datei (die Ergebnisse liegen im Unterordner "simulation")
+        simulation -- Bezeichnung der Simulation (z. B. "v1")
+        result_source -- "out" (Kennwerte aus der .out-Datei) oder "rpt" (Tabellen aus der .rpt-Datei)
+
+    Return:
+        tables -- Dictionary {Objekttyp: {Spalte: numpy-Array}}, die erste Spalte enthält die ID
+    """
+    if result_source == "out":
+        out_file = result_file(template_swmm_file, simulation, ".out")
+        logger.info(f'Kennwerte aus "{out_file}" berechnen')
+        return of.out_statistics(out_file)
+
+    rpt_file = result_file(template_swmm_file, simulation, ".rpt")
+    logger.info(f'Tabellen aus "{rpt_file}" lesen')
+    rpt_tables = rf.read_rpt_tables(rpt_file, [table for tables in RPT_TABLES.values() for table in tables])
+    # Tabellen eines Objekttyps über die ID zusammenführen
+    tables = {}
+    for object_type, table_names in RPT_TABLES.items():
+        merged = {}
+        for table_name in table_names:
+            if table_name not in rpt_tables:
+                continue
+            table = rpt_tables[table_name]
+            columns = list(table)
+            ids = table[columns[0]]
+            if "Name" not in merged:
+                merged["Name"] = np.array(ids, dtype = object)
+                positions = np.arange(len(ids))
+            else:
+                lookup = {name: ii for ii, name in enumerate(merged["Name"])}
+                positions = np.array([lookup.get(name, -1) for name in ids], dtype = int)
+            for column in columns[1:]:
+                if column in merged:
+                    continue
+                values = np.full(len(merged["Name"]), None, dtype = object)
+                valid = positions >= 0
+                values[positions[valid]] = table[column][valid]
+                merged[column] = values
+        tables[object_type] = merged
+    return tables
+
+
+def _field_type(values):
+    """Hilfsfunktion: Feldtyp für eine Ergebnisspalte"""
+    if values.dtype.kind == "f":
+        return "DOUBLE"
+    sample = [value for value in values if value is not None]
+    if sample and all(isinstance(value, datetime.datetime) for value in sample):
+        return "DATE"
+    if sample and all(isinstance(value, (int, float)) for value in sample):
+        return "DOUBLE"
+    return "TEXT"
+
+
+def _field_name(name):
+    """Hilfsfunktion: Gültiger Feldname (arcpy.ValidateFieldName, im GeoPackage Sonderzeichen durch "_" ersetzen)"""
+    if arcpy is not None and sf.backend() == "arcpy":
+        return arcpy.ValidateFieldName(name, sf.get_workspace())
+    return "".join(char if char.isalnum() or char == "_" else "_" for char in name)
+
+
+def _to_value(value):
+    """Hilfsfunktion: numpy-Wert für den UpdateCursor umwandeln (NaN -> None)"""
+    if value is None:
+        return None
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+@lf.profiled()
+def write_results(in_fc, id_field, result_map, fields):
+    """Ergebnisse mit einem einzigen UpdateCursor in eine Feature-Klasse schreiben
+
+    Required:
+        in_fc -- Feature-Klasse (node, link oder subcatchment)
+        id_field -- Bezeichnung vom ID-Feld
+        result_map -- Dictionary {ID: [Wert pro Feld]}
+        fields -- Liste mit [Feldname, Feldtyp] (gleiche Reihenfolge wie die Werte)
+
+    Return:
+        n_updated -- Anzahl aktualisierte Objekte
+    """
+    # Fehlende Felder in einem Schritt erstellen (Feldbeschreibung [Name, Typ, Länge])
+    new_fields = sf.add_fields(in_fc, [[field_name, field_type, 128] if field_type == "TEXT" else [field_name, field_type]
+                                       for field_name, field_type in fields])
+    if new_fields:
+        logger.info(f'{len(new_fields)} Felder in "{in_fc}" erstellt')
+
+    empty = [None] * len(fields)
+    n_updated = 0
+    with sf.update_cursor(in_fc, [id_field] + [field[0] for field in fields]) as ucursor:
+        for urow in ucursor:
+            values = result_map.get(urow[0])
+            if values is None:
+                values = empty
+            else:
+                n_updated += 1
+            ucursor.updateRow([urow[0]] + values)
+    return n_updated
+
+
+@lf.profiled()
+def main(feature_classes, id_fields, template_swmm_file, simulations, result_source, result_variables):
+    """Ergebnistabellen aller Simulationen einlesen und in die Feature-Klassen schreiben
+
+    Required:
+        feature_classes -- Dictionary {Objekttyp: Name der Feature-Klasse}
+        id_fields -- Dictionary {Objekttyp: Bezeichnung vom ID-Feld}
+        template_swmm_file -- Pfad zur Template .inp-Datei
+        simulations -- Liste mit den Simulationen (Szenarien), deren Ergebnisse geschrieben werden
+        result_source -- "out" oder "rpt"
+        result_variables -- Dictionary {Objekttyp: [Ergebnisvariable]}
+    """
+    # Ergebnisse pro Objekttyp sammeln: {Objekttyp: {ID: [Werte]}}
+    result_maps = {object_type: {} for object_type in feature_classes}
+    fields = {object_type: [] for object_type in feature_classes}
+    for simulation in simulations:
+        tables = read_result_tables(template_swmm_file, simulation, result_source)
+        for object_type in feature_classes:
+            table = tables.get(object_type, {})
+            variables = [var for var in result_variables.get(object_type, []) if var in table]
+            for var in result_variables.get(object_type, []):
+                if var not in table:
+                    logger.warning(f'Ergebnisvariable "{var}" ist für "{object_type}" in Simulation {simulation} nicht vorhanden')
+            if not variables:
+                continue
+            # Neue Felder (Werte von bisherigen Simulationen bleiben an der gleichen Position)
+            n_before = len(fields[object_type])
+            for var in variables:
+                field_name = _field_name(simulation + "_" + var)
+                fields[object_type].append([field_name, _field_type(table[var])])
+            columns = [table[var] for var in variables]
+            result_map = result_maps[object_type]
+            for ii, name in enumerate(table["Name"]):
+                values = result_map.setdefault(name, [])
+                values.extend([None] * (n_before - len(values)))
+                values.extend([_to_value(column[ii]) for column in columns])
+
+    for object_type, in_fc in feature_classes.items():
+        if not fields[object_type]:
+            continue
+        n_fields = len(fields[object_type])
+        result_map = result_maps[object_type]
+        for values in result_map.values():
+            values.extend([None] * (n_fields - len(values)))
+        logger.info(f'{n_fields} Ergebnisfelder für {len(result_map)} Objekte in "{in_fc}" schreiben')
+        n_updated = write_results(in_fc, id_fields[object_type], result_map, fields[object_type])
+        if n_updated < len(result_map):
+            logger.warning(f'{len(result_map) - n_updated} Objekte aus den Ergebnissen sind in "{in_fc}" nicht vorhanden')
+
+
+# Daten einlesen
+# Logginig initialisieren
+if __name__ == "__main__":
+    # Globale Variabel für logging
+    global logger
+    # Input JSON-Datei
+    # Falls das Skript mittels einer Batch-Datei ausgeführt wird, wird die JSON-Datei als Parameter übergeben:
+    paramFile = sf.parameter_as_text(0)
+    # Falls das Skript direkt ausgeführt wird, wird die JSON-Datei hier angeben:
+    if len(paramFile) == 0:
+        paramFile = os.path.join(os.path.dirname(__file__), '..', 'settings_v1.json')
+
+    if paramFile:
+        # Einlesen der json-Datei
+        with open(paramFile, encoding='utf-8') as f:
+            data = json.load(f)
+            # Der Pfad zum Ordner, in dem die log-Datei gespeichert werden soll.
+            log_folder = data["log_folder"]
+            # Wird als Postfix für Log-Dateinamen und die SWMM Feature-Klassen (node, link, subcatchment) verwendet.
+            sim_nr = data["sim_nr"]
+            # Pfad zum Workspace GISSWMM (.gdb oder .gpkg) mit den Knoten, Haltungen und Teileinzugsgebieten.
+            gisswmm_workspace = data["gisswmm_workspace"]
+            # Der Name der Feature-Klasse mit den Knoten (ohne Postfix "_sim_nr"!).
+            out_node = data["out_node"]
+            # Der Name der Feature-Klasse mit den Haltungen (ohne Postfix "_sim_nr"!).
+            out_link = data["out_link"]
+            # Der Name der Feature-Klasse mit den Teileinzugsgebieten (ohne Postfix "_sim_nr"!).
+            out_subcatchment = data["out_subcatchment"]
+            # Die Bezeichnung vom ID-Feld in den Feature-Klassen "out_node" und "out_link".
+            node_id = data["node_id"]
+            link_id = data["link_id"]
+            # Der Pfad zur Template SWMM-Eingabedatei (.inp), die Ergebnisse liegen im Unterordner "sim_nr".
+            template_swmm_file = data["template_swmm_file"]
+            # Die Simulationen (Szenarien), deren Ergebnisse geschrieben werden.
+            if "result_simulations" in data:
+                result_simulations = data["result_simulations"]
+            else:
+                result_simulations = [sim_nr]
+            # Die Quelle der Ergebnisse: "out" (Kennwerte aus .out-Datei) oder "rpt" (Tabellen aus .rpt-Datei).
+            if "result_source" in data:
+                result_source = data["result_source"]
+            else:
+                result_source = "out"
+            # Die Ergebnisvariablen pro Objekttyp {"node": [...], "link": [...], "subcatchment": [...]}.
+            if "result_variables" in data:
+                result_variables = data["result_variables"]
+            else:
+                result_variables = None
+    else:
+        raise ValueError('keine json-Datei mit den Parametern angegeben')
+
+    # Prüfen ob Logfolder existiert
+    if not os.path.isdir(log_folder):
+        try:
+            os.mkdir(log_folder)
+        except:
+            raise ValueError(f'Logfolder "{log_folder}" konnte nicht erstellt werden!')
+
+    if result_source not in DEFAULT_VARIABLES:
+        raise ValueError(f'Unbekannte Quelle der Ergebnisse "{result_source}" (erlaubt: "out" oder "rpt")')
+    if result_variables is None:
+        result_variables = DEFAULT_VARIABLES[result_source]
+
+    # Logging initialisieren
+    filename = 'swmm_results2gisswmm_' + sim_nr + '.log'
+    log = os.path.join(log_folder, filename)
+    logger= lf.init_logging(log)
+    logger.info('****************************************************************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    # Aktuelle Workspace definieren
+    sf.set_workspace(gisswmm_workspace)
+
+    # Prüfen ob Eingabedatensätze vorhanden sind
+    postfix = "_" + sim_nr
+    feature_classes = {}
+    for object_type, in_fc in [("node", out_node), ("link", out_link), ("subcatchment", out_subcatchment)]:
+        if not postfix in in_fc:
+            in_fc = in_fc + postfix
+        if not sf.exists(in_fc):
+            err_txt = f'Die angegebene Feature-Klasse {in_fc} ist nicht vorhanden!'
+            logger.error(err_txt)
+            raise ValueError(err_txt)
+        feature_classes[object_type] = in_fc
+    id_fields = {"node": node_id, "link": link_id, "subcatchment": "Name"}
+
+    # Main module aufrufen
+    with sf.environment(workspace = gisswmm_workspace):
+        main(feature_classes, id_fields, template_swmm_file, result_simulations, result_source, result_variables)
+
+    # Logging abschliessen
+    end_time = time.time()
+    i = lf.error_count()
+    logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
+    logger.info(str(i) + " Fehler gefunden. Check Log.")
+    endtime = time.ctime()
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
@@ -3,40 +3,47 @@
 # author: Timo Wicki
 # date: 16.06.2022
 #
-# Die SWMM-Ergebnisdateien ".rpt" wir zu Excel-Dateien konvertiert, die anschliessend 
-# in ArcGIS Pro zu den GIS-Datensätzen (node, link, subcatchment) angehängt werden können, 
+# Die SWMM-Ergebnisdateien ".rpt" wir zu Tabellen (CSV, Parquet oder Excel) konvertiert, die anschliessend
+# in ArcGIS Pro zu den GIS-Datensätzen (node, link, subcatchment) angehängt werden können,
 # um die Ergebnisse in Karten zu präsentieren.
+# Jede .rpt-Datei wird in einem Durchlauf gelesen (siehe rpt_functions), es werden nur die angegebenen
+# Tabellen umgewandelt. Es können mehrere Simulationen (Szenarien) auf einmal konvertiert werden.
 # -----------------------------------------------------------------------------
 """swmm_rpt2excel"""
-import os, sys, json
-from swmm_api import read_rpt_file 
-import matplotlib.pyplot as plt, matplotlib.dates as mdates
+import os, sys, time
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '0_BasicFunctions'))
+import rpt_functions as rf
 
-def print_dict(obj):
-    print(json.dumps(obj, indent=4))
-    
 # Pfad zu Ordner wo sich die Ordner der unterschiedlichen SWMM-Simulationsergebnissen befinden
-swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM' 
+swmm_folder = r'C:\pygisswmm\4_GISSWMM2SWMM'
 
+# Simulationen (Szenarien), die konvertiert werden
 all_simulations = ["v1"]
 
-# Liste mit SWMM rpt-Dateien
-rpts = []
-for ii, simulation in enumerate(all_simulations):
-    dataframe = {}
-    rpt_file = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".rpt")
-    rpts.append(read_rpt_file(rpt_file))
-    dataframe["link_flow_summary"] = rpts[ii].link_flow_summary
-    dataframe["node_depth_summary"] = rpts[ii].node_depth_summary
-    #dataframe["node_flooding_summary"] = rpts[ii].node_flooding_summary
-    #dataframe["node_inflow_summary"] = rpts[ii].node_inflow_summary
-    dataframe["subcatchment_runoff_summary"] = rpts[ii].subcatchment_runoff_summary
-    for key, df in dataframe.items():
-        try:
-            out_file = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + "_" + key + ".xlsx")
-            df.to_excel(out_file, key)
-        except:
-            continue
+# Tabellen, die konvertiert werden (siehe rpt_functions.SUMMARY_TABLES). Nicht vorhandene Tabellen
+# (z. B. "node_flooding_summary" falls kein Knoten überflutet wird) werden übersprungen.
+tables = ["link_flow_summary", "node_depth_summary", "node_flooding_summary", "node_inflow_summary",
+          "subcatchment_runoff_summary"]
 
+# Ausgabeformate: "csv", "parquet" (benötigt pyarrow) und/oder "xlsx" (benötigt openpyxl, langsam)
+out_formats = ["csv"]
 
+for simulation in all_simulations:
+    start_time = time.time()
+    rpt_file = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + ".rpt")
+    if not os.path.isfile(rpt_file):
+        print(f'Die Datei "{rpt_file}" ist nicht vorhanden!')
+        continue
+    rpt_tables = rf.read_rpt_tables(rpt_file, tables)
+    for key in tables:
+        if key not in rpt_tables:
+            print(f'Tabelle "{key}" ist in "{rpt_file}" nicht vorhanden')
+            continue
+        out_base = os.path.join(swmm_folder, simulation, "swmm_template_5-yr_" + simulation + "_" + key)
+        for out_format in out_formats:
+            try:
+                rf.write_table(rpt_tables[key], out_base, key, out_format)
+            except Exception as e:
+                print(f'Tabelle "{key}" konnte nicht als "{out_format}" gespeichert werden: {e}')
+                continue
+    print(f'Simulation {simulation}: {len(rpt_tables)} Tabellen in {round(time.time() - start_time, 1)} sec. konvertiert')
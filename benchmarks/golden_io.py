@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Golden-File-Benchmarks der Ein- und Ausgabe mit den Dateien der Beispielsimulation (4_GISSWMM2SWMM/v1):
+# .inp lesen und schreiben, Zeitreihen und Kennwerte aus der .out-Datei lesen, Tabellen aus der .rpt-Datei
+# lesen und als CSV bzw. Excel speichern. Jede Messung wird anschliessend geprüft:
+# - Die Tabellen der .rpt-Datei und die Excel-Ausgabe müssen mit den Excel-Dateien der Beispielsimulation
+#   übereinstimmen.
+# - Eine .inp-Datei ohne ersetzte Abschnitte muss byteweise mit der Vorlage übereinstimmen, eine neu
+#   geschriebene .inp-Datei muss beim erneuten Lesen dieselben Tabellen ergeben.
+# - Alle Ergebnisse werden mit den Prüfsummen (SHA-256) in "golden/v1.json" verglichen. Zeitreihen aus der
+#   .out-Datei (float32) werden byteweise geprüft, berechnete Werte auf 10 signifikante Stellen.
+# Damit kann ein schnellerer Reader oder Writer mit echten Daten auf Geschwindigkeit und Korrektheit geprüft
+# werden. Die Prüfsummen werden mit --update-golden neu erstellt (nur nach einer gewollten Änderung).
+#
+# Aufruf:
+# > python benchmarks/golden_io.py [--only inp_parse rpt_tables] [--repeat 5] [--update-golden] [--no-save]
+#   [--fail-on-regression]
+# -----------------------------------------------------------------------------
+"""golden_io"""
+import os, sys, gc, json, time, shutil, hashlib, argparse, tempfile, datetime
+import numpy as np
+BENCH_FOLDER = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_FOLDER)
+sys.path.append(os.path.join(ROOT, "0_BasicFunctions"))
+import inp_functions as inpf
+import out_functions as of
+import rpt_functions as rf
+import history
+
+# Dateien der Beispielsimulation
+FIXTURE_FOLDER = os.path.join(ROOT, "4_GISSWMM2SWMM", "v1")
+FIXTURE_BASE = "swmm_template_5-yr_v1"
+# Tabellen der .rpt-Datei, für die eine Excel-Datei vorhanden ist
+GOLDEN_TABLES = ["link_flow_summary", "node_inflow_summary", "subcatchment_runoff_summary"]
+# Zeitreihen, die aus der .out-Datei gelesen werden {Objekttyp: [Variable]}
+SERIES = {"subcatchment": ["rainfall", "runoff"], "node": ["depth", "total_inflow", "flooding"],
+          "link": ["flow", "velocity", "capacity"]}
+MANIFEST_FILE = os.path.join(BENCH_FOLDER, "golden", "v1.json")
+
+
+def fixture(extension):
+    """Pfad zu einer Datei der Beispielsimulation"""
+    return os.path.join(FIXTURE_FOLDER, FIXTURE_BASE + extension)
+
+
+def file_sha256(file):
+    """Prüfsumme (SHA-256) einer Datei"""
+    sha = hashlib.sha256()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _update(sha, value):
+    """Hilfsfunktion: Wert (Dictionary, Liste, Array oder Skalar) in die Prüfsumme aufnehmen"""
+    if isinstance(value, dict):
+        for key in sorted(value, key = str):
+            sha.update(b"\x1ek" + str(key).encode("utf-8"))
+            _update(sha, value[key])
+    elif isinstance(value, (list, tuple)):
+        sha.update(b"\x1el" + str(len(value)).encode("ascii"))
+        for item in value:
+            _update(sha, item)
+    elif isinstance(value, np.ndarray):
+        sha.update(b"\x1ea" + str(value.shape).encode("ascii"))
+        if value.dtype == np.float32:
+            # Werte aus der Datei: byteweise
+            sha.update(np.ascontiguousarray(value, dtype = "<f4").tobytes())
+        elif value.dtype.kind == "f":
+            # Berechnete Werte: 10 signifikante Stellen (unabhängig von der Summationsreihenfolge)
+            sha.update("\x1f".join(f'{v:.10g}' for v in value.ravel().tolist()).encode("utf-8"))
+        else:
+            sha.update("\x1f".join(str(v) for v in value.ravel().tolist()).encode("utf-8"))
+    elif isinstance(value, float):
+        sha.update(f'\x1ef{value:.10g}'.encode("utf-8"))
+    else:
+        sha.update(b"\x1es" + str(value).encode("utf-8"))
+
+
+def digest(value):
+    """Prüfsumme (SHA-256) eines Ergebnisses (Dictionary, Liste, Array oder Skalar)"""
+    sha = hashlib.sha256()
+    _update(sha, value)
+    return sha.hexdigest()
+
+
+def compare_with_xlsx(tables, golden_files):
+    """Tabellen mit den Excel-Dateien der Beispielsimulation vergleichen
+
+    Required:
+        tables -- Dictionary {Tabelle: {Spalte: Array}}
+        golden_files -- Dictionary {Tabelle: Pfad zur Excel-Datei}
+
+    Return:
+        errors -- Liste mit den Abweichungen (leer falls alle Werte übereinstimmen)
+    """
+    import pandas as pd
+    errors = []
+    for name, file in golden_files.items():
+        if name not in tables:
+            errors.append(f'{name}: Tabelle fehlt')
+            continue
+        golden = pd.read_excel(file, sheet_name = 0)
+        table = tables[name]
+        if list(golden.columns) != list(table):
+            errors.append(f'{name}: Spalten {list(table)} statt {list(golden.columns)}')
+            continue
+        for column in golden.columns:
+            expected = golden[column].to_numpy()
+            actual = np.asarray(table[column])
+            if len(expected) != len(actual):
+                errors.append(f'{name}: {len(actual)} statt {len(expected)} Zeilen')
+                break
+            if expected.dtype.kind in "fi" and actual.dtype.kind in "fi":
+                equal = np.isclose(actual.astype(float), expected.astype(float), rtol = 0, atol = 1e-9, equal_nan = True)
+            else:
+                equal = np.array([str(a) == str(e) for a, e in zip(actual, expected)], dtype = bool)
+            if not equal.all():
+                row = int(np.argmin(equal))
+                errors.append(f'{name}: Spalte "{column}" Zeile {row}: {actual[row]!r} statt {expected[row]!r}')
+    return errors
+
+
+## Messungen: "run(context)" wird gemessen und gibt das Ergebnis zurück, "check(result, context)" gibt die
+# Prüfsumme (für golden/v1.json) und eine Liste mit zusätzlichen Abweichungen zurück.
+def _run_inp_index(context):
+    return inpf.build_inp_index(context["inp"])
+
+
+def _check_inp_index(result, context):
+    return digest(result["sections"]), []
+
+
+def _run_inp_parse(context):
+    index = inpf.build_inp_index(context["inp"])
+    return {section: inpf.read_inp_section(context["inp"], section, index) for section in index["sections"]}
+
+
+def _check_inp_parse(result, context):
+    context["inp_tables"] = result
+    return digest(result), []
+
+
+def _run_inp_write_copy(context):
+    return inpf.write_inp(context["inp"], os.path.join(context["temp"], "copy.inp"), index = context["inp_index"])
+
+
+def _check_inp_write_copy(result, context):
+    errors = []
+    if file_sha256(result) != file_sha256(context["inp"]):
+        errors.append('Kopie ohne ersetzte Abschnitte ist nicht byteweise identisch mit der Vorlage')
+    return file_sha256(result), errors
+
+
+def _run_inp_write_sections(context):
+    return inpf.write_inp(context["inp"], os.path.join(context["temp"], "sections.inp"),
+                          sections = context["inp_tables"], index = context["inp_index"])
+
+
+def _check_inp_write_sections(result, context):
+    index = inpf.build_inp_index(result)
+    tables = {section: inpf.read_inp_section(result, section, index) for section in index["sections"]}
+    errors = []
+    if digest(tables) != digest(context["inp_tables"]):
+        errors.append('Neu geschriebene .inp-Datei ergibt beim Lesen andere Tabellen')
+    return file_sha256(result), errors
+
+
+def _run_out_header(context):
+    return of.read_out_header(context["out"])
+
+
+def _check_out_header(result, context):
+    return digest({key: value for key, value in result.items() if key not in ("dtype", "start_date")}), []
+
+
+def _run_out_series(context):
+    header = of.read_out_header(context["out"])
+    parts = {(object_type, variable): [] for object_type, variables in SERIES.items() for variable in variables}
+    for block in of.iter_out_blocks(context["out"], header):
+        for object_type, variable in parts:
+            index = header["variables"][object_type].index(variable)
+            parts[(object_type, variable)].append(block[object_type][:, :, index])
+    return {object_type + "_" + variable: np.concatenate(values) for (object_type, variable), values in parts.items()}
+
+
+def _check_out_series(result, context):
+    return digest(result), []
+
+
+def _run_out_statistics(context):
+    return of.out_statistics(context["out"])
+
+
+def _check_out_statistics(result, context):
+    return digest(result), []
+
+
+def _run_rpt_tables(context):
+    return rf.read_rpt_tables(context["rpt"], GOLDEN_TABLES)
+
+
+def _check_rpt_tables(result, context):
+    context["rpt_tables"] = result
+    return digest(result), compare_with_xlsx(result, context["xlsx"])
+
+
+def _run_export(out_format):
+    def run(context):
+        return {name: rf.write_table(table, os.path.join(context["temp"], FIXTURE_BASE + "_" + name), name, out_format)
+                for name, table in context["rpt_tables"].items()}
+    return run
+
+
+def _check_export_csv(result, context):
+    return digest({name: file_sha256(file) for name, file in result.items()}), []
+
+
+def _check_export_xlsx(result, context):
+    # Excel-Dateien enthalten Zeitstempel, deshalb werden die Werte verglichen
+    import pandas as pd
+    tables = {}
+    for name, file in result.items():
+        frame = pd.read_excel(file, sheet_name = 0)
+        tables[name] = {column: frame[column].to_numpy() for column in frame.columns}
+    return digest({name: sorted(table) for name, table in tables.items()}), compare_with_xlsx(tables, context["xlsx"])
+
+
+# Name, gelesene Datei (für MB/s), Messung, Prüfung, benötigt pandas
+CASES = [
+    {"name": "inp_index", "file": "inp", "run": _run_inp_index, "check": _check_inp_index, "pandas": False},
+    {"name": "inp_parse", "file": "inp", "run": _run_inp_parse, "check": _check_inp_parse, "pandas": False},
+    {"name": "inp_write_copy", "file": "inp", "run": _run_inp_write_copy, "check": _check_inp_write_copy, "pandas": False},
+    {"name": "inp_write_sections", "file": "inp", "run": _run_inp_write_sections, "check": _check_inp_write_sections,
+     "pandas": False},
+    {"name": "out_header", "file": "out", "run": _run_out_header, "check": _check_out_header, "pandas": False},
+    {"name": "out_series", "file": "out", "run": _run_out_series, "check": _check_out_series, "pandas": False},
+    {"name": "out_statistics", "file": "out", "run": _run_out_statistics, "check": _check_out_statistics, "pandas": False},
+    {"name": "rpt_tables", "file": "rpt", "run": _run_rpt_tables, "check": _check_rpt_tables, "pandas": True},
+    {"name": "export_csv", "file": None, "run": _run_export("csv"), "check": _check_export_csv, "pandas": False},
+    {"name": "export_xlsx", "file": None, "run": _run_export("xlsx"), "check": _check_export_xlsx, "pandas": True},
+]
+# Messungen, deren Ergebnis von einer anderen Messung verwendet wird
+_requires = {"inp_write_sections": "inp_parse", "export_csv": "rpt_tables", "export_xlsx": "rpt_tables"}
+
+
+def load_manifest(manifest_file = MANIFEST_FILE):
+    """Prüfsummen der Beispielsimulation lesen (leer falls noch nicht vorhanden)"""
+    if not os.path.isfile(manifest_file):
+        return {"fixtures": {}, "digests": {}}
+    with open(manifest_file, encoding = "utf-8") as f:
+        return json.load(f)
+
+
+def run_cases(cases, repeat = 5, manifest = None):
+    """Messungen ausführen und prüfen
+
+    Required:
+        cases -- Liste mit den Messungen (siehe CASES)
+    Optional:
+        repeat -- Anzahl Wiederholungen pro Messung (beste Zeit zählt)
+        manifest -- Prüfsummen (siehe load_manifest)
+
+    Return:
+        results -- Liste mit Dictionaries {"name", "seconds", "mb_per_s", "digest", "ok", "errors"}
+    """
+    manifest = manifest or {"fixtures": {}, "digests": {}}
+    context = {"inp": fixture(".inp"), "out": fixture(".out"), "rpt": fixture(".rpt"),
+               "xlsx": {name: fixture("_" + name + ".xlsx") for name in GOLDEN_TABLES},
+               "temp": tempfile.mkdtemp(prefix = "golden_io_")}
+    context["inp_index"] = inpf.build_inp_index(context["inp"])
+    names = [case["name"] for case in cases]
+    # Vorausgesetzte Messungen ergänzen (werden nur für das Ergebnis ausgeführt)
+    for name, required in _requires.items():
+        if name in names and required not in names:
+            case = next(case for case in CASES if case["name"] == required)
+            case["check"](case["run"](context), context)
+    results = []
+    try:
+        for case in cases:
+            best = None
+            for _ in range(repeat):
+                gc.collect()
+                gc.disable()
+                try:
+                    start_time = time.perf_counter()
+                    result = case["run"](context)
+                    seconds = time.perf_counter() - start_time
+                finally:
+                    gc.enable()
+                best = seconds if best is None else min(best, seconds)
+            value, errors = case["check"](result, context)
+            expected = manifest["digests"].get(case["name"])
+            if expected is None:
+                errors.append('Keine Prüfsumme vorhanden (--update-golden)')
+            elif expected != value:
+                errors.append(f'Prüfsumme {value[:12]} statt {expected[:12]}')
+            size = os.path.getsize(context[case["file"]]) if case["file"] else None
+            results.append({"name": case["name"], "seconds": round(best, 6),
+                            "mb_per_s": round(size / best / 1e6, 1) if size and best > 0 else None,
+                            "digest": value, "ok": not errors, "errors": errors})
+            status = "OK" if not errors else "FEHLER"
+            speed = f'{results[-1]["mb_per_s"]:>9.1f} MB/s' if results[-1]["mb_per_s"] else " " * 14
+            print(f'{case["name"]:<22}{best:>10.4f} sec.{speed}   {status}')
+            for error in errors:
+                print(f'    {error}')
+    finally:
+        shutil.rmtree(context["temp"], ignore_errors = True)
+    return results
+
+
+def update_manifest(results, manifest_file = MANIFEST_FILE):
+    """Prüfsummen der Ergebnisse und der Dateien der Beispielsimulation speichern"""
+    manifest = load_manifest(manifest_file)
+    manifest["created"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    manifest["fixtures"] = {os.path.basename(fixture(extension)): file_sha256(fixture(extension))
+                            for extension in [".inp", ".out", ".rpt"]}
+    manifest["digests"].update({result["name"]: result["digest"] for result in results})
+    os.makedirs(os.path.dirname(manifest_file), exist_ok = True)
+    with open(manifest_file, "w", encoding = "utf-8") as f:
+        json.dump(manifest, f, indent = 1, sort_keys = True)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Golden-File-Benchmarks der SWMM Ein- und Ausgabe")
+    parser.add_argument("--only", nargs = "+", help = "Nur diese Messungen ausführen "
+                        f'({", ".join(case["name"] for case in CASES)})')
+    parser.add_argument("--repeat", type = int, default = 5, help = "Wiederholungen pro Messung (beste Zeit zählt)")
+    parser.add_argument("--update-golden", action = "store_true", help = "Prüfsummen in golden/v1.json neu erstellen")
+    parser.add_argument("--threshold", type = float, default = history.DEFAULT_THRESHOLD, help = "Faktor für Regressionen")
+    parser.add_argument("--history", default = history.HISTORY_FILE, help = "History-Datei (JSON Lines)")
+    parser.add_argument("--no-save", action = "store_true", help = "Ergebnisse nicht in der History-Datei speichern")
+    parser.add_argument("--fail-on-regression", action = "store_true", help = "Rückgabewert 1 bei Regressionen")
+    args = parser.parse_args()
+
+    try:
+        import pandas
+    except ImportError:
+        pandas = None
+    cases = [case for case in CASES if not args.only or case["name"] in args.only]
+    if args.only:
+        unknown = set(args.only) - {case["name"] for case in CASES}
+        if unknown:
+            parser.error(f'Unbekannte Messungen: {", ".join(sorted(unknown))}')
+    if pandas is None:
+        print(f'pandas nicht installiert, übersprungen: {", ".join(case["name"] for case in cases if case["pandas"])}')
+        cases = [case for case in cases if not case["pandas"] and _requires.get(case["name"]) != "rpt_tables"]
+
+    manifest = load_manifest()
+    for name, sha in manifest["fixtures"].items():
+        if file_sha256(os.path.join(FIXTURE_FOLDER, name)) != sha:
+            print(f'Achtung: "{name}" wurde seit der Erstellung der Prüfsummen verändert')
+    results = run_cases(cases, args.repeat, manifest)
+    if args.update_golden:
+        update_manifest(results)
+        print(f'Prüfsummen in "{MANIFEST_FILE}" gespeichert')
+        for result in results:
+            result["errors"] = [error for error in result["errors"] if not error.startswith(("Prüfsumme", "Keine Prüfsumme"))]
+            result["ok"] = not result["errors"]
+
+    failed = [result["name"] for result in results if not result["ok"]]
+    run = history.new_run("golden_io", [{key: value for key, value in result.items() if key != "digest"}
+                                         for result in results])
+    regressions = history.report(run, args.history, args.threshold, save = not args.no_save)
+    if failed:
+        print(f'Abweichungen von den Golden Files: {", ".join(failed)}')
+        sys.exit(1)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Verlauf der Benchmark-Ergebnisse: Jeder Lauf (Suite, Datum, Git-Commit, Rechner, Python-Version und
+# Messungen) wird als eine Zeile in "results/history.jsonl" angehängt. Ein neuer Lauf wird mit dem letzten
+# Lauf derselben Suite auf demselben Rechner (und derselben Python-Version) verglichen, Messungen, die um
+# mehr als einen Faktor langsamer sind, gelten als Regression. Der Ordner "results" wird nicht versioniert
+# (.gitignore), mit der Umgebungsvariable "PYGISSWMM_BENCH_HISTORY" kann eine andere Datei angegeben werden.
+# -----------------------------------------------------------------------------
+"""history"""
+import os, json, time, platform, subprocess
+
+HISTORY_FILE = os.environ.get("PYGISSWMM_BENCH_HISTORY") or \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "history.jsonl")
+# Faktor, ab dem eine Messung als Regression gilt
+DEFAULT_THRESHOLD = 1.25
+# Kürzere Messungen (Sekunden) schwanken zu stark und werden nicht verglichen
+MIN_SECONDS = 0.001
+
+
+def git_commit():
+    """Aktueller Git-Commit (oder None)"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd = os.path.dirname(os.path.abspath(__file__)),
+                              capture_output = True, text = True, timeout = 10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def new_run(suite, results):
+    """Lauf mit den Angaben zur Umgebung erstellen
+
+    Required:
+        suite -- Bezeichnung der Benchmark-Suite (z. B. "scaling" oder "golden_io")
+        results -- Liste mit Dictionaries {"name", "n", "seconds", ...}
+    """
+    return {"suite": suite, "date": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": git_commit(),
+            "machine": platform.node(), "platform": platform.platform(), "python": platform.python_version(),
+            "results": results}
+
+
+def load_history(history_file = HISTORY_FILE):
+    """Alle bisherigen Läufe aus der History-Datei lesen"""
+    if not os.path.isfile(history_file):
+        return []
+    with open(history_file, encoding = "utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_run(run, history_file = HISTORY_FILE):
+    """Lauf an die History-Datei (JSON Lines) anhängen"""
+    os.makedirs(os.path.dirname(os.path.abspath(history_file)), exist_ok = True)
+    with open(history_file, "a", encoding = "utf-8") as f:
+        f.write(json.dumps(run, ensure_ascii = False) + "\n")
+
+
+def compare(run, history, threshold = DEFAULT_THRESHOLD):
+    """Lauf mit dem letzten Lauf derselben Suite auf demselben Rechner (und derselben Python-Version) vergleichen
+
+    Return:
+        previous -- Vorheriger Lauf (oder None)
+        regressions -- Liste mit Dictionaries {"name", "n", "seconds", "previous", "factor"}
+    """
+    previous = None
+    for old in reversed(history):
+        if old.get("suite", "scaling") == run["suite"] and old.get("machine") == run["machine"] and \
+           old.get("python") == run["python"]:
+            previous = old
+            break
+    if previous is None:
+        return None, []
+    old_results = {(result["name"], result.get("n")): result for result in previous["results"] if "seconds" in result}
+    regressions = []
+    for result in run["results"]:
+        old = old_results.get((result["name"], result.get("n")))
+        if old is None or "seconds" not in result or old["seconds"] < MIN_SECONDS:
+            continue
+        factor = result["seconds"] / old["seconds"]
+        if factor > threshold:
+            regressions.append({"name": result["name"], "n": result.get("n"), "seconds": result["seconds"],
+                                "previous": old["seconds"], "factor": round(factor, 2)})
+    return previous, regressions
+
+
+def report(run, history_file = HISTORY_FILE, threshold = DEFAULT_THRESHOLD, save = True):
+    """Lauf mit dem vorherigen Lauf vergleichen, Regressionen ausgeben und Lauf speichern
+
+    Return:
+        regressions -- siehe compare
+    """
+    previous, regressions = compare(run, load_history(history_file), threshold)
+    if previous is None:
+        print('Kein vorheriger Lauf auf diesem Rechner vorhanden')
+    else:
+        print(f'Vergleich mit Lauf vom {previous["date"]} (Commit {previous.get("commit")})')
+        for regression in regressions:
+            size = f' n = {regression["n"]}' if regression["n"] is not None else ""
+            print(f'Regression: {regression["name"]}{size}: {regression["previous"]:.4f} -> '
+                  f'{regression["seconds"]:.4f} sec. (Faktor {regression["factor"]})')
+        if not regressions:
+            print(f'Keine Regressionen (Faktor > {threshold})')
+    if save:
+        save_run(run, history_file)
+        print(f'Ergebnisse in "{history_file}" gespeichert')
+    return regressions
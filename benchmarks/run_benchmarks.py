@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Skalierungs-Benchmarks der reinen Python-Funktionen (ohne ArcGIS): Die Kernfunktionen (Dictionary der
+# Schächte erstellen, Sohlenkoten interpolieren, Koordinaten umwandeln, Dataframes der SWMM-Eingabedatei
+# zusammenstellen, Kennwerte der Teileinzugsgebiete aggregieren) werden mit synthetischen Daten
+# (synthetic_data.py) für 1e3 bis 1e6 Elemente gemessen. arcpy, swmmio und swmm_api werden durch lokale
+# Platzhalter ersetzt, falls sie nicht installiert sind (stand_ins.py). Funktionen mit Cursors (z. B.
+# gisswmm_upd.build_node_dict) lesen aus einem temporären GeoPackage (storage_functions). Grössere Stufen werden übersprungen,
+# falls die geschätzte Laufzeit (aus dem bisherigen Skalierungsverhalten) das Zeitbudget überschreitet.
+#
+# Die Ergebnisse werden in "results/history.jsonl" angehängt und mit dem letzten Lauf auf demselben
+# Rechner verglichen. Messungen, die um mehr als den Faktor --threshold langsamer sind, werden als
+# Regression gemeldet.
+#
+# Aufruf:
+# > python benchmarks/run_benchmarks.py [--sizes 1000 10000 100000 1000000] [--only interpolate_node_dict]
+#   [--repeat 3] [--budget 60] [--threshold 1.25] [--no-save] [--fail-on-regression]
+# -----------------------------------------------------------------------------
+"""run_benchmarks"""
+import os, sys, gc, json, math, time, logging, argparse, tempfile
+BENCH_FOLDER = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_FOLDER)
+for folder in ["0_BasicFunctions", "2_GISSWMM", "3_SUBCATCHMENT", "4_GISSWMM2SWMM"]:
+    sys.path.append(os.path.join(ROOT, folder))
+import stand_ins
+stand_ins.install()
+import synthetic_data as sd
+import history
+import storage_functions as sf
+import gisswmm_upd
+import gisswmm_cre_subcatchments
+try:
+    import pandas as pd
+    import gisswmm2swmm
+except ImportError:
+    pd = None
+    gisswmm2swmm = None
+
+# Standardgrössen (Anzahl Elemente)
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+# Die Skripte schreiben über den globalen Logger, der sonst im __main__-Block gesetzt wird
+_quiet = logging.getLogger("benchmarks")
+_quiet.setLevel(logging.ERROR)
+_quiet.addHandler(logging.NullHandler())
+_quiet.propagate = False
+for _module in [gisswmm_upd, gisswmm_cre_subcatchments, gisswmm2swmm]:
+    if _module is not None:
+        _module.logger = _quiet
+
+
+def _land_mappings():
+    """Hilfsfunktion: Zuordnung der Kennwerte zur Bodenbedeckungsart aus settings_v1.json"""
+    with open(os.path.join(ROOT, "settings_v1.json"), encoding = "utf-8") as f:
+        data = json.load(f)
+    return (data["mapping_land_imperv"], data["mapping_land_roughness"], data["mapping_land_depression_storage"])
+
+
+## Benchmarks: "setup(n)" erstellt die Daten (nicht gemessen), "run(data)" wird gemessen.
+# "fresh" = True: setup wird vor jeder Wiederholung aufgerufen (Funktion verändert die Daten)
+def _setup_rows(n):
+    network = sd.sewer_network(n, "dendritic")
+    return sd.link_rows(network), sd.node_rows(network)
+
+
+def _run_node_dict_from_rows(data):
+    gisswmm_upd.node_dict_from_rows(data[0], data[1], "INLET")
+
+
+def _setup_cursor(n):
+    network = sd.sewer_network(n, "dendritic")
+    gpkg = os.path.join(tempfile.gettempdir(), "pygisswmm_benchmark.gpkg")
+    sf.close_workspace(gpkg)
+    if os.path.isfile(gpkg):
+        os.remove(gpkg)
+    sf.create_workspace(gpkg)
+    sf.set_workspace(gpkg)
+    tables = {"bench_node": ([["Name", "TEXT", 50], ["InvertElev", "DOUBLE"], ["TopElev", "DOUBLE"], ["SWMM_TYPE", "TEXT", 20]],
+                             sd.node_rows(network)),
+              "bench_link": ([["Name", "TEXT", 50], ["InletNode", "TEXT", 50], ["OutletNode", "TEXT", 50], ["Length", "DOUBLE"]],
+                             sd.link_rows(network))}
+    for table, (fields, rows) in tables.items():
+        sf.create_feature_class(table, None, fields)
+        with sf.insert_cursor(table, [field[0] for field in fields]) as cursor:
+            for row in rows:
+                cursor.insertRow(row)
+
+
+def _run_build_node_dict(data):
+    gisswmm_upd.build_node_dict("bench_node", "Name", "TopElev", "InvertElev", "SWMM_TYPE", "INLET",
+                                "bench_link", "Name", "InletNode", "OutletNode", "Length")
+
+
+def _setup_interpolate(kind):
+    def setup(n):
+        network = sd.sewer_network(n, kind)
+        return gisswmm_upd.node_dict_from_rows(sd.link_rows(network), sd.node_rows(network), "INLET")
+    return setup
+
+
+def _run_interpolate(data):
+    gisswmm_upd.interpolate_node_dict(data, 0.01, 1.5, 0.3)
+
+
+def _setup_coords(n):
+    return sd.coordinate_strings(n)
+
+
+def _run_coords_to_list(data):
+    for coords in data:
+        gisswmm2swmm.coords_to_list(coords)
+
+
+def _setup_add_nodes(n):
+    nodes, _ = sd.swmm_rows(sd.sewer_network(n, "dendritic"))
+    junctions = pd.DataFrame(columns = ["InvertElev", "MaxDepth", "InitDepth", "SurchargeDepth", "PondedArea"])
+    outfalls = pd.DataFrame(columns = ["InvertElev", "OutfallType"])
+    coordinates = pd.DataFrame(columns = ["X", "Y"])
+    return nodes, junctions, outfalls, coordinates
+
+
+def _run_add_nodes(data):
+    gisswmm2swmm.add_nodes(*data)
+
+
+def _setup_add_links(n):
+    _, links = sd.swmm_rows(sd.sewer_network(n + 1, "dendritic"))
+    conduits = pd.DataFrame(columns = ["InletNode", "OutletNode", "Length", "Roughness", "InOffset", "OutOffset",
+                                       "InitFlow", "MaxFlow"])
+    pumps = pd.DataFrame(columns = ["InletNode", "OutletNode"])
+    xsections = pd.DataFrame(columns = ["Shape", "Geom1", "Geom2", "Geom3", "Geom4", "Barrels"])
+    vertices = pd.DataFrame(columns = ["X", "Y"])
+    return links, conduits, pumps, xsections, vertices
+
+
+def _run_add_links(data):
+    gisswmm2swmm.add_links(*data)
+
+
+def _setup_land(n):
+    return sd.subcatchment_land_rows(n), _land_mappings()
+
+
+def _run_land_parameters(data):
+    groups, mappings = data
+    for rows in groups:
+        gisswmm_cre_subcatchments.land_parameters(rows, *mappings)
+
+
+# Name, Beschreibung, setup, run, fresh, benötigt pandas
+BENCHMARKS = [
+    {"name": "node_dict_from_rows", "description": "Dictionary der Schächte aus Zeilen (Knoten)",
+     "setup": _setup_rows, "run": _run_node_dict_from_rows, "fresh": False, "pandas": False},
+    {"name": "build_node_dict", "description": "Dictionary der Schächte über Cursors (GeoPackage)",
+     "setup": _setup_cursor, "run": _run_build_node_dict, "fresh": False, "pandas": False},
+    {"name": "interpolate_dendritic", "description": "Sohlenkoten interpolieren, verzweigtes Netz (Knoten)",
+     "setup": _setup_interpolate("dendritic"), "run": _run_interpolate, "fresh": True, "pandas": False},
+    {"name": "interpolate_looped", "description": "Sohlenkoten interpolieren, vermaschtes Netz (Knoten)",
+     "setup": _setup_interpolate("looped"), "run": _run_interpolate, "fresh": True, "pandas": False},
+    {"name": "coords_to_list", "description": "Koordinaten-Strings umwandeln (Koordinatenpaare)",
+     "setup": _setup_coords, "run": _run_coords_to_list, "fresh": False, "pandas": True},
+    {"name": "add_nodes", "description": "Dataframes der Knoten zusammenstellen (Knoten)",
+     "setup": _setup_add_nodes, "run": _run_add_nodes, "fresh": True, "pandas": True},
+    {"name": "add_links", "description": "Dataframes der Haltungen zusammenstellen (Haltungen)",
+     "setup": _setup_add_links, "run": _run_add_links, "fresh": True, "pandas": True},
+    {"name": "land_parameters", "description": "Kennwerte der Teileinzugsgebiete aggregieren (Flächen)",
+     "setup": _setup_land, "run": _run_land_parameters, "fresh": False, "pandas": False},
+]
+
+
+def measure(benchmark, n, repeat):
+    """Benchmark für n Elemente messen (beste Zeit von "repeat" Wiederholungen, Garbage Collector ausgeschaltet)
+
+    Return:
+        seconds -- Beste gemessene Zeit in Sekunden
+    """
+    data = None if benchmark["fresh"] else benchmark["setup"](n)
+    best = None
+    for _ in range(repeat):
+        if benchmark["fresh"]:
+            data = benchmark["setup"](n)
+        gc.collect()
+        gc.disable()
+        try:
+            start_time = time.perf_counter()
+            benchmark["run"](data)
+            seconds = time.perf_counter() - start_time
+        finally:
+            gc.enable()
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def _estimate(measured, n):
+    """Hilfsfunktion: Laufzeit für n Elemente aus den bisherigen Messungen (Potenzgesetz) schätzen"""
+    if not measured:
+        return 0.0
+    n1, t1 = measured[-1]
+    exponent = 1.0
+    if len(measured) > 1:
+        n0, t0 = measured[-2]
+        if t0 > 0 and t1 > 0:
+            exponent = max(1.0, math.log(t1 / t0) / math.log(n1 / n0))
+    return t1 * (n / n1) ** exponent
+
+
+def run_benchmarks(benchmarks, sizes, repeat = 3, budget = 60.0):
+    """Benchmarks für alle Grössen messen
+
+    Required:
+        benchmarks -- Liste mit den Benchmarks (siehe BENCHMARKS)
+        sizes -- Liste mit den Anzahl Elementen
+    Optional:
+        repeat -- Anzahl Wiederholungen pro Messung
+        budget -- Maximale geschätzte Zeit in Sekunden für eine Messung (grössere Stufen werden übersprungen)
+
+    Return:
+        results -- Liste mit Dictionaries {"name", "n", "seconds", "us_per_element"} bzw. {"name", "n", "skipped"}
+    """
+    results = []
+    for benchmark in benchmarks:
+        if benchmark["pandas"] and gisswmm2swmm is None:
+            print(f'{benchmark["name"]}: übersprungen (pandas nicht installiert)')
+            continue
+        measured = []
+        for n in sorted(sizes):
+            estimate = _estimate(measured, n)
+            if estimate > budget:
+                print(f'{benchmark["name"]:<24}{n:>10}   übersprungen (geschätzt {estimate:.0f} sec.)')
+                results.append({"name": benchmark["name"], "n": n, "skipped": round(estimate, 1)})
+                continue
+            # Lange Messungen nur einmal ausführen
+            seconds = measure(benchmark, n, 1 if estimate * repeat > budget else repeat)
+            measured.append((n, seconds))
+            results.append({"name": benchmark["name"], "n": n, "seconds": round(seconds, 6),
+                            "us_per_element": round(seconds / n * 1e6, 3)})
+            print(f'{benchmark["name"]:<24}{n:>10}{seconds:>12.4f} sec.{seconds / n * 1e6:>10.2f} µs/Element')
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Skalierungs-Benchmarks der pygisswmm Kernfunktionen")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = DEFAULT_SIZES, help = "Anzahl Elemente")
+    parser.add_argument("--only", nargs = "+", help = "Nur diese Benchmarks ausführen "
+                        f'({", ".join(benchmark["name"] for benchmark in BENCHMARKS)})')
+    parser.add_argument("--repeat", type = int, default = 3, help = "Wiederholungen pro Messung (beste Zeit zählt)")
+    parser.add_argument("--budget", type = float, default = 60.0, help = "Maximale geschätzte Zeit pro Messung in sec.")
+    parser.add_argument("--threshold", type = float, default = history.DEFAULT_THRESHOLD, help = "Faktor für Regressionen")
+    parser.add_argument("--history", default = history.HISTORY_FILE, help = "History-Datei (JSON Lines)")
+    parser.add_argument("--no-save", action = "store_true", help = "Ergebnisse nicht in der History-Datei speichern")
+    parser.add_argument("--fail-on-regression", action = "store_true", help = "Rückgabewert 1 bei Regressionen")
+    args = parser.parse_args()
+
+    benchmarks = BENCHMARKS
+    if args.only:
+        unknown = set(args.only) - {benchmark["name"] for benchmark in BENCHMARKS}
+        if unknown:
+            parser.error(f'Unbekannte Benchmarks: {", ".join(sorted(unknown))}')
+        benchmarks = [benchmark for benchmark in BENCHMARKS if benchmark["name"] in args.only]
+
+    replaced = [name for name in ("arcpy", "swmmio", "swmm_api") if getattr(sys.modules.get(name), "__stand_in__", False)]
+    if replaced:
+        print(f'Platzhalter für: {", ".join(replaced)}')
+    results = run_benchmarks(benchmarks, args.sizes, args.repeat, args.budget)
+    run = history.new_run("scaling", results)
+    regressions = history.report(run, args.history, args.threshold, save = not args.no_save)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
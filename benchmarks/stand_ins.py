@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Lokale Platzhalter für die Benchmarks ohne ArcGIS: Die Skripte importieren arcpy (bzw. swmmio und
+# swmm_api) beim Laden. Für die Benchmarks der reinen Python-Funktionen werden diese Module durch
+# Platzhalter ersetzt, falls sie nicht installiert sind. Die arcpy.da-Cursors lesen und schreiben Tabellen
+# im Speicher (TABLES).
+# -----------------------------------------------------------------------------
+"""stand_ins"""
+import sys, types, importlib
+
+# Tabellen im Speicher {Name: {"fields": [Feldnamen], "rows": [Zeilen als Listen]}}
+TABLES = {}
+
+
+def register_table(name, fields, rows):
+    """Tabelle für die Platzhalter-Cursors registrieren"""
+    TABLES[name] = {"fields": list(fields), "rows": [list(row) for row in rows]}
+
+
+class _Cursor:
+    """Platzhalter für arcpy.da.SearchCursor und arcpy.da.UpdateCursor (Tabelle aus TABLES)"""
+
+    def __init__(self, table, field_names, where_clause = None, *args, **kwargs):
+        if table not in TABLES:
+            raise RuntimeError(f'Tabelle "{table}" ist nicht registriert')
+        self._table = TABLES[table]
+        self.fields = tuple(field_names)
+        self._index = [self._table["fields"].index(field) for field in self.fields]
+        self._position = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __iter__(self):
+        index = self._index
+        for position, row in enumerate(self._table["rows"]):
+            self._position = position
+            yield tuple(row[ii] for ii in index)
+
+    def reset(self):
+        self._position = -1
+
+    def updateRow(self, values):
+        row = self._table["rows"][self._position]
+        for ii, value in zip(self._index, values):
+            row[ii] = value
+
+    def deleteRow(self):
+        self._table["rows"][self._position] = None
+
+
+class _InsertCursor:
+    """Platzhalter für arcpy.da.InsertCursor"""
+
+    def __init__(self, table, field_names, *args, **kwargs):
+        if table not in TABLES:
+            register_table(table, field_names, [])
+        self._table = TABLES[table]
+        self.fields = tuple(field_names)
+        self._index = [self._table["fields"].index(field) for field in self.fields]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def insertRow(self, values):
+        row = [None] * len(self._table["fields"])
+        for ii, value in zip(self._index, values):
+            row[ii] = value
+        self._table["rows"].append(row)
+        return len(self._table["rows"])
+
+
+def _arcpy_stand_in():
+    """Hilfsfunktion: Modul "arcpy" mit den Cursors und den wenigen beim Import benötigten Funktionen"""
+    arcpy = types.ModuleType("arcpy")
+    arcpy.__stand_in__ = True
+    arcpy.da = types.ModuleType("arcpy.da")
+    arcpy.da.SearchCursor = _Cursor
+    arcpy.da.UpdateCursor = _Cursor
+    arcpy.da.InsertCursor = _InsertCursor
+    arcpy.env = types.SimpleNamespace(workspace = None, overwriteOutput = True)
+    arcpy.Exists = lambda name: name in TABLES
+    arcpy.GetParameterAsText = lambda index: sys.argv[index + 1] if len(sys.argv) > index + 1 else ""
+    arcpy.ValidateFieldName = lambda name, workspace = None: "".join(c if c.isalnum() else "_" for c in name)
+    for toolbox in ("management", "analysis", "conversion", "cartography", "sa"):
+        setattr(arcpy, toolbox, types.ModuleType("arcpy." + toolbox))
+    return arcpy
+
+
+def install(modules = ("arcpy", "swmmio", "swmm_api")):
+    """Platzhalter für nicht installierte Module in sys.modules eintragen
+
+    Return:
+        Liste mit den Namen der ersetzten Module
+    """
+    replaced = []
+    for name in modules:
+        if name in sys.modules:
+            continue
+        try:
+            importlib.import_module(name)
+            continue
+        except ImportError:
+            pass
+        if name == "arcpy":
+            module = _arcpy_stand_in()
+        else:
+            module = types.ModuleType(name)
+            module.__stand_in__ = True
+            if name == "swmm_api":
+                module.swmm5_run = lambda *args, **kwargs: None
+        sys.modules[name] = module
+        replaced.append(name)
+    return replaced
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Synthetische Testdaten für Benchmarks: Kanalnetze (verzweigt oder vermascht) mit beliebiger Anzahl
+# Knoten und einem Anteil fehlender Sohlenkoten, ein dazu passendes Höhenmodell (DHM) und Polygone der
+# Bodenbedeckung. Das Gelände steigt vom Auslauf (Ursprung) in Richtung x und y an, die Netze wachsen vom
+# Auslauf aus bergauf, sodass Deckelkoten, Sohlenkoten und Gefälle plausibel sind. Die Daten werden als
+# Listen (Zeilen wie bei den arcpy.da-Cursors) bzw. numpy-Arrays erzeugt und sind mit "seed" reproduzierbar.
+# -----------------------------------------------------------------------------
+"""synthetic_data"""
+import math, json, random
+import numpy as np
+
+# Felder der Zeilen (Reihenfolge wie in gisswmm_upd.node_dict_from_rows bzw. gisswmm2swmm)
+NODE_FIELDS = ["Name", "InvertElev", "TopElev", "SWMM_TYPE", "X", "Y"]
+LINK_FIELDS = ["Name", "InletNode", "OutletNode", "Length", "coords"]
+# Kennwerte der Bodenbedeckungsarten (Ausschnitt aus settings_v1.json)
+LAND_CLASSES = ["0", "4", "6", "8", "12", "19", "21", "23"]
+
+
+def terrain(x, y, z0 = 400.0, gradient = 0.02, hills = 2.0, wavelength = 300.0):
+    """Geländehöhe (Ebene mit Gefälle zum Ursprung und überlagerten Hügeln), auch für numpy-Arrays"""
+    return z0 + gradient * (x + y) + hills * np.sin(x / wavelength * 2 * np.pi) * np.cos(y / wavelength * 2 * np.pi)
+
+
+def sewer_network(n_nodes, kind = "dendritic", missing_fraction = 0.3, inlet_fraction = 0.2, loop_fraction = 0.05,
+                  seed = 0, link_length = (20.0, 60.0), depth = (1.5, 3.5)):
+    """Synthetisches Kanalnetz erzeugen
+
+    Required:
+        n_nodes -- Anzahl Knoten
+    Optional:
+        kind -- "dendritic" (verzweigtes Netz, Baum) oder "looped" (zusätzliche Maschen)
+        missing_fraction -- Anteil der Knoten ohne Sohlenkote (der Auslauf hat immer eine Sohlenkote)
+        inlet_fraction -- Anteil der Endknoten, die als Einlaufschacht ("INLET") gekennzeichnet werden
+        loop_fraction -- Anteil zusätzlicher Haltungen (bezogen auf n_nodes) bei "looped"
+        seed -- Startwert des Zufallsgenerators
+        link_length -- Minimale und maximale Haltungslänge
+        depth -- Minimale und maximale Schachttiefe
+
+    Return:
+        network -- Dictionary {"nodes": Liste mit Zeilen gemäss NODE_FIELDS, "links": Liste mit Zeilen gemäss
+                   LINK_FIELDS, "extent": (xmin, ymin, xmax, ymax)}
+    """
+    if kind not in ("dendritic", "looped"):
+        raise ValueError(f'Unbekannte Art "{kind}" (erlaubt: "dendritic" oder "looped")')
+    rng = random.Random(seed)
+    xs = [0.0]
+    ys = [0.0]
+    sks = [terrain(0.0, 0.0) - depth[1]]
+    children = [0]
+    links = []
+    for ii in range(1, n_nodes):
+        # Anschluss an einen der zuletzt erstellten Knoten (ergibt lange Stränge mit Verzweigungen)
+        parent = rng.randint(max(0, ii - 50), ii - 1)
+        length = rng.uniform(*link_length)
+        angle = rng.uniform(0.0, math.pi / 2)
+        x = xs[parent] + length * math.cos(angle)
+        y = ys[parent] + length * math.sin(angle)
+        dk = float(terrain(x, y))
+        # Sohlenkote: Mindestgefälle 0.5 % zum Unterlieger, maximal Schachttiefe gemäss "depth"
+        sk = min(dk - rng.uniform(*depth), max(sks[parent] + 0.005 * length, dk - depth[1]))
+        xs.append(x)
+        ys.append(y)
+        sks.append(sk)
+        children.append(0)
+        children[parent] += 1
+        links.append(["L" + str(ii), "N" + str(ii), "N" + str(parent), round(length, 2)])
+    if kind == "looped":
+        for jj in range(int(loop_fraction * n_nodes)):
+            a = rng.randint(1, n_nodes - 1)
+            b = rng.randint(max(0, a - 50), a - 1)
+            if a == b:
+                continue
+            upper, lower = (a, b) if sks[a] >= sks[b] else (b, a)
+            length = math.hypot(xs[a] - xs[b], ys[a] - ys[b]) or 1.0
+            links.append(["M" + str(jj), "N" + str(upper), "N" + str(lower), round(length, 2)])
+    index = {"N" + str(ii): ii for ii in range(n_nodes)}
+    for link in links:
+        a, b = index[link[1]], index[link[2]]
+        link.append(str([(round(xs[a], 2), round(ys[a], 2)), (round(xs[b], 2), round(ys[b], 2))]))
+    nodes = []
+    for ii in range(n_nodes):
+        dk = round(float(terrain(xs[ii], ys[ii])), 3)
+        sk = round(sks[ii], 3)
+        node_type = "OUTFALL" if ii == 0 else "JUNCTION"
+        if ii > 0 and children[ii] == 0 and rng.random() < inlet_fraction:
+            node_type = "INLET"
+        if ii > 0 and rng.random() < missing_fraction:
+            sk = None
+        nodes.append(["N" + str(ii), sk, dk, node_type, round(xs[ii], 2), round(ys[ii], 2)])
+    extent = (min(xs), min(ys), max(xs), max(ys))
+    return {"nodes": nodes, "links": [tuple(link) for link in links], "extent": extent}
+
+
+def node_rows(network):
+    """Zeilen der Knoten für gisswmm_upd.node_dict_from_rows (ID, Sohlenkote, Deckelkote, Schachttyp)"""
+    return [(node[0], node[1], node[2], node[3]) for node in network["nodes"]]
+
+
+def link_rows(network):
+    """Zeilen der Haltungen für gisswmm_upd.node_dict_from_rows (ID, Von-Schacht, Bis-Schacht, Länge)"""
+    return [link[:4] for link in network["links"]]
+
+
+def dem(extent, cell_size = 1.0, margin = 50.0):
+    """Höhenmodell passend zum Netz (gleiche Geländefunktion wie die Deckelkoten)
+
+    Required:
+        extent -- Ausdehnung (xmin, ymin, xmax, ymax), z. B. network["extent"]
+    Optional:
+        cell_size -- Zellengrösse
+        margin -- Rand um die Ausdehnung
+
+    Return:
+        grid -- numpy-Array (float32, erste Zeile = Norden)
+        transform -- Dictionary {"xllcorner", "yllcorner", "cellsize"}
+    """
+    xmin, ymin, xmax, ymax = extent
+    xmin, ymin = xmin - margin, ymin - margin
+    ncols = int(math.ceil((xmax + margin - xmin) / cell_size))
+    nrows = int(math.ceil((ymax + margin - ymin) / cell_size))
+    x = xmin + (np.arange(ncols) + 0.5) * cell_size
+    y = ymin + (np.arange(nrows)[::-1] + 0.5) * cell_size
+    grid = terrain(x[np.newaxis, :], y[:, np.newaxis]).astype(np.float32)
+    return grid, {"xllcorner": xmin, "yllcorner": ymin, "cellsize": cell_size}
+
+
+def write_ascii_grid(file, grid, transform, nodata = -9999):
+    """Höhenmodell als ESRI ASCII-Grid speichern (kann in ArcGIS mit "ASCII to Raster" importiert werden)"""
+    nrows, ncols = grid.shape
+    header = (f'ncols {ncols}\nnrows {nrows}\nxllcorner {transform["xllcorner"]}\nyllcorner {transform["yllcorner"]}\n'
+              f'cellsize {transform["cellsize"]}\nNODATA_value {nodata}\n')
+    with open(file, "w", encoding = "utf-8") as f:
+        f.write(header)
+        np.savetxt(f, grid, fmt = "%.3f")
+
+
+def land_cover(extent, n_polygons, seed = 0, classes = None):
+    """Polygone der Bodenbedeckung (Rechtecke auf einem Raster mit zufälliger Bodenbedeckungsart)
+
+    Required:
+        extent -- Ausdehnung (xmin, ymin, xmax, ymax)
+        n_polygons -- Ungefähre Anzahl Polygone
+    Optional:
+        seed -- Startwert des Zufallsgenerators
+        classes -- Liste mit den Bodenbedeckungsarten (Default: LAND_CLASSES)
+
+    Return:
+        polygons -- Liste mit Dictionaries {"ART": Art, "Shape_Area": Fläche, "coords": [(x, y), ...]}
+    """
+    rng = random.Random(seed)
+    classes = classes or LAND_CLASSES
+    xmin, ymin, xmax, ymax = extent
+    n_side = max(1, int(round(math.sqrt(n_polygons))))
+    dx = (xmax - xmin) / n_side or 1.0
+    dy = (ymax - ymin) / n_side or 1.0
+    polygons = []
+    for ii in range(n_side):
+        for jj in range(n_side):
+            x0, y0 = xmin + ii * dx, ymin + jj * dy
+            coords = [(x0, y0), (x0 + dx, y0), (x0 + dx, y0 + dy), (x0, y0 + dy), (x0, y0)]
+            polygons.append({"ART": rng.choice(classes), "Shape_Area": dx * dy, "coords": coords})
+    return polygons
+
+
+def write_geojson(file, polygons):
+    """Polygone der Bodenbedeckung als GeoJSON speichern"""
+    features = [{"type": "Feature", "properties": {"ART": polygon["ART"], "Shape_Area": polygon["Shape_Area"]},
+                 "geometry": {"type": "Polygon", "coordinates": [[list(point) for point in polygon["coords"]]]}}
+                for polygon in polygons]
+    with open(file, "w", encoding = "utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+def subcatchment_land_rows(n_rows, rows_per_subcatchment = 10, seed = 0, classes = None):
+    """Zeilen (Fläche, Bodenbedeckungsart) der Bodenbedeckung pro Teileinzugsgebiet, wie sie in
+    gisswmm_cre_subcatchments.land_parameters aggregiert werden
+
+    Return:
+        Liste mit einer Liste von Zeilen pro Teileinzugsgebiet (insgesamt n_rows Zeilen)
+    """
+    rng = random.Random(seed)
+    classes = classes or LAND_CLASSES
+    groups = []
+    for start in range(0, n_rows, rows_per_subcatchment):
+        size = min(rows_per_subcatchment, n_rows - start)
+        groups.append([(rng.uniform(1.0, 500.0), rng.choice(classes)) for _ in range(size)])
+    return groups
+
+
+def coordinate_strings(n_points, points_per_feature = 20, seed = 0):
+    """Koordinaten als Strings wie im Feld "coords" der GISSWMM Feature-Klassen ('[(x, y), (x, y), ...]')
+
+    Return:
+        Liste mit Strings (insgesamt n_points Koordinatenpaare)
+    """
+    rng = random.Random(seed)
+    strings = []
+    for start in range(0, n_points, points_per_feature):
+        size = min(points_per_feature, n_points - start)
+        x0, y0 = rng.uniform(2600000, 2700000), rng.uniform(1200000, 1300000)
+        strings.append(str([(round(x0 + ii * 1.3, 1), round(y0 + ii * 0.7, 1)) for ii in range(size)]))
+    return strings
+
+
+def swmm_rows(network):
+    """Zeilen der Knoten und Haltungen mit den Feldern der GISSWMM Feature-Klassen für gisswmm2swmm
+    (NODE_FIELDS_GIS bzw. LINK_FIELDS_GIS)"""
+    nodes = []
+    for node in network["nodes"]:
+        invert = node[1] if node[1] is not None else node[2] - 2.0
+        nodes.append((node[0], node[3], invert, 0.0, round(node[2] - invert, 3), 0.0, 0.0,
+                      "FREE" if node[3] == "OUTFALL" else None, str([(node[4], node[5])]), None))
+    links = []
+    for link in network["links"]:
+        links.append((link[0], "CONDUIT", link[1], link[2], link[3], 0.013, 0.0, 0.0, 0.0, 0.0, "CIRCULAR", 0.3, 0.0,
+                      0.0, 0.0, 1, link[4]))
+    return nodes, links
+
+
+if __name__ == "__main__":
+    import os, csv, argparse
+    parser = argparse.ArgumentParser(description = "Synthetische Testdaten (Kanalnetz, DHM, Bodenbedeckung) erstellen")
+    parser.add_argument("out_folder", help = "Ordner für die Dateien")
+    parser.add_argument("--nodes", type = int, default = 1000, help = "Anzahl Knoten")
+    parser.add_argument("--kind", default = "dendritic", choices = ["dendritic", "looped"], help = "Art des Netzes")
+    parser.add_argument("--missing", type = float, default = 0.3, help = "Anteil Knoten ohne Sohlenkote")
+    parser.add_argument("--cell-size", type = float, default = 1.0, help = "Zellengrösse des DHM")
+    parser.add_argument("--land-polygons", type = int, default = 1000, help = "Anzahl Polygone der Bodenbedeckung")
+    parser.add_argument("--seed", type = int, default = 0, help = "Startwert des Zufallsgenerators")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_folder, exist_ok = True)
+    network = sewer_network(args.nodes, args.kind, args.missing, seed = args.seed)
+    with open(os.path.join(args.out_folder, "nodes.csv"), "w", newline = "", encoding = "utf-8") as f:
+        writer = csv.writer(f, delimiter = ";")
+        writer.writerow(NODE_FIELDS)
+        writer.writerows(network["nodes"])
+    with open(os.path.join(args.out_folder, "links.csv"), "w", newline = "", encoding = "utf-8") as f:
+        writer = csv.writer(f, delimiter = ";")
+        writer.writerow(LINK_FIELDS)
+        writer.writerows(network["links"])
+    grid, transform = dem(network["extent"], args.cell_size)
+    write_ascii_grid(os.path.join(args.out_folder, "dem.asc"), grid, transform)
+    write_geojson(os.path.join(args.out_folder, "land_cover.geojson"),
+                  land_cover(network["extent"], args.land_polygons, args.seed))
+    print(f'{len(network["nodes"])} Knoten, {len(network["links"])} Haltungen, DHM {grid.shape[1]} x {grid.shape[0]} Zellen '
+          f'in "{args.out_folder}" gespeichert')
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Regressionstest der Ereignisse aus der .out-Datei (out_functions._block_events): Für zufällige Zeitreihen
+# werden die blockweise und vektorisiert bestimmten Ereignisse (Beginn, Ende, Anzahl Zeitschritte, Maximum
+# und Zeitpunkt vom Maximum) mit einer einfachen Schleife pro Objekt verglichen. Die Schwellenwerte sind wie beim
+# Einstau (Anteil der Schachttiefe) pro Objekt verschieden, alle Vergleiche werden geprüft. Zusätzlich wird die
+# Scheiteltiefe der Knoten für den Einstau (out_functions.crown_depths) geprüft.
+#
+# Aufruf:
+# > python benchmarks/test_out_events.py [--cases 300]
+# > python -m pytest benchmarks/test_out_events.py
+# -----------------------------------------------------------------------------
+"""test_out_events"""
+import os, sys, argparse, operator, tempfile
+import numpy as np
+BENCH_FOLDER = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(BENCH_FOLDER), "0_BasicFunctions"))
+import out_functions as of
+
+
+# Vergleiche (siehe out_functions._compare)
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+def reference_events(values, dates, compare_operator, thresholds):
+    """Ereignisse (Objekt, Beginn, Ende, Anzahl Zeitschritte, Maximum, Zeitpunkt Maximum) mit einer Schleife"""
+    events = []
+    for row in range(values.shape[1]):
+        event = None
+        for period, value in enumerate(values[:, row]):
+            if OPERATORS[compare_operator](value, thresholds[row]):
+                if event is None:
+                    event = [row, dates[period], dates[period], 0, value, dates[period]]
+                event[2] = dates[period]
+                event[3] += 1
+                if value > event[4]:
+                    event[4], event[5] = value, dates[period]
+            elif event is not None:
+                events.append(tuple(event))
+                event = None
+        if event is not None:
+            events.append(tuple(event))
+    return sorted((e[0], float(e[1]), float(e[2]), e[3], float(e[4]), float(e[5])) for e in events)
+
+
+def block_events(values, dates, compare_operator, thresholds, block_periods):
+    """Ereignisse blockweise mit out_functions._block_events (wie out_functions.out_events)"""
+    n_objects = values.shape[1]
+    carry = {"open": np.zeros(n_objects, dtype = bool), "start": np.zeros(n_objects),
+             "count": np.zeros(n_objects, dtype = np.int64), "peak": np.zeros(n_objects),
+             "tpeak": np.zeros(n_objects), "last": np.nan}
+    events = []
+    for first in range(0, len(dates), block_periods):
+        block = values[first:first + block_periods]
+        mask = of._compare(block, compare_operator, thresholds)
+        events += of._block_events(block, mask, dates[first:first + block_periods], carry)
+    for row in np.flatnonzero(carry["open"]):
+        events.append((row, carry["start"][row], dates[-1], carry["count"][row], carry["peak"][row], carry["tpeak"][row]))
+    return sorted((int(e[0]), float(e[1]), float(e[2]), int(e[3]), float(e[4]), float(e[5])) for e in events)
+
+
+def compare(cases = 300, seed = 0):
+    """Zufällige Fälle vergleichen
+
+    Return:
+        Liste mit den abweichenden Fällen (Nummer, Ereignisse der Schleife, Ereignisse blockweise)
+    """
+    rng = np.random.default_rng(seed)
+    failures = []
+    for case in range(cases):
+        n_periods = int(rng.integers(1, 40))
+        n_objects = int(rng.integers(1, 8))
+        values = np.round(rng.random((n_periods, n_objects)) * 5, 2)
+        dates = 40000 + np.arange(n_periods) / 288
+        compare_operator = list(OPERATORS)[case % len(OPERATORS)]
+        thresholds = np.round(rng.random(n_objects) * 5, 2)
+        expected = reference_events(values, dates, compare_operator, thresholds)
+        result = block_events(values, dates, compare_operator, thresholds, int(rng.integers(1, 12)))
+        if expected != result:
+            failures.append((case, expected, result))
+    return failures
+
+
+def test_block_events_matches_loop():
+    failures = compare()
+    assert not failures, f'{len(failures)} abweichende Fälle, z. B. {failures[0]}'
+
+
+def test_crown_depths():
+    # Höchster Scheitel (Offset + Geom1) der angeschlossenen Haltungen, Knoten ohne Haltung: kein Einstau
+    inp = ("[OPTIONS]\nLINK_OFFSETS DEPTH\n\n[CONDUITS]\n"
+           "C1 N1 N2 10 0.01 0.0 0.2 0 0\nC2 N2 N3 10 0.01 0.5 0.0 0 0\n\n"
+           "[XSECTIONS]\nC1 CIRCULAR 0.3 0 0 0 1\nC2 CIRCULAR 0.6 0 0 0 1\n")
+    with tempfile.TemporaryDirectory() as folder:
+        inp_file = os.path.join(folder, "test.inp")
+        with open(inp_file, "w") as f:
+            f.write(inp)
+        crowns = of.crown_depths(inp_file, ["N1", "N2", "N3", "N4"])
+    assert list(crowns) == [0.3, 1.1, 0.6, np.inf]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Ereignisse der .out-Datei mit einer einfachen Schleife vergleichen")
+    parser.add_argument("--cases", type = int, default = 300, help = "Anzahl zufälliger Fälle")
+    args = parser.parse_args()
+    failures = compare(args.cases)
+    print(f'{args.cases - len(failures)} von {args.cases} Fällen stimmen überein')
+    for case, expected, result in failures[:5]:
+        print(f'Fall {case}:\n  Schleife:   {expected}\n  blockweise: {result}')
+    sys.exit(1 if failures else 0)
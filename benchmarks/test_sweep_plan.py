@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Prüfung der geplanten Stufen einer Parameterstudie (sweep_functions.plan_stages) mit den Stufen von
+# run_pipeline.py: Werden Parameter von gisswmm_upd variiert (mean_slope, mean_depth, min_depth), müssen auch
+# die nachgelagerten Stufen (gisswmm_cre_subcatchments, gisswmm2swmm) pro Szenario ausgeführt werden. Zusätzlich
+# wird ein Probelauf (dry_run) von run_sweep in einem temporären Ordner ausgeführt.
+#
+# Aufruf:
+# > python benchmarks/test_sweep_plan.py
+# > python -m pytest benchmarks/test_sweep_plan.py
+# -----------------------------------------------------------------------------
+"""test_sweep_plan"""
+import os, sys, logging, tempfile
+BENCH_FOLDER = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_FOLDER)
+sys.path.append(os.path.join(ROOT, "0_BasicFunctions"))
+sys.path.append(ROOT)
+import sweep_functions as swf
+from run_pipeline import STAGES
+
+
+# Raster mit den Parametern der Sohlenkoten-Interpolation (gisswmm_upd)
+GRID = {"mean_slope": [0.01, 0.03], "mean_depth": [1.0, 1.5], "min_depth": [0.3]}
+
+
+def check_plan(grid = GRID):
+    """Geplante Stufen prüfen
+
+    Return:
+        Liste mit den Abweichungen (leer, falls die Planung stimmt)
+    """
+    shared, scenario_stages = swf.plan_stages(STAGES, grid)
+    errors = []
+    for name in ["gisswmm_upd", "gisswmm_cre_subcatchments", "gisswmm2swmm"]:
+        if name not in scenario_stages:
+            errors.append(f'Stufe "{name}" wird nicht pro Szenario ausgeführt (gemeinsam: {", ".join(shared)})')
+    if "sia2gisswmm" not in shared:
+        errors.append('Stufe "sia2gisswmm" wird nicht gemeinsam ausgeführt')
+    return errors
+
+
+def check_dry_run(grid = GRID):
+    """Probelauf von run_sweep mit settings_v1.json in einem temporären Ordner
+
+    Return:
+        Liste mit den Abweichungen (leer, falls der Probelauf stimmt)
+    """
+    logger = logging.getLogger("test_sweep_plan")
+    errors = []
+    with tempfile.TemporaryDirectory() as folder:
+        results, table = swf.run_sweep(STAGES, os.path.join(ROOT, "settings_v1.json"), grid, ROOT, folder = folder,
+                                       dry_run = True, logger = logger)
+        if results or table:
+            errors.append('Der Probelauf hat Szenarien ausgeführt')
+        scenarios = [name for name in os.listdir(folder) if name != "shared"]
+        if len(scenarios) != len(swf.expand_grid(grid)):
+            errors.append(f'{len(scenarios)} statt {len(swf.expand_grid(grid))} Szenarien erstellt')
+    return errors
+
+
+def test_grid_plans_subcatchments_per_scenario():
+    errors = check_plan()
+    assert not errors, errors[0]
+
+
+def test_dry_run_creates_scenarios():
+    errors = check_dry_run()
+    assert not errors, errors[0]
+
+
+if __name__ == "__main__":
+    errors = check_plan() + check_dry_run()
+    shared, scenario_stages = swf.plan_stages(STAGES, GRID)
+    print(f'Gemeinsame Stufen: {", ".join(shared)}, Stufen pro Szenario: {", ".join(scenario_stages)}')
+    for error in errors:
+        print(error)
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Vergleich der Topologie im Probelauf (gisswmm_upd.plan_topology mit Änderungssatz) mit dem Ergebnis von
+# gisswmm_upd.main_topology: Ein kleines synthetisches Netz wird als GeoPackage zweimal erstellt. In der ersten
+# Kopie wird main_topology ausgeführt, in der zweiten wird der Änderungssatz des Probelaufs angewendet. Die
+# Schächte und Haltungen (ID, Von- und Bis-Schacht, Länge, Geometrie, Schachttyp) müssen übereinstimmen.
+#
+# Aufruf:
+# > python benchmarks/test_topology_plan.py
+# > python -m pytest benchmarks/test_topology_plan.py
+# -----------------------------------------------------------------------------
+"""test_topology_plan"""
+import os, sys, logging, tempfile
+BENCH_FOLDER = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_FOLDER)
+sys.path.append(os.path.join(ROOT, "0_BasicFunctions"))
+sys.path.append(os.path.join(ROOT, "2_GISSWMM"))
+import storage_functions as sf
+import geometry_functions as gf
+import changeset_functions as cf
+import gisswmm_upd
+
+# Felder der Schächte und Haltungen
+NODE_FIELDS = [["Name", "TEXT", 50], ["to_link", "TEXT", 50], ["SWMM_TYPE", "TEXT", 20], ["TYP_AA", "LONG", None]]
+LINK_FIELDS = [["Name", "TEXT", 50], ["InletNode", "TEXT", 50], ["OutletNode", "TEXT", 50], ["Length", "DOUBLE", None],
+               ["TYP_AA", "LONG", None]]
+# Schächte (ID, Einlauf-Haltung, Typ, TYP_AA, x, y): Hauptleitung N2 -> N1 -> N0, zwei Einlaufschächte auf
+# derselben Haltung (I1, I2), einer am Anfang einer Haltung (I3), einer auf einer nicht vorhandenen Haltung (I4),
+# ein Einlaufschacht auf einer Haltung des FAA-Netzes (I5) und ein Schacht ohne Haltung (X1)
+NODES = [("N0", None, "JUNCTION", 1, 0.0, 0.0), ("N1", None, "JUNCTION", 1, 100.0, 0.0),
+         ("N2", None, "JUNCTION", 2, 200.0, 0.0), ("I1", "L1", "INLET", 1, 30.0, 0.0), ("I2", "L1", "INLET", 1, 70.0, 0.0),
+         ("I3", "L2", "INLET", 2, 199.95, 0.0), ("I4", "L9", "INLET", 2, 150.0, 5.0), ("I5", "L2", "INLET", 2, 140.0, 0.0),
+         ("S1", None, "JUNCTION", 1, 30.0, 20.0), ("S2", None, "JUNCTION", 1, 70.0, 20.0),
+         ("S3", None, "JUNCTION", 2, 199.95, 20.0), ("S4", None, "JUNCTION", 2, 150.0, 25.0),
+         ("S5", None, "JUNCTION", 2, 140.0, 20.0), ("X1", None, "JUNCTION", 2, 300.0, 300.0)]
+# Haltungen (ID, Von-Schacht, Bis-Schacht, TYP_AA, Koordinaten), "L8" hat einen nicht vorhandenen Von-Schacht
+LINKS = [("L1", "N1", "N0", 1, [(100.0, 0.0), (50.0, 0.0), (0.0, 0.0)]), ("L2", "N2", "N1", 2, [(200.0, 0.0), (100.0, 0.0)]),
+         ("H1", "S1", "I1", 1, [(30.0, 20.0), (30.0, 0.0)]), ("H2", "S2", "I2", 1, [(70.0, 20.0), (70.0, 0.0)]),
+         ("H3", "S3", "I3", 2, [(199.95, 20.0), (199.95, 0.0)]), ("H4", "S4", "I4", 2, [(150.0, 25.0), (150.0, 5.0)]),
+         ("H5", "S5", "I5", 2, [(140.0, 20.0), (140.0, 0.0)]), ("L8", "N9", "N2", 2, [(250.0, 0.0), (200.0, 0.0)])]
+ARGS = ["Name", "to_link", "SWMM_TYPE", "INLET"]
+LINK_ARGS = ["Name", "InletNode", "OutletNode", "Length"]
+
+
+def create_network(gpkg):
+    """Synthetisches Netz als GeoPackage mit den Feature-Klassen "node" und "link" erstellen"""
+    sf.create_workspace(gpkg)
+    node, link = os.path.join(gpkg, "node"), os.path.join(gpkg, "link")
+    sf.create_feature_class(node, "POINT", NODE_FIELDS)
+    sf.create_feature_class(link, "POLYLINE", LINK_FIELDS)
+    with sf.insert_cursor(node, [field[0] for field in NODE_FIELDS] + ["SHAPE@"]) as cursor:
+        for row in NODES:
+            cursor.insertRow(list(row[:4]) + [gf.Geometry("point", [[row[4:]]])])
+    with sf.insert_cursor(link, [field[0] for field in LINK_FIELDS] + ["SHAPE@"]) as cursor:
+        for row in LINKS:
+            line = gf.Geometry("polyline", [row[4]])
+            cursor.insertRow(list(row[:3]) + [line.length, row[3], line])
+    return node, link
+
+
+def read_result(node, link):
+    """Schächte {ID: (Typ, Auslauftyp)} und Haltungen {ID: (Von, Bis, Länge, Koordinaten)} lesen"""
+    nodes = {row[0]: (row[1], row[2]) for row in sf.search_cursor(node, ["Name", "SWMM_TYPE", "OutfallType"])}
+    links = {}
+    for row in sf.search_cursor(link, ["Name", "InletNode", "OutletNode", "Length", "SHAPE@"]):
+        coords = [tuple(round(value, 6) for value in point) for part in row[4].parts for point in part]
+        links[row[0]] = (row[1], row[2], round(row[3], 6), coords)
+    return nodes, links
+
+
+def run_topology(node, link):
+    """Topologie mit main_topology in der Feature-Klasse erstellen (erster Durchgang ohne Löschen und ohne
+    Auslaufschächte wie beim gestaffelten Durchgang, danach gesamtes Netz)"""
+    topology = gisswmm_upd.main_topology(node, *ARGS, link, *LINK_ARGS, delete = False, define_outfalls = False)
+    gisswmm_upd.main_topology(node, *ARGS, link, *LINK_ARGS, topology = topology)
+
+
+def run_plan(node, link, gpkg):
+    """Topologie im Speicher planen (plan_topology) und den Änderungssatz anwenden"""
+    network = gisswmm_upd.read_network(node, [field[0] for field in NODE_FIELDS] + ["tag"], link,
+                                       [field[0] for field in LINK_FIELDS])
+    network["new_fields"][node] = [field for field in gisswmm_upd.NODE_SCHEMA if field[0] not in network["fields"][node]]
+    topology = gisswmm_upd.plan_topology(network, *ARGS, *LINK_ARGS, delete = False, define_outfalls = False)
+    gisswmm_upd.plan_topology(network, *ARGS, *LINK_ARGS, topology = topology)
+    change_set = gisswmm_upd.network_change_set(network, node, "Name", link, "Name")
+    cf.apply_change_set(change_set, gpkg)
+
+
+def check_topology():
+    """Ergebnis von main_topology mit dem angewendeten Änderungssatz vergleichen
+
+    Return:
+        Liste mit den Abweichungen (leer, falls die Ergebnisse übereinstimmen)
+    """
+    gisswmm_upd.logger = logging.getLogger("test_topology_plan")
+    errors = []
+    with tempfile.TemporaryDirectory() as folder:
+        gpkg_a, gpkg_b = os.path.join(folder, "topology.gpkg"), os.path.join(folder, "plan.gpkg")
+        try:
+            run_topology(*create_network(gpkg_a))
+            run_plan(*create_network(gpkg_b), gpkg_b)
+            result_a = read_result(os.path.join(gpkg_a, "node"), os.path.join(gpkg_a, "link"))
+            result_b = read_result(os.path.join(gpkg_b, "node"), os.path.join(gpkg_b, "link"))
+        finally:
+            sf.close_workspace(gpkg_a)
+            sf.close_workspace(gpkg_b)
+    for name, rows_a, rows_b in zip(["Schächte", "Haltungen"], result_a, result_b):
+        for key in sorted(set(rows_a) | set(rows_b)):
+            if rows_a.get(key) != rows_b.get(key):
+                errors.append(f'{name} "{key}": main_topology {rows_a.get(key)} != Probelauf {rows_b.get(key)}')
+    # Erwartete Trennungen: I1 und I2 auf L1 (nacheinander), I5 auf L2, I3 am Anfang von L2 nicht getrennt
+    for key in ["L1_l", "L1_u_u", "L1_u_l", "L2_u", "L2_l"]:
+        if key not in result_a[1]:
+            errors.append(f'Haltung "{key}" wurde von main_topology nicht erstellt')
+    for key in ["I4", "X1"]:
+        if key in result_a[0]:
+            errors.append(f'Schacht "{key}" wurde von main_topology nicht gelöscht')
+    return errors
+
+
+def test_plan_matches_main_topology():
+    errors = check_topology()
+    assert not errors, errors[0]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level = logging.INFO)
+    errors = check_topology()
+    for error in errors:
+        print(error)
+    print(f'{len(errors)} Abweichungen zwischen main_topology und Probelauf')
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Pipeline: Die Skripte (Stufen) werden gemäss ihren Abhängigkeiten ausgeführt. Pro Stufe sind die
+# verwendeten Parameter der JSON-Datei, die externen Datensätze (Workspaces, Vorlagen) und die
+# vorgelagerten Stufen deklariert. Eine Stufe wird nur ausgeführt, falls sich ihre Eingaben oder eine
+# vorgelagerte Stufe seit der letzten erfolgreichen Ausführung geändert haben (Fingerabdruck). Stufen
+# ohne gegenseitige Abhängigkeit (z. B. Diagnose und Sohlenkoten interpolieren) werden parallel
+# ausgeführt. Der Zustand wird im Logfolder gespeichert ("pipeline_state_sim_nr.json").
+#
+# Aufruf:
+# > python run_pipeline.py settings_v1.json [--stages gisswmm_upd gisswmm2swmm] [--force] [--jobs 2] [--dry-run]
+#   [--worker localhost:6001] [--resume]
+# -----------------------------------------------------------------------------
+"""run_pipeline"""
+import os, sys, time, json, argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '0_BasicFunctions'))
+import logging_functions as lf
+import pipeline_functions as pf
+
+# Parameter, die von allen Stufen verwendet werden
+_common = ["sim_nr", "gisswmm_workspace", "overwrite"]
+
+
+def _result_files(settings):
+    """Ergebnisdateien der SWMM-Simulation (wird ausserhalb der Pipeline in SWMM gerechnet)"""
+    return [os.path.join(os.path.dirname(settings["template_swmm_file"]), sim,
+                         os.path.basename(settings["template_swmm_file"]).split(".inp")[0] + "_" + sim
+                         + "." + settings.get("result_source", "out"))
+            for sim in settings.get("result_simulations", [settings["sim_nr"]])]
+
+
+# Stufen der Pipeline:
+# - "script": Pfad zum Skript (relativ zum Ordner dieser Datei)
+# - "depends": vorgelagerte Stufen
+# - "settings": verwendete Parameter der JSON-Datei
+# - "paths": Parameter mit Pfaden zu externen Datensätzen (Fingerabdruck des Inhalts bzw. der Dateien)
+# - "files": Funktion, die weitere Eingabedateien zurückgibt (Funktion auf Modulebene, damit die Stufen an
+#   die Prozesse von run_sweep.py übergeben werden können)
+# - "outputs": erstellte bzw. veränderte Datensätze (nur zur Information)
+# - "optional": Stufe wird nur ausgeführt, falls sie mit --stages ausgewählt wird
+# - "dry_run": Parameter für einen Probelauf (Stufe schreibt nichts und wird nicht als erledigt gespeichert)
+STAGES = [
+    {"name": "sia2gisswmm", "script": "1_SIA2GISSWMM/sia2gisswmm.py", "depends": [],
+     "settings": _common + ["lk_workspace", "in_node", "in_link", "boundary_workspace", "in_boundary", "out_node", "out_link",
+                            "mapping_link", "mapping_node", "default_values_link", "default_values_node"],
+     "paths": ["lk_workspace", "boundary_workspace"],
+     "outputs": ["out_node", "out_link"]},
+    {"name": "gisswmm_diagnostics", "script": "2_GISSWMM/gisswmm_diagnostics.py", "depends": ["sia2gisswmm"],
+     "settings": _common + ["out_node", "node_id", "out_link", "link_id", "link_from", "link_to"],
+     "outputs": ["diagnostics_sim_nr"], "optional": True},
+    {"name": "gisswmm_upd", "script": "2_GISSWMM/gisswmm_upd.py", "depends": ["sia2gisswmm"],
+     "settings": _common + ["dhm_workspace", "in_dhm", "out_node", "out_link", "node_id", "node_dk", "node_sk", "tag_dk",
+                            "tag_sk", "node_to_link", "node_type", "type_inlet", "min_depth", "mean_depth", "link_id",
+                            "link_from", "link_to", "link_length", "link_link_ref", "mean_slope", "staged",
+                            "max_trace_depth", "max_trace_branches", "dry_run", "change_set", "apply_change_set"],
+     "paths": ["dhm_workspace"], "dry_run": "dry_run",
+     "outputs": ["out_node", "out_link"]},
+    # Die Teileinzugsgebiete verwenden die Schächte nach der Topologie von gisswmm_upd (gleiche File-Geodatabase,
+    # die Stufen dürfen nicht gleichzeitig laufen)
+    {"name": "gisswmm_cre_subcatchments", "script": "3_SUBCATCHMENT/gisswmm_cre_subcatchments.py", "depends": ["gisswmm_upd"],
+     "settings": _common + ["dhm_workspace", "in_dhm", "land_workspace", "in_land", "parcel_workspace", "in_parcel",
+                            "out_node", "node_id", "node_type", "type_inlet", "out_subcatchment", "subcatchment_method",
+                            "snap_distance", "min_area", "mapping_land_imperv", "mapping_land_roughness",
+                            "mapping_land_depression_storage", "infiltration", "max_slope", "out_raster_workspace",
+                            "out_raster_prefix"],
+     "paths": ["dhm_workspace", "land_workspace", "parcel_workspace"],
+     "outputs": ["out_subcatchment"]},
+    {"name": "gisswmm2swmm", "script": "4_GISSWMM2SWMM/gisswmm2swmm.py",
+     "depends": ["gisswmm_upd", "gisswmm_cre_subcatchments"],
+     "settings": _common + ["out_node", "out_link", "out_subcatchment", "template_swmm_file"],
+     "paths": ["template_swmm_file"],
+     "outputs": ["SWMM-Eingabedatei (.inp)"]},
+    {"name": "swmm_results2gisswmm", "script": "5_RESULT/swmm_results2gisswmm.py", "depends": ["gisswmm2swmm"],
+     "settings": _common + ["out_node", "out_link", "out_subcatchment", "node_id", "link_id", "template_swmm_file",
+                            "result_simulations", "result_source", "result_variables"],
+     "files": _result_files,
+     "outputs": ["out_node", "out_link", "out_subcatchment"], "optional": True},
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "pygisswmm Skripte als Pipeline ausführen")
+    parser.add_argument("settings", nargs = "?", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings_v1.json"),
+                        help = "JSON-Datei mit den Parametern")
+    parser.add_argument("--stages", nargs = "+", help = "Auszuführende Stufen (Default: alle nicht optionalen Stufen)")
+    parser.add_argument("--force", action = "store_true", help = "Stufen auch bei unveränderten Eingaben ausführen")
+    parser.add_argument("--jobs", type = int, default = 2, help = "Maximale Anzahl parallel ausgeführter Stufen")
+    parser.add_argument("--dry-run", action = "store_true", help = "Nur ausgeben, welche Stufen ausgeführt würden")
+    parser.add_argument("--worker", help = "Adresse eines laufenden Workers (host:port, siehe run_worker.py)")
+    parser.add_argument("--resume", action = "store_true",
+                        help = "Abgebrochene Stufen beim letzten Checkpoint fortsetzen (siehe checkpoint_functions.py)")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    settings_file = os.path.abspath(args.settings)
+    with open(settings_file, encoding = 'utf-8') as f:
+        data = json.load(f)
+    log_folder = data["log_folder"]
+    sim_nr = data["sim_nr"]
+
+    # Prüfen ob Logfolder existiert
+    if not os.path.isdir(log_folder):
+        try:
+            os.mkdir(log_folder)
+        except:
+            raise ValueError(f'Logfolder "{log_folder}" konnte nicht erstellt werden!')
+
+    # Logging initialisieren
+    log = os.path.join(log_folder, 'run_pipeline_' + sim_nr + '.log')
+    logger = lf.init_logging(log)
+    logger.info('****************************************************************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    state_file = os.path.join(log_folder, 'pipeline_state_' + sim_nr + '.json')
+    results = pf.run_pipeline(STAGES, settings_file, state_file, root, selected = args.stages, force = args.force,
+                              jobs = args.jobs, dry_run = args.dry_run, output_folder = log_folder, logger = logger,
+                              worker = args.worker, resume = args.resume)
+    logger.info('Ergebnis: ' + ", ".join(f'{name}: {status}' for name, status in results.items()))
+
+    # Logging abschliessen
+    end_time = time.time()
+    i = lf.error_count()
+    logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
+    logger.info(str(i) + " Fehler gefunden. Check Log.")
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    if any(status in ("failed", "blocked") for status in results.values()):
+        sys.exit(1)
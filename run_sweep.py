@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Parameterstudie: Aus einer JSON-Datei mit den Basis-Parametern und einem Raster von Parameterwerten werden
+# Szenarien ("<sim_nr>_s01", "<sim_nr>_s02", ...) erstellt und mit den Stufen der Pipeline (siehe
+# run_pipeline.py) parallel in einem Prozess-Pool berechnet. Jedes Szenario erhält einen eigenen Ordner mit
+# eigenen Workspaces. Stufen, die von keinem variierten Parameter abhängen, werden nur einmal ausgeführt.
+# Laufzeiten, Status und Ausgaben werden in der Ergebnistabelle "sweep_<sim_nr>.csv" (und .json) im Ordner
+# der Parameterstudie zusammengefasst (siehe sweep_functions.py).
+#
+# Aufruf:
+# > python run_sweep.py settings_v1.json --param mean_slope=0.03,0.05 --param subcatchment_method=3,4 [--grid grid.json]
+#   [--processes 2] [--stages gisswmm_upd gisswmm2swmm] [--folder C:/sweep] [--jobs 1] [--force] [--resume] [--dry-run]
+# -----------------------------------------------------------------------------
+"""run_sweep"""
+import os, sys, time, json, argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '0_BasicFunctions'))
+import logging_functions as lf
+import sweep_functions as swf
+from run_pipeline import STAGES
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Parameterstudie mit den pygisswmm Skripten ausführen")
+    parser.add_argument("settings", nargs = "?", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings_v1.json"),
+                        help = "JSON-Datei mit den Basis-Parametern")
+    parser.add_argument("--grid", help = "JSON-Datei mit den Parameterwerten ({Parameter: [Werte]})")
+    parser.add_argument("--param", action = "append", default = [],
+                        help = "Parameterwerte als Parameter=Wert1,Wert2 (mehrfach möglich)")
+    parser.add_argument("--processes", type = int, default = 2, help = "Anzahl parallel berechneter Szenarien")
+    parser.add_argument("--stages", nargs = "+", help = "Auszuführende Stufen (Default: alle nicht optionalen Stufen)")
+    parser.add_argument("--folder", help = "Ordner der Parameterstudie (Default: sweep_<sim_nr> im Logfolder)")
+    parser.add_argument("--jobs", type = int, default = 1, help = "Maximale Anzahl parallel ausgeführter Stufen pro Szenario")
+    parser.add_argument("--force", action = "store_true", help = "Stufen auch bei unveränderten Eingaben ausführen")
+    parser.add_argument("--resume", action = "store_true",
+                        help = "Abgebrochene Stufen beim letzten Checkpoint fortsetzen (siehe checkpoint_functions.py)")
+    parser.add_argument("--dry-run", action = "store_true", help = "Nur die Szenarien und Stufen ausgeben")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    settings_file = os.path.abspath(args.settings)
+    with open(settings_file, encoding = 'utf-8') as f:
+        data = json.load(f)
+    log_folder = data["log_folder"]
+    sim_nr = data["sim_nr"]
+    grid = swf.load_grid(args.grid, args.param)
+    if not grid:
+        raise ValueError('Keine Parameterwerte angegeben (--grid oder --param)')
+
+    # Prüfen ob Logfolder existiert
+    if not os.path.isdir(log_folder):
+        try:
+            os.mkdir(log_folder)
+        except:
+            raise ValueError(f'Logfolder "{log_folder}" konnte nicht erstellt werden!')
+
+    # Logging initialisieren
+    log = os.path.join(log_folder, 'run_sweep_' + sim_nr + '.log')
+    logger = lf.init_logging(log)
+    logger.info('****************************************************************')
+    logger.info(f'Start logging: {time.ctime()}')
+    start_time = time.time()
+
+    results, table = swf.run_sweep(STAGES, settings_file, grid, root, folder = args.folder, processes = args.processes,
+                                   selected = args.stages, jobs = args.jobs, force = args.force, resume = args.resume,
+                                   dry_run = args.dry_run, logger = logger)
+
+    # Logging abschliessen
+    end_time = time.time()
+    i = lf.error_count()
+    logger.info("Skript Laufzeit: " + str(round(end_time - start_time)) + " sec.")
+    logger.info(str(i) + " Fehler gefunden. Check Log.")
+    logger.info(f'End time: {time.ctime()}')
+    logger.info('****************************************************************\n')
+    if any(result["status"] != "ok" for result in results):
+        sys.exit(1)
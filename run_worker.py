@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# author: Timo Wicki
+# date: 19.10.2026
+#
+# Worker: Ein langlebiger Prozess lädt arcpy, pandas, swmmio und swmm_api einmal und führt danach die
+# Stufen der Pipeline (siehe run_pipeline.STAGES) auf Anfrage aus, ohne dass pro Skript ein neuer Python-
+# Prozess gestartet und die Lizenz von arcpy erneut geprüft wird. Die Ausgabe der Skripte wird an den
+# Aufrufer zurückgeschickt.
+#
+# Aufruf:
+# > python run_worker.py serve [--address localhost:6001]
+# > python run_worker.py run gisswmm2swmm settings_v1.json [--sim-nr v2] [--address localhost:6001]
+# > python run_worker.py ping | stop
+# -----------------------------------------------------------------------------
+"""run_worker"""
+import os, sys, time, argparse
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '0_BasicFunctions'))
+import worker_functions as wf
+from run_pipeline import STAGES
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "pygisswmm Worker-Prozess")
+    parser.add_argument("command", choices = ["serve", "run", "ping", "stop"], help = "Worker starten, Stufe ausführen, "
+                        "Worker prüfen oder beenden")
+    parser.add_argument("stage", nargs = "?", help = "Name der Stufe (nur bei run)")
+    parser.add_argument("settings", nargs = "?", default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings_v1.json"),
+                        help = "JSON-Datei mit den Parametern (nur bei run)")
+    parser.add_argument("--sim-nr", help = "Szenario, das die sim_nr der JSON-Datei ersetzt (nur bei run)")
+    parser.add_argument("--address", default = f'{wf.DEFAULT_ADDRESS[0]}:{wf.DEFAULT_ADDRESS[1]}', help = "Adresse des Workers (host:port)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        root = os.path.dirname(os.path.abspath(__file__))
+        wf.serve(STAGES, root, address = args.address)
+    elif args.command == "run":
+        if not args.stage:
+            parser.error("Die Stufe muss angegeben werden")
+        start_time = time.time()
+        try:
+            returncode = wf.submit_job(args.stage, args.settings, sim_nr = args.sim_nr, address = args.address)
+        except ConnectionRefusedError:
+            print(f'Worker "{args.address}" ist nicht erreichbar (python run_worker.py serve)')
+            sys.exit(2)
+        print(f'Stufe "{args.stage}" in {round(time.time() - start_time, 1)} sec. beendet (Rückgabewert {returncode})')
+        sys.exit(returncode)
+    else:
+        answer = wf.send_command(args.command, address = args.address)
+        if answer is None:
+            print(f'Worker "{args.address}" ist nicht erreichbar')
+            sys.exit(2)
+        if args.command == "ping":
+            print(f'Worker "{args.address}" läuft seit {answer["duration"]} sec.')
+        else:
+            print(f'Worker "{args.address}" beendet')